@@ -1,18 +1,40 @@
+import base64
+import binascii
 import os
 import logging
 import json
+import math
+from functools import lru_cache
 from urllib.parse import urlparse
 import azure.functions as func
 
-from utilities.helpers.azure_blob_storage_client import AzureBlobStorageClient
+from utilities.helpers.azure_blob_storage_client import (
+    AzureBlobStorageClient,
+    create_queue_client,
+)
 from utilities.helpers.env_helper import EnvHelper
 from utilities.helpers.embedders.embedder_factory import EmbedderFactory
+from utilities.helpers.document_processing_guard import (
+    DocumentLease,
+    DocumentProcessingGuard,
+    ProcessingDeferred,
+)
+from utilities.helpers.batch_fan_out import (
+    BATCH_START_PROCESSING_EVENT_TYPE,
+    BatchFanOut,
+)
 from utilities.search.search import Search
 
 bp_batch_push_results = func.Blueprint()
 logger = logging.getLogger(__name__)
 logger.setLevel(level=os.environ.get("LOGLEVEL", "INFO").upper())
 
+# Drained messages stay hidden for as long as an invocation can run, the 10 minute maximum
+# function timeout, so that no other invocation processes them while their batch is embedded
+DRAINED_MESSAGES_VISIBILITY_TIMEOUT_SECONDS = 600
+# The most messages the queue service returns per request
+MAX_MESSAGES_PER_PAGE = 32
+
 
 def _get_file_name_from_message(message_body) -> str:
     return message_body.get(
@@ -23,6 +45,28 @@ def _get_file_name_from_message(message_body) -> str:
     )
 
 
+@lru_cache(maxsize=1)
+def _get_embedder(env_helper: EnvHelper):
+    # Reused by every invocation handled by this worker process, until the settings are reloaded
+    return EmbedderFactory.create(env_helper)
+
+
+def _is_document_created_event(message_body) -> bool:
+    return message_body.get("eventType", "") in ("", "Microsoft.Storage.BlobCreated")
+
+
+def _get_file_names_from_message(message_body) -> list[str]:
+    # BatchStartProcessing can pack several files in one message
+    return message_body.get("filenames") or [_get_file_name_from_message(message_body)]
+
+
+def _decode_message_content(content: str) -> dict:
+    try:
+        return json.loads(content)
+    except json.JSONDecodeError:
+        return json.loads(base64.b64decode(content, validate=True).decode("utf-8"))
+
+
 @bp_batch_push_results.queue_trigger(
     arg_name="msg", queue_name="doc-processing", connection="AzureWebJobsStorage"
 )
@@ -30,6 +74,16 @@ def batch_push_results(msg: func.QueueMessage) -> None:
     message_body = json.loads(msg.get_body().decode("utf-8"))
     logger.debug("Process Document Event queue function triggered: %s", message_body)
 
+    if _is_document_created_event(message_body):
+        batch_size = EnvHelper().DOCUMENT_PROCESSING_BATCH_SIZE
+        if batch_size > 1:
+            _process_document_created_events(message_body, batch_size)
+            return
+
+    _process_message(message_body)
+
+
+def _process_message(message_body) -> None:
     event_type = message_body.get("eventType", "")
     # We handle "" in this scenario for backwards compatibility
     # This function is primarily triggered by an Event Grid queue message from the blob storage
@@ -40,19 +94,126 @@ def batch_push_results(msg: func.QueueMessage) -> None:
     elif event_type == "Microsoft.Storage.BlobDeleted":
         _process_document_deleted_event(message_body)
 
+    elif event_type == BATCH_START_PROCESSING_EVENT_TYPE:
+        BatchFanOut().run(message_body["job_id"])
+
     else:
         raise NotImplementedError(f"Unknown event type received: {event_type}")
 
 
 def _process_document_created_event(message_body) -> None:
-    env_helper: EnvHelper = EnvHelper()
-
-    blob_client = AzureBlobStorageClient()
-    file_name = _get_file_name_from_message(message_body)
-    file_sas = blob_client.get_blob_sas(file_name)
+    _embed_documents([message_body])
+
+
+def _embed_documents(message_bodies: list) -> None:
+    file_names = [
+        file_name
+        for message_body in message_bodies
+        for file_name in _get_file_names_from_message(message_body)
+    ]
+
+    leases = []
+    if EnvHelper().DOCUMENT_PROCESSING_DEDUPLICATION:
+        file_names, leases = _acquire_leases(file_names)
+        if not file_names:
+            return
+
+    try:
+        blob_client = AzureBlobStorageClient()
+        _get_embedder(EnvHelper()).embed_files(
+            [
+                (blob_client.get_blob_sas(file_name), file_name)
+                for file_name in file_names
+            ]
+        )
+    except Exception:
+        for lease in leases:
+            lease.release()
+        raise
+
+    for lease in leases:
+        lease.complete()
+
+
+def _acquire_leases(file_names: list[str]) -> tuple[list[str], list[DocumentLease]]:
+    """Returns the files to process now and their leases, and queues the deferred files again."""
+    guard = DocumentProcessingGuard()
+    leases = []
+    try:
+        for file_name in file_names:
+            try:
+                lease = guard.acquire(file_name)
+            except ProcessingDeferred as e:
+                create_queue_client().send_message(
+                    json.dumps({"filename": file_name}).encode("utf-8"),
+                    visibility_timeout=math.ceil(e.delay_seconds),
+                )
+                continue
+            if lease is not None:
+                leases.append(lease)
+    except Exception:
+        for lease in leases:
+            lease.release()
+        raise
+
+    return [lease.file_name for lease in leases], leases
+
+
+def _process_document_created_events(message_body, batch_size: int) -> None:
+    """
+    Drains up to batch_size - 1 more messages from the queue and embeds the documents of all the
+    document created events together. Drained messages are deleted once processed, and are left
+    on the queue to be retried if they fail. If the batch fails as a whole, its messages are
+    processed one by one so that a single bad document does not fail the others.
+    """
+    queue_client = create_queue_client()
+    created_events = []
+    for message in queue_client.receive_messages(
+        max_messages=batch_size - 1,
+        messages_per_page=min(MAX_MESSAGES_PER_PAGE, batch_size - 1),
+        visibility_timeout=DRAINED_MESSAGES_VISIBILITY_TIMEOUT_SECONDS,
+    ):
+        try:
+            body = _decode_message_content(message.content)
+        except (ValueError, binascii.Error):
+            logger.warning("Could not decode drained queue message %s", message.id)
+            continue
+
+        if _is_document_created_event(body):
+            created_events.append((message, body))
+            continue
+
+        try:
+            _process_message(body)
+            queue_client.delete_message(message)
+        except Exception:
+            logger.exception("Failed to process drained queue message %s", message.id)
+
+    try:
+        _embed_documents([message_body] + [body for _, body in created_events])
+    except Exception:
+        logger.warning(
+            "Failed to embed documents in batch, processing them one by one",
+            exc_info=True,
+        )
+        for message, body in created_events:
+            try:
+                _process_document_created_event(body)
+                queue_client.delete_message(message)
+            except Exception:
+                logger.exception(
+                    "Failed to process drained queue message %s", message.id
+                )
+        # Raises for the host to retry the triggering message
+        _process_document_created_event(message_body)
+        return
 
-    embedder = EmbedderFactory.create(env_helper)
-    embedder.embed_file(file_sas, file_name)
+    for message, _ in created_events:
+        queue_client.delete_message(message)
+    logger.info(
+        "Processed document created events in batch",
+        extra={"messages": len(created_events) + 1},
+    )
 
 
 def _process_document_deleted_event(message_body) -> None:
@@ -6,10 +6,7 @@ from utilities.helpers.embedders.integrated_vectorization_embedder import (
     IntegratedVectorizationEmbedder,
 )
 from utilities.helpers.env_helper import EnvHelper
-from utilities.helpers.azure_blob_storage_client import (
-    AzureBlobStorageClient,
-    create_queue_client,
-)
+from utilities.helpers.batch_fan_out import BatchFanOut
 
 bp_batch_start_processing = func.Blueprint()
 logger = logging.getLogger(__name__)
@@ -20,24 +17,31 @@ logger.setLevel(level=os.environ.get("LOGLEVEL", "INFO").upper())
 def batch_start_processing(req: func.HttpRequest) -> func.HttpResponse:
     logger.info("Requested to start processing all documents received")
     env_helper: EnvHelper = EnvHelper()
-    # Set up Blob Storage Client
-    azure_blob_storage_client = AzureBlobStorageClient()
-    # Get all files from Blob Storage
-    files_data = azure_blob_storage_client.get_all_files()
-
-    files_data = list(map(lambda x: {"filename": x["filename"]}, files_data))
 
     if env_helper.AZURE_SEARCH_USE_INTEGRATED_VECTORIZATION:
         reprocess_integrated_vectorization(env_helper)
-    else:
-        # Send a message to the queue for each file
-        queue_client = create_queue_client()
-        for fd in files_data:
-            queue_client.send_message(json.dumps(fd).encode("utf-8"))
+        return func.HttpResponse(
+            "Reprocessing started successfully for all documents.",
+            status_code=200,
+        )
+
+    # Queue the documents in the background, see BatchFanOut
+    job_id = BatchFanOut().start()
+    return func.HttpResponse(
+        json.dumps({"job_id": job_id}),
+        mimetype="application/json",
+        status_code=202,
+    )
+
+
+@bp_batch_start_processing.route(route="BatchStartProcessing/{job_id}", methods=["GET"])
+def batch_start_processing_status(req: func.HttpRequest) -> func.HttpResponse:
+    job = BatchFanOut().get_status(req.route_params.get("job_id", ""))
+    if job is None:
+        return func.HttpResponse("Job not found", status_code=404)
 
     return func.HttpResponse(
-        f"Conversion started successfully for {len(files_data)} documents.",
-        status_code=200,
+        json.dumps(job), mimetype="application/json", status_code=200
     )
 
 
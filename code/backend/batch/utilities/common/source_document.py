@@ -6,6 +6,22 @@ from ..helpers.azure_blob_storage_client import AzureBlobStorageClient
 
 
 class SourceDocument:
+    # A SourceDocument is created for every search hit, so avoid a per-instance __dict__
+    __slots__ = (
+        "id",
+        "content",
+        "_source",
+        "title",
+        "chunk",
+        "offset",
+        "page_number",
+        "chunk_id",
+        "token_count",
+        "_filename",
+        "_filepath",
+        "_quoted_url",
+    )
+
     def __init__(
         self,
         content: str,
@@ -16,6 +32,7 @@ class SourceDocument:
         offset: Optional[int] = None,
         page_number: Optional[int] = None,
         chunk_id: Optional[str] = None,
+        token_count: Optional[int] = None,
     ):
         self.id = id
         self.content = content
@@ -25,6 +42,19 @@ class SourceDocument:
         self.offset = offset
         self.page_number = page_number
         self.chunk_id = chunk_id
+        self.token_count = token_count
+
+    @property
+    def source(self) -> str:
+        return self._source
+
+    @source.setter
+    def source(self, value: str):
+        self._source = value
+        # Derived from the source, and computed on first use
+        self._filename = None
+        self._filepath = None
+        self._quoted_url = None
 
     def __str__(self):
         return f"SourceDocument(id={self.id}, title={self.title}, source={self.source}, chunk={self.chunk}, offset={self.offset}, page_number={self.page_number}, chunk_id={self.chunk_id})"
@@ -61,6 +91,7 @@ class SourceDocument:
             dict_obj["offset"],
             dict_obj["page_number"],
             dict_obj["chunk_id"],
+            dict_obj.get("token_count"),
         )
 
     @classmethod
@@ -94,17 +125,19 @@ class SourceDocument:
         )
 
     def get_filename(self, include_path=False):
-        filename = self.source.replace("_SAS_TOKEN_PLACEHOLDER_", "").replace(
-            "http://", ""
-        )
-        if include_path:
-            filename = filename.split("/")[-1]
-        else:
-            filename = filename.split("/")[-1].split(".")[0]
-        return filename
+        if self._filepath is None:
+            self._filepath = (
+                self.source.replace("_SAS_TOKEN_PLACEHOLDER_", "")
+                .replace("http://", "")
+                .split("/")[-1]
+            )
+            self._filename = self._filepath.split(".")[0]
+        return self._filepath if include_path else self._filename
 
     def get_markdown_url(self):
-        url = quote(self.source, safe=":/")
+        if self._quoted_url is None:
+            self._quoted_url = quote(self.source, safe=":/")
+        url = self._quoted_url
         if "_SAS_TOKEN_PLACEHOLDER_" in url:
             blob_client = AzureBlobStorageClient()
             container_sas = blob_client.get_container_sas()
@@ -124,6 +157,7 @@ class SourceDocumentEncoder(json.JSONEncoder):
                 "offset": obj.offset,
                 "page_number": obj.page_number,
                 "chunk_id": obj.chunk_id,
+                "token_count": obj.token_count,
             }
         return super().default(obj)
 
@@ -140,4 +174,6 @@ class SourceDocumentDecoder(json.JSONDecoder):
             offset=obj["offset"],
             page_number=obj["page_number"],
             chunk_id=obj["chunk_id"],
+            # Absent from documents serialized before it was added
+            token_count=obj.get("token_count"),
         )
@@ -1,18 +1,31 @@
+import asyncio
+import logging
 import mimetypes
-from typing import Optional
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Iterable, Iterator, Optional
 from datetime import datetime, timedelta
 from azure.storage.blob import (
+    BlobClient,
     BlobServiceClient,
     generate_blob_sas,
     generate_container_sas,
     ContentSettings,
     UserDelegationKey,
 )
+from azure.core import MatchConditions
 from azure.core.credentials import AzureNamedKeyCredential
+from azure.core.exceptions import ResourceNotFoundError, ResourceNotModifiedError
+from azure.storage.blob.aio import BlobServiceClient as AsyncBlobServiceClient
 from azure.storage.queue import QueueClient, BinaryBase64EncodePolicy
 import chardet
 from .env_helper import EnvHelper
 from azure.identity import DefaultAzureCredential
+from azure.identity.aio import DefaultAzureCredential as AsyncDefaultAzureCredential
+
+logger = logging.getLogger(__name__)
 
 
 def connection_string(account_name: str, account_key: str):
@@ -40,6 +53,20 @@ def create_queue_client():
 
 
 class AzureBlobStorageClient:
+    # User delegation keys and container SAS tokens are shared by every client in the process,
+    # and renewed shortly before they expire, so producing a SAS rarely needs a network call.
+    _USER_DELEGATION_KEY_LIFETIME = timedelta(days=1)
+    _USER_DELEGATION_KEY_REFRESH_AHEAD = timedelta(hours=1)
+    _CONTAINER_SAS_LIFETIME = timedelta(hours=1)
+    _CONTAINER_SAS_REFRESH_AHEAD = timedelta(minutes=15)
+    _user_delegation_keys: dict[str, tuple[UserDelegationKey, datetime]] = {}
+    _container_sas_tokens: dict[tuple, tuple[str, datetime]] = {}
+    _sas_lock = threading.Lock()
+    _sas_counters: Counter = Counter()
+    # The Blob batch API accepts up to 256 sub-requests per batch
+    _DELETE_BATCH_SIZE = 256
+    _DELETE_CONCURRENCY = 4
+
     def __init__(
         self,
         account_name: Optional[str] = None,
@@ -58,9 +85,6 @@ class AzureBlobStorageClient:
             self.blob_service_client = BlobServiceClient(
                 account_url=self.endpoint, credential=DefaultAzureCredential()
             )
-            self.user_delegation_key = self.request_user_delegation_key(
-                blob_service_client=self.blob_service_client
-            )
         else:
             self.account_key = account_key or env_helper.AZURE_BLOB_ACCOUNT_KEY
             self.blob_service_client = BlobServiceClient(
@@ -69,14 +93,51 @@ class AzureBlobStorageClient:
                     name=self.account_name, key=self.account_key
                 ),
             )
-            self.user_delegation_key = None
+
+    @property
+    def user_delegation_key(self) -> Optional[UserDelegationKey]:
+        return self.get_user_delegation_key() if self.auth_type == "rbac" else None
+
+    @classmethod
+    def get_sas_counters(cls) -> dict[str, int]:
+        """Returns how many user delegation keys and container SAS tokens were requested and reused."""
+        with cls._sas_lock:
+            return dict(cls._sas_counters)
+
+    @classmethod
+    def clear_sas_cache(cls):
+        with cls._sas_lock:
+            cls._user_delegation_keys.clear()
+            cls._container_sas_tokens.clear()
+            cls._sas_counters.clear()
+
+    def get_user_delegation_key(self) -> UserDelegationKey:
+        now = datetime.utcnow()
+        with AzureBlobStorageClient._sas_lock:
+            cached = AzureBlobStorageClient._user_delegation_keys.get(self.endpoint)
+            if cached and cached[1] - now > self._USER_DELEGATION_KEY_REFRESH_AHEAD:
+                AzureBlobStorageClient._sas_counters["user_delegation_key_hits"] += 1
+                return cached[0]
+
+        user_delegation_key = self.request_user_delegation_key(
+            blob_service_client=self.blob_service_client
+        )
+        with AzureBlobStorageClient._sas_lock:
+            AzureBlobStorageClient._sas_counters["user_delegation_key_requests"] += 1
+            AzureBlobStorageClient._user_delegation_keys[self.endpoint] = (
+                user_delegation_key,
+                now + self._USER_DELEGATION_KEY_LIFETIME,
+            )
+        return user_delegation_key
 
     def request_user_delegation_key(
         self, blob_service_client: BlobServiceClient
     ) -> UserDelegationKey:
         # Get a user delegation key that's valid for 1 day
         delegation_key_start_time = datetime.utcnow()
-        delegation_key_expiry_time = delegation_key_start_time + timedelta(days=1)
+        delegation_key_expiry_time = (
+            delegation_key_start_time + self._USER_DELEGATION_KEY_LIFETIME
+        )
 
         user_delegation_key = blob_service_client.get_user_delegation_key(
             key_start_time=delegation_key_start_time,
@@ -84,6 +145,11 @@ class AzureBlobStorageClient:
         )
         return user_delegation_key
 
+    def get_blob_client(self, file_name) -> BlobClient:
+        return self.blob_service_client.get_blob_client(
+            container=self.container_name, blob=file_name
+        )
+
     def file_exists(self, file_name):
         blob_client = self.blob_service_client.get_blob_client(
             container=self.container_name, blob=file_name
@@ -143,6 +209,38 @@ class AzureBlobStorageClient:
         )
         return blob_client.download_blob().readall()
 
+    def download_file_if_modified(
+        self, file_name, etag: Optional[str] = None
+    ) -> tuple[Optional[bytes], Optional[str]]:
+        """
+        Downloads a file only if it has changed since the given ETag (If-None-Match).
+
+        Args:
+            file_name (str): The name of the file to download.
+            etag (Optional[str]): The ETag of the copy already held by the caller.
+
+        Returns:
+            tuple[Optional[bytes], Optional[str]]: The file content and its ETag. The content
+            is None when the file has not been modified.
+
+        Raises:
+            ResourceNotFoundError: If the file does not exist.
+        """
+        blob_client = self.blob_service_client.get_blob_client(
+            container=self.container_name, blob=file_name
+        )
+        try:
+            if etag:
+                downloader = blob_client.download_blob(
+                    etag=etag, match_condition=MatchConditions.IfModified
+                )
+            else:
+                downloader = blob_client.download_blob()
+        except ResourceNotModifiedError:
+            return None, etag
+
+        return downloader.readall(), downloader.properties.etag
+
     def delete_file(self, file_name):
         """
         Deletes a file from the Azure Blob Storage container.
@@ -156,77 +254,248 @@ class AzureBlobStorageClient:
         blob_client = self.blob_service_client.get_blob_client(
             container=self.container_name, blob=file_name
         )
-        if blob_client.exists():
+        try:
             blob_client.delete_blob()
+        except ResourceNotFoundError:
+            pass
 
-    def delete_files(self, files, integrated_vectorization: bool):
+    def delete_files(self, files, integrated_vectorization: bool) -> list[str]:
         """
-        Deletes files from the Azure Blob Storage container.
+        Deletes files from the Azure Blob Storage container, in concurrent batches of up to 256 files.
 
         Args:
-            files (list[str]): The names of the files to delete.
+            files (dict[str, list]): The files to delete, keyed by their source URL or name.
+            integrated_vectorization (bool): Whether the keys are blob names rather than source URLs.
 
         Returns:
-            None
+            list[str]: The names of the files that could not be deleted. Missing files count as deleted.
+        """
+        batches = self._get_delete_batches(files, integrated_vectorization)
+        if not batches:
+            return []
+
+        container_client = self.blob_service_client.get_container_client(
+            self.container_name
+        )
+
+        def delete_batch(batch: list[str]) -> list[str]:
+            try:
+                responses = container_client.delete_blobs(
+                    *batch, raise_on_any_failure=False
+                )
+                return self._get_failed_deletions(
+                    batch, [r.status_code for r in responses]
+                )
+            except Exception:
+                # e.g. the account does not support batch requests
+                logger.warning(
+                    "Batch delete failed, deleting files one by one", exc_info=True
+                )
+                failed = []
+                for file_name in batch:
+                    try:
+                        self.delete_file(file_name)
+                    except Exception:
+                        failed.append(file_name)
+                return failed
+
+        with ThreadPoolExecutor(
+            max_workers=min(self._DELETE_CONCURRENCY, len(batches))
+        ) as executor:
+            failed = [
+                name for names in executor.map(delete_batch, batches) for name in names
+            ]
+
+        self._log_deletions(batches, failed)
+        return failed
+
+    async def delete_files_async(
+        self, files, integrated_vectorization: bool
+    ) -> list[str]:
+        """
+        Deletes files from the Azure Blob Storage container, in concurrent batches of up to 256 files,
+        without blocking the event loop. See `delete_files`.
         """
-        for filename, ids in files.items():
-            if not integrated_vectorization:
-                filename = filename.split("/")[-1]
-            self.delete_file(filename)
+        batches = self._get_delete_batches(files, integrated_vectorization)
+        if not batches:
+            return []
+
+        if self.auth_type == "rbac":
+            credential = AsyncDefaultAzureCredential()
+        else:
+            credential = AzureNamedKeyCredential(
+                name=self.account_name, key=self.account_key
+            )
+
+        semaphore = asyncio.Semaphore(self._DELETE_CONCURRENCY)
+        try:
+            async with AsyncBlobServiceClient(
+                self.endpoint, credential=credential
+            ) as blob_service_client:
+                container_client = blob_service_client.get_container_client(
+                    self.container_name
+                )
+
+                async def delete_batch(batch: list[str]) -> list[str]:
+                    async with semaphore:
+                        responses = await container_client.delete_blobs(
+                            *batch, raise_on_any_failure=False
+                        )
+                        return self._get_failed_deletions(
+                            batch, [r.status_code async for r in responses]
+                        )
+
+                results = await asyncio.gather(
+                    *(delete_batch(batch) for batch in batches)
+                )
+        finally:
+            if self.auth_type == "rbac":
+                await credential.close()
+
+        failed = [name for names in results for name in names]
+        self._log_deletions(batches, failed)
+        return failed
+
+    def _get_delete_batches(
+        self, files: Iterable[str], integrated_vectorization: bool
+    ) -> list[list[str]]:
+        file_names = list(
+            dict.fromkeys(
+                filename if integrated_vectorization else filename.split("/")[-1]
+                for filename in files
+            )
+        )
+        remaining = iter(file_names)
+        batches = []
+        while batch := list(islice(remaining, self._DELETE_BATCH_SIZE)):
+            batches.append(batch)
+        return batches
+
+    @staticmethod
+    def _get_failed_deletions(batch: list[str], status_codes: list[int]) -> list[str]:
+        # 404 means the file is already gone, which is what the caller wants
+        return [
+            file_name
+            for file_name, status_code in zip(batch, status_codes)
+            if status_code not in (200, 202, 404)
+        ]
+
+    @staticmethod
+    def _log_deletions(batches: list[list[str]], failed: list[str]):
+        logger.info(
+            "Deleted files",
+            extra={
+                "files_deleted": sum(len(batch) for batch in batches) - len(failed),
+                "files_failed": len(failed),
+                "delete_batches": len(batches),
+            },
+        )
 
     def get_all_files(self):
         # Get all files in the container from Azure Blob Storage
+        return list(self.iter_files())
+
+    def iter_files(
+        self,
+        prefix: Optional[str] = None,
+        metadata_filter: Optional[dict[str, str]] = None,
+        names_only: bool = False,
+    ) -> Iterator[dict]:
+        """
+        Lists the files in the container page by page, without holding the whole listing in memory.
+        See `iter_file_pages`.
+        """
+        for files, _ in self.iter_file_pages(
+            prefix=prefix, metadata_filter=metadata_filter, names_only=names_only
+        ):
+            yield from files
+
+    def iter_file_pages(
+        self,
+        prefix: Optional[str] = None,
+        metadata_filter: Optional[dict[str, str]] = None,
+        names_only: bool = False,
+        results_per_page: Optional[int] = None,
+        continuation_token: Optional[str] = None,
+    ) -> Iterator[tuple[list[dict], Optional[str]]]:
+        """
+        Lists the files in the container, skipping the converted/ copies, one page at a time.
+
+        Args:
+            prefix (Optional[str]): Only list the files whose name starts with this prefix.
+            metadata_filter (Optional[dict[str, str]]): Only list the files with these metadata values.
+            names_only (bool): Only return the filenames, which does not fetch metadata or create a SAS.
+            results_per_page (Optional[int]): The maximum number of blobs listed per page.
+            continuation_token (Optional[str]): The token of the page to resume listing from.
+
+        Yields:
+            tuple[list[dict], Optional[str]]: The files of a page, and the token of the next page,
+            which is None after the last page.
+        """
         container_client = self.blob_service_client.get_container_client(
             self.container_name
         )
-        blob_list = container_client.list_blobs(include="metadata")
-        # sas = generate_blob_sas(account_name, container_name, blob.name,account_key=account_key,  permission="r", expiry=datetime.utcnow() + timedelta(hours=3))
-        sas = generate_container_sas(
-            self.account_name,
-            self.container_name,
-            user_delegation_key=self.user_delegation_key,
-            account_key=self.account_key,
-            permission="r",
-            expiry=datetime.utcnow() + timedelta(hours=3),
-        )
-        files = []
-        converted_files = {}
-        for blob in blob_list:
-            if not blob.name.startswith("converted/"):
+        if names_only and not metadata_filter:
+            blob_pages = container_client.list_blob_names(
+                name_starts_with=prefix, results_per_page=results_per_page
+            ).by_page(continuation_token=continuation_token)
+            for page in blob_pages:
+                files = [
+                    {"filename": name}
+                    for name in page
+                    if not name.startswith("converted/")
+                ]
+                yield files, blob_pages.continuation_token
+            return
+
+        blob_pages = container_client.list_blobs(
+            name_starts_with=prefix,
+            include="metadata",
+            results_per_page=results_per_page,
+        ).by_page(continuation_token=continuation_token)
+        # The converted/ copies are listed after many of the files that point to them, so their
+        # names are listed separately, once, to check that they still exist
+        converted_filenames = None
+        for page in blob_pages:
+            files = []
+            for blob in page:
+                metadata = blob.metadata or {}
+                if blob.name.startswith("converted/") or any(
+                    metadata.get(key) != value
+                    for key, value in (metadata_filter or {}).items()
+                ):
+                    continue
+                if names_only:
+                    files.append({"filename": blob.name})
+                    continue
+                if converted_filenames is None and metadata.get("converted_filename"):
+                    converted_filenames = set(
+                        container_client.list_blob_names(name_starts_with="converted/")
+                    )
                 files.append(
-                    {
-                        "filename": blob.name,
-                        "converted": (
-                            blob.metadata.get("converted", "false") == "true"
-                            if blob.metadata
-                            else False
-                        ),
-                        "embeddings_added": (
-                            blob.metadata.get("embeddings_added", "false") == "true"
-                            if blob.metadata
-                            else False
-                        ),
-                        "fullpath": f"{self.endpoint}{self.container_name}/{blob.name}?{sas}",
-                        "converted_filename": (
-                            blob.metadata.get("converted_filename", "")
-                            if blob.metadata
-                            else ""
-                        ),
-                        "converted_path": "",
-                    }
+                    self._get_file_properties(
+                        blob.name, metadata, converted_filenames or set()
+                    )
                 )
-            else:
-                converted_files[blob.name] = (
-                    f"{self.endpoint}{self.container_name}/{blob.name}?{sas}"
-                )
-
-        for file in files:
-            converted_filename = file.pop("converted_filename", "")
-            if converted_filename in converted_files:
-                file["converted"] = True
-                file["converted_path"] = converted_files[converted_filename]
+            yield files, blob_pages.continuation_token
 
-        return files
+    def _get_file_properties(
+        self, file_name: str, metadata: dict[str, str], converted_filenames: set[str]
+    ) -> dict:
+        # The container SAS is cached, so it is only requested for the first file listed
+        converted_filename = metadata.get("converted_filename", "")
+        converted = converted_filename in converted_filenames
+        return {
+            "filename": file_name,
+            "converted": metadata.get("converted", "false") == "true" or converted,
+            "embeddings_added": metadata.get("embeddings_added", "false") == "true",
+            "fullpath": f"{self.endpoint}{self.container_name}/{file_name}{self.get_container_sas()}",
+            "converted_path": (
+                f"{self.endpoint}{self.container_name}/{converted_filename}{self.get_container_sas()}"
+                if converted
+                else ""
+            ),
+        }
 
     def upsert_blob_metadata(self, file_name, metadata):
         blob_client = self.blob_service_client.get_blob_client(
@@ -239,16 +508,38 @@ class AzureBlobStorageClient:
         # Add metadata to the blob
         blob_client.set_blob_metadata(metadata=blob_metadata)
 
-    def get_container_sas(self):
-        # Generate a SAS URL to the container and return it
-        return "?" + generate_container_sas(
+    def get_container_sas(self, permission: str = "r"):
+        # Generate a SAS URL to the container and return it, reusing a recent one if possible
+        now = datetime.utcnow()
+        cache_key = (
+            self.endpoint,
+            self.account_name,
+            self.account_key,
+            self.container_name,
+            permission,
+        )
+        with AzureBlobStorageClient._sas_lock:
+            cached = AzureBlobStorageClient._container_sas_tokens.get(cache_key)
+            if cached and cached[1] - now > self._CONTAINER_SAS_REFRESH_AHEAD:
+                AzureBlobStorageClient._sas_counters["container_sas_hits"] += 1
+                return cached[0]
+
+        expiry = now + self._CONTAINER_SAS_LIFETIME
+        container_sas = "?" + generate_container_sas(
             account_name=self.account_name,
             container_name=self.container_name,
             user_delegation_key=self.user_delegation_key,
             account_key=self.account_key,
-            permission="r",
-            expiry=datetime.utcnow() + timedelta(hours=1),
+            permission=permission,
+            expiry=expiry,
         )
+        with AzureBlobStorageClient._sas_lock:
+            AzureBlobStorageClient._sas_counters["container_sas_generated"] += 1
+            AzureBlobStorageClient._container_sas_tokens[cache_key] = (
+                container_sas,
+                expiry,
+            )
+        return container_sas
 
     def get_blob_sas(self, file_name):
         # Generate a SAS URL to the blob and return it
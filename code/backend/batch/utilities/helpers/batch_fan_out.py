@@ -0,0 +1,138 @@
+import json
+import logging
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from itertools import islice
+from typing import Optional
+
+from azure.core.exceptions import ResourceNotFoundError
+
+from .azure_blob_storage_client import AzureBlobStorageClient, create_queue_client
+from .config.config_helper import CONFIG_CONTAINER_NAME
+from .env_helper import EnvHelper
+
+logger = logging.getLogger(__name__)
+
+BATCH_START_PROCESSING_EVENT_TYPE = "BatchStartProcessing"
+
+
+class BatchFanOut:
+    """
+    Queues a processing message for every document of the container, as a resumable job.
+
+    A job is started by queueing a control message, which the document processing queue trigger
+    passes to `run`. Each run lists a bounded number of pages of blob names, sends their messages
+    concurrently and checkpoints the listing continuation token and the number of files queued after
+    every page, then queues another control message for the next pages. A run that is retried
+    resumes from the last checkpoint, so at most one page of messages is sent twice.
+    The job state is stored in the config container, where `get_status` reads it.
+    """
+
+    JOBS_PREFIX = "batch-jobs/"
+    PAGE_SIZE = 1000
+    PAGES_PER_RUN = 20
+
+    def __init__(self) -> None:
+        env_helper: EnvHelper = EnvHelper()
+        self.files_per_message = max(1, env_helper.BATCH_PROCESSING_FILES_PER_MESSAGE)
+        self.max_in_flight = max(1, env_helper.BATCH_PROCESSING_MAX_IN_FLIGHT)
+        self.blob_client = AzureBlobStorageClient()
+        self.jobs_client = AzureBlobStorageClient(container_name=CONFIG_CONTAINER_NAME)
+        self.queue_client = create_queue_client()
+
+    def start(self) -> str:
+        job_id = str(uuid.uuid4())
+        self._save_job(
+            {
+                "job_id": job_id,
+                "status": "queued",
+                "files_queued": 0,
+                "continuation_token": None,
+                "started_at": self._now(),
+                "updated_at": self._now(),
+            }
+        )
+        self._queue_run(job_id)
+        return job_id
+
+    def get_status(self, job_id: str) -> Optional[dict]:
+        try:
+            uuid.UUID(job_id)
+            job = json.loads(self.jobs_client.download_file(self._job_file(job_id)))
+        except (ValueError, ResourceNotFoundError):
+            return None
+        job.pop("continuation_token", None)
+        return job
+
+    def run(self, job_id: str) -> None:
+        job = json.loads(self.jobs_client.download_file(self._job_file(job_id)))
+        if job["status"] == "completed":
+            return
+
+        job["status"] = "running"
+        pages = self.blob_client.iter_file_pages(
+            names_only=True,
+            results_per_page=self.PAGE_SIZE,
+            continuation_token=job["continuation_token"],
+        )
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as executor:
+            for pages_run, (files, continuation_token) in enumerate(pages, 1):
+                remaining = (file["filename"] for file in files)
+                messages = []
+                while file_names := list(islice(remaining, self.files_per_message)):
+                    messages.append(self._create_message(file_names))
+                # Consuming the results raises the first send error, before the checkpoint
+                list(executor.map(self.queue_client.send_message, messages))
+
+                job["files_queued"] += len(files)
+                job["continuation_token"] = continuation_token
+                if continuation_token is None:
+                    break
+                self._save_job(job)
+
+                if pages_run == self.PAGES_PER_RUN:
+                    self._queue_run(job_id)
+                    logger.info(
+                        "Batch processing job checkpointed",
+                        extra={"job_id": job_id, "files_queued": job["files_queued"]},
+                    )
+                    return
+
+        job["status"] = "completed"
+        self._save_job(job)
+        logger.info(
+            "Batch processing job completed",
+            extra={"job_id": job_id, "files_queued": job["files_queued"]},
+        )
+
+    def _create_message(self, file_names: list[str]) -> bytes:
+        # A single file keeps the message schema that BatchStartProcessing always used
+        message = (
+            {"filename": file_names[0]}
+            if len(file_names) == 1
+            else {"filenames": file_names}
+        )
+        return json.dumps(message).encode("utf-8")
+
+    def _queue_run(self, job_id: str):
+        self.queue_client.send_message(
+            json.dumps(
+                {"eventType": BATCH_START_PROCESSING_EVENT_TYPE, "job_id": job_id}
+            ).encode("utf-8")
+        )
+
+    def _save_job(self, job: dict):
+        job["updated_at"] = self._now()
+        self.jobs_client.upload_file(
+            json.dumps(job).encode("utf-8"),
+            self._job_file(job["job_id"]),
+            content_type="application/json",
+        )
+
+    def _job_file(self, job_id: str) -> str:
+        return f"{self.JOBS_PREFIX}{job_id}.json"
+
+    @staticmethod
+    def _now() -> str:
+        return datetime.now(timezone.utc).isoformat()
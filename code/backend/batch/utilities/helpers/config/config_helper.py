@@ -1,9 +1,14 @@
 import os
 import json
+import math
+import time
 import logging
 import functools
+import threading
 from string import Template
 
+from azure.core.exceptions import ResourceNotFoundError
+
 from ..azure_blob_storage_client import AzureBlobStorageClient
 from ...document_chunking.chunking_strategy import ChunkingStrategy, ChunkingSettings
 from ...document_loading import LoadingSettings, LoadingStrategy
@@ -137,6 +142,14 @@ class IntegratedVectorizationConfig:
 
 class ConfigHelper:
     _default_config = None
+    _active_config = None
+    _active_config_etag = None
+    _active_config_ttl = math.inf
+    _active_config_expires_at = math.inf
+    _active_config_revalidating = False
+    # Bumped on invalidation, so that a revalidation started before it does not cache a stale config
+    _active_config_generation = 0
+    _active_config_lock = threading.Lock()
 
     @staticmethod
     def _set_new_config_properties(config: dict, default_config: dict):
@@ -186,24 +199,133 @@ class ConfigHelper:
             ]
 
     @staticmethod
-    @functools.cache
     def get_active_config_or_default():
+        """
+        Returns the active config, served from an in-process cache.
+
+        Once the cached config is older than CONFIG_CACHE_TTL_SECONDS it is still returned,
+        and a background conditional GET (If-None-Match) revalidates it against the blob, so
+        the request path never waits on blob storage after the first load.
+        """
+        config = ConfigHelper._active_config
+        if config is None:
+            with ConfigHelper._active_config_lock:
+                if ConfigHelper._active_config is None:
+                    ConfigHelper._load_active_config()
+                return ConfigHelper._active_config
+
+        if time.monotonic() >= ConfigHelper._active_config_expires_at:
+            ConfigHelper._revalidate_active_config_in_background()
+
+        return config
+
+    @staticmethod
+    def _load_active_config():
         env_helper = EnvHelper()
         config = ConfigHelper.get_default_config()
+        etag = None
 
         if env_helper.LOAD_CONFIG_FROM_BLOB_STORAGE:
             blob_client = AzureBlobStorageClient(container_name=CONFIG_CONTAINER_NAME)
 
-            if blob_client.file_exists(CONFIG_FILE_NAME):
-                default_config = config
-                config_file = blob_client.download_file(CONFIG_FILE_NAME)
-                config = json.loads(config_file)
-
-                ConfigHelper._set_new_config_properties(config, default_config)
-            else:
+            try:
+                config_file, etag = blob_client.download_file_if_modified(
+                    CONFIG_FILE_NAME
+                )
+                config = ConfigHelper._parse_config_file(config_file, config)
+            except ResourceNotFoundError:
                 logger.info("Returning default config")
 
-        return Config(config)
+        ConfigHelper._set_active_config(
+            Config(config),
+            etag,
+            (
+                env_helper.CONFIG_CACHE_TTL_SECONDS
+                if env_helper.LOAD_CONFIG_FROM_BLOB_STORAGE
+                else math.inf
+            ),
+        )
+
+    @staticmethod
+    def _parse_config_file(config_file, default_config: dict) -> dict:
+        config = json.loads(config_file)
+        ConfigHelper._set_new_config_properties(config, default_config)
+        return config
+
+    @staticmethod
+    def _set_active_config(config: Config, etag, ttl: float):
+        ConfigHelper._active_config = config
+        ConfigHelper._active_config_etag = etag
+        ConfigHelper._active_config_ttl = ttl
+        ConfigHelper._active_config_expires_at = time.monotonic() + ttl
+
+    @staticmethod
+    def _revalidate_active_config_in_background():
+        with ConfigHelper._active_config_lock:
+            if ConfigHelper._active_config_revalidating:
+                return
+            ConfigHelper._active_config_revalidating = True
+
+        threading.Thread(
+            target=ConfigHelper._revalidate_active_config, daemon=True
+        ).start()
+
+    @staticmethod
+    def _revalidate_active_config():
+        generation = ConfigHelper._active_config_generation
+        etag = ConfigHelper._active_config_etag
+        try:
+            blob_client = AzureBlobStorageClient(container_name=CONFIG_CONTAINER_NAME)
+            try:
+                config_file, new_etag = blob_client.download_file_if_modified(
+                    CONFIG_FILE_NAME, etag
+                )
+            except ResourceNotFoundError:
+                config_file, new_etag = None, None
+                if etag is not None:
+                    logger.info("Active config was deleted, returning default config")
+                    ConfigHelper._set_revalidated_config(
+                        generation, Config(ConfigHelper.get_default_config()), None
+                    )
+
+            if config_file is not None:
+                logger.info("Active config changed, reloading")
+                config = ConfigHelper._parse_config_file(
+                    config_file, ConfigHelper.get_default_config()
+                )
+                ConfigHelper._set_revalidated_config(
+                    generation, Config(config), new_etag
+                )
+        except Exception:
+            logger.exception("Failed to revalidate active config")
+        finally:
+            ConfigHelper._active_config_expires_at = (
+                time.monotonic() + ConfigHelper._active_config_ttl
+            )
+            ConfigHelper._active_config_revalidating = False
+
+    @staticmethod
+    def _set_revalidated_config(generation: int, config: Config, etag):
+        with ConfigHelper._active_config_lock:
+            if generation != ConfigHelper._active_config_generation:
+                logger.info(
+                    "Active config was invalidated, dropping revalidated config"
+                )
+                return
+            ConfigHelper._set_active_config(
+                config, etag, ConfigHelper._active_config_ttl
+            )
+
+    @staticmethod
+    def invalidate_active_config():
+        """
+        Drops the cached active config so that the next call reloads it.
+        Other processes pick up the change on their next ETag revalidation.
+        """
+        with ConfigHelper._active_config_lock:
+            ConfigHelper._active_config_generation += 1
+            ConfigHelper._active_config = None
+            ConfigHelper._active_config_etag = None
 
     @staticmethod
     @functools.cache
@@ -220,7 +342,7 @@ class ConfigHelper:
             CONFIG_FILE_NAME,
             content_type="application/json",
         )
-        ConfigHelper.get_active_config_or_default.cache_clear()
+        ConfigHelper.invalidate_active_config()
 
     @staticmethod
     def validate_config(config: dict):
@@ -271,7 +393,7 @@ class ConfigHelper:
     @staticmethod
     def clear_config():
         ConfigHelper._default_config = None
-        ConfigHelper.get_active_config_or_default.cache_clear()
+        ConfigHelper.invalidate_active_config()
 
     @staticmethod
     def _append_advanced_image_processors():
@@ -298,3 +420,4 @@ class ConfigHelper:
     def delete_config():
         blob_client = AzureBlobStorageClient(container_name=CONFIG_CONTAINER_NAME)
         blob_client.delete_file(CONFIG_FILE_NAME)
+        ConfigHelper.invalidate_active_config()
@@ -0,0 +1,183 @@
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Optional
+
+from azure.core.exceptions import (
+    HttpResponseError,
+    ResourceExistsError,
+    ResourceNotFoundError,
+)
+from azure.storage.blob import BlobClient, BlobLeaseClient
+
+from .azure_blob_storage_client import AzureBlobStorageClient
+from .config.config_helper import CONFIG_CONTAINER_NAME
+from .env_helper import EnvHelper
+
+logger = logging.getLogger(__name__)
+
+
+class ProcessingDeferred(Exception):
+    def __init__(self, file_name: str, delay_seconds: float):
+        super().__init__(f"Processing of {file_name} deferred")
+        self.file_name = file_name
+        self.delay_seconds = delay_seconds
+
+
+class DocumentLease:
+    """A lease on the processing of one version of a document, renewed until it is released."""
+
+    _RENEW_INTERVAL_SECONDS = 40
+
+    def __init__(
+        self,
+        marker_client: BlobClient,
+        lease_client: BlobLeaseClient,
+        file_name: str,
+        etag: str,
+        document_client: Optional[BlobClient] = None,
+        content_md5: Optional[bytearray] = None,
+    ) -> None:
+        self.marker_client = marker_client
+        self.lease_client = lease_client
+        self.file_name = file_name
+        self.etag = etag
+        self.document_client = document_client
+        self.content_md5 = content_md5
+        self._released = threading.Event()
+        threading.Thread(target=self._renew, daemon=True).start()
+
+    def complete(self):
+        """Records the version as processed, so later events for it are dropped, and releases the lease."""
+        try:
+            self.marker_client.set_blob_metadata(
+                {"processed_etag": self._processed_etag()}, lease=self.lease_client
+            )
+        finally:
+            self.release()
+
+    def _processed_etag(self) -> str:
+        """
+        The ETag of the processed version once processing is done. Marking the document as embedded
+        updates its metadata, which changes its ETag, unless its content was replaced meanwhile.
+        """
+        if self.document_client is None:
+            return self.etag
+        try:
+            properties = self.document_client.get_blob_properties()
+        except ResourceNotFoundError:
+            return self.etag
+        if properties.content_settings.content_md5 != self.content_md5:
+            return self.etag
+        return properties.etag
+
+    def release(self):
+        if self._released.is_set():
+            return
+        self._released.set()
+        try:
+            self.lease_client.release()
+        except HttpResponseError:
+            # The lease expires on its own
+            logger.warning("Failed to release lease on %s", self.file_name)
+
+    def _renew(self):
+        while not self._released.wait(self._RENEW_INTERVAL_SECONDS):
+            try:
+                self.lease_client.renew()
+            except HttpResponseError:
+                logger.exception("Failed to renew lease on %s", self.file_name)
+                return
+
+
+class DocumentProcessingGuard:
+    """
+    Makes sure each version of a document, identified by the blob ETag, is processed once.
+
+    Every document has a marker blob in the config container. Its metadata records the last
+    processed ETag, and a lease on it is held while the document is processed. Events for a version
+    that is processed or being processed are dropped. Documents modified within the debounce window,
+    or leased for another version, are deferred so that bursts of updates are processed once.
+    """
+
+    MARKERS_PREFIX = "document-processing/"
+    _LEASE_DURATION_SECONDS = 60
+
+    def __init__(self) -> None:
+        self.debounce_seconds = EnvHelper().DOCUMENT_PROCESSING_DEBOUNCE_SECONDS
+        self.blob_client = AzureBlobStorageClient()
+        self.markers_client = AzureBlobStorageClient(
+            container_name=CONFIG_CONTAINER_NAME
+        )
+
+    def acquire(self, file_name: str) -> Optional[DocumentLease]:
+        """
+        Returns a lease to process the current version of the document, or None if there is nothing
+        to do. Raises ProcessingDeferred if the document should be processed later.
+        """
+        document_client = self.blob_client.get_blob_client(file_name)
+        try:
+            properties = document_client.get_blob_properties()
+        except ResourceNotFoundError:
+            logger.info("Skipping %s, which no longer exists", file_name)
+            return None
+
+        etag = properties.etag
+        marker_client = self.markers_client.get_blob_client(
+            f"{self.MARKERS_PREFIX}{file_name}"
+        )
+        try:
+            marker_client.upload_blob(b"", overwrite=False)
+        except ResourceExistsError:
+            pass
+
+        # Checked before debouncing, as marking the document as embedded also modifies it
+        if self._get_marker_metadata(marker_client).get("processed_etag") == etag:
+            self._log_duplicate(file_name, "processed")
+            return None
+
+        age = (datetime.now(timezone.utc) - properties.last_modified).total_seconds()
+        if age < self.debounce_seconds:
+            raise ProcessingDeferred(file_name, self.debounce_seconds - age)
+
+        try:
+            lease_client = marker_client.acquire_lease(
+                lease_duration=self._LEASE_DURATION_SECONDS
+            )
+        except HttpResponseError as e:
+            if e.status_code != 409:
+                raise
+            if self._get_marker_metadata(marker_client).get("processing_etag") == etag:
+                self._log_duplicate(file_name, "in_flight")
+                return None
+            # Another version is being processed, this one has to wait for it
+            raise ProcessingDeferred(file_name, self._LEASE_DURATION_SECONDS)
+
+        metadata = self._get_marker_metadata(marker_client)
+        if metadata.get("processed_etag") == etag:
+            lease_client.release()
+            self._log_duplicate(file_name, "processed")
+            return None
+
+        marker_client.set_blob_metadata(
+            {**metadata, "processing_etag": etag}, lease=lease_client
+        )
+        return DocumentLease(
+            marker_client,
+            lease_client,
+            file_name,
+            etag,
+            document_client,
+            properties.content_settings.content_md5,
+        )
+
+    @staticmethod
+    def _get_marker_metadata(marker_client: BlobClient) -> dict:
+        return marker_client.get_blob_properties().metadata or {}
+
+    @staticmethod
+    def _log_duplicate(file_name: str, reason: str):
+        logger.info(
+            "Dropped duplicate document processing event",
+            extra={"file_name": file_name, "duplicate_reason": reason},
+        )
@@ -5,3 +5,7 @@ class EmbedderBase(ABC):
     @abstractmethod
     def embed_file(self, source_url: str, file_name: str = None):
         pass
+
+    def embed_files(self, files: list[tuple[str, str]]):
+        for source_url, file_name in files:
+            self.embed_file(source_url, file_name)
@@ -1,9 +1,13 @@
 import hashlib
 import json
 import logging
-from typing import List
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Iterable, List, Optional
 from urllib.parse import urlparse
 
+import tiktoken
+
 from ...helpers.llm_helper import LLMHelper
 from ...helpers.env_helper import EnvHelper
 from ..azure_computer_vision_client import AzureComputerVisionClient
@@ -18,24 +22,45 @@ from ..azure_search_helper import AzureSearchHelper
 from ..document_loading_helper import DocumentLoading
 from ..document_chunking_helper import DocumentChunking
 from ...common.source_document import SourceDocument
+from ...search.local_search_index import LocalSearchIndex
 
 logger = logging.getLogger(__name__)
 
 
+def _batched(items: Iterable, size: int):
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
 class PushEmbedder(EmbedderBase):
+    _ENCODER_NAME = "cl100k_base"
+    _MAX_CONCURRENT_FILES = 8
+    _EMBEDDING_BATCH_SIZE = 16
+    _UPLOAD_BATCH_SIZE = 200
+
     def __init__(self, blob_client: AzureBlobStorageClient, env_helper: EnvHelper):
         self.env_helper = env_helper
         self.llm_helper = LLMHelper()
-        self.azure_search_helper = AzureSearchHelper()
+        self.azure_search_helper = (
+            None if env_helper.USE_LOCAL_SEARCH_INDEX else AzureSearchHelper()
+        )
         self.azure_computer_vision_client = AzureComputerVisionClient(env_helper)
         self.document_loading = DocumentLoading()
         self.document_chunking = DocumentChunking()
         self.blob_client = blob_client
-        self.config = ConfigHelper.get_active_config_or_default()
-        self.embedding_configs = {}
-        for processor in self.config.document_processors:
-            ext = processor.document_type.lower()
-            self.embedding_configs[ext] = processor
+
+    @property
+    def config(self):
+        # Read on every use, so a long-lived embedder follows configuration changes
+        return ConfigHelper.get_active_config_or_default()
+
+    @property
+    def embedding_configs(self) -> dict[str, EmbeddingConfig]:
+        return {
+            processor.document_type.lower(): processor
+            for processor in self.config.document_processors
+        }
 
     def embed_file(self, source_url: str, file_name: str):
         file_extension = file_name.split(".")[-1].lower()
@@ -50,15 +75,88 @@ class PushEmbedder(EmbedderBase):
                 file_name, {"embeddings_added": "true"}
             )
 
+    def embed_files(self, files: List[tuple[str, str]]):
+        """
+        Embeds several files together, given as (source_url, file_name) pairs.
+
+        The files are loaded and chunked concurrently, then the chunks of all of them share the
+        embedding and upload requests, so a batch of small files needs only a few round trips.
+        Images are still embedded one by one.
+        """
+        documents: List[SourceDocument] = []
+        text_files = []
+        with ThreadPoolExecutor(max_workers=self._MAX_CONCURRENT_FILES) as executor:
+            futures = []
+            for source_url, file_name in files:
+                file_extension = file_name.split(".")[-1].lower()
+                embedding_config = self.embedding_configs.get(file_extension)
+                if self.__is_advanced_image(file_extension, embedding_config):
+                    self.embed_file(source_url, file_name)
+                    continue
+                text_files.append((file_name, file_extension))
+                futures.append(
+                    executor.submit(self.__load_and_chunk, source_url, embedding_config)
+                )
+            for future in futures:
+                documents.extend(future.result())
+
+        embeddings: List[List[float]] = []
+        for batch in _batched(documents, self._EMBEDDING_BATCH_SIZE):
+            embeddings.extend(
+                self.llm_helper.generate_embeddings_batch(
+                    [document.content for document in batch]
+                )
+            )
+        search_documents = [
+            self.__convert_to_search_document(document, embedded_content)
+            for document, embedded_content in zip(documents, embeddings)
+        ]
+        for batch in _batched(search_documents, self._UPLOAD_BATCH_SIZE):
+            self.__upload(batch)
+
+        for file_name, file_extension in text_files:
+            if file_extension != "url":
+                self.blob_client.upsert_blob_metadata(
+                    file_name, {"embeddings_added": "true"}
+                )
+        logger.info(
+            "Embedded files",
+            extra={"files": len(files), "chunks": len(search_documents)},
+        )
+
+    def __is_advanced_image(
+        self, file_extension: str, embedding_config: EmbeddingConfig
+    ) -> bool:
+        return (
+            embedding_config.use_advanced_image_processing
+            and file_extension
+            in self.config.get_advanced_image_processing_image_types()
+        )
+
+    def __load_and_chunk(
+        self, source_url: str, embedding_config: EmbeddingConfig
+    ) -> List[SourceDocument]:
+        documents: List[SourceDocument] = self.document_loading.load(
+            source_url, embedding_config.loading
+        )
+        return self.document_chunking.chunk(documents, embedding_config.chunking)
+
+    def __upload(self, documents_to_upload: List[dict]):
+        search_client = (
+            LocalSearchIndex.get_index(self.env_helper)
+            if self.azure_search_helper is None
+            else self.azure_search_helper.get_search_client()
+        )
+        response = search_client.upload_documents(documents_to_upload)
+        if not all([r.succeeded for r in response]):
+            logger.error("Failed to upload documents to search index")
+            raise Exception(response)
+
     def __embed(
         self, source_url: str, file_extension: str, embedding_config: EmbeddingConfig
     ):
         documents_to_upload: List[SourceDocument] = []
-        if (
-            embedding_config.use_advanced_image_processing
-            and file_extension
-            in self.config.get_advanced_image_processing_image_types()
-        ):
+        if self.__is_advanced_image(file_extension, embedding_config):
             caption = self.__generate_image_caption(source_url)
             caption_vector = self.llm_helper.generate_embeddings(caption)
 
@@ -69,22 +167,10 @@ class PushEmbedder(EmbedderBase):
                 )
             )
         else:
-            documents: List[SourceDocument] = self.document_loading.load(
-                source_url, embedding_config.loading
-            )
-            documents = self.document_chunking.chunk(
-                documents, embedding_config.chunking
-            )
-
-            for document in documents:
+            for document in self.__load_and_chunk(source_url, embedding_config):
                 documents_to_upload.append(self.__convert_to_search_document(document))
 
-        response = self.azure_search_helper.get_search_client().upload_documents(
-            documents_to_upload
-        )
-        if not all([r.succeeded for r in response]):
-            logger.error("Failed to upload documents to search index")
-            raise Exception(response)
+        self.__upload(documents_to_upload)
 
     def __generate_image_caption(self, source_url):
         model = self.env_helper.AZURE_OPENAI_VISION_MODEL
@@ -112,8 +198,13 @@ If the image is mostly text, use OCR to extract the text as it is displayed in t
         caption = response.choices[0].message.content
         return caption
 
-    def __convert_to_search_document(self, document: SourceDocument):
-        embedded_content = self.llm_helper.generate_embeddings(document.content)
+    def __convert_to_search_document(
+        self,
+        document: SourceDocument,
+        embedded_content: Optional[List[float]] = None,
+    ):
+        if embedded_content is None:
+            embedded_content = self.llm_helper.generate_embeddings(document.content)
         metadata = {
             self.env_helper.AZURE_SEARCH_FIELDS_ID: document.id,
             self.env_helper.AZURE_SEARCH_SOURCE_COLUMN: document.source,
@@ -122,6 +213,10 @@ If the image is mostly text, use OCR to extract the text as it is displayed in t
             self.env_helper.AZURE_SEARCH_OFFSET_COLUMN: document.offset,
             "page_number": document.page_number,
             "chunk_id": document.chunk_id,
+            # Lets the answering prompt be packed into a token budget without re-tokenizing
+            "token_count": len(
+                tiktoken.get_encoding(self._ENCODER_NAME).encode(document.content)
+            ),
         }
         return {
             self.env_helper.AZURE_SEARCH_FIELDS_ID: document.id,
@@ -48,6 +48,18 @@ class EnvHelper:
         )
         self.AZURE_SEARCH_FILTER = os.getenv("AZURE_SEARCH_FILTER", "")
         self.AZURE_SEARCH_TOP_K = self.get_env_var_int("AZURE_SEARCH_TOP_K", 5)
+        self.AZURE_SEARCH_USE_MMR = self.get_env_var_bool(
+            "AZURE_SEARCH_USE_MMR", "False"
+        )
+        self.AZURE_SEARCH_MMR_FETCH_K = self.get_env_var_int(
+            "AZURE_SEARCH_MMR_FETCH_K", 20
+        )
+        self.AZURE_SEARCH_MMR_LAMBDA = self.get_env_var_float(
+            "AZURE_SEARCH_MMR_LAMBDA", 0.5
+        )
+        self.AZURE_SEARCH_MERGE_OVERLAPPING_CHUNKS = self.get_env_var_bool(
+            "AZURE_SEARCH_MERGE_OVERLAPPING_CHUNKS", "False"
+        )
         self.AZURE_SEARCH_ENABLE_IN_DOMAIN = (
             os.getenv("AZURE_SEARCH_ENABLE_IN_DOMAIN", "true").lower() == "true"
         )
@@ -86,6 +98,22 @@ class EnvHelper:
         self.AZURE_SEARCH_USE_INTEGRATED_VECTORIZATION = self.get_env_var_bool(
             "AZURE_SEARCH_USE_INTEGRATED_VECTORIZATION", "False"
         )
+        # Local search index
+        self.USE_LOCAL_SEARCH_INDEX = self.get_env_var_bool(
+            "USE_LOCAL_SEARCH_INDEX", "False"
+        )
+        self.LOCAL_SEARCH_INDEX_PATH = os.getenv(
+            "LOCAL_SEARCH_INDEX_PATH", "local_search_index"
+        )
+        self.LOCAL_SEARCH_INDEX_VECTOR_DTYPE = os.getenv(
+            "LOCAL_SEARCH_INDEX_VECTOR_DTYPE", "float32"
+        )
+        self.LOCAL_SEARCH_INDEX_IVF_LISTS = self.get_env_var_int(
+            "LOCAL_SEARCH_INDEX_IVF_LISTS", 0
+        )
+        self.LOCAL_SEARCH_INDEX_IVF_PROBES = self.get_env_var_int(
+            "LOCAL_SEARCH_INDEX_IVF_PROBES", 4
+        )
 
         self.AZURE_AUTH_TYPE = os.getenv("AZURE_AUTH_TYPE", "keys")
         # Azure OpenAI
@@ -113,6 +141,12 @@ class EnvHelper:
         self.SHOULD_STREAM = (
             True if self.AZURE_OPENAI_STREAM.lower() == "true" else False
         )
+        self.SHOULD_STREAM_CUSTOM_CONVERSATION = self.get_env_var_bool(
+            "AZURE_OPENAI_STREAM_CUSTOM_CONVERSATION", "False"
+        )
+        self.AZURE_OPENAI_CONTEXT_TOKEN_BUDGET = self.get_env_var_int(
+            "AZURE_OPENAI_CONTEXT_TOKEN_BUDGET", 0
+        )
 
         self.AZURE_TOKEN_PROVIDER = get_bearer_token_provider(
             DefaultAzureCredential(), "https://cognitiveservices.azure.com/.default"
@@ -175,6 +209,21 @@ class EnvHelper:
         self.DOCUMENT_PROCESSING_QUEUE_NAME = os.getenv(
             "DOCUMENT_PROCESSING_QUEUE_NAME", "doc-processing"
         )
+        self.DOCUMENT_PROCESSING_BATCH_SIZE = self.get_env_var_int(
+            "DOCUMENT_PROCESSING_BATCH_SIZE", 1
+        )
+        self.DOCUMENT_PROCESSING_DEDUPLICATION = self.get_env_var_bool(
+            "DOCUMENT_PROCESSING_DEDUPLICATION", "False"
+        )
+        self.DOCUMENT_PROCESSING_DEBOUNCE_SECONDS = self.get_env_var_int(
+            "DOCUMENT_PROCESSING_DEBOUNCE_SECONDS", 10
+        )
+        self.BATCH_PROCESSING_FILES_PER_MESSAGE = self.get_env_var_int(
+            "BATCH_PROCESSING_FILES_PER_MESSAGE", 1
+        )
+        self.BATCH_PROCESSING_MAX_IN_FLIGHT = self.get_env_var_int(
+            "BATCH_PROCESSING_MAX_IN_FLIGHT", 16
+        )
         # Azure Blob Storage
         self.AZURE_BLOB_ACCOUNT_NAME = os.getenv("AZURE_BLOB_ACCOUNT_NAME", "")
         self.AZURE_BLOB_ACCOUNT_KEY = self.secretHelper.get_secret(
@@ -210,10 +259,31 @@ class EnvHelper:
         self.AZURE_CONTENT_SAFETY_KEY = self.secretHelper.get_secret(
             "AZURE_CONTENT_SAFETY_KEY"
         )
+        self.SPECULATIVE_CONTENT_SAFETY = self.get_env_var_bool(
+            "SPECULATIVE_CONTENT_SAFETY", "False"
+        )
+        self.POST_ANSWERING_GROUNDING_THRESHOLD = self.get_env_var_float(
+            "POST_ANSWERING_GROUNDING_THRESHOLD", 0
+        )
+        self.CONVERSATION_LOGGING_ASYNC = self.get_env_var_bool(
+            "CONVERSATION_LOGGING_ASYNC", "False"
+        )
         # Orchestration Settings
         self.ORCHESTRATION_STRATEGY = os.getenv(
             "ORCHESTRATION_STRATEGY", "openai_function"
         )
+        self.CHAT_HISTORY_SUMMARIZATION = self.get_env_var_bool(
+            "CHAT_HISTORY_SUMMARIZATION", "False"
+        )
+        self.CHAT_HISTORY_SUMMARIZATION_KEEP_TURNS = self.get_env_var_int(
+            "CHAT_HISTORY_SUMMARIZATION_KEEP_TURNS", 3
+        )
+        self.LOCAL_INTENT_ROUTING = self.get_env_var_bool(
+            "LOCAL_INTENT_ROUTING", "False"
+        )
+        self.LOCAL_INTENT_ROUTING_MIN_MARGIN = self.get_env_var_float(
+            "LOCAL_INTENT_ROUTING_MIN_MARGIN", 0.05
+        )
         # Speech Service
         self.AZURE_SPEECH_SERVICE_NAME = os.getenv("AZURE_SPEECH_SERVICE_NAME", "")
         self.AZURE_SPEECH_SERVICE_REGION = os.getenv("AZURE_SPEECH_SERVICE_REGION")
@@ -228,6 +298,9 @@ class EnvHelper:
         self.LOAD_CONFIG_FROM_BLOB_STORAGE = self.get_env_var_bool(
             "LOAD_CONFIG_FROM_BLOB_STORAGE"
         )
+        self.CONFIG_CACHE_TTL_SECONDS = self.get_env_var_float(
+            "CONFIG_CACHE_TTL_SECONDS", 10.0
+        )
 
         self.AZURE_ML_WORKSPACE_NAME = os.getenv("AZURE_ML_WORKSPACE_NAME", "")
 
@@ -109,14 +109,22 @@ class LLMHelper:
             .embedding
         )
 
-    def get_chat_completion_with_functions(
-        self, messages: list[dict], functions: list[dict], function_call: str = "auto"
+    def generate_embeddings_batch(self, inputs: list[str]) -> List[List[float]]:
+        return [
+            data.embedding
+            for data in self.openai_client.embeddings.create(
+                input=inputs, model=self.embedding_model
+            ).data
+        ]
+
+    def get_chat_completion_with_tools(
+        self, messages: list[dict], tools: list[dict], tool_choice: str = "auto"
     ):
         return self.openai_client.chat.completions.create(
             model=self.llm_model,
             messages=messages,
-            functions=functions,
-            function_call=function_call,
+            tools=tools,
+            tool_choice=tool_choice,
         )
 
     def get_chat_completion(
@@ -1,4 +1,4 @@
-from typing import List
+from typing import AsyncIterator, List
 
 from ..orchestrator.orchestration_strategy import OrchestrationStrategy
 from ..orchestrator import OrchestrationSettings
@@ -27,3 +27,16 @@ class Orchestrator:
         return await orchestrator.handle_message(
             user_message, chat_history, conversation_id
         )
+
+    def handle_message_stream(
+        self,
+        user_message: str,
+        chat_history: List[dict],
+        conversation_id: str,
+        orchestrator: OrchestrationSettings,
+        **kwargs: dict,
+    ) -> AsyncIterator[list[dict]]:
+        orchestrator = get_orchestrator(orchestrator.strategy.value)
+        return orchestrator.handle_message_stream(
+            user_message, chat_history, conversation_id
+        )
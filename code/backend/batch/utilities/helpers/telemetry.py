@@ -0,0 +1,39 @@
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from opentelemetry import metrics, trace
+from opentelemetry.trace import Span
+
+# Proxies until configure_azure_monitor sets the providers, and no-ops if it is never called
+_tracer = trace.get_tracer(__name__)
+_stage_duration = metrics.get_meter(__name__).create_histogram(
+    "orchestration.stage.duration",
+    unit="ms",
+    description="Duration of each stage of answering a message",
+)
+
+
+@contextmanager
+def trace_stage(stage: str, current: bool = True, **attributes) -> Iterator[Span]:
+    """
+    Traces a stage of answering a message, e.g. "search" or "answer_llm", as a span named
+    orchestration.<stage>, and records its duration in the orchestration.stage.duration histogram.
+
+    `attributes` are set on both, so they must have a low cardinality (strategy, top_k, ...).
+    Per call values such as token counts are set on the yielded span. Generators that yield
+    within the stage must pass current=False, as the span can't be made current across yields.
+    """
+    attributes["stage"] = stage
+    start = time.perf_counter()
+    span = _tracer.start_span(f"orchestration.{stage}", attributes=attributes)
+    try:
+        with trace.use_span(span, end_on_exit=True) if current else span:
+            yield span
+    finally:
+        _stage_duration.record((time.perf_counter() - start) * 1000, attributes)
+
+
+def set_token_attributes(span: Span, prompt_tokens: int, completion_tokens: int):
+    span.set_attribute("prompt_tokens", prompt_tokens or 0)
+    span.set_attribute("completion_tokens", completion_tokens or 0)
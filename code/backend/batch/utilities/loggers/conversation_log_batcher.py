@@ -0,0 +1,142 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+from collections import Counter
+from typing import List, Optional
+
+from ..helpers.azure_search_helper import AzureSearchHelper
+from ..helpers.llm_helper import LLMHelper
+
+logger = logging.getLogger(__name__)
+
+
+class ConversationLogBatcher:
+    """
+    Writes conversation log entries to the log index from a background thread.
+
+    Entries are put on a bounded in-process queue and written in batches, once BATCH_SIZE entries are
+    waiting or FLUSH_INTERVAL_SECONDS after the first one. Each batch is embedded with a single
+    embeddings request and uploaded with a single call. Entries are dropped when the queue is full rather than slowing down the
+    requests, and the queue is flushed when the process exits.
+    """
+
+    MAX_QUEUE_SIZE = 1000
+    BATCH_SIZE = 32
+    FLUSH_INTERVAL_SECONDS = 2
+
+    _queue: queue.Queue = queue.Queue(maxsize=MAX_QUEUE_SIZE)
+    _counters: Counter = Counter()
+    _lock = threading.Lock()
+    _worker: Optional[threading.Thread] = None
+    _vectorstore = None
+    _llm_helper: Optional[LLMHelper] = None
+
+    @classmethod
+    def enqueue(cls, entries: List[tuple[str, dict]]):
+        """Queues (text, metadata) entries for the log index without waiting for them to be written."""
+        cls._start_worker()
+        for entry in entries:
+            try:
+                cls._queue.put_nowait(entry)
+            except queue.Full:
+                with cls._lock:
+                    cls._counters["dropped"] += 1
+                    dropped = cls._counters["dropped"]
+                logger.warning(
+                    "Conversation log queue full, dropping entry",
+                    extra={"conversation_log_dropped": dropped},
+                )
+                continue
+            with cls._lock:
+                cls._counters["enqueued"] += 1
+
+    @classmethod
+    def flush(cls, timeout: float = 10) -> bool:
+        """Waits until the queued entries are written, returns False if they were not within the timeout."""
+        deadline = time.monotonic() + timeout
+        # The condition shares the queue's mutex, so qsize() can't be called while holding it
+        with cls._queue.all_tasks_done:
+            while cls._queue.unfinished_tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                cls._queue.all_tasks_done.wait(remaining)
+            unfinished = cls._queue.unfinished_tasks
+
+        if unfinished:
+            logger.warning(
+                "Timed out flushing conversation log",
+                extra={"conversation_log_queue_depth": unfinished},
+            )
+            return False
+        return True
+
+    @classmethod
+    def get_counters(cls) -> dict:
+        with cls._lock:
+            return {**cls._counters, "queue_depth": cls._queue.qsize()}
+
+    @classmethod
+    def _start_worker(cls):
+        with cls._lock:
+            if cls._worker is not None:
+                return
+            cls._worker = threading.Thread(target=cls._run, daemon=True)
+            cls._worker.start()
+        atexit.register(cls.flush)
+
+    @classmethod
+    def _run(cls):
+        while True:
+            batch = cls._get_batch()
+            try:
+                cls._write(batch)
+            finally:
+                for _ in batch:
+                    cls._queue.task_done()
+
+    @classmethod
+    def _get_batch(cls) -> List[tuple[str, dict]]:
+        batch = [cls._queue.get()]
+        deadline = time.monotonic() + cls.FLUSH_INTERVAL_SECONDS
+        while len(batch) < cls.BATCH_SIZE:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(cls._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    @classmethod
+    def _write(cls, batch: List[tuple[str, dict]]):
+        try:
+            if cls._vectorstore is None:
+                cls._vectorstore = AzureSearchHelper().get_conversation_logger()
+                cls._llm_helper = LLMHelper()
+            texts = [text for text, _ in batch]
+            # add_texts would embed the entries one request at a time
+            embeddings = cls._llm_helper.generate_embeddings_batch(texts)
+            cls._vectorstore.add_embeddings(
+                list(zip(texts, embeddings)),
+                metadatas=[metadata for _, metadata in batch],
+            )
+        except Exception:
+            with cls._lock:
+                cls._counters["failed"] += len(batch)
+            logger.exception("Failed to write %d conversation log entries", len(batch))
+            return
+
+        with cls._lock:
+            cls._counters["written"] += len(batch)
+            cls._counters["batches"] += 1
+        logger.info(
+            "Conversation log batch written",
+            extra={
+                "conversation_log_batch_size": len(batch),
+                "conversation_log_queue_depth": cls._queue.qsize(),
+            },
+        )
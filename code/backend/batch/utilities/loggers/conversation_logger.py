@@ -1,17 +1,40 @@
 from ..helpers.azure_search_helper import AzureSearchHelper
+from ..helpers.env_helper import EnvHelper
+from .conversation_log_batcher import ConversationLogBatcher
 from datetime import datetime
 import json
 
 
 class ConversationLogger:
     def __init__(self):
-        self.logger = AzureSearchHelper().get_conversation_logger()
+        self.log_asynchronously = EnvHelper().CONVERSATION_LOGGING_ASYNC
+        # Asynchronous entries are written by the batcher's own vector store
+        self.logger = (
+            None
+            if self.log_asynchronously
+            else AzureSearchHelper().get_conversation_logger()
+        )
 
     def log(self, messages: list):
-        self.log_user_message(messages)
-        self.log_assistant_message(messages)
+        entries = [
+            self.get_user_message_entry(messages),
+            self.get_assistant_message_entry(messages),
+        ]
+        if self.log_asynchronously:
+            ConversationLogBatcher.enqueue(entries)
+            return
+        for text, metadata in entries:
+            self.logger.add_texts(texts=[text], metadatas=[metadata])
 
     def log_user_message(self, messages: dict):
+        text, metadata = self.get_user_message_entry(messages)
+        self.logger.add_texts(texts=[text], metadatas=[metadata])
+
+    def log_assistant_message(self, messages: dict):
+        text, metadata = self.get_assistant_message_entry(messages)
+        self.logger.add_texts(texts=[text], metadatas=[metadata])
+
+    def get_user_message_entry(self, messages: dict) -> tuple[str, dict]:
         text = ""
         metadata = {}
         for message in messages:
@@ -21,9 +44,9 @@ class ConversationLogger:
                 metadata["created_at"] = datetime.now().strftime("%Y-%m-%dT%H:%M:%SZ")
                 metadata["updated_at"] = datetime.now().strftime("%Y-%m-%dT%H:%M:%SZ")
                 text = message["content"]
-        self.logger.add_texts(texts=[text], metadatas=[metadata])
+        return text, metadata
 
-    def log_assistant_message(self, messages: dict):
+    def get_assistant_message_entry(self, messages: dict) -> tuple[str, dict]:
         text = ""
         metadata = {}
         try:
@@ -43,4 +66,4 @@ class ConversationLogger:
                     source["id"]
                     for source in json.loads(message["content"]).get("citations", [])
                 ]
-        self.logger.add_texts(texts=[text], metadatas=[metadata])
+        return text, metadata
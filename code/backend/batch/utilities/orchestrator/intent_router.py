@@ -0,0 +1,137 @@
+import logging
+import math
+import re
+import threading
+from typing import List, Optional
+
+from ..helpers.env_helper import EnvHelper
+from ..helpers.llm_helper import LLMHelper
+from ..helpers.telemetry import trace_stage
+
+logger = logging.getLogger(__name__)
+
+SEARCH_DOCUMENTS = "search_documents"
+
+
+class IntentRouter:
+    """
+    Routes obvious first-turn questions to the search_documents function without calling the LLM.
+
+    Messages are first classified with lexical rules, then by comparing their embedding with the
+    centroids of a few example messages per intent. `route` returns None whenever the message is
+    not clearly a standalone question, in which case the orchestrator falls back to the LLM router.
+    Subclasses can override `route_lexically` and the example messages to adapt the rules.
+    """
+
+    question_pattern = re.compile(
+        r"^(what|who|whom|whose|when|where|why|how|which|is|are|was|were|can|could|"
+        r"do|does|did|should|shall|will|would|may|explain|describe|tell me|list|show me)\b",
+        re.IGNORECASE,
+    )
+    other_pattern = re.compile(
+        r"\b(translate|translation|summari[sz]e|summary|paraphrase|rephrase|rewrite|"
+        r"reword|proofread|shorten|simplify|all (the )?documents)\b|"
+        r"^(hi|hello|hey|thanks|thank you|good (morning|afternoon|evening)|bye)\b",
+        re.IGNORECASE,
+    )
+
+    search_examples = [
+        "What is our parental leave policy?",
+        "How many vacation days do employees get?",
+        "Who approves travel expenses?",
+        "When is the next benefits enrollment period?",
+        "Requirements for the security training",
+        "Steps to request a new laptop",
+    ]
+    other_examples = [
+        "Translate the previous answer to Italian",
+        "Summarize this in three bullet points",
+        "Paraphrase the text above",
+        "Make it shorter",
+        "Hello there",
+        "Thanks, that was helpful",
+    ]
+
+    _centroids: Optional[dict[str, List[float]]] = None
+    _centroids_lock = threading.Lock()
+
+    def __init__(self) -> None:
+        self.env_helper = EnvHelper()
+
+    def route(self, user_message: str, chat_history: List[dict]) -> Optional[str]:
+        """Returns the name of the function to call, or None if the LLM router should decide."""
+        with trace_stage("intent_routing") as span:
+            route = self._route(user_message, chat_history)
+            span.set_attribute("hit", route is not None)
+            return route
+
+    def _route(self, user_message: str, chat_history: List[dict]) -> Optional[str]:
+        if chat_history:
+            # Follow-up questions need to be rewritten as standalone questions by the LLM
+            return self._log_decision(None, "history")
+
+        message = user_message.strip()
+        if not message:
+            return self._log_decision(None, "lexical")
+
+        route = self.route_lexically(message)
+        if route is not False:
+            return self._log_decision(route, "lexical")
+
+        return self._log_decision(self.route_by_similarity(message), "centroid")
+
+    def route_lexically(self, message: str) -> Optional[str] | bool:
+        """Returns the route for the message, None if the LLM must decide, or False if uncertain."""
+        if self.other_pattern.search(message):
+            return None
+        if message.endswith("?") or self.question_pattern.match(message):
+            return SEARCH_DOCUMENTS
+        return False
+
+    def route_by_similarity(self, message: str) -> Optional[str]:
+        try:
+            centroids = self._get_centroids()
+            embedding = LLMHelper().generate_embeddings(message)
+        except Exception:
+            logger.exception("Failed to embed message for intent routing")
+            return None
+
+        margin = self._cosine_similarity(
+            embedding, centroids[SEARCH_DOCUMENTS]
+        ) - self._cosine_similarity(embedding, centroids["other"])
+        if margin >= self.env_helper.LOCAL_INTENT_ROUTING_MIN_MARGIN:
+            return SEARCH_DOCUMENTS
+        return None
+
+    def _get_centroids(self) -> dict[str, List[float]]:
+        cls = type(self)
+        with cls._centroids_lock:
+            if cls.__dict__.get("_centroids") is None:
+                embeddings = LLMHelper().generate_embeddings_batch(
+                    cls.search_examples + cls.other_examples
+                )
+                split = len(cls.search_examples)
+                cls._centroids = {
+                    SEARCH_DOCUMENTS: self._mean(embeddings[:split]),
+                    "other": self._mean(embeddings[split:]),
+                }
+            return cls._centroids
+
+    @staticmethod
+    def _mean(vectors: List[List[float]]) -> List[float]:
+        return [sum(values) / len(vectors) for values in zip(*vectors)]
+
+    @staticmethod
+    def _cosine_similarity(a: List[float], b: List[float]) -> float:
+        norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+        if norm == 0:
+            return 0.0
+        return sum(x * y for x, y in zip(a, b)) / norm
+
+    @staticmethod
+    def _log_decision(route: Optional[str], router: str) -> Optional[str]:
+        logger.info(
+            "Intent routing decision",
+            extra={"intent_route": route or "llm", "intent_router": router},
+        )
+        return route
@@ -1,5 +1,7 @@
+import asyncio
 import logging
-from typing import List
+import threading
+from typing import List, Optional
 from langchain.agents import Tool
 from langchain.memory import ConversationBufferMemory
 from langchain.agents import ZeroShotAgent, AgentExecutor
@@ -17,13 +19,34 @@ logger = logging.getLogger(__name__)
 
 
 class LangChainAgent(OrchestratorBase):
+    # The agent only depends on the environment, so it is built once and shared by the requests
+    _agent_executor: Optional[AgentExecutor] = None
+    _lock = threading.Lock()
+
     def __init__(self) -> None:
         super().__init__()
-        self.question_answer_tool = QuestionAnswerTool()
-        self.text_processing_tool = TextProcessingTool()
         self.llm_helper = LLMHelper()
 
-        self.tools = [
+    @staticmethod
+    def run_tool(user_message) -> Answer:
+        return QuestionAnswerTool().answer_question(user_message, chat_history=[])
+
+    @staticmethod
+    def run_text_processing_tool(user_message) -> Answer:
+        return TextProcessingTool().answer_question(user_message, chat_history=[])
+
+    def get_agent_executor(self) -> AgentExecutor:
+        """
+        The agent, its prompt, tools and LLM, built on first use. It keeps no state between runs,
+        the chat history being passed in with each question.
+        """
+        with LangChainAgent._lock:
+            if LangChainAgent._agent_executor is None:
+                LangChainAgent._agent_executor = self._create_agent_executor()
+            return LangChainAgent._agent_executor
+
+    def _create_agent_executor(self) -> AgentExecutor:
+        tools = [
             Tool(
                 name="Question Answering",
                 func=self.run_tool,
@@ -39,29 +62,6 @@ class LangChainAgent(OrchestratorBase):
                 return_direct=True,
             ),
         ]
-
-    def run_tool(self, user_message):
-        answer = self.question_answer_tool.answer_question(
-            user_message, chat_history=[]
-        )
-        return answer.to_json()
-
-    def run_text_processing_tool(self, user_message):
-        answer = self.text_processing_tool.answer_question(
-            user_message, chat_history=[]
-        )
-        return answer.to_json()
-
-    async def orchestrate(
-        self, user_message: str, chat_history: List[dict], **kwargs: dict
-    ) -> list[dict]:
-
-        # Call Content Safety tool
-        if self.config.prompts.enable_content_safety:
-            if response := self.call_content_safety_input(user_message):
-                return response
-
-        # Call function to determine route
         prefix = """Have a conversation with a human, answering the following questions as best you can. You have access to the following tools:"""
         suffix = """Begin!"
 
@@ -69,12 +69,20 @@ class LangChainAgent(OrchestratorBase):
         Question: {input}
         {agent_scratchpad}"""
         prompt = ZeroShotAgent.create_prompt(
-            self.tools,
+            tools,
             prefix=prefix,
             suffix=suffix,
             input_variables=["input", "chat_history", "agent_scratchpad"],
         )
-        # Create conversation memory
+        # Define Agent and Agent Chain
+        llm_chain = LLMChain(llm=self.llm_helper.get_llm(), prompt=prompt)
+        agent = ZeroShotAgent(llm_chain=llm_chain, tools=tools, verbose=True)
+        return AgentExecutor.from_agent_and_tools(
+            agent=agent, tools=tools, verbose=True
+        )
+
+    def create_memory(self, chat_history: List[dict]) -> ConversationBufferMemory:
+        """The conversation memory of a request, the only part of the agent that is not shared."""
         memory = ConversationBufferMemory(
             memory_key="chat_history", return_messages=True
         )
@@ -83,23 +91,36 @@ class LangChainAgent(OrchestratorBase):
                 memory.chat_memory.add_user_message(message["content"])
             elif message["role"] == "assistant":
                 memory.chat_memory.add_ai_message(message["content"])
-        # Define Agent and Agent Chain
-        llm_chain = LLMChain(llm=self.llm_helper.get_llm(), prompt=prompt)
-        agent = ZeroShotAgent(llm_chain=llm_chain, tools=self.tools, verbose=True)
-        agent_chain = AgentExecutor.from_agent_and_tools(
-            agent=agent, tools=self.tools, verbose=True, memory=memory
+        return memory
+
+    async def orchestrate(
+        self, user_message: str, chat_history: List[dict], **kwargs: dict
+    ) -> list[dict]:
+        memory = self.create_memory(chat_history)
+
+        def run_agent_chain():
+            agent_chain = self.get_agent_executor()
+            with get_openai_callback() as cb:
+                result = agent_chain.invoke(
+                    {"input": user_message, **memory.load_memory_variables({})}
+                )
+            return result["output"], cb.prompt_tokens, cb.completion_tokens
+
+        # Call Content Safety tool, and run the Agent Chain once it has passed
+        response, agent_result = await self.run_with_content_safety_input(
+            user_message, asyncio.to_thread(run_agent_chain)
+        )
+        if response:
+            return response
+
+        answer, prompt_tokens, completion_tokens = agent_result
+        self.log_tokens(
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
         )
-        # Run Agent Chain
-        with get_openai_callback() as cb:
-            answer = agent_chain.run(user_message)
-            self.log_tokens(
-                prompt_tokens=cb.prompt_tokens,
-                completion_tokens=cb.completion_tokens,
-            )
 
-        try:
-            answer = Answer.from_json(answer)
-        except Exception:
+        # The tools answer directly, anything else is the agent's own final answer
+        if not isinstance(answer, Answer):
             answer = Answer(question=user_message, answer=answer)
 
         if self.config.prompts.enable_post_answering_prompt:
@@ -1,9 +1,13 @@
+import asyncio
 import logging
-from typing import List
+from typing import AsyncIterator, List, Optional, Tuple
 import json
 
+from .intent_router import IntentRouter
 from .orchestrator_base import OrchestratorBase
+from ..helpers.env_helper import EnvHelper
 from ..helpers.llm_helper import LLMHelper
+from ..helpers.telemetry import set_token_attributes
 from ..tools.post_prompt_tool import PostPromptTool
 from ..tools.question_answer_tool import QuestionAnswerTool
 from ..tools.text_processing_tool import TextProcessingTool
@@ -26,6 +30,11 @@ class OpenAIFunctionsOrchestrator(OrchestratorBase):
                             "type": "string",
                             "description": "A standalone question, converted from the chat history",
                         },
+                        "search_queries": {
+                            "type": "array",
+                            "items": {"type": "string"},
+                            "description": "Only for a question that compares or combines several things, a standalone search query for each of them",
+                        },
                     },
                     "required": ["question"],
                 },
@@ -49,20 +58,35 @@ class OpenAIFunctionsOrchestrator(OrchestratorBase):
                 },
             },
         ]
+        self.intent_router = (
+            IntentRouter() if EnvHelper().LOCAL_INTENT_ROUTING else None
+        )
 
-    async def orchestrate(
-        self, user_message: str, chat_history: List[dict], **kwargs: dict
-    ) -> list[dict]:
-        # Call Content Safety tool
-        if self.config.prompts.enable_content_safety:
-            if response := self.call_content_safety_input(user_message):
-                return response
+    async def route(self, user_message: str, chat_history: List[dict]):
+        """
+        Decides which functions answer the user message, locally when the intent router is
+        confident, otherwise by calling the LLM, which may call several functions in parallel.
+
+        Returns:
+            tuple: The content safety response if the user message was flagged, otherwise None, and
+            the function calls as a list of (function name, arguments) pairs. When the LLM replied
+            directly, the list has a single (None, {"content": reply}) pair.
+        """
+        if self.intent_router and (
+            function_name := await asyncio.to_thread(
+                self.intent_router.route, user_message, chat_history
+            )
+        ):
+            response, _ = await self.run_with_content_safety_input(
+                user_message, asyncio.sleep(0)
+            )
+            return response, [(function_name, {"question": user_message})]
 
-        # Call function to determine route
         llm_helper = LLMHelper()
 
         system_message = """You help employees to navigate only private information sources.
         You must prioritize the function call over your general knowledge for any question by calling the search_documents function.
+        When the user asks several separate questions in one message, call the search_documents function once for each of them, in parallel.
         Call the text_processing function when the user request an operation on the current context, such as translate, summarize, or paraphrase. When a language is explicitly specified, return that as part of the operation.
         When directly replying to the user, always reply in the language the user is speaking.
         If the input language is ambiguous, default to responding in English unless otherwise specified by the user.
@@ -74,71 +98,199 @@ class OpenAIFunctionsOrchestrator(OrchestratorBase):
             messages.append({"role": message["role"], "content": message["content"]})
         messages.append({"role": "user", "content": user_message})
 
-        result = llm_helper.get_chat_completion_with_functions(
-            messages, self.functions, function_call="auto"
+        # Call Content Safety tool, and the routing call once it has passed
+        response, result = await self.run_with_content_safety_input(
+            user_message,
+            asyncio.to_thread(self.call_routing_llm, llm_helper, messages),
+            speculative=True,
         )
+        if response:
+            return response, []
+
         self.log_tokens(
             prompt_tokens=result.usage.prompt_tokens,
             completion_tokens=result.usage.completion_tokens,
         )
 
-        # TODO: call content safety if needed
-
-        if result.choices[0].finish_reason == "function_call":
+        if result.choices[0].finish_reason == "tool_calls":
             logger.info("Function call detected")
-            if result.choices[0].message.function_call.name == "search_documents":
-                logger.info("search_documents function detected")
-                question = json.loads(
-                    result.choices[0].message.function_call.arguments
-                )["question"]
-                # run answering chain
-                answering_tool = QuestionAnswerTool()
-                answer = answering_tool.answer_question(question, chat_history)
-
-                self.log_tokens(
-                    prompt_tokens=answer.prompt_tokens,
-                    completion_tokens=answer.completion_tokens,
-                )
+            function_calls = [
+                (tool_call.function.name, json.loads(tool_call.function.arguments))
+                for tool_call in result.choices[0].message.tool_calls
+            ]
+        else:
+            logger.info("No function call detected")
+            function_calls = [(None, {"content": result.choices[0].message.content})]
 
-                # Run post prompt if needed
-                if self.config.prompts.enable_post_answering_prompt:
-                    logger.debug("Running post answering prompt")
-                    post_prompt_tool = PostPromptTool()
-                    answer = post_prompt_tool.validate_answer(answer)
-                    self.log_tokens(
-                        prompt_tokens=answer.prompt_tokens,
-                        completion_tokens=answer.completion_tokens,
-                    )
-            elif result.choices[0].message.function_call.name == "text_processing":
-                logger.info("text_processing function detected")
-                text = json.loads(result.choices[0].message.function_call.arguments)[
-                    "text"
-                ]
-                operation = json.loads(
-                    result.choices[0].message.function_call.arguments
-                )["operation"]
-                text_processing_tool = TextProcessingTool()
-                answer = text_processing_tool.answer_question(
-                    user_message, chat_history, text=text, operation=operation
-                )
-                self.log_tokens(
-                    prompt_tokens=answer.prompt_tokens,
-                    completion_tokens=answer.completion_tokens,
+        logger.info(
+            "Intent routing decision",
+            extra={
+                "intent_route": ",".join(
+                    function_name or "none" for function_name, _ in function_calls
+                ),
+                "intent_router": "llm",
+            },
+        )
+        return None, function_calls
+
+    def call_routing_llm(self, llm_helper: LLMHelper, messages: List[dict]):
+        with self.trace_stage("routing_llm") as span:
+            result = llm_helper.get_chat_completion_with_tools(
+                messages,
+                [
+                    {"type": "function", "function": function}
+                    for function in self.functions
+                ],
+                tool_choice="auto",
+            )
+            set_token_attributes(
+                span, result.usage.prompt_tokens, result.usage.completion_tokens
+            )
+            return result
+
+    async def orchestrate(
+        self, user_message: str, chat_history: List[dict], **kwargs: dict
+    ) -> list[dict]:
+        # Call function to determine route
+        response, function_calls = await self.route(user_message, chat_history)
+        if response:
+            return response
+
+        answer = await self.answer_function_calls(
+            user_message, chat_history, function_calls
+        )
+
+        # Call Content Safety tool and format the output for the UI
+        return self.format_answer(user_message, answer)
+
+    async def answer_function_calls(
+        self,
+        user_message: str,
+        chat_history: List[dict],
+        function_calls: List[Tuple[Optional[str], dict]],
+    ) -> Answer:
+        """Answers the function calls concurrently, and merges their answers."""
+        answers = await asyncio.gather(
+            *(
+                asyncio.to_thread(
+                    self.answer_function_call,
+                    user_message,
+                    chat_history,
+                    function_name,
+                    arguments,
                 )
+                for function_name, arguments in function_calls
+            )
+        )
+        return self.merge_answers(user_message, answers)
+
+    def answer_function_call(
+        self,
+        user_message: str,
+        chat_history: List[dict],
+        function_name: Optional[str],
+        arguments: dict,
+    ) -> Answer:
+        # TODO: call content safety if needed
+
+        if function_name == "search_documents":
+            logger.info("search_documents function detected")
+            # run answering chain
+            answering_tool = QuestionAnswerTool()
+            answer = answering_tool.answer_question(
+                arguments["question"],
+                chat_history,
+                search_queries=arguments.get("search_queries"),
+            )
+
+            self.log_tokens(
+                prompt_tokens=answer.prompt_tokens,
+                completion_tokens=answer.completion_tokens,
+            )
+
+            answer = self.run_post_prompt(answer)
+        elif function_name == "text_processing":
+            logger.info("text_processing function detected")
+            text_processing_tool = TextProcessingTool()
+            answer = text_processing_tool.answer_question(
+                user_message,
+                chat_history,
+                text=arguments["text"],
+                operation=arguments["operation"],
+            )
+            self.log_tokens(
+                prompt_tokens=answer.prompt_tokens,
+                completion_tokens=answer.completion_tokens,
+            )
         else:
-            logger.info("No function call detected")
-            text = result.choices[0].message.content
-            answer = Answer(question=user_message, answer=text)
-
-        # Call Content Safety tool
-        if self.config.prompts.enable_content_safety:
-            if response := self.call_content_safety_output(user_message, answer.answer):
-                return response
-
-        # Format the output for the UI
-        messages = self.output_parser.parse(
-            question=answer.question,
-            answer=answer.answer,
-            source_documents=answer.source_documents,
+            answer = Answer(question=user_message, answer=arguments["content"])
+
+        return answer
+
+    async def orchestrate_stream(
+        self, user_message: str, chat_history: List[dict], **kwargs: dict
+    ) -> AsyncIterator[list[dict]]:
+        # Call function to determine route
+        response, function_calls = await self.route(user_message, chat_history)
+        if response:
+            yield response
+            return
+
+        if [function_name for function_name, _ in function_calls] != [
+            "search_documents"
+        ]:
+            # Only a single answering chain streams, anything else is answered in one go
+            answer = await self.answer_function_calls(
+                user_message, chat_history, function_calls
+            )
+            yield self.format_answer(user_message, answer)
+            return
+
+        logger.info("search_documents function detected")
+        arguments = function_calls[0][1]
+
+        # run answering chain, sending the citations as soon as retrieval has finished
+        answering_tool = QuestionAnswerTool()
+        answer_stream = answering_tool.stream_answer_question(
+            arguments["question"],
+            chat_history,
+            search_queries=arguments.get("search_queries"),
         )
-        return messages
+        tool_message = None
+        answer = None
+        while (
+            streamed_answer := await asyncio.to_thread(next, answer_stream, None)
+        ) is not None:
+            answer = streamed_answer
+            if tool_message is None:
+                tool_message = self.output_parser.parse_partial(
+                    question=answer.question,
+                    answer="",
+                    source_documents=answer.source_documents,
+                )[0]
+            yield [
+                tool_message,
+                {"role": "assistant", "content": answer.answer, "end_turn": False},
+            ]
+
+        self.log_tokens(
+            prompt_tokens=answer.prompt_tokens,
+            completion_tokens=answer.completion_tokens,
+        )
+
+        answer = self.run_post_prompt(answer)
+
+        # Call Content Safety tool and format the output for the UI
+        yield self.format_answer(user_message, answer)
+
+    def run_post_prompt(self, answer: Answer) -> Answer:
+        # Run post prompt if needed
+        if self.config.prompts.enable_post_answering_prompt:
+            logger.debug("Running post answering prompt")
+            post_prompt_tool = PostPromptTool()
+            answer = post_prompt_tool.validate_answer(answer)
+            self.log_tokens(
+                prompt_tokens=answer.prompt_tokens,
+                completion_tokens=answer.completion_tokens,
+            )
+        return answer
@@ -1,16 +1,36 @@
+import asyncio
 import logging
+import threading
 from uuid import uuid4
-from typing import List, Optional
+from typing import Any, AsyncIterator, Coroutine, List, Optional
 from abc import ABC, abstractmethod
+from ..common.answer import Answer
 from ..loggers.conversation_logger import ConversationLogger
 from ..helpers.config.config_helper import ConfigHelper
-from ..parser.output_parser_tool import OutputParserTool
+from ..helpers.env_helper import EnvHelper
+from ..helpers.telemetry import trace_stage
+from ..parser.output_parser_tool import DOC_REFERENCE_PATTERN, OutputParserTool
+from ..tools.chat_history_compactor import ChatHistoryCompactor
 from ..tools.content_safety_checker import ContentSafetyChecker
 
 logger = logging.getLogger(__name__)
 
 
+def _discard_result(task: asyncio.Future):
+    if task.cancelled():
+        return
+    if error := task.exception():
+        logger.debug("Discarded speculative work failed: %s", error)
+        return
+    close = getattr(task.result(), "close", None)
+    if callable(close):
+        close()
+
+
 class OrchestratorBase(ABC):
+    # Tool calls answered in parallel log their tokens from several threads
+    _tokens_lock = threading.Lock()
+
     def __init__(self) -> None:
         super().__init__()
         self.config = ConfigHelper.get_active_config_or_default()
@@ -22,9 +42,18 @@ class OrchestratorBase(ABC):
         self.output_parser = OutputParserTool()
 
     def log_tokens(self, prompt_tokens, completion_tokens):
-        self.tokens["prompt"] += prompt_tokens
-        self.tokens["completion"] += completion_tokens
-        self.tokens["total"] += prompt_tokens + completion_tokens
+        with self._tokens_lock:
+            self.tokens["prompt"] += prompt_tokens
+            self.tokens["completion"] += completion_tokens
+            self.tokens["total"] += prompt_tokens + completion_tokens
+
+    def trace_stage(self, stage: str, **attributes):
+        """Traces a stage of answering the message, see telemetry.trace_stage."""
+        return trace_stage(
+            stage,
+            orchestrator_strategy=self.config.orchestrator.strategy.value,
+            **attributes,
+        )
 
     @abstractmethod
     async def orchestrate(
@@ -32,13 +61,24 @@ class OrchestratorBase(ABC):
     ) -> list[dict]:
         pass
 
+    async def orchestrate_stream(
+        self, user_message: str, chat_history: List[dict], **kwargs: dict
+    ) -> AsyncIterator[list[dict]]:
+        """
+        Yields the response messages as they are being generated, each time in full.
+        Orchestrators that do not support streaming yield the complete response once.
+        """
+        yield await self.orchestrate(user_message, chat_history, **kwargs)
+
     def call_content_safety_input(self, user_message: str):
         logger.debug("Calling content safety with question")
-        filtered_user_message = (
-            self.content_safety_checker.validate_input_and_replace_if_harmful(
-                user_message
+        with self.trace_stage("input_safety") as span:
+            filtered_user_message = (
+                self.content_safety_checker.validate_input_and_replace_if_harmful(
+                    user_message
+                )
             )
-        )
+            span.set_attribute("flagged", user_message != filtered_user_message)
         if user_message != filtered_user_message:
             logger.warning("Content safety detected harmful content in question")
             messages = self.output_parser.parse(
@@ -48,11 +88,59 @@ class OrchestratorBase(ABC):
 
         return None
 
+    async def run_with_content_safety_input(
+        self,
+        user_message: str,
+        work: Coroutine[Any, Any, Any],
+        speculative: bool = False,
+    ) -> tuple[Optional[list[dict]], Any]:
+        """
+        Runs `work` once the input content safety check has passed.
+
+        When `speculative` is set and SPECULATIVE_CONTENT_SAFETY is enabled, `work` is started
+        concurrently with the check instead of after it. Work run in a thread cannot be stopped,
+        so only cheap calls, such as routing, should be speculative. If the input is flagged, the
+        result of `work` is discarded once it finishes, and closed if it can be. Either way
+        nothing produced by `work` is returned before the verdict.
+
+        Returns:
+            tuple: The content safety response if the input was flagged, otherwise None,
+            and the result of `work`, or None if the input was flagged.
+        """
+        if not self.config.prompts.enable_content_safety:
+            return None, await work
+
+        if not speculative or not EnvHelper().SPECULATIVE_CONTENT_SAFETY:
+            if response := self.call_content_safety_input(user_message):
+                work.close()
+                return response, None
+            return None, await work
+
+        work_task = asyncio.ensure_future(work)
+        try:
+            response = await asyncio.to_thread(
+                self.call_content_safety_input, user_message
+            )
+        except BaseException:
+            work_task.add_done_callback(_discard_result)
+            raise
+
+        if response:
+            logger.debug("Discarding speculative work for flagged question")
+            work_task.add_done_callback(_discard_result)
+            return response, None
+
+        return None, await work_task
+
     def call_content_safety_output(self, user_message: str, answer: str):
         logger.debug("Calling content safety with answer")
-        filtered_answer = (
-            self.content_safety_checker.validate_output_and_replace_if_harmful(answer)
-        )
+        with self.trace_stage("output_safety") as span:
+            filtered_answer = (
+                self.content_safety_checker.validate_output_and_replace_if_harmful(
+                    answer
+                )
+            )
+            span.set_attribute("flagged", answer != filtered_answer)
         if answer != filtered_answer:
             logger.warning("Content safety detected harmful content in answer")
             messages = self.output_parser.parse(
@@ -62,6 +150,58 @@ class OrchestratorBase(ABC):
 
         return None
 
+    def format_answer(self, user_message: str, answer: Answer) -> list[dict]:
+        """Runs the output content safety check and formats the answer for the UI."""
+        if self.config.prompts.enable_content_safety:
+            if response := self.call_content_safety_output(user_message, answer.answer):
+                return response
+
+        return self.output_parser.parse(
+            question=answer.question,
+            answer=answer.answer,
+            source_documents=answer.source_documents,
+        )
+
+    def merge_answers(self, user_message: str, answers: List[Answer]) -> Answer:
+        """
+        Combines the answers of the tool calls the LLM requested in parallel into one answer to the
+        user message. The [docN] references of each answer are renumbered to the merged list of
+        source documents, in which a document used by several answers appears once.
+        """
+        if len(answers) == 1:
+            return answers[0]
+
+        source_documents = []
+        positions = {}
+        texts = []
+        for answer in answers:
+            references = {}
+            for number, document in enumerate(answer.source_documents, start=1):
+                # Documents without an id are never taken for one another
+                key = document.id or f"{len(texts)}-{number}"
+                if key not in positions:
+                    source_documents.append(document)
+                    positions[key] = len(source_documents)
+                references[number] = positions[key]
+            texts.append(
+                DOC_REFERENCE_PATTERN.sub(
+                    lambda match: (
+                        f"[doc{references[int(match.group(1))]}]"
+                        if int(match.group(1)) in references
+                        else ""
+                    ),
+                    answer.answer,
+                )
+            )
+
+        return Answer(
+            question=user_message,
+            answer="\n\n".join(texts),
+            source_documents=source_documents,
+            prompt_tokens=sum(answer.prompt_tokens or 0 for answer in answers),
+            completion_tokens=sum(answer.completion_tokens or 0 for answer in answers),
+        )
+
     async def handle_message(
         self,
         user_message: str,
@@ -69,7 +209,41 @@ class OrchestratorBase(ABC):
         conversation_id: Optional[str],
         **kwargs: Optional[dict],
     ) -> dict:
+        chat_history = self.compact_chat_history(chat_history, conversation_id)
         result = await self.orchestrate(user_message, chat_history, **kwargs)
+        self.log_message(user_message, conversation_id, result)
+        return result
+
+    async def handle_message_stream(
+        self,
+        user_message: str,
+        chat_history: List[dict],
+        conversation_id: Optional[str],
+        **kwargs: Optional[dict],
+    ) -> AsyncIterator[list[dict]]:
+        chat_history = self.compact_chat_history(chat_history, conversation_id)
+        result = []
+        async for result in self.orchestrate_stream(
+            user_message, chat_history, **kwargs
+        ):
+            yield result
+        self.log_message(user_message, conversation_id, result)
+
+    def compact_chat_history(
+        self, chat_history: List[dict], conversation_id: Optional[str]
+    ) -> List[dict]:
+        """Replaces the older turns with a summary when CHAT_HISTORY_SUMMARIZATION is enabled."""
+        env_helper = EnvHelper()
+        if not env_helper.CHAT_HISTORY_SUMMARIZATION:
+            return chat_history
+
+        return ChatHistoryCompactor(
+            env_helper.CHAT_HISTORY_SUMMARIZATION_KEEP_TURNS
+        ).compact(chat_history, conversation_id)
+
+    def log_message(
+        self, user_message: str, conversation_id: Optional[str], result: list[dict]
+    ):
         if self.config.logging.log_tokens:
             custom_dimensions = {
                 "conversation_id": conversation_id,
@@ -80,14 +254,17 @@ class OrchestratorBase(ABC):
             }
             logger.info("Token Consumption", extra=custom_dimensions)
         if self.config.logging.log_user_interactions:
-            self.conversation_logger.log(
-                messages=[
-                    {
-                        "role": "user",
-                        "content": user_message,
-                        "conversation_id": conversation_id,
-                    }
-                ]
-                + result
-            )
-        return result
+            with self.trace_stage(
+                "conversation_logging",
+                asynchronous=self.conversation_logger.log_asynchronously,
+            ):
+                self.conversation_logger.log(
+                    messages=[
+                        {
+                            "role": "user",
+                            "content": user_message,
+                            "conversation_id": conversation_id,
+                        }
+                    ]
+                    + result
+                )
@@ -1,7 +1,13 @@
+import asyncio
 import logging
-from typing import List
+import threading
+import time
+from typing import AsyncIterator, Iterator, List, NamedTuple, Optional
 import json
-import tempfile
+
+import requests
+from azure.ai.ml.entities import EndpointAuthKeys
+from requests.adapters import HTTPAdapter
 
 from .orchestrator_base import OrchestratorBase
 from ..common.answer import Answer
@@ -12,7 +18,24 @@ from ..helpers.env_helper import EnvHelper
 logger = logging.getLogger(__name__)
 
 
+class ScoringEndpoint(NamedTuple):
+    scoring_uri: str
+    token: str
+    # When the token expires, in seconds since the epoch, None for a key
+    expires_on: Optional[float]
+
+
 class PromptFlowOrchestrator(OrchestratorBase):
+    # Tokens are renewed this long before they expire
+    _TOKEN_RENEWAL_SECONDS = 300
+    _POOL_SIZE = 32
+    _TIMEOUT = (10, 300)
+
+    # Shared by all the requests of the process, which each run on their own event loop
+    _session: Optional[requests.Session] = None
+    _scoring_endpoints: dict[tuple[str, str], ScoringEndpoint] = {}
+    _lock = threading.Lock()
+
     def __init__(self) -> None:
         super().__init__()
         self.llm_helper = LLMHelper()
@@ -26,25 +49,18 @@ class PromptFlowOrchestrator(OrchestratorBase):
     async def orchestrate(
         self, user_message: str, chat_history: List[dict], **kwargs: dict
     ) -> list[dict]:
-        # Call Content Safety tool on question
-        if self.config.prompts.enable_content_safety:
-            if response := self.call_content_safety_input(user_message):
-                return response
-
-        transformed_chat_history = self.transform_chat_history(chat_history)
-
-        file_name = self.transform_data_into_file(
-            user_message, transformed_chat_history
+        body = self.create_request_body(
+            user_message, self.transform_chat_history(chat_history)
         )
 
-        # Call the Prompt Flow service
+        # Call Content Safety tool on question, and the Prompt Flow service once it has passed
         try:
-            response = self.ml_client.online_endpoints.invoke(
-                endpoint_name=self.enpoint_name,
-                request_file=file_name,
-                deployment_name=self.deployment_name,
+            response, result = await self.run_with_content_safety_input(
+                user_message, asyncio.to_thread(self.score, body)
             )
-            result = json.loads(response)
+            if response:
+                return response
+
             logger.debug(result)
         except Exception as error:
             logger.error("The request failed: %s", error)
@@ -59,18 +75,152 @@ class PromptFlowOrchestrator(OrchestratorBase):
             ),
         )
 
-        # Call Content Safety tool on answer
-        if self.config.prompts.enable_content_safety:
-            if response := self.call_content_safety_output(user_message, answer.answer):
-                return response
+        # Call Content Safety tool on answer, and format the output for the UI
+        return self.format_answer(user_message, answer)
 
-        # Format the output for the UI
-        messages = self.output_parser.parse(
-            question=answer.question,
-            answer=answer.answer,
-            source_documents=answer.source_documents,
+    async def orchestrate_stream(
+        self, user_message: str, chat_history: List[dict], **kwargs: dict
+    ) -> AsyncIterator[list[dict]]:
+        body = self.create_request_body(
+            user_message, self.transform_chat_history(chat_history)
         )
-        return messages
+
+        try:
+            response, outputs = await self.run_with_content_safety_input(
+                user_message, asyncio.to_thread(self.score_stream, body)
+            )
+            if response:
+                yield response
+                return
+
+            answer = Answer(question=user_message, answer="", source_documents=[])
+            tool_message = None
+            while (output := await asyncio.to_thread(next, outputs, None)) is not None:
+                if "citations" in output or tool_message is None:
+                    answer.source_documents = (
+                        self.transform_citations_into_source_documents(
+                            output.get("citations", {})
+                        )
+                    )
+                    tool_message = self.output_parser.parse_partial(
+                        question=user_message,
+                        answer="",
+                        source_documents=answer.source_documents,
+                    )[0]
+                answer.answer += output.get("chat_output", "")
+                yield [
+                    tool_message,
+                    {"role": "assistant", "content": answer.answer, "end_turn": False},
+                ]
+        except Exception as error:
+            logger.error("The request failed: %s", error)
+            raise RuntimeError(f"The request failed: {error}") from error
+
+        # Call Content Safety tool on answer, and format the output for the UI
+        yield self.format_answer(user_message, answer)
+
+    def score(self, body: dict) -> dict:
+        """Scores the request body with the Prompt Flow deployment."""
+        with self.post(body, stream=False) as response:
+            return response.json()
+
+    def score_stream(self, body: dict) -> Iterator[dict]:
+        """
+        Scores the request body with the Prompt Flow deployment, returning the outputs of the flow as
+        it streams them. Flows that do not stream return all their outputs at once.
+        """
+        response = self.post(body, stream=True)
+        if not response.headers.get("Content-Type", "").startswith("text/event-stream"):
+            with response:
+                return iter([response.json()])
+        return self._read_events(response)
+
+    def post(self, body: dict, stream: bool) -> requests.Response:
+        """
+        Posts the request body to the scoring URI of the deployment, with a pooled connection.
+        The scoring URI and credentials are resolved again once if they were rejected.
+        """
+        for attempt in range(2):
+            scoring_endpoint = self.get_scoring_endpoint(renew=attempt > 0)
+            response = self.get_session().post(
+                scoring_endpoint.scoring_uri,
+                json=body,
+                headers={
+                    "Authorization": f"Bearer {scoring_endpoint.token}",
+                    "azureml-model-deployment": self.deployment_name,
+                    "Accept": (
+                        "text/event-stream, application/json"
+                        if stream
+                        else "application/json"
+                    ),
+                },
+                stream=stream,
+                timeout=self._TIMEOUT,
+            )
+            if response.status_code not in (401, 403) or attempt > 0:
+                break
+            response.close()
+
+        if not response.ok:
+            response.close()
+        response.raise_for_status()
+        return response
+
+    def get_scoring_endpoint(self, renew: bool = False) -> ScoringEndpoint:
+        """
+        The scoring URI of the endpoint and the key or token to call it with, resolved through the
+        management plane once and shared by the process until the token expires.
+        """
+        key = (self.enpoint_name, self.deployment_name)
+        with PromptFlowOrchestrator._lock:
+            scoring_endpoint = PromptFlowOrchestrator._scoring_endpoints.get(key)
+            if (
+                renew
+                or scoring_endpoint is None
+                or (
+                    scoring_endpoint.expires_on is not None
+                    and scoring_endpoint.expires_on - self._TOKEN_RENEWAL_SECONDS
+                    < time.time()
+                )
+            ):
+                scoring_endpoint = self._resolve_scoring_endpoint()
+                PromptFlowOrchestrator._scoring_endpoints[key] = scoring_endpoint
+            return scoring_endpoint
+
+    @classmethod
+    def get_session(cls) -> requests.Session:
+        with cls._lock:
+            if cls._session is None:
+                session = requests.Session()
+                session.mount(
+                    "https://",
+                    HTTPAdapter(
+                        pool_connections=cls._POOL_SIZE, pool_maxsize=cls._POOL_SIZE
+                    ),
+                )
+                cls._session = session
+            return cls._session
+
+    def _resolve_scoring_endpoint(self) -> ScoringEndpoint:
+        logger.info(
+            "Resolving Prompt Flow endpoint", extra={"endpoint": self.enpoint_name}
+        )
+        endpoint = self.ml_client.online_endpoints.get(self.enpoint_name)
+        credentials = self.ml_client.online_endpoints.get_keys(self.enpoint_name)
+        if isinstance(credentials, EndpointAuthKeys):
+            return ScoringEndpoint(endpoint.scoring_uri, credentials.primary_key, None)
+        return ScoringEndpoint(
+            endpoint.scoring_uri, credentials.access_token, credentials.expiry_time_utc
+        )
+
+    def _read_events(self, response: requests.Response) -> Iterator[dict]:
+        with response:
+            for line in response.iter_lines(decode_unicode=True):
+                if line and line.startswith("data:"):
+                    yield json.loads(line.removeprefix("data:"))
+
+    def create_request_body(self, user_message: str, chat_history: List[dict]) -> dict:
+        return {"chat_input": user_message, "chat_history": chat_history}
 
     def transform_chat_history(self, chat_history):
         transformed_chat_history = []
@@ -91,14 +241,6 @@ class PromptFlowOrchestrator(OrchestratorBase):
                 )
         return transformed_chat_history
 
-    def transform_data_into_file(self, user_message, chat_history):
-        # Transform data input into a file for the Prompt Flow service
-        data = {"chat_input": user_message, "chat_history": chat_history}
-        body = str.encode(json.dumps(data))
-        with tempfile.NamedTemporaryFile(delete=False) as file:
-            file.write(body)
-        return file.name
-
     def transform_citations_into_source_documents(self, citations):
         source_documents = []
 
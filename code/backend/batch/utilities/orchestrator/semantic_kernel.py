@@ -1,3 +1,4 @@
+import asyncio
 import json
 import logging
 
@@ -5,12 +6,21 @@ from semantic_kernel import Kernel
 from semantic_kernel.connectors.ai.function_call_behavior import FunctionCallBehavior
 from semantic_kernel.contents import ChatHistory
 from semantic_kernel.contents.chat_message_content import ChatMessageContent
+from semantic_kernel.contents.function_call_content import FunctionCallContent
 from semantic_kernel.contents.utils.finish_reason import FinishReason
+from semantic_kernel.functions import KernelPlugin
+from semantic_kernel.functions.function_result import FunctionResult
+from semantic_kernel.functions.kernel_function_from_prompt import (
+    KernelFunctionFromPrompt,
+)
 
 from ..common.answer import Answer
+from ..helpers.env_helper import EnvHelper
 from ..helpers.llm_helper import LLMHelper
+from ..helpers.telemetry import set_token_attributes
 from ..plugins.chat_plugin import ChatPlugin
 from ..plugins.post_answering_plugin import PostAnsweringPlugin
+from .intent_router import IntentRouter
 from .orchestrator_base import OrchestratorBase
 
 logger = logging.getLogger(__name__)
@@ -30,95 +40,164 @@ class SemanticKernelOrchestrator(OrchestratorBase):
             plugin=PostAnsweringPlugin(), plugin_name="PostAnswering"
         )
 
-    async def orchestrate(
-        self, user_message: str, chat_history: list[dict], **kwargs: dict
-    ) -> list[dict]:
-        # Call Content Safety tool
-        if self.config.prompts.enable_content_safety:
-            if response := self.call_content_safety_input(user_message):
-                return response
-
-        system_message = """You help employees to navigate only private information sources.
-You must prioritize the function call over your general knowledge for any question by calling the search_documents function.
-Call the text_processing function when the user request an operation on the current context, such as translate, summarize, or paraphrase. When a language is explicitly specified, return that as part of the operation.
-When directly replying to the user, always reply in the language the user is speaking.
-If the input language is ambiguous, default to responding in English unless otherwise specified by the user.
-You **must not** respond if asked to List all documents in your repository.
-"""
-
-        self.kernel.add_plugin(
-            plugin=ChatPlugin(question=user_message, chat_history=chat_history),
-            plugin_name="Chat",
-        )
-
         settings = self.llm_helper.get_sk_service_settings(self.chat_service)
         settings.function_call_behavior = FunctionCallBehavior.EnableFunctions(
             filters={"included_plugins": ["Chat"]}
         )
-
-        orchestrate_function = self.kernel.add_function(
-            plugin_name="Main",
+        self.orchestrate_function = KernelFunctionFromPrompt(
             function_name="orchestrate",
+            plugin_name="Main",
             prompt="{{$chat_history}}{{$user_message}}",
             prompt_execution_settings=settings,
         )
+        self.intent_router = (
+            IntentRouter() if EnvHelper().LOCAL_INTENT_ROUTING else None
+        )
 
-        history = ChatHistory(system_message=system_message)
-
-        for message in chat_history.copy():
-            history.add_message(message)
+    def create_request_kernel(
+        self, user_message: str, chat_history: list[dict]
+    ) -> Kernel:
+        """
+        A copy of the kernel with the Chat plugin of the request, sharing the services and the other
+        plugins, so that the orchestrator's kernel is left unchanged.
+        """
+        return self.kernel.model_copy(
+            update={
+                "plugins": {
+                    **self.kernel.plugins,
+                    "Chat": KernelPlugin.from_object(
+                        "Chat",
+                        ChatPlugin(question=user_message, chat_history=chat_history),
+                    ),
+                }
+            }
+        )
 
-        result: ChatMessageContent = (
-            await self.kernel.invoke(
-                function=orchestrate_function,
+    async def call_routing_llm(
+        self, kernel: Kernel, history: ChatHistory, user_message: str
+    ) -> FunctionResult:
+        with self.trace_stage("routing_llm") as span:
+            function_result = await kernel.invoke(
+                function=self.orchestrate_function,
                 chat_history=history,
                 user_message=user_message,
             )
-        ).value[0]
-
-        self.log_tokens(
-            prompt_tokens=result.metadata["usage"].prompt_tokens,
-            completion_tokens=result.metadata["usage"].completion_tokens,
-        )
+            usage = function_result.value[0].metadata["usage"]
+            set_token_attributes(span, usage.prompt_tokens, usage.completion_tokens)
+            return function_result
 
-        if result.finish_reason == FinishReason.TOOL_CALLS:
-            logger.info("Semantic Kernel function call detected")
+    async def call_function(
+        self, kernel: Kernel, function_name: str, arguments: dict
+    ) -> Answer:
+        logger.info(f"{function_name} function detected")
+        function = kernel.get_function_from_fully_qualified_function_name(function_name)
 
-            function_name = result.items[0].name
-            logger.info(f"{function_name} function detected")
-            function = self.kernel.get_function_from_fully_qualified_function_name(
-                function_name
-            )
+        answer: Answer = (await kernel.invoke(function=function, **arguments)).value
 
-            arguments = json.loads(result.items[0].arguments)
+        self.log_tokens(
+            prompt_tokens=answer.prompt_tokens,
+            completion_tokens=answer.completion_tokens,
+        )
 
+        # Run post prompt if needed
+        if (
+            self.config.prompts.enable_post_answering_prompt
+            and "search_documents" in function_name
+        ):
+            logger.debug("Running post answering prompt")
             answer: Answer = (
-                await self.kernel.invoke(function=function, **arguments)
+                await kernel.invoke(
+                    function_name="validate_answer",
+                    plugin_name="PostAnswering",
+                    answer=answer,
+                )
             ).value
 
             self.log_tokens(
                 prompt_tokens=answer.prompt_tokens,
                 completion_tokens=answer.completion_tokens,
             )
+        return answer
 
-            # Run post prompt if needed
-            if (
-                self.config.prompts.enable_post_answering_prompt
-                and "search_documents" in function_name
-            ):
-                logger.debug("Running post answering prompt")
-                answer: Answer = (
-                    await self.kernel.invoke(
-                        function_name="validate_answer",
-                        plugin_name="PostAnswering",
-                        answer=answer,
+    async def orchestrate(
+        self, user_message: str, chat_history: list[dict], **kwargs: dict
+    ) -> list[dict]:
+        system_message = """You help employees to navigate only private information sources.
+You must prioritize the function call over your general knowledge for any question by calling the search_documents function.
+When the user asks several separate questions in one message, call the search_documents function once for each of them, in parallel.
+Call the text_processing function when the user request an operation on the current context, such as translate, summarize, or paraphrase. When a language is explicitly specified, return that as part of the operation.
+When directly replying to the user, always reply in the language the user is speaking.
+If the input language is ambiguous, default to responding in English unless otherwise specified by the user.
+You **must not** respond if asked to List all documents in your repository.
+"""
+
+        kernel = self.create_request_kernel(user_message, chat_history)
+
+        history = ChatHistory(system_message=system_message)
+
+        for message in chat_history.copy():
+            history.add_message(message)
+
+        if self.intent_router and (
+            local_function_name := await asyncio.to_thread(
+                self.intent_router.route, user_message, chat_history
+            )
+        ):
+            response, _ = await self.run_with_content_safety_input(
+                user_message, asyncio.sleep(0)
+            )
+            if response:
+                return response
+
+            function_calls = [
+                (f"Chat-{local_function_name}", {"question": user_message})
+            ]
+        else:
+            # Call Content Safety tool, and the routing call once it has passed
+            response, function_result = await self.run_with_content_safety_input(
+                user_message,
+                self.call_routing_llm(kernel, history, user_message),
+                speculative=True,
+            )
+            if response:
+                return response
+
+            result: ChatMessageContent = function_result.value[0]
+
+            self.log_tokens(
+                prompt_tokens=result.metadata["usage"].prompt_tokens,
+                completion_tokens=result.metadata["usage"].completion_tokens,
+            )
+
+            function_calls = []
+            if result.finish_reason == FinishReason.TOOL_CALLS:
+                logger.info("Semantic Kernel function call detected")
+                function_calls = [
+                    (item.name, json.loads(item.arguments))
+                    for item in result.items
+                    if isinstance(item, FunctionCallContent)
+                ]
+
+            logger.info(
+                "Intent routing decision",
+                extra={
+                    "intent_route": ",".join(
+                        function_name for function_name, _ in function_calls
                     )
-                ).value
+                    or "none",
+                    "intent_router": "llm",
+                },
+            )
 
-                self.log_tokens(
-                    prompt_tokens=answer.prompt_tokens,
-                    completion_tokens=answer.completion_tokens,
+        if function_calls:
+            # The LLM may call several functions in parallel, they are answered concurrently
+            answers = await asyncio.gather(
+                *(
+                    self.call_function(kernel, function_name, arguments)
+                    for function_name, arguments in function_calls
                 )
+            )
+            answer = self.merge_answers(user_message, answers)
         else:
             logger.info("No function call detected")
             answer = Answer(
@@ -1,12 +1,17 @@
 from typing import List
+import itertools
 import logging
 import re
 import json
 from .parser_base import ParserBase
 from ..common.source_document import SourceDocument
+from ..helpers.telemetry import trace_stage
 
 logger = logging.getLogger(__name__)
 
+DOC_REFERENCE_PATTERN = re.compile(r"\[doc(\d+)\]")
+DIGITS_PATTERN = re.compile(r"\d+")
+
 
 class OutputParserTool(ParserBase):
     def __init__(self) -> None:
@@ -17,21 +22,66 @@ class OutputParserTool(ParserBase):
 
     def _get_source_docs_from_answer(self, answer):
         # extract all [docN] from answer and extract N, and just return the N's as a list of ints
-        results = re.findall(r"\[doc(\d+)\]", answer)
+        results = DOC_REFERENCE_PATTERN.findall(answer)
         return [int(i) for i in results]
 
-    def _replace_last(self, text, old, new):
-        """Replaces the last occurence of a substring in a string
+    def _make_doc_references_sequential(self, answer):
+        """Renumbers every [docN] reference by order of appearance, in a single pass."""
+        counter = itertools.count(1)
+        return DOC_REFERENCE_PATTERN.sub(lambda _: f"[doc{next(counter)}]", answer)
 
-        This is done by reversing the string using [::-1], replacing the first occurence of the reversed substring, and
-        reversing the string again.
-        """
-        return (text[::-1].replace(old[::-1], new[::-1], 1))[::-1]
+    def _get_citation(self, doc: SourceDocument) -> dict:
+        markdown_url = doc.get_markdown_url()
+        filename = doc.get_filename()
+        return {
+            "content": markdown_url + "\n\n\n" + doc.content,
+            "id": doc.id,
+            "chunk_id": (
+                DIGITS_PATTERN.findall(doc.chunk_id)[-1]
+                if doc.chunk_id is not None
+                else doc.chunk
+            ),
+            "title": doc.title,
+            "filepath": doc.get_filename(include_path=True),
+            "url": markdown_url,
+            "metadata": {
+                "offset": doc.offset,
+                "source": doc.source,
+                "markdown_url": markdown_url,
+                "title": doc.title,
+                "original_url": doc.source,  # TODO: do we need this?
+                "chunk": doc.chunk,
+                "key": doc.id,
+                "filename": filename,
+            },
+        }
 
-    def _make_doc_references_sequential(self, answer, doc_ids):
-        for i, idx in enumerate(doc_ids):
-            answer = self._replace_last(answer, f"[doc{idx}]", f"[doc{i+1}]")
-        return answer
+    def parse_partial(
+        self,
+        question: str,
+        answer: str,
+        source_documents: List[SourceDocument] = [],
+    ) -> List[dict]:
+        """Formats an answer that is still being generated.
+
+        Every source document is returned as a citation, in retrieval order, so the [docN] references
+        generated so far resolve without renumbering. `parse` renumbers them once the answer is complete.
+        """
+        return [
+            {
+                "role": "tool",
+                "content": json.dumps(
+                    {
+                        "citations": [
+                            self._get_citation(doc) for doc in source_documents
+                        ],
+                        "intent": question,
+                    }
+                ),
+                "end_turn": False,
+            },
+            {"role": "assistant", "content": answer, "end_turn": False},
+        ]
 
     def parse(
         self,
@@ -39,10 +89,18 @@ class OutputParserTool(ParserBase):
         answer: str,
         source_documents: List[SourceDocument] = [],
         **kwargs: dict,
+    ) -> List[dict]:
+        with trace_stage("output_parsing") as span:
+            messages = self._parse(question, answer, source_documents)
+            span.set_attribute("source_count", len(source_documents))
+            return messages
+
+    def _parse(
+        self, question: str, answer: str, source_documents: List[SourceDocument]
     ) -> List[dict]:
         answer = self._clean_up_answer(answer)
         doc_ids = self._get_source_docs_from_answer(answer)
-        answer = self._make_doc_references_sequential(answer, doc_ids)
+        answer = self._make_doc_references_sequential(answer)
 
         # create return message object
         messages = [
@@ -64,32 +122,9 @@ class OutputParserTool(ParserBase):
             logger.debug(f"doc{idx}: {doc}")
 
             # Then update the citation object in the response, it needs to have filepath and chunk_id to render in the UI as a file
-            messages[0]["content"]["citations"].append(
-                {
-                    "content": doc.get_markdown_url() + "\n\n\n" + doc.content,
-                    "id": doc.id,
-                    "chunk_id": (
-                        re.findall(r"\d+", doc.chunk_id)[-1]
-                        if doc.chunk_id is not None
-                        else doc.chunk
-                    ),
-                    "title": doc.title,
-                    "filepath": doc.get_filename(include_path=True),
-                    "url": doc.get_markdown_url(),
-                    "metadata": {
-                        "offset": doc.offset,
-                        "source": doc.source,
-                        "markdown_url": doc.get_markdown_url(),
-                        "title": doc.title,
-                        "original_url": doc.source,  # TODO: do we need this?
-                        "chunk": doc.chunk,
-                        "key": doc.id,
-                        "filename": doc.get_filename(),
-                    },
-                }
-            )
+            messages[0]["content"]["citations"].append(self._get_citation(doc))
         if messages[0]["content"]["citations"] == []:
-            answer = re.sub(r"\[doc\d+\]", "", answer)
+            answer = DOC_REFERENCE_PATTERN.sub("", answer)
         messages.append({"role": "assistant", "content": answer, "end_turn": True})
         # everything in content needs to be stringified to work with Azure BYOD frontend
         messages[0]["content"] = json.dumps(messages[0]["content"])
@@ -4,6 +4,7 @@ from .search_handler_base import SearchHandlerBase
 from ..helpers.llm_helper import LLMHelper
 from ..helpers.azure_computer_vision_client import AzureComputerVisionClient
 from ..helpers.azure_search_helper import AzureSearchHelper
+from ..helpers.telemetry import trace_stage
 from ..common.source_document import SourceDocument
 import json
 from azure.search.documents.models import VectorizedQuery
@@ -69,50 +70,91 @@ class AzureSearchHandler(SearchHandlerBase):
             "*",
             select="id, title",
             include_total_count=True,
-            filter=f"source eq '{blob_url}_SAS_TOKEN_PLACEHOLDER_'",
+            filter=self.get_blob_url_filter(blob_url),
         )
 
-    def query_search(self, question) -> List[SourceDocument]:
-        encoding = tiktoken.get_encoding(self._ENCODER_NAME)
-        tokenised_question = encoding.encode(question)
+    def get_blob_url_filter(self, blob_url: str) -> str:
+        return f"source eq '{blob_url}_SAS_TOKEN_PLACEHOLDER_'"
 
-        if self.env_helper.USE_ADVANCED_IMAGE_PROCESSING:
-            vectorized_question = self.azure_computer_vision_client.vectorize_text(
-                question
+    def query_search(self, question) -> List[SourceDocument]:
+        with trace_stage("query_embedding"):
+            encoding = tiktoken.get_encoding(self._ENCODER_NAME)
+            question_embedding = self.llm_helper.generate_embeddings(
+                encoding.encode(question)
             )
-        else:
-            vectorized_question = None
+            vectorized_question = self._vectorize_question(question)
 
-        if self.env_helper.AZURE_SEARCH_USE_SEMANTIC_SEARCH:
-            results = self._semantic_search(
-                question, tokenised_question, vectorized_question
-            )
-        else:
-            results = self._hybrid_search(
-                question, tokenised_question, vectorized_question
+        return self._search(question, question_embedding, vectorized_question)
+
+    def query_search_many(self, questions: List[str]) -> List[SourceDocument]:
+        if len(questions) == 1:
+            return self.query_search(questions[0])
+
+        # The questions are embedded in one request, then searched for concurrently
+        with trace_stage("query_embedding"):
+            question_embeddings = self.llm_helper.generate_embeddings_batch(questions)
+
+        return self._fuse_rankings(
+            self._map_concurrently(
+                lambda question, question_embedding: self._search(
+                    question,
+                    question_embedding,
+                    self._vectorize_question(question),
+                ),
+                questions,
+                question_embeddings,
             )
+        )
+
+    def _vectorize_question(self, question: str) -> list[float] | None:
+        if self.env_helper.USE_ADVANCED_IMAGE_PROCESSING:
+            return self.azure_computer_vision_client.vectorize_text(question)
+        return None
+
+    def _search(
+        self,
+        question: str,
+        question_embedding: list[float],
+        vectorized_question: list[float] | None,
+    ) -> List[SourceDocument]:
+        with trace_stage(
+            "search",
+            top_k=self._fetch_count(),
+            semantic=self.env_helper.AZURE_SEARCH_USE_SEMANTIC_SEARCH,
+        ) as span:
+            if self.env_helper.AZURE_SEARCH_USE_SEMANTIC_SEARCH:
+                results = self._semantic_search(
+                    question, question_embedding, vectorized_question
+                )
+            else:
+                results = self._hybrid_search(
+                    question, question_embedding, vectorized_question
+                )
 
-        return self._convert_to_source_documents(results)
+            # The results are only fetched as they are iterated
+            source_documents = self._to_source_documents(results)
+            span.set_attribute("result_count", len(source_documents))
+            return source_documents
 
     def _semantic_search(
         self,
         question: str,
-        tokenised_question: list[int],
+        question_embedding: list[float],
         vectorized_question: list[float] | None,
     ):
         return self.search_client.search(
             search_text=question,
             vector_queries=[
                 VectorizedQuery(
-                    vector=self.llm_helper.generate_embeddings(tokenised_question),
-                    k_nearest_neighbors=self.env_helper.AZURE_SEARCH_TOP_K,
+                    vector=question_embedding,
+                    k_nearest_neighbors=self._fetch_count(),
                     fields=self._VECTOR_FIELD,
                 ),
                 *(
                     [
                         VectorizedQuery(
                             vector=vectorized_question,
-                            k_nearest_neighbors=self.env_helper.AZURE_SEARCH_TOP_K,
+                            k_nearest_neighbors=self._fetch_count(),
                             fields=self._IMAGE_VECTOR_FIELD,
                         )
                     ]
@@ -125,21 +167,21 @@ class AzureSearchHandler(SearchHandlerBase):
             semantic_configuration_name=self.env_helper.AZURE_SEARCH_SEMANTIC_SEARCH_CONFIG,
             query_caption="extractive",
             query_answer="extractive",
-            top=self.env_helper.AZURE_SEARCH_TOP_K,
+            top=self._fetch_count(),
         )
 
     def _hybrid_search(
         self,
         question: str,
-        tokenised_question: list[int],
+        question_embedding: list[float],
         vectorized_question: list[float] | None,
     ):
         return self.search_client.search(
             search_text=question,
             vector_queries=[
                 VectorizedQuery(
-                    vector=self.llm_helper.generate_embeddings(tokenised_question),
-                    k_nearest_neighbors=self.env_helper.AZURE_SEARCH_TOP_K,
+                    vector=question_embedding,
+                    k_nearest_neighbors=self._fetch_count(),
                     filter=self.env_helper.AZURE_SEARCH_FILTER,
                     fields=self._VECTOR_FIELD,
                 ),
@@ -147,7 +189,7 @@ class AzureSearchHandler(SearchHandlerBase):
                     [
                         VectorizedQuery(
                             vector=vectorized_question,
-                            k_nearest_neighbors=self.env_helper.AZURE_SEARCH_TOP_K,
+                            k_nearest_neighbors=self._fetch_count(),
                             fields=self._IMAGE_VECTOR_FIELD,
                         )
                     ]
@@ -157,7 +199,7 @@ class AzureSearchHandler(SearchHandlerBase):
             ],
             query_type="simple",  # this is the default value
             filter=self.env_helper.AZURE_SEARCH_FILTER,
-            top=self.env_helper.AZURE_SEARCH_TOP_K,
+            top=self._fetch_count(),
         )
 
     def _convert_to_source_documents(self, search_results) -> List[SourceDocument]:
@@ -172,6 +214,9 @@ class AzureSearchHandler(SearchHandlerBase):
                     chunk=source.get("chunk"),
                     offset=source.get("offset"),
                     page_number=source.get("page_number"),
+                    token_count=json.loads(source.get("metadata") or "{}").get(
+                        "token_count"
+                    ),
                 )
             )
         return source_documents
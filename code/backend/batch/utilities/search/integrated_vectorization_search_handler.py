@@ -6,10 +6,13 @@ from azure.search.documents.models import VectorizableTextQuery
 from azure.core.credentials import AzureKeyCredential
 from azure.identity import DefaultAzureCredential
 from ..common.source_document import SourceDocument
+from ..helpers.telemetry import trace_stage
 import re
 
 
 class IntegratedVectorizationSearchHandler(SearchHandlerBase):
+    _KEY_FIELD = "chunk_id"
+
     def create_search_client(self):
         if self._check_index_exists():
             return SearchClient(
@@ -59,14 +62,17 @@ class IntegratedVectorizationSearchHandler(SearchHandlerBase):
 
     def search_by_blob_url(self, blob_url: str):
         if self._check_index_exists():
-            title = blob_url.split(f"{self.env_helper.AZURE_BLOB_CONTAINER_NAME}/")[1]
             return self.search_client.search(
                 "*",
                 select="id, chunk_id, title",
                 include_total_count=True,
-                filter=f"title eq '{title}'",
+                filter=self.get_blob_url_filter(blob_url),
             )
 
+    def get_blob_url_filter(self, blob_url: str) -> str:
+        title = blob_url.split(f"{self.env_helper.AZURE_BLOB_CONTAINER_NAME}/")[1]
+        return f"title eq '{title}'"
+
     def delete_files(self, files):
         ids_to_delete = []
         files_to_delete = []
@@ -81,29 +87,37 @@ class IntegratedVectorizationSearchHandler(SearchHandlerBase):
 
     def query_search(self, question) -> List[SourceDocument]:
         if self._check_index_exists():
-            if self.env_helper.AZURE_SEARCH_USE_SEMANTIC_SEARCH:
-                search_results = self._semantic_search(question)
-            else:
-                search_results = self._hybrid_search(question)
-            return self._convert_to_source_documents(search_results)
+            # The question is embedded by the search service as part of the search
+            with trace_stage(
+                "search",
+                top_k=self._fetch_count(),
+                semantic=self.env_helper.AZURE_SEARCH_USE_SEMANTIC_SEARCH,
+            ) as span:
+                if self.env_helper.AZURE_SEARCH_USE_SEMANTIC_SEARCH:
+                    search_results = self._semantic_search(question)
+                else:
+                    search_results = self._hybrid_search(question)
+                source_documents = self._to_source_documents(search_results)
+                span.set_attribute("result_count", len(source_documents))
+                return source_documents
 
     def _hybrid_search(self, question: str):
         vector_query = VectorizableTextQuery(
             text=question,
-            k_nearest_neighbors=self.env_helper.AZURE_SEARCH_TOP_K,
+            k_nearest_neighbors=self._fetch_count(),
             fields=self._VECTOR_FIELD,
             exhaustive=True,
         )
         return self.search_client.search(
             search_text=question,
             vector_queries=[vector_query],
-            top=self.env_helper.AZURE_SEARCH_TOP_K,
+            top=self._fetch_count(),
         )
 
     def _semantic_search(self, question: str):
         vector_query = VectorizableTextQuery(
             text=question,
-            k_nearest_neighbors=self.env_helper.AZURE_SEARCH_TOP_K,
+            k_nearest_neighbors=self._fetch_count(),
             fields=self._VECTOR_FIELD,
             exhaustive=True,
         )
@@ -115,7 +129,7 @@ class IntegratedVectorizationSearchHandler(SearchHandlerBase):
             semantic_configuration_name=self.env_helper.AZURE_SEARCH_SEMANTIC_SEARCH_CONFIG,
             query_caption="extractive",
             query_answer="extractive",
-            top=self.env_helper.AZURE_SEARCH_TOP_K,
+            top=self._fetch_count(),
         )
 
     def _convert_to_source_documents(self, search_results) -> List[SourceDocument]:
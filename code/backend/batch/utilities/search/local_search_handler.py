@@ -0,0 +1,9 @@
+from .azure_search_handler import AzureSearchHandler
+from .local_search_index import LocalSearchIndex
+
+
+class LocalSearchHandler(AzureSearchHandler):
+    """Searches the local search index, with the same queries as for Azure AI Search."""
+
+    def create_search_client(self):
+        return LocalSearchIndex.get_index(self.env_helper)
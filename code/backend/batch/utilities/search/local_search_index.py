@@ -0,0 +1,671 @@
+import json
+import logging
+import math
+import os
+import re
+import threading
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from typing import Any, Iterable, List, Optional
+
+import numpy as np
+from azure.search.documents.models import IndexingResult, VectorizedQuery
+
+from ..helpers.env_helper import EnvHelper
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+_FILTER_CLAUSE_PATTERN = re.compile(
+    r"\s*(\w+)\s+(eq|ne)\s+('(?:[^']|'')*'|true|false|null|-?\d+(?:\.\d+)?)\s*(and\s+|$)",
+    re.IGNORECASE,
+)
+
+
+def _tokenize(text: str) -> List[str]:
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+def _parse_filter_value(value: str):
+    if value.startswith("'"):
+        return value[1:-1].replace("''", "'")
+    if value.lower() in ("true", "false"):
+        return value.lower() == "true"
+    if value.lower() == "null":
+        return None
+    return float(value) if "." in value else int(value)
+
+
+@contextmanager
+def _exclusive_file_lock(path: str):
+    """Holds an exclusive lock on the file, created if missing, against other processes."""
+    with open(path, "a+b") as file:
+        if os.name == "nt":
+            file.seek(0)
+            # LK_LOCK retries for ten seconds before failing, so wait for long writes
+            while True:
+                try:
+                    msvcrt.locking(file.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    pass
+            try:
+                yield
+            finally:
+                file.seek(0)
+                msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            fcntl.flock(file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+
+class LocalSearchResults(list):
+    """Search results with the count and facets accessors of the results of SearchClient.search."""
+
+    def __init__(self, results: List[dict], count: Optional[int], facets: dict):
+        super().__init__(results)
+        self._count = count
+        self._facets = facets
+
+    def get_count(self) -> Optional[int]:
+        return self._count
+
+    def get_facets(self) -> dict:
+        return self._facets
+
+
+class LocalSearchIndex:
+    """
+    A search index kept in a local directory, for development, CI and small deployments without Azure AI Search.
+
+    It implements the part of the SearchClient interface that the search handlers and the embedders use, so they
+    work with it unchanged: search with text and vector queries, OData `eq`/`ne` filters joined by `and`, paging,
+    counts and facets, and uploading and deleting documents by key.
+
+    Vectors are normalized and kept in a float32 or float16 matrix per vector field, memory-mapped from disk, and
+    searched by brute force, or only in the `ivf_probes` closest of `ivf_lists` k-means clusters when `ivf_lists`
+    is set. Text is ranked with BM25, and text and vector rankings are fused with reciprocal rank fusion, as Azure
+    AI Search does for hybrid queries.
+
+    Each write saves a new generation of the files before the manifest that points to them, and the index is
+    reloaded when the manifest changes, so processes can search while another writes. Writes hold a lock file,
+    so that processes writing at the same time, such as the admin app and the batch functions, do not lose
+    each other's updates.
+    """
+
+    KEY_FIELD = "id"
+    TEXT_FIELD = "content"
+    MANIFEST_FILE_NAME = "manifest.json"
+    LOCK_FILE_NAME = "index.lock"
+    BM25_K1 = 1.2
+    BM25_B = 0.75
+    RRF_K = 60
+    _DEFAULT_K_NEAREST_NEIGHBORS = 50
+    _IVF_MIN_ROWS_PER_LIST = 4
+    _IVF_ITERATIONS = 10
+    _FLOAT16_BLOCK_ROWS = 4096
+    _LOAD_ATTEMPTS = 3
+
+    _instances: dict[str, "LocalSearchIndex"] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(
+        self,
+        path: str,
+        vector_dtype: str = "float32",
+        ivf_lists: int = 0,
+        ivf_probes: int = 4,
+    ):
+        if vector_dtype not in ("float32", "float16"):
+            raise ValueError(f"Unsupported vector dtype: {vector_dtype}")
+        self.path = path
+        self.vector_dtype = np.dtype(vector_dtype)
+        self.ivf_lists = ivf_lists
+        self.ivf_probes = ivf_probes
+        self._lock = threading.RLock()
+        self._manifest_mtime: Optional[int] = None
+        self._load()
+
+    @classmethod
+    def get_index(cls, env_helper: EnvHelper) -> "LocalSearchIndex":
+        """Returns the index at LOCAL_SEARCH_INDEX_PATH, shared by everything in the process that uses it."""
+        path = os.path.abspath(env_helper.LOCAL_SEARCH_INDEX_PATH)
+        with cls._instances_lock:
+            if path not in cls._instances:
+                cls._instances[path] = cls(
+                    path,
+                    vector_dtype=env_helper.LOCAL_SEARCH_INDEX_VECTOR_DTYPE,
+                    ivf_lists=env_helper.LOCAL_SEARCH_INDEX_IVF_LISTS,
+                    ivf_probes=env_helper.LOCAL_SEARCH_INDEX_IVF_PROBES,
+                )
+            return cls._instances[path]
+
+    def search(
+        self,
+        search_text: Optional[str] = None,
+        *,
+        select: Optional[str | List[str]] = None,
+        filter: Optional[str] = None,
+        top: Optional[int] = None,
+        skip: Optional[int] = None,
+        include_total_count: bool = False,
+        facets: Optional[List[str]] = None,
+        vector_queries: Optional[List[VectorizedQuery]] = None,
+        **kwargs: Any,
+    ) -> LocalSearchResults:
+        """
+        Searches like SearchClient.search, returning the vector fields too unless fields are selected.
+        Other keyword arguments, such as the query type, are ignored, so a semantic query is answered
+        as a hybrid one.
+        """
+        with self._lock:
+            self._reload_if_changed()
+            rows = self._filter_rows(filter)
+
+            rankings = []
+            if search_text and search_text != "*":
+                rankings.append(self._text_search(search_text, rows))
+            for vector_query in vector_queries or []:
+                rankings.append(self._vector_search(vector_query, rows))
+
+            if not rankings:
+                all_rows = range(len(self._documents)) if rows is None else rows
+                ranked = [(int(row), 1.0) for row in all_rows]
+            elif len(rankings) == 1:
+                ranked = rankings[0]
+            else:
+                ranked = self._fuse(rankings)
+
+            facet_results = self._facets(facets or [], [row for row, _ in ranked])
+            start = skip or 0
+            end = None if top is None else start + top
+            page = ranked[start:end]
+            fields = self._select(select)
+            results = [
+                {
+                    **{
+                        field: self._field_value(row, field)
+                        for field in fields
+                        or [*self._documents[row].keys(), *self._vectors]
+                    },
+                    "@search.score": score,
+                }
+                for row, score in page
+            ]
+
+        return LocalSearchResults(
+            results, len(ranked) if include_total_count else None, facet_results
+        )
+
+    def upload_documents(self, documents: Iterable[dict]) -> List[IndexingResult]:
+        """Adds the documents, replacing those with the same key, and saves the index."""
+        with self._lock, self._writing(), self._reloading_on_error():
+            self._reload_if_changed()
+            documents_to_save = list(self._documents)
+            rows = dict(self._rows)
+            new_vectors: dict[str, dict[int, List[float]]] = defaultdict(dict)
+            replaced_rows = []
+            results = []
+            for document in documents:
+                key = document[self.KEY_FIELD]
+                fields = {}
+                for field, value in document.items():
+                    if self._is_vector(value):
+                        new_vectors[field][
+                            rows.get(key, len(documents_to_save))
+                        ] = value
+                    else:
+                        fields[field] = value
+
+                if key in rows:
+                    self._remove_text(key)
+                    documents_to_save[rows[key]] = fields
+                    replaced_rows.append(rows[key])
+                else:
+                    rows[key] = len(documents_to_save)
+                    documents_to_save.append(fields)
+                self._add_text(key, fields.get(self.TEXT_FIELD))
+                results.append(self._indexing_result(key))
+
+            vectors = {}
+            for field in set(self._vectors) | set(new_vectors):
+                dimensions = (
+                    self._vectors[field].shape[1]
+                    if field in self._vectors
+                    else len(next(iter(new_vectors[field].values())))
+                )
+                matrix = np.zeros((len(documents_to_save), dimensions), np.float32)
+                if field in self._vectors:
+                    matrix[: len(self._documents)] = self._vectors[field]
+                    # Like Azure AI Search, an upload replaces the whole document
+                    matrix[replaced_rows] = 0
+                for row, vector in new_vectors.get(field, {}).items():
+                    matrix[row] = vector
+                    matrix[row] = _normalize(matrix[row])
+                vectors[field] = matrix
+
+            self._save(documents_to_save, vectors)
+        return results
+
+    def delete_documents(self, documents: Iterable[dict]) -> List[IndexingResult]:
+        """Deletes the documents with the keys of the given ones, and saves the index."""
+        with self._lock, self._writing(), self._reloading_on_error():
+            self._reload_if_changed()
+            keys = {document[self.KEY_FIELD] for document in documents}
+            keep = np.ones(len(self._documents), bool)
+            for key in keys:
+                if key in self._rows:
+                    keep[self._rows[key]] = False
+                    self._remove_text(key)
+
+            self._save(
+                [document for document, kept in zip(self._documents, keep) if kept],
+                {
+                    field: np.asarray(matrix, np.float32)[keep]
+                    for field, matrix in self._vectors.items()
+                },
+            )
+        return [self._indexing_result(key) for key in keys]
+
+    def _text_search(
+        self, search_text: str, rows: Optional[np.ndarray]
+    ) -> List[tuple[int, float]]:
+        allowed = None if rows is None else set(rows.tolist())
+        document_count = len(self._documents)
+        average_length = self._total_length / document_count if document_count else 0
+        scores: dict[int, float] = defaultdict(float)
+        for term in set(_tokenize(search_text)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(
+                1 + (document_count - len(postings) + 0.5) / (len(postings) + 0.5)
+            )
+            for key, frequency in postings.items():
+                row = self._rows[key]
+                if allowed is not None and row not in allowed:
+                    continue
+                length_norm = (
+                    1
+                    - self.BM25_B
+                    + self.BM25_B * (self._lengths[key] / average_length)
+                )
+                scores[row] += (
+                    idf
+                    * frequency
+                    * (self.BM25_K1 + 1)
+                    / (frequency + self.BM25_K1 * length_norm)
+                )
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+    def _vector_search(
+        self, vector_query: VectorizedQuery, rows: Optional[np.ndarray]
+    ) -> List[tuple[int, float]]:
+        query = _normalize(np.asarray(vector_query.vector, np.float32))
+        k = vector_query.k_nearest_neighbors or self._DEFAULT_K_NEAREST_NEIGHBORS
+        best: dict[int, float] = {}
+        for field in (vector_query.fields or "").split(","):
+            field = field.strip()
+            if field not in self._vectors:
+                continue
+
+            candidates = self._candidates(field, query, rows)
+            scores = self._scores(field, query, candidates)
+            if candidates is None:
+                candidates = np.arange(len(scores))
+            has_vector = self._has_vector[field][candidates]
+            candidates, scores = candidates[has_vector], scores[has_vector]
+
+            if len(scores) > k:
+                top = np.argpartition(-scores, k - 1)[:k]
+                candidates, scores = candidates[top], scores[top]
+            for row, score in zip(candidates.tolist(), scores.tolist()):
+                best[row] = max(score, best.get(row, -1.0))
+        return sorted(best.items(), key=lambda item: item[1], reverse=True)
+
+    def _candidates(
+        self, field: str, query: np.ndarray, rows: Optional[np.ndarray]
+    ) -> Optional[np.ndarray]:
+        """The rows to score, None for all of them."""
+        if field not in self._ivf_centroids:
+            return rows
+        centroids = self._ivf_centroids[field]
+        probes = min(self.ivf_probes, len(centroids))
+        closest = np.argpartition(-(centroids @ query), probes - 1)[:probes]
+        candidates = np.concatenate([self._ivf_rows[field][i] for i in closest])
+        if rows is not None:
+            candidates = np.intersect1d(candidates, rows, assume_unique=True)
+        return candidates
+
+    def _scores(
+        self, field: str, query: np.ndarray, candidates: Optional[np.ndarray]
+    ) -> np.ndarray:
+        matrix = self._vectors[field]
+        if candidates is not None:
+            matrix = matrix[candidates]
+        if matrix.dtype == np.float32:
+            return matrix @ query
+        # NumPy has no fast float16 matrix product, so blocks of rows are converted first
+        blocks = np.array_split(
+            matrix,
+            range(self._FLOAT16_BLOCK_ROWS, len(matrix), self._FLOAT16_BLOCK_ROWS),
+        )
+        return np.concatenate([block.astype(np.float32) @ query for block in blocks])
+
+    def _fuse(self, rankings: List[List[tuple[int, float]]]) -> List[tuple[int, float]]:
+        scores: dict[int, float] = defaultdict(float)
+        for ranking in rankings:
+            for rank, (row, _) in enumerate(ranking, start=1):
+                scores[row] += 1 / (self.RRF_K + rank)
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+    def _facets(self, facets: List[str], rows: List[int]) -> dict:
+        results = {}
+        for facet in facets:
+            field, *parameters = [part.strip() for part in facet.split(",")]
+            count = next(
+                (
+                    int(parameter.split(":")[1])
+                    for parameter in parameters
+                    if parameter.startswith("count:")
+                ),
+                10,
+            )
+            values = Counter(self._documents[row].get(field) for row in rows)
+            ordered = sorted(values.items(), key=lambda item: (-item[1], str(item[0])))
+            results[field] = [
+                {"value": value, "count": value_count}
+                for value, value_count in (ordered[:count] if count else ordered)
+            ]
+        return results
+
+    def _filter_rows(self, filter: Optional[str]) -> Optional[np.ndarray]:
+        """The rows that match the filter, None for all of them."""
+        if not filter:
+            return None
+        if filter in self._filter_cache:
+            return self._filter_cache[filter]
+
+        clauses = []
+        position = 0
+        while position < len(filter):
+            match = _FILTER_CLAUSE_PATTERN.match(filter, position)
+            if match is None:
+                raise ValueError(
+                    f"Unsupported filter for the local search index: {filter}"
+                )
+            field, operator, value, _ = match.groups()
+            clauses.append((field, operator.lower(), _parse_filter_value(value)))
+            position = match.end()
+
+        rows = np.array(
+            [
+                row
+                for row, document in enumerate(self._documents)
+                if all(
+                    (document.get(field) == value) == (operator == "eq")
+                    for field, operator, value in clauses
+                )
+            ],
+            dtype=np.int64,
+        )
+        self._filter_cache[filter] = rows
+        return rows
+
+    def _select(self, select: Optional[str | List[str]]) -> Optional[List[str]]:
+        if select is None:
+            return None
+        if isinstance(select, str):
+            select = select.split(",")
+        return [field.strip() for field in select]
+
+    def _field_value(self, row: int, field: str):
+        if field in self._vectors:
+            # Vectors are returned normalized, which keeps their cosine similarities
+            if not self._has_vector[field][row]:
+                return None
+            return np.asarray(self._vectors[field][row], np.float32).tolist()
+        return self._documents[row].get(field)
+
+    def _is_vector(self, value) -> bool:
+        return (
+            isinstance(value, list)
+            and len(value) > 0
+            and isinstance(value[0], (int, float))
+        )
+
+    def _indexing_result(self, key: str) -> IndexingResult:
+        result = IndexingResult()
+        result.key = key
+        result.succeeded = True
+        result.status_code = 200
+        return result
+
+    def _add_text(self, key: str, text: Optional[str]):
+        frequencies = Counter(_tokenize(text or ""))
+        self._term_frequencies[key] = frequencies
+        self._lengths[key] = sum(frequencies.values())
+        self._total_length += self._lengths[key]
+        for term, frequency in frequencies.items():
+            self._postings[term][key] = frequency
+
+    def _remove_text(self, key: str):
+        frequencies = self._term_frequencies.pop(key, Counter())
+        self._total_length -= self._lengths.pop(key, 0)
+        for term in frequencies:
+            postings = self._postings[term]
+            postings.pop(key, None)
+            if not postings:
+                del self._postings[term]
+
+    @contextmanager
+    def _writing(self):
+        # Reloading, changing and saving under the lock keeps another process from saving the same generation
+        os.makedirs(self.path, exist_ok=True)
+        with _exclusive_file_lock(self._file_path(self.LOCK_FILE_NAME)):
+            if self._saved_generation() != self._generation:
+                # Saved by another process within the resolution of the manifest's modification time
+                self._load()
+            yield
+
+    def _saved_generation(self) -> int:
+        try:
+            with open(self._file_path(self.MANIFEST_FILE_NAME)) as manifest_file:
+                return json.load(manifest_file)["generation"]
+        except FileNotFoundError:
+            return 0
+
+    @contextmanager
+    def _reloading_on_error(self):
+        # A failed write leaves the text index updated for documents that were not saved
+        try:
+            yield
+        except Exception:
+            self._load()
+            raise
+
+    def _file_path(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _reload_if_changed(self):
+        try:
+            mtime = os.stat(self._file_path(self.MANIFEST_FILE_NAME)).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if mtime != self._manifest_mtime:
+            logger.info("Reloading local search index", extra={"path": self.path})
+            self._load()
+
+    def _load(self):
+        for attempt in range(self._LOAD_ATTEMPTS):
+            try:
+                documents = self._load_generation()
+                break
+            except FileNotFoundError:
+                # The generation was replaced, and its files removed, while it was being read
+                if attempt == self._LOAD_ATTEMPTS - 1:
+                    raise
+
+        self._term_frequencies: dict[str, Counter] = {}
+        self._lengths: dict[str, int] = {}
+        self._total_length = 0
+        self._postings: dict[str, dict[str, int]] = defaultdict(dict)
+        for document in documents:
+            self._add_text(document[self.KEY_FIELD], document.get(self.TEXT_FIELD))
+
+    def _load_generation(self) -> List[dict]:
+        manifest_path = self._file_path(self.MANIFEST_FILE_NAME)
+        try:
+            manifest_mtime = os.stat(manifest_path).st_mtime_ns
+            with open(manifest_path) as manifest_file:
+                manifest = json.load(manifest_file)
+        except FileNotFoundError:
+            manifest_mtime = None
+            manifest = {"generation": 0, "vector_fields": [], "ivf_fields": {}}
+
+        generation = manifest["generation"]
+        documents = []
+        if generation:
+            with open(self._file_path(f"documents.{generation}.json")) as file:
+                documents = json.load(file)
+        self._set_documents(
+            generation,
+            documents,
+            {
+                field: np.load(
+                    self._file_path(f"{field}.{generation}.npy"), mmap_mode="r"
+                )
+                for field in manifest["vector_fields"]
+            },
+            {
+                field: np.load(self._file_path(f"{field}.centroids.{generation}.npy"))
+                for field in manifest["ivf_fields"]
+            },
+            manifest["ivf_fields"],
+        )
+        self._manifest_mtime = manifest_mtime
+        return documents
+
+    def _set_documents(
+        self,
+        generation: int,
+        documents: List[dict],
+        vectors: dict[str, np.ndarray],
+        ivf_centroids: dict[str, np.ndarray],
+        ivf_trained_rows: dict[str, int],
+    ):
+        self._generation = generation
+        self._documents = documents
+        self._rows = {
+            document[self.KEY_FIELD]: row for row, document in enumerate(documents)
+        }
+        self._vectors = vectors
+        self._has_vector = {
+            field: np.any(matrix != 0, axis=1) for field, matrix in vectors.items()
+        }
+        self._ivf_centroids = ivf_centroids
+        self._ivf_trained_rows = ivf_trained_rows
+        self._ivf_rows = {}
+        for field, centroids in ivf_centroids.items():
+            lists = np.argmax(np.asarray(vectors[field], np.float32) @ centroids.T, 1)
+            self._ivf_rows[field] = [
+                np.flatnonzero(lists == i) for i in range(len(centroids))
+            ]
+        self._filter_cache: dict[str, np.ndarray] = {}
+
+    def _save(self, documents: List[dict], vectors: dict[str, np.ndarray]):
+        generation = self._generation + 1
+
+        with open(self._file_path(f"documents.{generation}.json"), "w") as file:
+            json.dump(documents, file)
+        ivf_centroids, ivf_trained_rows = {}, {}
+        for field, matrix in vectors.items():
+            np.save(
+                self._file_path(f"{field}.{generation}.npy"),
+                matrix.astype(self.vector_dtype),
+            )
+            centroids, trained_rows = self._train_ivf(field, matrix)
+            if centroids is not None:
+                np.save(
+                    self._file_path(f"{field}.centroids.{generation}.npy"), centroids
+                )
+                ivf_centroids[field] = centroids
+                ivf_trained_rows[field] = trained_rows
+
+        # The manifest is replaced last, so readers only see complete generations
+        manifest_path = self._file_path(self.MANIFEST_FILE_NAME)
+        with open(f"{manifest_path}.tmp", "w") as file:
+            json.dump(
+                {
+                    "generation": generation,
+                    "vector_fields": list(vectors),
+                    "ivf_fields": ivf_trained_rows,
+                },
+                file,
+            )
+        os.replace(f"{manifest_path}.tmp", manifest_path)
+        self._manifest_mtime = os.stat(manifest_path).st_mtime_ns
+
+        self._remove_generations_before(generation)
+        self._set_documents(
+            generation,
+            documents,
+            {
+                field: np.load(
+                    self._file_path(f"{field}.{generation}.npy"), mmap_mode="r"
+                )
+                for field in vectors
+            },
+            ivf_centroids,
+            ivf_trained_rows,
+        )
+
+    def _train_ivf(
+        self, field: str, matrix: np.ndarray
+    ) -> tuple[Optional[np.ndarray], int]:
+        """
+        Returns the k-means centroids of the vectors, keeping the current ones until the number of vectors
+        doubles, and None when the index is searched by brute force.
+        """
+        vectors = matrix[np.any(matrix != 0, axis=1)]
+        if (
+            not self.ivf_lists
+            or len(vectors) < self.ivf_lists * self._IVF_MIN_ROWS_PER_LIST
+        ):
+            return None, 0
+        trained_rows = self._ivf_trained_rows.get(field, 0)
+        if field in self._ivf_centroids and len(vectors) <= 2 * trained_rows:
+            return self._ivf_centroids[field], trained_rows
+
+        random = np.random.default_rng(0)
+        centroids = vectors[random.choice(len(vectors), self.ivf_lists, replace=False)]
+        for _ in range(self._IVF_ITERATIONS):
+            lists = np.argmax(vectors @ centroids.T, axis=1)
+            for i in range(self.ivf_lists):
+                members = vectors[lists == i]
+                if len(members):
+                    centroids[i] = _normalize(members.sum(axis=0))
+        return centroids, len(vectors)
+
+    def _remove_generations_before(self, generation: int):
+        for name in os.listdir(self.path):
+            match = re.fullmatch(r".+\.(\d+)\.(json|npy)", name)
+            if match and int(match.group(1)) < generation:
+                try:
+                    os.remove(self._file_path(name))
+                except OSError:
+                    # Still open in another process, it is removed with a later generation
+                    logger.debug("Could not remove %s", name)
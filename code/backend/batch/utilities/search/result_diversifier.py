@@ -0,0 +1,149 @@
+import logging
+import re
+from typing import List, Optional
+
+import numpy as np
+
+from ..common.source_document import SourceDocument
+
+logger = logging.getLogger(__name__)
+
+_WORD_PATTERN = re.compile(r"\w+")
+
+
+class ResultDiversifier:
+    """
+    Reduces over-fetched search results to fewer, more diverse and de-duplicated sources.
+
+    Maximal marginal relevance picks top_k of the candidates, each time the one that best balances its
+    search score against its similarity to the ones already picked. Similarity is the cosine similarity
+    of the chunk vectors when the index returns them, and the word overlap of the chunks otherwise.
+    Chunks of the same document that share text, as neighbouring chunks cut with an overlap do, are
+    then merged so that the shared text is only sent once.
+    """
+
+    # The shortest text two chunks must share to be merged
+    _MIN_OVERLAP_CHARACTERS = 20
+
+    def __init__(self, top_k: int, lambda_mult: float = 0.5) -> None:
+        self.top_k = top_k
+        self.lambda_mult = lambda_mult
+
+    def select(
+        self,
+        documents: List[SourceDocument],
+        scores: List[float],
+        vectors: Optional[List[Optional[List[float]]]] = None,
+    ) -> List[SourceDocument]:
+        """Returns top_k of the documents, in the order maximal marginal relevance selects them."""
+        if len(documents) <= 1:
+            return list(documents)
+
+        relevance = np.asarray(scores, np.float32)
+        if relevance.max() > 0:
+            relevance = relevance / relevance.max()
+        similarity = self._similarity(documents, vectors)
+
+        selected = [int(np.argmax(relevance))]
+        max_similarity = similarity[selected[0]].copy()
+        while len(selected) < min(self.top_k, len(documents)):
+            marginal_relevance = (
+                self.lambda_mult * relevance - (1 - self.lambda_mult) * max_similarity
+            )
+            marginal_relevance[selected] = -np.inf
+            index = int(np.argmax(marginal_relevance))
+            selected.append(index)
+            max_similarity = np.maximum(max_similarity, similarity[index])
+
+        return [documents[index] for index in selected]
+
+    def merge_overlapping(
+        self, documents: List[SourceDocument]
+    ) -> List[SourceDocument]:
+        """
+        Merges each document into an earlier one of the same source it overlaps with, keeping the rank
+        of the earlier one and the metadata of the one whose text comes first.
+        """
+        merged: List[SourceDocument] = []
+        for document in documents:
+            for index, kept in enumerate(merged):
+                if kept.source != document.source:
+                    continue
+                combined = self._combine(kept, document)
+                if combined is not None:
+                    merged[index] = combined
+                    break
+            else:
+                merged.append(document)
+
+        if len(merged) < len(documents):
+            logger.info(
+                "Merged overlapping sources",
+                extra={"sources": len(documents), "merged_sources": len(merged)},
+            )
+        return merged
+
+    def _similarity(
+        self,
+        documents: List[SourceDocument],
+        vectors: Optional[List[Optional[List[float]]]],
+    ) -> np.ndarray:
+        if vectors is not None and all(vector for vector in vectors):
+            matrix = np.asarray(vectors, np.float32)
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            matrix = matrix / np.where(norms == 0, 1, norms)
+            return matrix @ matrix.T
+
+        words = [
+            set(_WORD_PATTERN.findall(document.content.lower()))
+            for document in documents
+        ]
+        similarity = np.zeros((len(documents), len(documents)), np.float32)
+        for i, first in enumerate(words):
+            for j in range(i, len(words)):
+                union = len(first | words[j])
+                similarity[i, j] = similarity[j, i] = (
+                    len(first & words[j]) / union if union else 1
+                )
+        return similarity
+
+    def _combine(
+        self, first: SourceDocument, second: SourceDocument
+    ) -> Optional[SourceDocument]:
+        """The two documents as one, or None when their text does not overlap."""
+        if second.content in first.content:
+            return first
+        if first.content in second.content:
+            return second
+
+        overlap = self._overlap(first.content, second.content)
+        if overlap:
+            return self._with_content(first, first.content + second.content[overlap:])
+        overlap = self._overlap(second.content, first.content)
+        if overlap:
+            return self._with_content(second, second.content + first.content[overlap:])
+        return None
+
+    def _overlap(self, first: str, second: str) -> int:
+        """The length of the longest end of the first text that the second one starts with."""
+        probe = second[: self._MIN_OVERLAP_CHARACTERS]
+        if len(probe) < self._MIN_OVERLAP_CHARACTERS:
+            return 0
+        start = first.find(probe)
+        while start != -1:
+            if second.startswith(first[start:]):
+                return len(first) - start
+            start = first.find(probe, start + 1)
+        return 0
+
+    def _with_content(self, document: SourceDocument, content: str) -> SourceDocument:
+        return SourceDocument(
+            id=document.id,
+            content=content,
+            source=document.source,
+            title=document.title,
+            chunk=document.chunk,
+            offset=document.offset,
+            page_number=document.page_number,
+            chunk_id=document.chunk_id,
+        )
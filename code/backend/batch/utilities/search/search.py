@@ -2,6 +2,7 @@ from ..search.azure_search_handler import AzureSearchHandler
 from ..search.integrated_vectorization_search_handler import (
     IntegratedVectorizationSearchHandler,
 )
+from ..search.local_search_handler import LocalSearchHandler
 from ..search.search_handler_base import SearchHandlerBase
 from ..common.source_document import SourceDocument
 from ..helpers.env_helper import EnvHelper
@@ -10,7 +11,9 @@ from ..helpers.env_helper import EnvHelper
 class Search:
     @staticmethod
     def get_search_handler(env_helper: EnvHelper) -> SearchHandlerBase:
-        if env_helper.AZURE_SEARCH_USE_INTEGRATED_VECTORIZATION:
+        if env_helper.USE_LOCAL_SEARCH_INDEX:
+            return LocalSearchHandler(env_helper)
+        elif env_helper.AZURE_SEARCH_USE_INTEGRATED_VECTORIZATION:
             return IntegratedVectorizationSearchHandler(env_helper)
         else:
             return AzureSearchHandler(env_helper)
@@ -20,3 +23,9 @@ class Search:
         search_handler: SearchHandlerBase, question: str
     ) -> list[SourceDocument]:
         return search_handler.query_search(question)
+
+    @staticmethod
+    def get_source_documents_for_questions(
+        search_handler: SearchHandlerBase, questions: list[str]
+    ) -> list[SourceDocument]:
+        return search_handler.query_search_many(questions)
@@ -1,12 +1,29 @@
+import contextvars
+import logging
+import time
 from abc import ABC, abstractmethod
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 from ..helpers.env_helper import EnvHelper
 from ..common.source_document import SourceDocument
+from .result_diversifier import ResultDiversifier
 from azure.search.documents import SearchClient
 
+logger = logging.getLogger(__name__)
+
 
 class SearchHandlerBase(ABC):
     _VECTOR_FIELD = "content_vector"
     _IMAGE_VECTOR_FIELD = "image_vector"
+    _KEY_FIELD = "id"
+    _DELETE_PAGE_SIZE = 1000
+    _DELETE_BATCH_SIZE = 250
+    _DELETE_CONCURRENCY = 4
+    _INDEX_REFRESH_DELAY_SECONDS = 1
+    _MAX_STALE_PAGES = 10
+    _SEARCH_CONCURRENCY = 4
+    _RRF_K = 60
 
     def __init__(self, env_helper: EnvHelper):
         self.env_helper = env_helper
@@ -28,16 +45,160 @@ class SearchHandlerBase(ABC):
         return []
 
     def delete_from_index(self, blob_url) -> None:
-        documents = self.search_by_blob_url(blob_url)
-        if documents is None or documents.get_count() == 0:
+        """
+        Deletes every chunk of a document from the index, holding only their keys in memory.
+
+        Only the keys are selected, a page at a time, and each page is deleted in concurrent batches
+        before the next one is read. Chunks that were already deleted can still be returned until the
+        index refreshes, so they are skipped and never counted twice. The number of chunks deleted is checked against the
+        count reported by the first page.
+        """
+        if self.search_client is None:
             return
-        files_to_delete = self.output_results(documents)
-        self.delete_files(files_to_delete)
+
+        blob_url_filter = self.get_blob_url_filter(blob_url)
+        expected_count = None
+        deleted_count = 0
+        deleted_keys: set[str] = set()
+        stale_pages = 0
+        with ThreadPoolExecutor(max_workers=self._DELETE_CONCURRENCY) as executor:
+            while expected_count is None or deleted_count < expected_count:
+                results = self.search_client.search(
+                    "*",
+                    select=self._KEY_FIELD,
+                    filter=blob_url_filter,
+                    top=self._DELETE_PAGE_SIZE,
+                    include_total_count=expected_count is None,
+                )
+                keys = [result[self._KEY_FIELD] for result in results]
+                if expected_count is None:
+                    expected_count = results.get_count()
+                if not keys:
+                    break
+
+                new_keys = [key for key in keys if key not in deleted_keys]
+                if not new_keys:
+                    stale_pages += 1
+                    if stale_pages > self._MAX_STALE_PAGES:
+                        raise Exception(
+                            f"Deleted documents still returned for {blob_url}"
+                        )
+                    time.sleep(self._INDEX_REFRESH_DELAY_SECONDS)
+                    continue
+
+                stale_pages = 0
+                remaining = iter(new_keys)
+                batches = iter(
+                    lambda: list(islice(remaining, self._DELETE_BATCH_SIZE)), []
+                )
+                deleted_count += sum(executor.map(self._delete_keys, batches))
+                deleted_keys.update(new_keys)
+
+        if expected_count and deleted_count < expected_count:
+            logger.warning(
+                "Deleted fewer documents than expected",
+                extra={"expected": expected_count, "deleted": deleted_count},
+            )
+        logger.info(
+            "Deleted document from index", extra={"chunks_deleted": deleted_count}
+        )
+
+    def query_search_many(self, questions: list[str]) -> list[SourceDocument]:
+        """
+        Searches for several questions at once, such as the parts of a compound question, and
+        merges the results with reciprocal rank fusion, keeping each chunk once and the
+        AZURE_SEARCH_TOP_K best ones.
+        """
+        if len(questions) == 1:
+            return self.query_search(questions[0])
+        return self._fuse_rankings(self._map_concurrently(self.query_search, questions))
+
+    def _map_concurrently(self, function, *iterables) -> list:
+        """Calls the function on up to _SEARCH_CONCURRENCY threads, keeping the tracing context."""
+        contexts = [contextvars.copy_context() for _ in iterables[0]]
+        with ThreadPoolExecutor(max_workers=self._SEARCH_CONCURRENCY) as executor:
+            return list(
+                executor.map(
+                    lambda context, *args: context.run(function, *args),
+                    contexts,
+                    *iterables,
+                )
+            )
+
+    def _fuse_rankings(
+        self, rankings: list[list[SourceDocument]]
+    ) -> list[SourceDocument]:
+        scores: dict[str, float] = defaultdict(float)
+        documents: dict[str, SourceDocument] = {}
+        for ranking in rankings:
+            for rank, document in enumerate(ranking or [], start=1):
+                key = document.chunk_id or document.id
+                scores[key] += 1 / (self._RRF_K + rank)
+                documents.setdefault(key, document)
+
+        # Sorting is stable, so ties keep the order the chunks were first found in
+        fused = [documents[key] for key in sorted(scores, key=scores.get, reverse=True)]
+        if self.env_helper.AZURE_SEARCH_MERGE_OVERLAPPING_CHUNKS:
+            fused = ResultDiversifier(len(fused)).merge_overlapping(fused)
+        top_k = self.env_helper.AZURE_SEARCH_TOP_K
+        return fused[:top_k]
+
+    def _fetch_count(self) -> int:
+        """The number of results to search for, more than AZURE_SEARCH_TOP_K when they are diversified."""
+        if self.env_helper.AZURE_SEARCH_USE_MMR:
+            return max(
+                self.env_helper.AZURE_SEARCH_MMR_FETCH_K,
+                self.env_helper.AZURE_SEARCH_TOP_K,
+            )
+        return self.env_helper.AZURE_SEARCH_TOP_K
+
+    def _to_source_documents(self, search_results) -> list[SourceDocument]:
+        """
+        Converts the search results to source documents, selecting AZURE_SEARCH_TOP_K of them with
+        maximal marginal relevance and merging overlapping chunks when configured to.
+        """
+        if not (
+            self.env_helper.AZURE_SEARCH_USE_MMR
+            or self.env_helper.AZURE_SEARCH_MERGE_OVERLAPPING_CHUNKS
+        ):
+            return self._convert_to_source_documents(search_results)
+
+        search_results = list(search_results)
+        source_documents = self._convert_to_source_documents(search_results)
+        diversifier = ResultDiversifier(
+            self.env_helper.AZURE_SEARCH_TOP_K, self.env_helper.AZURE_SEARCH_MMR_LAMBDA
+        )
+        if self.env_helper.AZURE_SEARCH_USE_MMR:
+            source_documents = diversifier.select(
+                source_documents,
+                [
+                    result.get("@search.reranker_score")
+                    or result.get("@search.score")
+                    or 0
+                    for result in search_results
+                ],
+                [result.get(self._VECTOR_FIELD) for result in search_results],
+            )
+        if self.env_helper.AZURE_SEARCH_MERGE_OVERLAPPING_CHUNKS:
+            source_documents = diversifier.merge_overlapping(source_documents)
+        return source_documents
+
+    def _delete_keys(self, keys: list) -> int:
+        results = self.search_client.delete_documents(
+            [{self._KEY_FIELD: key} for key in keys]
+        )
+        if not all(result.succeeded for result in results):
+            raise Exception(results)
+        return len(keys)
 
     @abstractmethod
     def create_search_client(self) -> SearchClient:
         pass
 
+    @abstractmethod
+    def _convert_to_source_documents(self, search_results) -> list[SourceDocument]:
+        pass
+
     @abstractmethod
     def perform_search(self, filename):
         pass
@@ -65,3 +226,7 @@ class SearchHandlerBase(ABC):
     @abstractmethod
     def search_by_blob_url(self, blob_url):
         pass
+
+    @abstractmethod
+    def get_blob_url_filter(self, blob_url: str) -> str:
+        pass
@@ -0,0 +1,145 @@
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+
+from ..helpers.llm_helper import LLMHelper
+
+logger = logging.getLogger(__name__)
+
+
+class ChatHistoryCompactor:
+    """
+    Replaces the older turns of a conversation with a running summary, keeping the last turns verbatim.
+
+    Summaries are cached per conversation_id along with a hash of the messages they cover, and are
+    extended in the background with the turns that fall out of the window, so the request itself never
+    waits for a summarization call. Until a summary covers them, older turns are kept verbatim.
+    The summary is sent as a user/assistant exchange so every orchestrator can consume it.
+    """
+
+    _MAX_CACHED_CONVERSATIONS = 1000
+    SUMMARY_REQUEST = "Summarize our conversation so far."
+
+    # conversation_id -> (number of messages summarized, hash of those messages, summary)
+    _summaries: OrderedDict[str, tuple[int, str, str]] = OrderedDict()
+    _summarizing: set[str] = set()
+    _lock = threading.Lock()
+
+    def __init__(self, keep_turns: int) -> None:
+        self.keep_messages = keep_turns * 2
+
+    def compact(
+        self, chat_history: List[dict], conversation_id: Optional[str]
+    ) -> List[dict]:
+        if not conversation_id or len(chat_history) <= self.keep_messages:
+            return chat_history
+
+        split = len(chat_history) - self.keep_messages
+        # Never separate an assistant reply from its question
+        if split < len(chat_history) and chat_history[split]["role"] == "assistant":
+            split -= 1
+        older, recent = chat_history[:split], chat_history[split:]
+        if not older:
+            return chat_history
+
+        summarized_count, summary = self._get_summary(conversation_id, older)
+        if summarized_count < len(older):
+            self._summarize_in_background(conversation_id, older)
+
+        if not summary:
+            return chat_history
+
+        return [
+            {"role": "user", "content": self.SUMMARY_REQUEST},
+            {"role": "assistant", "content": summary},
+            *older[summarized_count:],
+            *recent,
+        ]
+
+    @classmethod
+    def _get_summary(
+        cls, conversation_id: str, older: List[dict]
+    ) -> tuple[int, Optional[str]]:
+        with cls._lock:
+            cached = cls._summaries.get(conversation_id)
+            if cached is None:
+                return 0, None
+            cls._summaries.move_to_end(conversation_id)
+
+        summarized_count, summarized_hash, summary = cached
+        if summarized_count > len(older) or summarized_hash != cls._hash(
+            older[:summarized_count]
+        ):
+            # The client sent a different history, e.g. after editing a message
+            return 0, None
+        return summarized_count, summary
+
+    @classmethod
+    def _summarize_in_background(cls, conversation_id: str, older: List[dict]):
+        with cls._lock:
+            if conversation_id in cls._summarizing:
+                return
+            cls._summarizing.add(conversation_id)
+
+        threading.Thread(
+            target=cls._summarize, args=(conversation_id, older), daemon=True
+        ).start()
+
+    @classmethod
+    def _summarize(cls, conversation_id: str, older: List[dict]):
+        try:
+            summarized_count, summary = cls._get_summary(conversation_id, older)
+            transcript = "\n".join(
+                f"{message['role']}: {message['content']}"
+                for message in older[summarized_count:]
+            )
+            content = (
+                f"Summary of the conversation so far:\n{summary}\n\nNew messages:\n{transcript}"
+                if summary
+                else f"Conversation:\n{transcript}"
+            )
+
+            result = LLMHelper().get_chat_completion(
+                [
+                    {
+                        "role": "system",
+                        "content": "Summarize the conversation between a user and an assistant. Keep every fact, name, number and open question a follow-up question could refer to. Reply with the summary only, in the language of the conversation.",
+                    },
+                    {"role": "user", "content": content},
+                ],
+                temperature=0,
+            )
+            logger.info(
+                "Chat history summarized",
+                extra={
+                    "conversation_id": conversation_id,
+                    "prompt_tokens": result.usage.prompt_tokens,
+                    "completion_tokens": result.usage.completion_tokens,
+                },
+            )
+
+            with cls._lock:
+                cls._summaries[conversation_id] = (
+                    len(older),
+                    cls._hash(older),
+                    result.choices[0].message.content,
+                )
+                cls._summaries.move_to_end(conversation_id)
+                while len(cls._summaries) > cls._MAX_CACHED_CONVERSATIONS:
+                    cls._summaries.popitem(last=False)
+        except Exception:
+            logger.exception("Failed to summarize chat history")
+        finally:
+            with cls._lock:
+                cls._summarizing.discard(conversation_id)
+
+    @staticmethod
+    def _hash(messages: List[dict]) -> str:
+        return hashlib.sha256(
+            json.dumps(
+                [[message["role"], message["content"]] for message in messages]
+            ).encode("utf-8")
+        ).hexdigest()
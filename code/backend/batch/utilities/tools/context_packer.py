@@ -0,0 +1,86 @@
+import logging
+from typing import List
+
+import tiktoken
+
+from ..common.source_document import SourceDocument
+
+logger = logging.getLogger(__name__)
+
+
+class ContextPacker:
+    """
+    Fits the chat history and the sources of an answering request into a token budget.
+
+    The fixed messages (system prompts, few-shot example and question) are always kept. The sources
+    are then added in ranked order, and the chat history from the most recent message backwards,
+    while they fit. Sources use the token count stored in the index at ingestion when available.
+    """
+
+    _ENCODER_NAME = "cl100k_base"
+    # Tokens added by the chat format around each message, and by the JSON around each source
+    _MESSAGE_OVERHEAD = 4
+    _SOURCE_OVERHEAD = 12
+
+    def __init__(self, budget: int) -> None:
+        self.budget = budget
+        self.encoding = tiktoken.get_encoding(self._ENCODER_NAME)
+
+    def count_tokens(self, text: str) -> int:
+        return len(self.encoding.encode(text))
+
+    def count_message_tokens(self, message: dict) -> int:
+        content = message["content"]
+        if isinstance(content, list):
+            content = "".join(part.get("text", "") for part in content)
+        return self.count_tokens(content) + self._MESSAGE_OVERHEAD
+
+    def count_source_tokens(self, source: SourceDocument) -> int:
+        if source.token_count is None:
+            return self.count_tokens(source.content) + self._SOURCE_OVERHEAD
+        return source.token_count + self._SOURCE_OVERHEAD
+
+    def pack(
+        self,
+        fixed_messages: List[dict],
+        chat_history: List[dict],
+        sources: List[SourceDocument],
+    ) -> tuple[List[dict], List[SourceDocument]]:
+        """
+        Returns the chat history and the sources that fit in the budget along with the fixed messages.
+        At least the highest ranked source is always kept.
+        """
+        used = sum(self.count_message_tokens(message) for message in fixed_messages)
+        saved = 0
+
+        packed_sources = []
+        for source in sources:
+            tokens = self.count_source_tokens(source)
+            if packed_sources and used + tokens > self.budget:
+                saved += tokens
+                continue
+            packed_sources.append(source)
+            used += tokens
+
+        packed_history = []
+        for index in range(len(chat_history) - 1, -1, -1):
+            tokens = self.count_message_tokens(chat_history[index])
+            if used + tokens > self.budget:
+                saved += sum(
+                    self.count_message_tokens(message)
+                    for message in chat_history[: index + 1]
+                )
+                break
+            packed_history.insert(0, chat_history[index])
+            used += tokens
+
+        logger.info(
+            "Context packing",
+            extra={
+                "context_tokens": used,
+                "context_tokens_saved": saved,
+                "context_sources_dropped": len(sources) - len(packed_sources),
+                "context_messages_dropped": len(chat_history) - len(packed_history),
+            },
+        )
+        return packed_history, packed_sources
@@ -0,0 +1,59 @@
+import re
+from typing import List, Optional, Set, Tuple
+
+from ..common.answer import Answer
+from ..parser.output_parser_tool import DOC_REFERENCE_PATTERN
+
+SENTENCE_END_PATTERN = re.compile(r"(?<=[.!?])\s+|\n+")
+WORD_PATTERN = re.compile(r"\w+")
+
+
+class GroundingChecker:
+    """
+    Scores how well an answer is supported by the source documents it cites, without calling the LLM.
+
+    Every sentence of the answer is compared with the sources it references with [docN], or with
+    all the sources if it has no reference, by the share of its word bigrams found in them.
+    """
+
+    def score(self, answer: Answer) -> Optional[float]:
+        """
+        Returns the share of the answer's bigrams found in the cited sources, between 0 and 1,
+        or None if the answer does not reference any source or references a missing one.
+        """
+        references = [int(i) for i in DOC_REFERENCE_PATTERN.findall(answer.answer)]
+        if not references or any(
+            i < 1 or i > len(answer.source_documents) for i in references
+        ):
+            return None
+
+        source_ngrams = [
+            self._get_ngrams(source.content) for source in answer.source_documents
+        ]
+        all_source_ngrams = set().union(*source_ngrams)
+
+        supported = 0
+        total = 0
+        for sentence in SENTENCE_END_PATTERN.split(answer.answer):
+            cited = {int(i) for i in DOC_REFERENCE_PATTERN.findall(sentence)}
+            ngrams = self._get_ngrams(DOC_REFERENCE_PATTERN.sub(" ", sentence))
+            if not ngrams:
+                continue
+
+            cited_ngrams = (
+                set().union(*(source_ngrams[i - 1] for i in cited))
+                if cited
+                else all_source_ngrams
+            )
+            supported += len(ngrams & cited_ngrams)
+            total += len(ngrams)
+
+        if total == 0:
+            return None
+
+        return supported / total
+
+    @staticmethod
+    def _get_ngrams(text: str) -> Set[Tuple[str, ...]]:
+        words: List[str] = WORD_PATTERN.findall(text.lower())
+        return set(zip(words, words[1:]))
@@ -1,6 +1,14 @@
+import logging
+
 from ..common.answer import Answer
+from ..helpers.env_helper import EnvHelper
 from ..helpers.llm_helper import LLMHelper
 from ..helpers.config.config_helper import ConfigHelper
+from ..helpers.telemetry import set_token_attributes, trace_stage
+from opentelemetry import trace
+from .grounding_checker import GroundingChecker
+
+logger = logging.getLogger(__name__)
 
 
 class PostPromptTool:
@@ -8,6 +16,42 @@ class PostPromptTool:
         pass
 
     def validate_answer(self, answer: Answer) -> Answer:
+        with trace_stage("post_answer_validation") as span:
+            validated_answer = self._validate_answer(answer)
+            set_token_attributes(
+                span,
+                validated_answer.prompt_tokens,
+                validated_answer.completion_tokens,
+            )
+            return validated_answer
+
+    def _validate_answer(self, answer: Answer) -> Answer:
+        # Accept clearly grounded answers locally, and only ask the LLM about the others
+        threshold = EnvHelper().POST_ANSWERING_GROUNDING_THRESHOLD
+        if threshold > 0:
+            grounding_score = GroundingChecker().score(answer)
+            validated_locally = (
+                grounding_score is not None and grounding_score >= threshold
+            )
+            logger.info(
+                "Post answering validation",
+                extra={
+                    "post_answering_validation": (
+                        "local" if validated_locally else "llm"
+                    ),
+                    "grounding_score": grounding_score,
+                },
+            )
+            trace.get_current_span().set_attribute(
+                "validated_locally", validated_locally
+            )
+            if validated_locally:
+                return Answer(
+                    question=answer.question,
+                    answer=answer.answer,
+                    source_documents=answer.source_documents,
+                )
+
         config = ConfigHelper.get_active_config_or_default()
         llm_helper = LLMHelper()
 
@@ -1,6 +1,7 @@
 import json
 import logging
 import warnings
+from typing import Iterator
 
 from ..common.answer import Answer
 from ..common.source_document import SourceDocument
@@ -8,8 +9,10 @@ from ..helpers.azure_blob_storage_client import AzureBlobStorageClient
 from ..helpers.config.config_helper import ConfigHelper
 from ..helpers.env_helper import EnvHelper
 from ..helpers.llm_helper import LLMHelper
+from ..helpers.telemetry import set_token_attributes, trace_stage
 from ..search.search import Search
 from .answering_tool_base import AnsweringToolBase
+from .context_packer import ContextPacker
 from openai.types.chat import ChatCompletion
 
 logger = logging.getLogger(__name__)
@@ -147,8 +150,34 @@ class QuestionAnswerTool(AnsweringToolBase):
             },
         ]
 
-    def answer_question(self, question: str, chat_history: list[dict], **kwargs):
-        source_documents = Search.get_source_documents(self.search_handler, question)
+    def prepare_answer(
+        self,
+        question: str,
+        chat_history: list[dict],
+        search_queries: list[str] | None = None,
+    ) -> tuple[list[SourceDocument], list[dict], str | None]:
+        """
+        Retrieves the source documents for a question and builds the messages to answer it.
+        The source documents are searched for with the search queries when given, such as the
+        parts of a compound question, and with the question otherwise.
+
+        Returns:
+            tuple: The source documents, the messages and the model to send them to
+            (None for the default model).
+        """
+        if search_queries:
+            source_documents = Search.get_source_documents_for_questions(
+                self.search_handler, search_queries
+            )
+        else:
+            source_documents = Search.get_source_documents(
+                self.search_handler, question
+            )
+
+        if self.env_helper.AZURE_OPENAI_CONTEXT_TOKEN_BUDGET > 0:
+            chat_history, source_documents = self.pack_context(
+                question, chat_history, source_documents
+            )
 
         if self.env_helper.USE_ADVANCED_IMAGE_PROCESSING:
             image_urls = self.create_image_url_list(source_documents)
@@ -167,15 +196,95 @@ class QuestionAnswerTool(AnsweringToolBase):
             )
             messages = self.generate_messages(question, source_documents)
 
+        return source_documents, messages, model
+
+    def pack_context(
+        self,
+        question: str,
+        chat_history: list[dict],
+        source_documents: list[SourceDocument],
+    ) -> tuple[list[dict], list[SourceDocument]]:
+        """
+        Trims the chat history and the source documents so the answering prompt fits in
+        AZURE_OPENAI_CONTEXT_TOKEN_BUDGET.
+        """
+        if self.config.prompts.use_on_your_data_format:
+            fixed_messages = self.generate_on_your_data_messages(question, [], [])
+        else:
+            fixed_messages = self.generate_messages(question, [])
+
+        return ContextPacker(self.env_helper.AZURE_OPENAI_CONTEXT_TOKEN_BUDGET).pack(
+            fixed_messages, chat_history, source_documents
+        )
+
+    def answer_question(
+        self,
+        question: str,
+        chat_history: list[dict],
+        search_queries: list[str] | None = None,
+        **kwargs,
+    ):
+        source_documents, messages, model = self.prepare_answer(
+            question, chat_history, search_queries
+        )
+
         llm_helper = LLMHelper()
 
-        response = llm_helper.get_chat_completion(messages, model=model, temperature=0)
+        with trace_stage("answer_llm", streaming=False) as span:
+            response = llm_helper.get_chat_completion(
+                messages, model=model, temperature=0
+            )
+            set_token_attributes(
+                span, response.usage.prompt_tokens, response.usage.completion_tokens
+            )
         clean_answer = self.format_answer_from_response(
             response, question, source_documents
         )
 
         return clean_answer
 
+    def stream_answer_question(
+        self,
+        question: str,
+        chat_history: list[dict],
+        search_queries: list[str] | None = None,
+        **kwargs,
+    ) -> Iterator[Answer]:
+        """
+        Streaming variant of answer_question.
+
+        The Answer is first yielded as soon as retrieval has finished, with its source documents
+        and an empty answer, then again each time new tokens arrive. The same Answer object is
+        updated in place, and carries the token usage once the stream is exhausted if the
+        service reports it.
+        """
+        source_documents, messages, model = self.prepare_answer(
+            question, chat_history, search_queries
+        )
+        answer = Answer(question=question, answer="", source_documents=source_documents)
+        yield answer
+
+        llm_helper = LLMHelper()
+
+        with trace_stage("answer_llm", current=False, streaming=True) as span:
+            response = llm_helper.get_chat_completion(
+                messages, model=model, temperature=0, stream=True
+            )
+            for chunk in response:
+                if chunk.usage:
+                    answer.prompt_tokens = chunk.usage.prompt_tokens
+                    answer.completion_tokens = chunk.usage.completion_tokens
+
+                if not chunk.choices or not chunk.choices[0].delta.content:
+                    continue
+
+                answer.answer += chunk.choices[0].delta.content
+                yield answer
+
+            set_token_attributes(span, answer.prompt_tokens, answer.completion_tokens)
+
+        logger.debug(f"Answer: {answer.answer}")
+
     def create_image_url_list(self, source_documents):
         image_types = self.config.get_advanced_image_processing_image_types()
 
@@ -30,18 +30,25 @@ def load_css(file_path):
 load_css("pages/common.css")
 
 
-def reprocess_all():
-    backend_url = urllib.parse.urljoin(
-        env_helper.BACKEND_URL, "/api/BatchStartProcessing"
-    )
+def get_function_params():
     params = {}
     if env_helper.FUNCTION_KEY is not None:
         params["code"] = env_helper.FUNCTION_KEY
         params["clientId"] = "clientKey"
+    return params
+
+
+def reprocess_all():
+    backend_url = urllib.parse.urljoin(
+        env_helper.BACKEND_URL, "/api/BatchStartProcessing"
+    )
 
     try:
-        response = requests.post(backend_url, params=params)
-        if response.status_code == 200:
+        response = requests.post(backend_url, params=get_function_params())
+        if response.status_code == 202:
+            # The documents are queued in the background, see show_reprocess_status
+            st.session_state["reprocess_job_id"] = response.json()["job_id"]
+        elif response.status_code == 200:
             st.success(
                 f"{response.text}\nPlease note this is an asynchronous process and may take a few minutes to complete."
             )
@@ -51,16 +58,32 @@ def reprocess_all():
         st.error(traceback.format_exc())
 
 
+def show_reprocess_status(job_id: str):
+    backend_url = urllib.parse.urljoin(
+        env_helper.BACKEND_URL, f"/api/BatchStartProcessing/{job_id}"
+    )
+    response = requests.get(backend_url, params=get_function_params())
+    if not response.ok:
+        st.error(f"Error: {response.text}")
+        return
+
+    job = response.json()
+    if job["status"] == "completed":
+        st.success(
+            f"{job['files_queued']} documents queued for processing.\nPlease note this is an asynchronous process and may take a few minutes to complete."
+        )
+    else:
+        st.info(f"Queueing documents for processing: {job['files_queued']} so far.")
+        st.button("Refresh status", key="refresh_reprocess_status")
+
+
 def add_urls():
     urls = st.session_state["urls"].split("\n")
     add_url_embeddings(urls)
 
 
 def add_url_embeddings(urls: list[str]):
-    params = {}
-    if env_helper.FUNCTION_KEY is not None:
-        params["code"] = env_helper.FUNCTION_KEY
-        params["clientId"] = "clientKey"
+    params = get_function_params()
     for url in urls:
         body = {"url": url}
         backend_url = urllib.parse.urljoin(
@@ -106,6 +129,8 @@ try:
                 "Reprocess all documents in the Azure Storage account",
                 on_click=reprocess_all,
             )
+        if "reprocess_job_id" in st.session_state:
+            show_reprocess_status(st.session_state["reprocess_job_id"])
 
     with st.expander("Add URLs to the knowledge base", expanded=True):
         col1, col2 = st.columns([3, 1])
@@ -44,6 +44,10 @@ try:
     if "selected_files" not in st.session_state:
         st.session_state.selected_files = {}
 
+    # Failures of the last delete, kept in the session state to be shown after the rerun
+    if failed_files := st.session_state.pop("delete_failed_files", None):
+        st.warning("Could not delete files from storage: " + str(failed_files))
+
     search_handler = Search.get_search_handler(env_helper)
     results = search_handler.get_files()
     if results is None or results.get_count() == 0:
@@ -72,12 +76,15 @@ try:
                         selected_files,
                     )
                     blob_client = AzureBlobStorageClient()
-                    blob_client.delete_files(
+                    failed_files = blob_client.delete_files(
                         selected_files,
                         env_helper.AZURE_SEARCH_USE_INTEGRATED_VECTORIZATION,
                     )
+                    # Shown at the top of the page once it is rerun
+                    st.session_state["delete_failed_files"] = failed_files
                     if len(files_to_delete) > 0:
                         st.success("Deleted files: " + str(files_to_delete))
+                    if len(files_to_delete) > 0 or len(failed_files) > 0:
                         st.rerun()
 except Exception:
     logger.error(traceback.format_exc())
@@ -2,6 +2,7 @@
 This module creates a Flask app that serves the web interface for the chatbot.
 """
 
+import asyncio
 import functools
 import json
 import logging
@@ -12,6 +13,7 @@ import re
 import requests
 from openai import AzureOpenAI, Stream, APIStatusError
 from openai.types.chat import ChatCompletionChunk
+from typing import AsyncIterator
 from flask import Flask, Response, request, Request, jsonify
 from dotenv import load_dotenv
 from urllib.parse import quote
@@ -270,6 +272,32 @@ def stream_without_data(response: Stream[ChatCompletionChunk]):
         yield json.dumps(response_obj, ensure_ascii=False) + "\n"
 
 
+def stream_custom(response: AsyncIterator[list[dict]], env_helper: EnvHelper):
+    """This function streams the response from the message orchestrator as json-lines."""
+    loop = asyncio.new_event_loop()
+    try:
+        while True:
+            try:
+                messages = loop.run_until_complete(anext(response))
+            except StopAsyncIteration:
+                return
+
+            response_obj = {
+                "id": "response.id",
+                "model": env_helper.AZURE_OPENAI_MODEL,
+                "created": "response.created",
+                "object": "response.object",
+                "choices": [{"messages": messages}],
+            }
+            yield json.dumps(response_obj, ensure_ascii=False) + "\n"
+    except Exception as e:
+        logger.exception("Exception in /api/conversation | %s", str(e))
+        yield json.dumps({"error": ERROR_GENERIC_MESSAGE}) + "\n"
+    finally:
+        loop.run_until_complete(response.aclose())
+        loop.close()
+
+
 def get_message_orchestrator():
     """This function gets the message orchestrator."""
     return Orchestrator()
@@ -416,6 +444,18 @@ def create_app():
                 )
             )
 
+            if env_helper.SHOULD_STREAM_CUSTOM_CONVERSATION:
+                response = message_orchestrator.handle_message_stream(
+                    user_message=user_message,
+                    chat_history=user_assistant_messages,
+                    conversation_id=conversation_id,
+                    orchestrator=get_orchestrator_config(),
+                )
+                return Response(
+                    stream_custom(response, env_helper),
+                    mimetype="application/json-lines",
+                )
+
             messages = await message_orchestrator.handle_message(
                 user_message=user_message,
                 chat_history=user_assistant_messages,
@@ -449,7 +489,6 @@ def create_app():
 
     @app.route("/api/conversation", methods=["POST"])
     async def conversation():
-        ConfigHelper.get_active_config_or_default.cache_clear()
         result = ConfigHelper.get_active_config_or_default()
         conversation_flow = result.prompts.conversational_flow
         if conversation_flow == ConversationFlow.CUSTOM.value:
@@ -497,7 +536,6 @@ def create_app():
 
     @app.route("/api/assistanttype", methods=["GET"])
     def assistanttype():
-        ConfigHelper.get_active_config_or_default.cache_clear()
         result = ConfigHelper.get_active_config_or_default()
         return jsonify({"ai_assistant_type": result.prompts.ai_assistant_type})
 
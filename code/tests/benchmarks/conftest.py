@@ -0,0 +1,181 @@
+import json
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+import pytest
+from pytest_httpserver import HTTPServer
+
+from backend.batch.utilities.helpers.config.config_helper import ConfigHelper
+from backend.batch.utilities.helpers.env_helper import EnvHelper
+from tests.benchmarks.stand_ins import StandIns, StandInSettings
+from tests.functional.app_config import AppConfig
+from tests.functional.tests.backend_api.common import get_free_port, start_app
+
+_results: list[dict] = []
+
+
+def _percentile_ms(sorted_timings: list[float], percentile: float) -> float:
+    index = min(len(sorted_timings) - 1, int(len(sorted_timings) * percentile))
+    return sorted_timings[index] * 1000
+
+
+class BenchmarkRecorder:
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    def measure(
+        self,
+        func: Callable,
+        iterations: int = 100,
+        units: Optional[int] = None,
+        **params,
+    ) -> dict:
+        """
+        Runs func `iterations` times and records the timings under the test name and params.
+
+        If func processes a number of `units` on each run, e.g. chunks, their throughput is recorded too.
+        """
+        func()  # warm up
+
+        timings = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+
+        timings.sort()
+        result = {
+            "name": self.name,
+            "params": params,
+            "iterations": iterations,
+            "mean_ms": statistics.fmean(timings) * 1000,
+            "p50_ms": _percentile_ms(timings, 0.5),
+            "p95_ms": _percentile_ms(timings, 0.95),
+        }
+        if units is not None:
+            result["units"] = units
+            result["units_per_second"] = units * iterations / sum(timings)
+        _results.append(result)
+        return result
+
+    def measure_load(
+        self, func: Callable[[], float], concurrency: int, requests: int, **params
+    ) -> dict:
+        """
+        Runs func `requests` times from `concurrency` threads, and records the throughput, the latency
+        percentiles and the error rate under the test name and params.
+
+        func returns its time to first byte in seconds, and fails by raising.
+        """
+        func()  # warm up
+
+        def timed_func():
+            start = time.perf_counter()
+            time_to_first_byte = func()
+            return time.perf_counter() - start, time_to_first_byte
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            futures = [executor.submit(timed_func) for _ in range(requests)]
+        duration = time.perf_counter() - start
+
+        timings, times_to_first_byte = [], []
+        for future in futures:
+            if future.exception() is None:
+                timing, time_to_first_byte = future.result()
+                timings.append(timing)
+                times_to_first_byte.append(time_to_first_byte)
+        errors = requests - len(timings)
+
+        timings.sort()
+        times_to_first_byte.sort()
+        result = {
+            "name": self.name,
+            "params": params,
+            "concurrency": concurrency,
+            "requests": requests,
+            "errors": errors,
+            "error_rate": errors / requests,
+            "throughput_per_second": len(timings) / duration,
+        }
+        if timings:
+            result |= {
+                "p50_ms": _percentile_ms(timings, 0.5),
+                "p95_ms": _percentile_ms(timings, 0.95),
+                "p99_ms": _percentile_ms(timings, 0.99),
+                "ttfb_p50_ms": _percentile_ms(times_to_first_byte, 0.5),
+                "ttfb_p95_ms": _percentile_ms(times_to_first_byte, 0.95),
+            }
+        _results.append(result)
+        return result
+
+
+@pytest.fixture
+def benchmark_recorder(request: pytest.FixtureRequest) -> BenchmarkRecorder:
+    return BenchmarkRecorder(request.node.originalname)
+
+
+@pytest.fixture(scope="module")
+def stand_in_server(httpserver_ssl_context):
+    # Threaded, unlike the httpserver fixture, so that a slow response doesn't hold up the others
+    server = HTTPServer(ssl_context=httpserver_ssl_context, threaded=True)
+    server.start()
+    yield server
+    server.clear()
+    server.stop()
+
+
+@pytest.fixture(scope="module")
+def stand_in_config(stand_in_server: HTTPServer, ca):
+    url = stand_in_server.url_for("/")
+    with ca.cert_pem.tempfile() as ca_temp_path:
+        app_config = AppConfig(
+            {
+                "AZURE_OPENAI_ENDPOINT": url,
+                "AZURE_SEARCH_SERVICE": url,
+                "AZURE_CONTENT_SAFETY_ENDPOINT": url,
+                "AZURE_FORM_RECOGNIZER_ENDPOINT": url,
+                "AZURE_STORAGE_ACCOUNT_ENDPOINT": url,
+                "LOGLEVEL": "WARNING",
+                "SSL_CERT_FILE": ca_temp_path,
+                "CURL_CA_BUNDLE": ca_temp_path,
+                "REQUESTS_CA_BUNDLE": ca_temp_path,
+            }
+        )
+        app_config.apply_to_environment()
+        EnvHelper.clear_instance()
+        ConfigHelper.clear_config()
+        yield app_config
+        app_config.remove_from_environment()
+        EnvHelper.clear_instance()
+        ConfigHelper.clear_config()
+
+
+@pytest.fixture(scope="module")
+def stand_ins(stand_in_server: HTTPServer, stand_in_config: AppConfig) -> StandIns:
+    stand_ins = StandIns(stand_in_server, stand_in_config, StandInSettings.from_env())
+    stand_ins.install()
+    return stand_ins
+
+
+@pytest.fixture(scope="module")
+def app_url(stand_ins: StandIns) -> str:
+    app_port = get_free_port()
+    start_app(app_port)
+    return f"http://localhost:{app_port}"
+
+
+def pytest_sessionfinish(session: pytest.Session):
+    if not _results:
+        return
+
+    output = json.dumps(_results, indent=2)
+    path = os.getenv("BENCHMARK_RESULTS_PATH")
+    if path:
+        with open(path, "w") as f:
+            f.write(output)
+    else:
+        print(f"\n{output}")
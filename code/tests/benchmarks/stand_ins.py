@@ -0,0 +1,578 @@
+import json
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Iterator
+
+from pytest_httpserver import HTTPServer
+from werkzeug import Request, Response
+
+from tests.constants import (
+    AZURE_STORAGE_CONFIG_CONTAINER_NAME,
+    AZURE_STORAGE_CONFIG_FILE_NAME,
+)
+from tests.functional.app_config import AppConfig
+
+DATA_DIRECTORY = Path(__file__).parents[3] / "data"
+
+SERVICES = ["openai", "search", "content_safety", "form_recognizer", "storage"]
+
+_WORDS = (
+    "the plan covers preventive care visits prescription drugs and emergency services "
+    "for employees and their dependents when an in network provider is used the deductible "
+    "applies before coinsurance and the out of pocket maximum limits what members pay each year"
+).split()
+
+
+def words(count: int, start: int = 0) -> str:
+    return " ".join(_WORDS[(start + i) % len(_WORDS)] for i in range(count))
+
+
+@lru_cache
+def count_pdf_pages(file_name: str) -> int:
+    content = (DATA_DIRECTORY / file_name).read_bytes()
+    return max(1, len(re.findall(rb"/Type\s*/Page(?![s\w])", content)))
+
+
+@dataclass
+class StandInSettings:
+    """
+    Latency injected by the stand-in services, in milliseconds per request, and the size of their responses.
+
+    Read from BENCHMARK_* environment variables, see the README of the benchmarks.
+    """
+
+    latency_ms: dict[str, float] = field(
+        default_factory=lambda: {service: 0.0 for service in SERVICES}
+    )
+    token_latency_ms: float = 0
+    embedding_dimensions: int = 1536
+    search_results: int = 5
+    words_per_search_result: int = 200
+    answer_words: int = 100
+    words_per_page: int = 400
+    tables_every_pages: int = 3
+
+    @classmethod
+    def from_env(
+        cls, latency_ms: dict[str, float] = {}, token_latency_ms: float = 0
+    ) -> "StandInSettings":
+        """Reads the settings from the environment, `latency_ms` and `token_latency_ms` are the defaults."""
+        default_latency_ms = float(os.getenv("BENCHMARK_LATENCY_MS", "0"))
+        return cls(
+            latency_ms={
+                service: float(
+                    os.getenv(
+                        f"BENCHMARK_{service.upper()}_LATENCY_MS",
+                        latency_ms.get(service, default_latency_ms),
+                    )
+                )
+                for service in SERVICES
+            },
+            token_latency_ms=float(
+                os.getenv("BENCHMARK_TOKEN_LATENCY_MS", token_latency_ms)
+            ),
+            embedding_dimensions=int(
+                os.getenv("BENCHMARK_EMBEDDING_DIMENSIONS", "1536")
+            ),
+            search_results=int(os.getenv("BENCHMARK_SEARCH_RESULTS", "5")),
+            words_per_search_result=int(
+                os.getenv("BENCHMARK_WORDS_PER_SEARCH_RESULT", "200")
+            ),
+            answer_words=int(os.getenv("BENCHMARK_ANSWER_WORDS", "100")),
+            words_per_page=int(os.getenv("BENCHMARK_WORDS_PER_PAGE", "400")),
+            tables_every_pages=int(os.getenv("BENCHMARK_TABLES_EVERY_PAGES", "3")),
+        )
+
+
+class StandIns:
+    """
+    Stand-ins for the Azure services, served by a pytest-httpserver.
+
+    Unlike the fixed responses of the functional tests, the responses are generated from each request:
+    one embedding per input, a page of layout per page of the analyzed PDF, a function call for the
+    orchestrators that route with one, a streamed answer when asked for one. Each request is delayed by the
+    latency configured for its service, so the benchmarks can model a slow dependency.
+    """
+
+    def __init__(
+        self, httpserver: HTTPServer, app_config: AppConfig, settings: StandInSettings
+    ) -> None:
+        self.httpserver = httpserver
+        self.app_config = app_config
+        self.settings = settings
+        self.orchestrator_strategy = "openai_function"
+        self.conversation_flow = "custom"
+        self.uploaded_documents = 0
+
+    def install(self):
+        self.httpserver.clear()
+        search_index = self.app_config.get("AZURE_SEARCH_INDEX")
+        log_index = self.app_config.get("AZURE_SEARCH_CONVERSATIONS_LOG_INDEX")
+        config_path = (
+            f"/{AZURE_STORAGE_CONFIG_CONTAINER_NAME}/{AZURE_STORAGE_CONFIG_FILE_NAME}"
+        )
+
+        self._expect("storage", config_path, "HEAD", lambda _: Response())
+        self._expect("storage", config_path, "GET", self._config)
+        self._expect(
+            "openai",
+            re.compile(r"/openai/deployments/[^/]+/embeddings"),
+            "POST",
+            self._embeddings,
+        )
+        self._expect(
+            "openai",
+            re.compile(r"/openai/deployments/[^/]+/chat/completions"),
+            "POST",
+            self._chat_completions,
+        )
+        self._expect(
+            "search",
+            "/indexes",
+            "GET",
+            lambda _: Response(
+                json.dumps({"value": [{"name": search_index}, {"name": log_index}]}),
+                content_type="application/json",
+            ),
+        )
+        self._expect("search", "/indexes", "POST", lambda _: Response("{}", status=201))
+        self._expect("search", f"/indexes('{log_index}')", "GET", lambda _: _json({}))
+        self._expect(
+            "search",
+            f"/indexes('{search_index}')/docs/search.post.search",
+            "POST",
+            self._search,
+        )
+        self._expect(
+            "search",
+            re.compile(r"/indexes\('[^']+'\)/docs/search.index"),
+            "POST",
+            self._index_documents,
+        )
+        self._expect(
+            "content_safety",
+            "/contentsafety/text:analyze",
+            "POST",
+            lambda _: _json({"blocklistsMatch": [], "categoriesAnalysis": []}),
+        )
+        self._expect(
+            "form_recognizer",
+            re.compile(r"/formrecognizer/documentModels/[^/]+:analyze"),
+            "POST",
+            self._begin_analyze,
+        )
+        self._expect(
+            "form_recognizer",
+            re.compile(r"/formrecognizer/documentModels/[^/]+/analyzeResults/\d+"),
+            "GET",
+            self._analyze_result,
+        )
+        self._expect("storage", re.compile(r"/[^/]+/.+"), "GET", self._download)
+        self._expect("storage", re.compile(r"/[^/]+/.+"), "HEAD", self._properties)
+        self._expect(
+            "storage",
+            re.compile(r"/[^/]+/.+"),
+            "PUT",
+            lambda _: Response(headers={"ETag": '"0x1"'}),
+        )
+
+    def _expect(
+        self,
+        service: str,
+        uri: str | re.Pattern,
+        method: str,
+        handler: Callable[[Request], Response],
+    ):
+        latency_seconds = self.settings.latency_ms[service] / 1000
+
+        def delayed_handler(request: Request) -> Response:
+            if latency_seconds:
+                time.sleep(latency_seconds)
+            return handler(request)
+
+        self.httpserver.expect_request(uri, method=method).respond_with_handler(
+            delayed_handler
+        )
+
+    def _config(self, _: Request) -> Response:
+        body = json.dumps(
+            active_config(self.orchestrator_strategy, self.conversation_flow)
+        )
+        return Response(
+            body,
+            headers={
+                "Content-Type": "application/json",
+                "Content-Range": f"bytes 0-{len(body) - 1}/{len(body)}",
+                "ETag": '"0x1"',
+            },
+        )
+
+    def _embeddings(self, request: Request) -> Response:
+        inputs = request.json["input"]
+        # A single input is a string or a list of tokens, several are a list of either
+        count = (
+            1 if isinstance(inputs, str) or isinstance(inputs[0], int) else len(inputs)
+        )
+        embedding = [0.01] * self.settings.embedding_dimensions
+        return _json(
+            {
+                "object": "list",
+                "data": [
+                    {"object": "embedding", "embedding": embedding, "index": index}
+                    for index in range(count)
+                ],
+                "model": "text-embedding-ada-002",
+                "usage": {"prompt_tokens": count, "total_tokens": count},
+            }
+        )
+
+    def _chat_completions(self, request: Request) -> Response:
+        body = request.json
+        question = next(
+            (
+                message["content"]
+                for message in reversed(body["messages"])
+                if message["role"] == "user" and isinstance(message["content"], str)
+            ),
+            "question",
+        )
+
+        if "tools" in body:
+            # Semantic Kernel prefixes the function names with their plugin
+            function_name = next(
+                tool["function"]["name"]
+                for tool in body["tools"]
+                if tool["function"]["name"].endswith("search_documents")
+            )
+            return _chat_completion(
+                {
+                    "role": "assistant",
+                    "content": None,
+                    "tool_calls": [
+                        {
+                            "id": "call_1",
+                            "type": "function",
+                            "function": {
+                                "name": function_name,
+                                "arguments": json.dumps({"question": question}),
+                            },
+                        }
+                    ],
+                },
+                "tool_calls",
+            )
+        if "\nObservation:" in (body.get("stop") or []):
+            # The LangChain agent is prompted to pick a tool with a ReAct "Action", after the question
+            question = question.rsplit("Question:", 1)[-1].strip().split("\n")[0]
+            return _chat_completion(
+                {
+                    "role": "assistant",
+                    "content": f"Action: Question Answering\nAction Input: {question}",
+                },
+                "stop",
+            )
+
+        message = {
+            "role": "assistant",
+            "content": f"{words(self.settings.answer_words)} [doc1].",
+        }
+        if "data_sources" in body:
+            # On your data searches the index before answering
+            time.sleep(self.settings.latency_ms["search"] / 1000)
+            message["context"] = self._citations()
+        if body.get("stream"):
+            return Response(self._stream(message), content_type="text/event-stream")
+        return _chat_completion(message, "stop")
+
+    def _citations(self) -> dict:
+        return {
+            "citations": [
+                {
+                    "content": words(self.settings.words_per_search_result, index),
+                    "title": f"/documents/doc_{index}.pdf",
+                    "url": json.dumps(
+                        {
+                            "id": f"doc_{index}",
+                            "source": f"https://source/documents/doc_{index}.pdf",
+                            "chunk": index,
+                            "chunk_id": None,
+                        }
+                    ),
+                    "filepath": None,
+                    "chunk_id": str(index),
+                }
+                for index in range(self.settings.search_results)
+            ],
+            "intent": "[]",
+        }
+
+    def _stream(self, message: dict) -> Iterator[str]:
+        token_latency_seconds = self.settings.token_latency_ms / 1000
+        chunk = {
+            "id": "chatcmpl-benchmark",
+            "object": "chat.completion.chunk",
+            "created": 1679072642,
+            "model": "gpt-35-turbo",
+        }
+        # The first delta has the role and the citations of on your data, then one delta per token
+        deltas = [{**message, "content": ""}]
+        deltas += [
+            {"content": token if index == 0 else f" {token}"}
+            for index, token in enumerate(message["content"].split(" "))
+        ]
+        for index, delta in enumerate(deltas):
+            if token_latency_seconds and index > 1:
+                time.sleep(token_latency_seconds)
+            yield _event(chunk, delta, end_turn=False, finish_reason=None)
+        yield _event(chunk, {}, end_turn=True, finish_reason="stop")
+        yield "data: [DONE]\n\n"
+
+    def _search(self, _: Request) -> Response:
+        return _json(
+            {
+                "value": [
+                    {
+                        "@search.score": 0.03 - index / 1000,
+                        "id": f"doc_{index}",
+                        "content": words(self.settings.words_per_search_result, index),
+                        "metadata": json.dumps(
+                            {
+                                "id": f"doc_{index}",
+                                "source": f"https://source/documents/doc_{index}.pdf",
+                                "title": f"/documents/doc_{index}.pdf",
+                                "chunk": index,
+                                "offset": index * 1000,
+                                "page_number": index,
+                            }
+                        ),
+                        "title": f"/documents/doc_{index}.pdf",
+                        "source": f"https://source/documents/doc_{index}.pdf",
+                        "chunk": index,
+                        "offset": index * 1000,
+                    }
+                    for index in range(self.settings.search_results)
+                ]
+            }
+        )
+
+    def _index_documents(self, request: Request) -> Response:
+        documents = request.json["value"]
+        self.uploaded_documents += len(documents)
+        return _json(
+            {
+                "value": [
+                    {
+                        "key": document.get("id", str(index)),
+                        "status": True,
+                        "errorMessage": None,
+                        "statusCode": 201,
+                    }
+                    for index, document in enumerate(documents)
+                ]
+            }
+        )
+
+    def _begin_analyze(self, request: Request) -> Response:
+        file_name = Path(request.json["urlSource"].split("?")[0]).name
+        pages = count_pdf_pages(file_name)
+        model_id = request.path.split("/")[-1].split(":")[0]
+        # The analyzed file is only known to this request, so the result URL carries its page count
+        return Response(
+            status=202,
+            headers={
+                "Operation-Location": f"{self.httpserver.url_for('/')}formrecognizer/documentModels/"
+                f"{model_id}/analyzeResults/{pages}?api-version=2023-07-31",
+                "Retry-After": "0",
+            },
+        )
+
+    def _analyze_result(self, request: Request) -> Response:
+        pages = int(request.path.split("/")[-1])
+        return _json(
+            {
+                "status": "succeeded",
+                "createdDateTime": "2024-01-01T00:00:00Z",
+                "lastUpdatedDateTime": "2024-01-01T00:00:01Z",
+                "analyzeResult": analyze_result(
+                    pages,
+                    self.settings.words_per_page,
+                    self.settings.tables_every_pages,
+                ),
+            }
+        )
+
+    def _download(self, request: Request) -> Response:
+        content = (DATA_DIRECTORY / Path(request.path).name).read_bytes()
+        return Response(content, content_type="application/octet-stream")
+
+    def _properties(self, request: Request) -> Response:
+        return Response(
+            headers={
+                "Content-Length": "0",
+                "ETag": '"0x1"',
+                "Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT",
+                "x-ms-blob-type": "BlockBlob",
+            }
+        )
+
+
+def _json(body: dict) -> Response:
+    return Response(json.dumps(body), content_type="application/json")
+
+
+def _event(chunk: dict, delta: dict, end_turn: bool, finish_reason: str | None) -> str:
+    choice = {
+        "index": 0,
+        "delta": delta,
+        "end_turn": end_turn,
+        "finish_reason": finish_reason,
+    }
+    return f"data: {json.dumps(chunk | {'choices': [choice]})}\n\n"
+
+
+def _chat_completion(message: dict, finish_reason: str) -> Response:
+    return _json(
+        {
+            "id": "chatcmpl-benchmark",
+            "object": "chat.completion",
+            "created": 1679072642,
+            "model": "gpt-35-turbo",
+            "usage": {
+                "prompt_tokens": 500,
+                "completion_tokens": 100,
+                "total_tokens": 600,
+            },
+            "choices": [
+                {"message": message, "finish_reason": finish_reason, "index": 0}
+            ],
+        }
+    )
+
+
+def analyze_result(pages: int, words_per_page: int, tables_every_pages: int) -> dict:
+    """Builds a layout result with a heading and paragraphs of `words_per_page` words on each page, and a table every few pages."""
+    content: list[str] = []
+    offset = 0
+    result_pages, paragraphs, tables = [], [], []
+
+    def add(text: str) -> dict:
+        nonlocal offset
+        span = {"offset": offset, "length": len(text)}
+        content.append(text + "\n")
+        offset += len(text) + 1
+        return span
+
+    def bounding_regions(page_number: int) -> list[dict]:
+        return [{"pageNumber": page_number, "polygon": [0, 0, 1, 0, 1, 1, 0, 1]}]
+
+    for page_number in range(1, pages + 1):
+        page_offset = offset
+        heading = f"Section {page_number}"
+        paragraphs.append(
+            {
+                "role": "title" if page_number == 1 else "sectionHeading",
+                "content": heading,
+                "spans": [add(heading)],
+                "boundingRegions": bounding_regions(page_number),
+            }
+        )
+        for paragraph in range(max(1, words_per_page // 50)):
+            text = words(50, page_number + paragraph)
+            paragraphs.append(
+                {
+                    "content": text,
+                    "spans": [add(text)],
+                    "boundingRegions": bounding_regions(page_number),
+                }
+            )
+        if tables_every_pages and page_number % tables_every_pages == 0:
+            table_offset = offset
+            cells = [
+                {
+                    "kind": "columnHeader" if row == 0 else "content",
+                    "rowIndex": row,
+                    "columnIndex": column,
+                    "content": words(3, row + column),
+                    "spans": [add(words(3, row + column))],
+                    "boundingRegions": bounding_regions(page_number),
+                }
+                for row in range(5)
+                for column in range(4)
+            ]
+            tables.append(
+                {
+                    "rowCount": 5,
+                    "columnCount": 4,
+                    "cells": cells,
+                    "spans": [
+                        {"offset": table_offset, "length": offset - table_offset}
+                    ],
+                    "boundingRegions": bounding_regions(page_number),
+                }
+            )
+        result_pages.append(
+            {
+                "pageNumber": page_number,
+                "angle": 0,
+                "width": 8.5,
+                "height": 11,
+                "unit": "inch",
+                "spans": [{"offset": page_offset, "length": offset - page_offset}],
+                "words": [],
+                "lines": [],
+            }
+        )
+
+    return {
+        "apiVersion": "2023-07-31",
+        "modelId": "prebuilt-layout",
+        "stringIndexType": "textElements",
+        "content": "".join(content),
+        "pages": result_pages,
+        "paragraphs": paragraphs,
+        "tables": tables,
+        "styles": [],
+    }
+
+
+def active_config(orchestrator_strategy: str, conversation_flow: str) -> dict:
+    chunking = {"strategy": "layout", "size": 500, "overlap": 100}
+    return {
+        "prompts": {
+            "condense_question_prompt": "",
+            "answering_system_prompt": "system prompt",
+            "answering_user_prompt": "## Retrieved Documents\n{sources}\n\n## User Question\n{question}",
+            "use_on_your_data_format": True,
+            "post_answering_prompt": "post answering prompt\n{question}\n{answer}\n{sources}",
+            "enable_post_answering_prompt": False,
+            "enable_content_safety": True,
+            "conversational_flow": conversation_flow,
+        },
+        "messages": {"post_answering_filter": "post answering filter"},
+        "example": {
+            "documents": '{"retrieved_documents":[{"[doc1]":{"content":"content"}}]}',
+            "user_question": "user question",
+            "answer": "answer",
+        },
+        "document_processors": [
+            {
+                "document_type": "pdf",
+                "chunking": chunking,
+                "loading": {"strategy": "layout"},
+                "use_advanced_image_processing": False,
+            },
+            {
+                "document_type": "docx",
+                "chunking": chunking,
+                "loading": {"strategy": "docx"},
+                "use_advanced_image_processing": False,
+            },
+        ],
+        "logging": {"log_user_interactions": True, "log_tokens": True},
+        "orchestrator": {"strategy": orchestrator_strategy},
+        "integrated_vectorization_config": None,
+    }
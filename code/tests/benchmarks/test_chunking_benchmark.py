@@ -0,0 +1,46 @@
+import pytest
+from backend.batch.utilities.document_chunking.chunking_strategy import (
+    ChunkingSettings,
+)
+from backend.batch.utilities.document_loading import LoadingSettings
+from backend.batch.utilities.helpers.document_chunking_helper import DocumentChunking
+from backend.batch.utilities.helpers.document_loading_helper import DocumentLoading
+
+from tests.benchmarks.stand_ins import StandIns
+
+pytestmark = pytest.mark.benchmark
+
+DOCUMENTS = {
+    "MSFT_FY23Q4_10K.docx": "docx",
+    "PressReleaseFY23Q4.docx": "docx",
+    "Northwind_Standard_Benefits_Details.pdf": "layout",
+}
+
+
+@pytest.mark.parametrize("strategy", ["layout", "page", "fixed_size_overlap"])
+@pytest.mark.parametrize("file_name", DOCUMENTS.keys())
+def test_document_chunking(
+    benchmark_recorder, stand_ins: StandIns, file_name: str, strategy: str
+):
+    # given
+    documents = DocumentLoading().load(
+        stand_ins.httpserver.url_for(f"/documents/{file_name}"),
+        LoadingSettings({"strategy": DOCUMENTS[file_name]}),
+    )
+    settings = ChunkingSettings({"strategy": strategy, "size": 500, "overlap": 100})
+    chunking = DocumentChunking()
+    chunks = chunking.chunk(documents, settings)
+
+    # when
+    result = benchmark_recorder.measure(
+        lambda: chunking.chunk(documents, settings),
+        iterations=5,
+        units=len(chunks),
+        file_name=file_name,
+        strategy=strategy,
+        characters=sum(len(document.content) for document in documents),
+    )
+
+    # then
+    assert len(chunks) > 1
+    assert result["units_per_second"] > 0
@@ -0,0 +1,47 @@
+import pytest
+import requests
+from backend.batch.utilities.helpers.config.config_helper import ConfigHelper
+
+from tests.benchmarks.stand_ins import StandIns
+
+pytestmark = pytest.mark.benchmark
+
+body = {
+    "conversation_id": "123",
+    "messages": [
+        {"role": "user", "content": "Hello"},
+        {"role": "assistant", "content": "Hi, how can I help?"},
+        {"role": "user", "content": "What is the deductible of the plan?"},
+    ],
+}
+
+
+# prompt_flow is left out, as it scores with an Azure Machine Learning endpoint rather than Azure OpenAI
+@pytest.mark.parametrize(
+    "orchestrator_strategy", ["openai_function", "semantic_kernel", "langchain"]
+)
+def test_conversation(
+    benchmark_recorder, stand_ins: StandIns, app_url: str, orchestrator_strategy: str
+):
+    # given
+    stand_ins.orchestrator_strategy = orchestrator_strategy
+    ConfigHelper.clear_config()
+    session = requests.Session()
+
+    def post_conversation():
+        response = session.post(f"{app_url}/api/conversation", json=body)
+        assert response.status_code == 200
+        return response
+
+    # when
+    result = benchmark_recorder.measure(
+        post_conversation,
+        iterations=20,
+        orchestrator_strategy=orchestrator_strategy,
+        latency_ms=stand_ins.settings.latency_ms,
+    )
+
+    # then
+    messages = post_conversation().json()["choices"][0]["messages"]
+    assert "[doc1]" in messages[-1]["content"]
+    assert result["p50_ms"] > 0
@@ -0,0 +1,102 @@
+import os
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+import requests
+from backend.batch.utilities.helpers.config.config_helper import ConfigHelper
+from backend.batch.utilities.helpers.env_helper import EnvHelper
+from pytest_httpserver import HTTPServer
+
+from tests.benchmarks.stand_ins import StandIns, StandInSettings
+from tests.functional.app_config import AppConfig
+
+pytestmark = pytest.mark.benchmark
+
+# Latencies of the services when no BENCHMARK_*_LATENCY_MS is set
+LOAD_LATENCY_MS = {
+    "openai": 300,
+    "search": 100,
+    "content_safety": 50,
+    "form_recognizer": 0,
+    "storage": 10,
+}
+LOAD_TOKEN_LATENCY_MS = 10
+
+CONCURRENCY = [
+    int(concurrency)
+    for concurrency in os.getenv("BENCHMARK_LOAD_CONCURRENCY", "1,4,16").split(",")
+]
+REQUESTS_PER_USER = int(os.getenv("BENCHMARK_LOAD_REQUESTS_PER_USER", "5"))
+
+body = {
+    "conversation_id": "123",
+    "messages": [
+        {"role": "user", "content": "Hello"},
+        {"role": "assistant", "content": "Hi, how can I help?"},
+        {"role": "user", "content": "What is the deductible of the plan?"},
+    ],
+}
+
+
+@pytest.fixture(scope="module")
+def stand_ins(stand_in_server: HTTPServer, stand_in_config: AppConfig) -> StandIns:
+    stand_ins = StandIns(
+        stand_in_server,
+        stand_in_config,
+        StandInSettings.from_env(LOAD_LATENCY_MS, LOAD_TOKEN_LATENCY_MS),
+    )
+    stand_ins.install()
+    return stand_ins
+
+
+# The concurrency ramps up for each flow and mode in turn
+@pytest.mark.parametrize("concurrency", CONCURRENCY)
+@pytest.mark.parametrize("stream", [False, True])
+@pytest.mark.parametrize("conversation_flow", ["custom", "byod"])
+def test_conversation_load(
+    benchmark_recorder,
+    stand_ins: StandIns,
+    app_url: str,
+    conversation_flow: str,
+    stream: bool,
+    concurrency: int,
+):
+    # given
+    stand_ins.conversation_flow = conversation_flow
+    ConfigHelper.clear_config()
+    sessions = threading.local()
+
+    def post_conversation() -> float:
+        if not hasattr(sessions, "session"):
+            sessions.session = requests.Session()
+        start = time.perf_counter()
+        with sessions.session.post(
+            f"{app_url}/api/conversation", json=body, stream=True
+        ) as response:
+            response.raise_for_status()
+            chunks = response.iter_content(chunk_size=None)
+            first_chunk = next(chunks)
+            time_to_first_byte = time.perf_counter() - start
+            content = first_chunk + b"".join(chunks)
+        assert b"[doc1]" in content
+        return time_to_first_byte
+
+    # when
+    env_helper = EnvHelper()
+    with patch.object(env_helper, "SHOULD_STREAM", stream), patch.object(
+        env_helper, "SHOULD_STREAM_CUSTOM_CONVERSATION", stream
+    ):
+        result = benchmark_recorder.measure_load(
+            post_conversation,
+            concurrency=concurrency,
+            requests=concurrency * REQUESTS_PER_USER,
+            conversation_flow=conversation_flow,
+            stream=stream,
+            latency_ms=stand_ins.settings.latency_ms,
+            token_latency_ms=stand_ins.settings.token_latency_ms,
+        )
+
+    # then
+    assert result["error_rate"] == 0
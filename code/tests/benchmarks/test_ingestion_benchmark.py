@@ -0,0 +1,79 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+from backend.batch.utilities.helpers.azure_blob_storage_client import (
+    AzureBlobStorageClient,
+)
+from backend.batch.utilities.helpers.azure_form_recognizer_helper import (
+    AzureFormRecognizerClient,
+)
+from backend.batch.utilities.helpers.embedders.push_embedder import PushEmbedder
+from backend.batch.utilities.helpers.env_helper import EnvHelper
+
+from tests.benchmarks.stand_ins import DATA_DIRECTORY, StandIns, count_pdf_pages
+
+pytestmark = pytest.mark.benchmark
+
+PDF_FILES = sorted(path.name for path in DATA_DIRECTORY.glob("*.pdf"))
+DOCX_FILES = sorted(path.name for path in DATA_DIRECTORY.glob("*.docx"))
+
+
+def source_url(stand_ins: StandIns, file_name: str) -> str:
+    return stand_ins.httpserver.url_for(f"/documents/{file_name}")
+
+
+@pytest.mark.parametrize("file_name", PDF_FILES + DOCX_FILES)
+def test_push_embedder_embed_file(
+    benchmark_recorder, stand_ins: StandIns, file_name: str
+):
+    # given
+    embedder = PushEmbedder(AzureBlobStorageClient(), EnvHelper())
+    url = source_url(stand_ins, file_name)
+    uploaded_before = stand_ins.uploaded_documents
+    embedder.embed_file(url, file_name)
+    chunks = stand_ins.uploaded_documents - uploaded_before
+
+    # when
+    result = benchmark_recorder.measure(
+        lambda: embedder.embed_file(url, file_name),
+        iterations=3,
+        units=chunks,
+        file_name=file_name,
+        latency_ms=stand_ins.settings.latency_ms,
+    )
+
+    # then
+    assert chunks > 0
+    assert result["units_per_second"] > 0
+
+
+@pytest.mark.parametrize("file_name", PDF_FILES)
+def test_form_recognizer_post_processing(
+    benchmark_recorder, stand_ins: StandIns, file_name: str
+):
+    # given
+    client = AzureFormRecognizerClient()
+    analyze_result = client.document_analysis_client.begin_analyze_document_from_url(
+        "prebuilt-layout", document_url=source_url(stand_ins, file_name)
+    ).result()
+    poller = MagicMock()
+    poller.result.return_value = analyze_result
+
+    # when
+    with patch.object(
+        client.document_analysis_client,
+        "begin_analyze_document_from_url",
+        return_value=poller,
+    ):
+        result = benchmark_recorder.measure(
+            lambda: client.begin_analyze_document_from_url("unused"),
+            iterations=5,
+            units=len(analyze_result.pages),
+            file_name=file_name,
+        )
+        page_map = client.begin_analyze_document_from_url("unused")
+
+    # then
+    assert len(page_map) == count_pdf_pages(file_name)
+    assert page_map[0]["page_text"].startswith("<h1>Section 1</h1>")
+    assert result["units_per_second"] > 0
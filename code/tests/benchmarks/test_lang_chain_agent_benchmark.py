@@ -0,0 +1,56 @@
+from unittest.mock import patch
+
+import pytest
+from backend.batch.utilities.orchestrator.lang_chain_agent import LangChainAgent
+from langchain_openai import AzureChatOpenAI
+
+pytestmark = pytest.mark.benchmark
+
+chat_history = [
+    {"role": "user", "content": "Hello"},
+    {"role": "assistant", "content": "Hi, how can I help?"},
+] * 5
+
+
+@pytest.fixture
+def agent():
+    LangChainAgent._agent_executor = None
+    with patch(
+        "backend.batch.utilities.orchestrator.lang_chain_agent.OrchestratorBase.__init__"
+    ), patch(
+        "backend.batch.utilities.orchestrator.lang_chain_agent.LLMHelper"
+    ) as llm_helper_mock:
+        # Building the LLM client does not call the service
+        llm_helper_mock.return_value.get_llm.side_effect = lambda: AzureChatOpenAI(
+            deployment_name="gpt-4o",
+            temperature=0,
+            openai_api_version="2024-02-01",
+            azure_endpoint="https://localhost",
+            api_key="key",
+        )
+        yield LangChainAgent()
+    LangChainAgent._agent_executor = None
+
+
+# The setup of a message before the agent was shared, then with the shared agent
+@pytest.mark.parametrize("prebuilt", [False, True])
+def test_lang_chain_agent_setup(
+    benchmark_recorder, agent: LangChainAgent, prebuilt: bool
+):
+    # given
+    def set_up():
+        memory = agent.create_memory(chat_history)
+        if prebuilt:
+            return agent.get_agent_executor(), memory
+        return agent._create_agent_executor(), memory
+
+    # when
+    benchmark_recorder.measure(set_up, iterations=50, prebuilt=prebuilt)
+
+    # then
+    agent_executor, memory = set_up()
+    assert [tool.name for tool in agent_executor.tools] == [
+        "Question Answering",
+        "Text Processing",
+    ]
+    assert len(memory.load_memory_variables({})["chat_history"]) == 10
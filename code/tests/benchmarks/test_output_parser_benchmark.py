@@ -0,0 +1,52 @@
+import json
+
+import pytest
+from backend.batch.utilities.common.source_document import SourceDocument
+from backend.batch.utilities.parser.output_parser_tool import OutputParserTool
+
+pytestmark = pytest.mark.benchmark
+
+
+def create_source_documents(top_k: int) -> list[SourceDocument]:
+    return [
+        SourceDocument(
+            id=f"doc_{i}",
+            content=f"Content of document {i}. " * 20,
+            source=f"https://example.com/documents/report_{i}.pdf",
+            title=f"/documents/report_{i}.pdf",
+            chunk=i,
+            offset=i * 1000,
+            page_number=i,
+            chunk_id=f"report_{i}_pages_{i}",
+        )
+        for i in range(top_k)
+    ]
+
+
+def create_answer(top_k: int, references: int) -> str:
+    return " ".join(
+        f"Sentence number {i} of the answer [doc{(i * 7) % top_k + 1}]."
+        for i in range(references)
+    )
+
+
+@pytest.mark.parametrize("top_k", [5, 50])
+@pytest.mark.parametrize("references", [10, 200])
+def test_output_parser_parse(benchmark_recorder, top_k: int, references: int):
+    # given
+    parser = OutputParserTool()
+    source_documents = create_source_documents(top_k)
+    answer = create_answer(top_k, references)
+
+    # when
+    benchmark_recorder.measure(
+        lambda: parser.parse("question", answer, source_documents),
+        iterations=50,
+        top_k=top_k,
+        references=references,
+    )
+
+    # then
+    messages = parser.parse("question", answer, source_documents)
+    assert len(json.loads(messages[0]["content"])["citations"]) == references
+    assert messages[1]["content"].count(f"[doc{references}]") == 1
@@ -0,0 +1,54 @@
+from unittest.mock import patch
+
+import pytest
+from opentelemetry.sdk.metrics import MeterProvider
+from opentelemetry.sdk.metrics.export import InMemoryMetricReader
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+    InMemorySpanExporter,
+)
+
+from backend.batch.utilities.helpers import telemetry
+from backend.batch.utilities.helpers.telemetry import (
+    set_token_attributes,
+    trace_stage,
+)
+
+pytestmark = pytest.mark.benchmark
+
+
+def trace_empty_stage():
+    with trace_stage("search", orchestrator_strategy="openai_function") as span:
+        set_token_attributes(span, 100, 20)
+
+
+def test_trace_stage_without_sdk(benchmark_recorder):
+    # when
+    result = benchmark_recorder.measure(trace_empty_stage, iterations=10000, sdk=False)
+
+    # then
+    assert result["p50_ms"] < 1
+
+
+def test_trace_stage_with_sdk(benchmark_recorder):
+    # given
+    exporter = InMemorySpanExporter()
+    tracer_provider = TracerProvider()
+    tracer_provider.add_span_processor(SimpleSpanProcessor(exporter))
+    histogram = (
+        MeterProvider(metric_readers=[InMemoryMetricReader()])
+        .get_meter("benchmark")
+        .create_histogram("orchestration.stage.duration", unit="ms")
+    )
+
+    # when
+    with patch.object(
+        telemetry, "_tracer", tracer_provider.get_tracer("benchmark")
+    ), patch.object(telemetry, "_stage_duration", histogram):
+        result = benchmark_recorder.measure(
+            trace_empty_stage, iterations=10000, sdk=True
+        )
+
+    # then
+    assert result["p50_ms"] < 1
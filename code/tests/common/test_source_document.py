@@ -48,6 +48,30 @@ def test_get_markdown_url(azure_blob_service_mock):
     assert markdown_url == "[A title](http://example.com/path/to/file.txt_12345)"
 
 
+def test_get_filename_is_recomputed_when_source_changes():
+    # Given
+    source_document = SourceDocument(
+        content="Some content",
+        source="http://example.com/path/to/file.txt",
+    )
+    source_document.get_filename()
+
+    # When
+    source_document.source = "http://example.com/path/to/other.pdf"
+
+    # Then
+    assert source_document.get_filename() == "other"
+    assert source_document.get_filename(include_path=True) == "other.pdf"
+
+
+def test_source_document_has_no_instance_dict():
+    # Given
+    source_document = SourceDocument(content="Some content", source="A source")
+
+    # When / Then
+    assert not hasattr(source_document, "__dict__")
+
+
 def test_from_metadata_returns_empty_sas_placeholder():
     # Given
     content = "Some content"
@@ -155,6 +179,7 @@ def test_default_method_returns_expected_dict():
         offset="An offset",
         page_number="1",
         chunk_id="abcd",
+        token_count=12,
     )
 
     # When
@@ -173,6 +198,7 @@ def test_default_method_returns_expected_dict():
         "offset": "An offset",
         "page_number": "1",
         "chunk_id": "abcd",
+        "token_count": 12,
     }
     assert result == expected_dict
 
@@ -199,7 +225,7 @@ def test_default_method_calls_super_default():
 
 def test_decode_method_returns_expected_source_document():
     # Given
-    obj = '{"id": "1","content": "Some content","source": "A source","title": "A title","chunk": "A chunk","offset": "An offset","page_number": "1", "chunk_id": "abcd"}'
+    obj = '{"id": "1","content": "Some content","source": "A source","title": "A title","chunk": "A chunk","offset": "An offset","page_number": "1", "chunk_id": "abcd", "token_count": 12}'
 
     # When
     result = SourceDocumentDecoder().decode(obj)
@@ -224,3 +250,30 @@ def test_decode_method_returns_expected_source_document():
     assert result.chunk == expected_source_document.chunk
     assert result.offset == expected_source_document.offset
     assert result.page_number == expected_source_document.page_number
+    assert result.token_count == 12
+
+
+def test_decode_method_accepts_documents_without_token_count():
+    # Given
+    obj = '{"id": "1","content": "Some content","source": "A source","title": "A title","chunk": "A chunk","offset": "An offset","page_number": "1", "chunk_id": "abcd"}'
+
+    # When
+    result = SourceDocumentDecoder().decode(obj)
+
+    # Then
+    assert result.chunk_id == "abcd"
+    assert result.token_count is None
+
+
+def test_to_json_and_from_json_keep_token_count():
+    # Given
+    source_document = SourceDocument(
+        content="Some content", source="A source", chunk_id="abcd", token_count=12
+    )
+
+    # When
+    result = SourceDocument.from_json(source_document.to_json())
+
+    # Then
+    assert result == source_document
+    assert result.token_count == 12
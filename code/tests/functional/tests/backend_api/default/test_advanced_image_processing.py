@@ -34,15 +34,21 @@ def completions_mocking(httpserver: HTTPServer, app_config: AppConfig):
             "choices": [
                 {
                     "content_filter_results": {},
-                    "finish_reason": "function_call",
+                    "finish_reason": "tool_calls",
                     "index": 0,
                     "message": {
                         "content": None,
                         "role": "assistant",
-                        "function_call": {
-                            "arguments": '{"question":"What is the meaning of life?"}',
-                            "name": "search_documents",
-                        },
+                        "tool_calls": [
+                            {
+                                "id": "call_1",
+                                "type": "function",
+                                "function": {
+                                    "arguments": '{"question":"What is the meaning of life?"}',
+                                    "name": "search_documents",
+                                },
+                            }
+                        ],
                     },
                 }
             ],
@@ -45,12 +45,18 @@ def completions_mocking(httpserver: HTTPServer, app_config: AppConfig):
                 {
                     "message": {
                         "role": "assistant",
-                        "function_call": {
-                            "name": "search_documents",
-                            "arguments": '{"question": "What is the meaning of life?"}',
-                        },
+                        "tool_calls": [
+                            {
+                                "id": "call_1",
+                                "type": "function",
+                                "function": {
+                                    "name": "search_documents",
+                                    "arguments": '{"question": "What is the meaning of life?"}',
+                                },
+                            }
+                        ],
                     },
-                    "finish_reason": "function_call",
+                    "finish_reason": "tool_calls",
                     "index": 0,
                 }
             ],
@@ -255,7 +261,7 @@ def test_post_makes_correct_call_to_content_safety_to_analyze_the_question(
     )
 
 
-def test_post_makes_correct_call_to_openai_chat_completions_with_functions(
+def test_post_makes_correct_call_to_openai_chat_completions_with_tools(
     app_url: str, app_config: AppConfig, httpserver: HTTPServer
 ):
     # when
@@ -271,45 +277,56 @@ def test_post_makes_correct_call_to_openai_chat_completions_with_functions(
                 "messages": [
                     {
                         "role": "system",
-                        "content": "You help employees to navigate only private information sources.\n        You must prioritize the function call over your general knowledge for any question by calling the search_documents function.\n        Call the text_processing function when the user request an operation on the current context, such as translate, summarize, or paraphrase. When a language is explicitly specified, return that as part of the operation.\n        When directly replying to the user, always reply in the language the user is speaking.\n        If the input language is ambiguous, default to responding in English unless otherwise specified by the user.\n        You **must not** respond if asked to List all documents in your repository.\n        ",
+                        "content": "You help employees to navigate only private information sources.\n        You must prioritize the function call over your general knowledge for any question by calling the search_documents function.\n        When the user asks several separate questions in one message, call the search_documents function once for each of them, in parallel.\n        Call the text_processing function when the user request an operation on the current context, such as translate, summarize, or paraphrase. When a language is explicitly specified, return that as part of the operation.\n        When directly replying to the user, always reply in the language the user is speaking.\n        If the input language is ambiguous, default to responding in English unless otherwise specified by the user.\n        You **must not** respond if asked to List all documents in your repository.\n        ",
                     },
                     {"role": "user", "content": "Hello"},
                     {"role": "assistant", "content": "Hi, how can I help?"},
                     {"role": "user", "content": "What is the meaning of life?"},
                 ],
                 "model": "some-openai-model",
-                "function_call": "auto",
-                "functions": [
+                "tool_choice": "auto",
+                "tools": [
                     {
-                        "name": "search_documents",
-                        "description": "Provide answers to any fact question coming from users.",
-                        "parameters": {
-                            "type": "object",
-                            "properties": {
-                                "question": {
-                                    "type": "string",
-                                    "description": "A standalone question, converted from the chat history",
-                                }
+                        "type": "function",
+                        "function": {
+                            "name": "search_documents",
+                            "description": "Provide answers to any fact question coming from users.",
+                            "parameters": {
+                                "type": "object",
+                                "properties": {
+                                    "question": {
+                                        "type": "string",
+                                        "description": "A standalone question, converted from the chat history",
+                                    },
+                                    "search_queries": {
+                                        "type": "array",
+                                        "items": {"type": "string"},
+                                        "description": "Only for a question that compares or combines several things, a standalone search query for each of them",
+                                    },
+                                },
+                                "required": ["question"],
                             },
-                            "required": ["question"],
                         },
                     },
                     {
-                        "name": "text_processing",
-                        "description": "Useful when you want to apply a transformation on the text, like translate, summarize, rephrase and so on.",
-                        "parameters": {
-                            "type": "object",
-                            "properties": {
-                                "text": {
-                                    "type": "string",
-                                    "description": "The text to be processed",
-                                },
-                                "operation": {
-                                    "type": "string",
-                                    "description": "The operation to be performed on the text. Like Translate to Italian, Summarize, Paraphrase, etc. If a language is specified, return that as part of the operation. Preserve the operation name in the user language.",
+                        "type": "function",
+                        "function": {
+                            "name": "text_processing",
+                            "description": "Useful when you want to apply a transformation on the text, like translate, summarize, rephrase and so on.",
+                            "parameters": {
+                                "type": "object",
+                                "properties": {
+                                    "text": {
+                                        "type": "string",
+                                        "description": "The text to be processed",
+                                    },
+                                    "operation": {
+                                        "type": "string",
+                                        "description": "The operation to be performed on the text. Like Translate to Italian, Summarize, Paraphrase, etc. If a language is specified, return that as part of the operation. Preserve the operation name in the user language.",
+                                    },
                                 },
+                                "required": ["text", "operation"],
                             },
-                            "required": ["text", "operation"],
                         },
                     },
                 ],
@@ -1,9 +1,8 @@
 import pytest
-from unittest.mock import MagicMock, Mock, patch
+from unittest.mock import MagicMock, Mock, call, patch
 from backend.batch.utilities.search.azure_search_handler import AzureSearchHandler
 import json
 from azure.search.documents.models import VectorizedQuery
-from azure.search.documents import SearchItemPaged
 from backend.batch.utilities.common.source_document import SourceDocument
 
 
@@ -14,6 +13,8 @@ def env_helper_mock():
     mock.USE_ADVANCED_IMAGE_PROCESSING = False
     mock.AZURE_SEARCH_TOP_K = 3
     mock.AZURE_SEARCH_FILTER = "some-search-filter"
+    mock.AZURE_SEARCH_USE_MMR = False
+    mock.AZURE_SEARCH_MERGE_OVERLAPPING_CHUNKS = False
     return mock
 
 
@@ -283,6 +284,27 @@ def test_query_search_converts_results_to_source_documents(
     assert actual_results == expected_results
 
 
+@patch("backend.batch.utilities.search.azure_search_handler.tiktoken")
+def test_query_search_reads_token_count_from_metadata(mock_tiktoken, handler):
+    # given
+    handler.search_client.search.return_value = [
+        {
+            "id": 1,
+            "content": "content1",
+            "source": "source1",
+            "metadata": json.dumps({"chunk": 1, "token_count": 42}),
+        },
+        {"id": 2, "content": "content2", "source": "source2"},
+    ]
+
+    # when
+    actual_results = handler.query_search("What is the answer?")
+
+    # then
+    assert actual_results[0].token_count == 42
+    assert actual_results[1].token_count is None
+
+
 def test_hybrid_search_with_advanced_image_processing(
     handler: AzureSearchHandler,
     mock_llm_helper: MagicMock,
@@ -409,33 +431,183 @@ def test_get_unique_files_with_results(search_handler):
     assert result == ["file1", "file2"]
 
 
+def create_search_results(documents: list[dict], count: int = None) -> MagicMock:
+    results = MagicMock()
+    results.__iter__.return_value = iter(documents)
+    results.get_count.return_value = count
+    return results
+
+
 def test_delete_from_index(handler, mock_search_client):
     # given
     blob_url = "https://example.com/blob"
     filter_value = f"source eq '{blob_url}_SAS_TOKEN_PLACEHOLDER_'"
-    documents = Mock(
-        SearchItemPaged(
-            [
-                {"id": 1, "title": "file1"},
-                {"id": 2, "title": "file2"},
-                {"id": 3, "title": "file1"},
-                {"id": 4, "title": "file3"},
-            ]
-        )
+    handler._DELETE_PAGE_SIZE = 3
+    handler._DELETE_BATCH_SIZE = 2
+    handler.search_client.search.side_effect = [
+        create_search_results([{"id": 1}, {"id": 2}, {"id": 3}], count=4),
+        create_search_results([{"id": 4}]),
+    ]
+    handler.search_client.delete_documents.side_effect = lambda keys: [
+        MagicMock(succeeded=True) for _ in keys
+    ]
+
+    # when
+    handler.delete_from_index(blob_url)
+
+    # then
+    handler.search_client.search.assert_any_call(
+        "*", select="id", filter=filter_value, top=3, include_total_count=True
+    )
+    handler.search_client.search.assert_called_with(
+        "*", select="id", filter=filter_value, top=3, include_total_count=False
     )
+    deleted = sorted(
+        key["id"]
+        for call in handler.search_client.delete_documents.call_args_list
+        for key in call.args[0]
+    )
+    assert deleted == [1, 2, 3, 4]
+    assert handler.search_client.delete_documents.call_count == 3
+
 
-    handler.search_client.search.return_value = documents
-    documents.get_count.return_value = 4
-    ids_to_delete = [{"id": 1}, {"id": 3}, {"id": 2}, {"id": 4}]
-    handler.output_results = MagicMock(
-        return_value={"file1": [1, 3], "file2": [2], "file3": [4]}
+def test_delete_from_index_skips_documents_deleted_before_index_refresh(
+    handler, mock_search_client
+):
+    # given
+    handler._DELETE_PAGE_SIZE = 2
+    handler._INDEX_REFRESH_DELAY_SECONDS = 0
+    handler.search_client.search.side_effect = [
+        create_search_results([{"id": 1}, {"id": 2}], count=3),
+        create_search_results([{"id": 1}, {"id": 2}]),
+        create_search_results([{"id": 3}]),
+    ]
+    handler.search_client.delete_documents.side_effect = lambda keys: [
+        MagicMock(succeeded=True) for _ in keys
+    ]
+
+    # when
+    handler.delete_from_index("https://example.com/blob")
+
+    # then
+    assert handler.search_client.delete_documents.call_args_list == [
+        call([{"id": 1}, {"id": 2}]),
+        call([{"id": 3}]),
+    ]
+
+
+def test_delete_from_index_never_deletes_a_document_twice(handler, mock_search_client):
+    # given
+    handler._DELETE_PAGE_SIZE = 2
+    handler.search_client.search.side_effect = [
+        create_search_results([{"id": 1}, {"id": 2}], count=7),
+        create_search_results([{"id": 3}, {"id": 4}]),
+        create_search_results([{"id": 5}, {"id": 6}]),
+        create_search_results([{"id": 1}, {"id": 7}]),
+    ]
+    handler.search_client.delete_documents.side_effect = lambda keys: [
+        MagicMock(succeeded=True) for _ in keys
+    ]
+
+    # when
+    handler.delete_from_index("https://example.com/blob")
+
+    # then
+    assert handler.search_client.delete_documents.call_args_list == [
+        call([{"id": 1}, {"id": 2}]),
+        call([{"id": 3}, {"id": 4}]),
+        call([{"id": 5}, {"id": 6}]),
+        call([{"id": 7}]),
+    ]
+
+
+def test_delete_from_index_raises_exception_on_failure(handler, mock_search_client):
+    # given
+    handler.search_client.search.return_value = create_search_results(
+        [{"id": 1}], count=1
+    )
+    handler.search_client.delete_documents.return_value = [MagicMock(succeeded=False)]
+
+    # when + then
+    with pytest.raises(Exception):
+        handler.delete_from_index("https://example.com/blob")
+
+
+@patch("backend.batch.utilities.search.azure_search_handler.tiktoken")
+def test_query_search_selects_diverse_results_with_mmr(
+    mock_tiktoken, handler, mock_llm_helper, env_helper_mock
+):
+    # given
+    env_helper_mock.AZURE_SEARCH_USE_MMR = True
+    env_helper_mock.AZURE_SEARCH_MMR_FETCH_K = 10
+    env_helper_mock.AZURE_SEARCH_MMR_LAMBDA = 0.5
+    env_helper_mock.AZURE_SEARCH_TOP_K = 2
+    mock_llm_helper.generate_embeddings.return_value = [1, 2, 3]
+    handler.search_client.search.return_value = [
+        {
+            "id": 1,
+            "content": "content1",
+            "source": "source1",
+            "content_vector": [1, 0],
+            "@search.score": 1.0,
+        },
+        {
+            "id": 2,
+            "content": "content2",
+            "source": "source1",
+            "content_vector": [1, 0.01],
+            "@search.score": 0.9,
+        },
+        {
+            "id": 3,
+            "content": "content3",
+            "source": "source2",
+            "content_vector": [0, 1],
+            "@search.score": 0.8,
+        },
+    ]
+
+    # when
+    source_documents = handler.query_search("What is the answer?")
+
+    # then
+    assert [source_document.id for source_document in source_documents] == [1, 3]
+    assert handler.search_client.search.call_args.kwargs["top"] == 10
+    assert (
+        handler.search_client.search.call_args.kwargs["vector_queries"][
+            0
+        ].k_nearest_neighbors
+        == 10
     )
 
+
+def test_query_search_many_embeds_questions_in_one_request(handler, mock_llm_helper):
+    # given
+    mock_llm_helper.generate_embeddings_batch.return_value = [[1, 0], [0, 1]]
+    results = {
+        "Standard plan": [
+            {"id": 1, "content": "content1", "source": "source1"},
+            {"id": 2, "content": "content2", "source": "source1"},
+        ],
+        "Plus plan": [
+            {"id": 3, "content": "content3", "source": "source2"},
+            {"id": 2, "content": "content2", "source": "source1"},
+        ],
+    }
+    handler.search_client.search.side_effect = lambda search_text, **kwargs: results[
+        search_text
+    ]
+
     # when
-    handler.delete_from_index(blob_url)
+    source_documents = handler.query_search_many(["Standard plan", "Plus plan"])
 
     # then
-    handler.search_client.search.assert_called_once_with(
-        "*", select="id, title", include_total_count=True, filter=filter_value
+    mock_llm_helper.generate_embeddings_batch.assert_called_once_with(
+        ["Standard plan", "Plus plan"]
     )
-    handler.search_client.delete_documents.assert_called_once_with(ids_to_delete)
+    mock_llm_helper.generate_embeddings.assert_not_called()
+    assert sorted(
+        call.kwargs["vector_queries"][0].vector
+        for call in handler.search_client.search.call_args_list
+    ) == [[0, 1], [1, 0]]
+    assert [source_document.id for source_document in source_documents] == [2, 1, 3]
@@ -4,7 +4,6 @@ from backend.batch.utilities.search.integrated_vectorization_search_handler impo
     IntegratedVectorizationSearchHandler,
 )
 from azure.search.documents.models import VectorizableTextQuery
-from azure.search.documents import SearchItemPaged
 
 from backend.batch.utilities.common.source_document import SourceDocument
 
@@ -17,6 +16,8 @@ def env_helper_mock():
     mock.AZURE_SEARCH_KEY = "example-key"
     mock.is_auth_type_keys = Mock(return_value=True)
     mock.AZURE_SEARCH_TOP_K = 5
+    mock.AZURE_SEARCH_USE_MMR = False
+    mock.AZURE_SEARCH_MERGE_OVERLAPPING_CHUNKS = False
     return mock
 
 
@@ -262,20 +263,17 @@ def test_delete_from_index(env_helper_mock, handler, search_client_mock):
     env_helper_mock.AZURE_BLOB_CONTAINER_NAME = "documents"
     blob_url = "https://example.com/documents/file1.txt"
     title = "file1.txt"
-    documents = Mock(
-        SearchItemPaged(
-            [
-                {"chunk_id": "123_chunk", "title": title},
-                {"chunk_id": "789_chunk", "title": title},
-            ]
-        )
+    documents = MagicMock()
+    documents.__iter__.return_value = iter(
+        [{"chunk_id": "123_chunk"}, {"chunk_id": "789_chunk"}]
     )
-    search_client_mock.search.return_value = documents
     documents.get_count.return_value = 2
+    search_client_mock.search.return_value = documents
+    search_client_mock.delete_documents.return_value = [
+        MagicMock(succeeded=True),
+        MagicMock(succeeded=True),
+    ]
     ids_to_delete = [{"chunk_id": "123_chunk"}, {"chunk_id": "789_chunk"}]
-    handler.output_results = MagicMock(
-        return_value={"file1.txt": ["123_chunk", "789_chunk"]}
-    )
 
     # when
     handler.delete_from_index(blob_url)
@@ -283,8 +281,55 @@ def test_delete_from_index(env_helper_mock, handler, search_client_mock):
     # then
     search_client_mock.search.assert_called_once_with(
         "*",
-        select="id, chunk_id, title",
-        include_total_count=True,
+        select="chunk_id",
         filter=f"title eq '{title}'",
+        top=1000,
+        include_total_count=True,
     )
     search_client_mock.delete_documents.assert_called_once_with(ids_to_delete)
+
+
+def test_query_search_many_fuses_results_by_chunk_id(handler, env_helper_mock):
+    # given
+    env_helper_mock.AZURE_SEARCH_USE_SEMANTIC_SEARCH = False
+    results = {
+        "Standard plan": [
+            {"id": "1", "chunk_id": "doc_pages_1", "content": "a", "source": "s"},
+            {"id": "1", "chunk_id": "doc_pages_2", "content": "b", "source": "s"},
+        ],
+        "Plus plan": [
+            {"id": "1", "chunk_id": "doc_pages_2", "content": "b", "source": "s"},
+        ],
+    }
+    handler.search_client.search.side_effect = lambda search_text, **kwargs: results[
+        search_text
+    ]
+
+    # when
+    source_documents = handler.query_search_many(["Standard plan", "Plus plan"])
+
+    # then
+    assert handler.search_client.search.call_count == 2
+    assert [source_document.chunk_id for source_document in source_documents] == [
+        "doc_pages_2",
+        "doc_pages_1",
+    ]
+
+
+def test_query_search_many_keeps_top_k_results(handler, env_helper_mock):
+    # given
+    env_helper_mock.AZURE_SEARCH_USE_SEMANTIC_SEARCH = False
+    env_helper_mock.AZURE_SEARCH_TOP_K = 2
+    handler.search_client.search.side_effect = lambda search_text, **kwargs: [
+        {"id": "1", "chunk_id": f"{search_text}_{i}", "content": "a", "source": "s"}
+        for i in range(2)
+    ]
+
+    # when
+    source_documents = handler.query_search_many(["Standard plan", "Plus plan"])
+
+    # then
+    assert [source_document.chunk_id for source_document in source_documents] == [
+        "Standard plan_0",
+        "Plus plan_0",
+    ]
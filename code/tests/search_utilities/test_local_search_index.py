@@ -0,0 +1,288 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import Mock
+
+import numpy as np
+import pytest
+from azure.search.documents.models import VectorizedQuery
+from backend.batch.utilities.search.local_search_index import LocalSearchIndex
+
+
+def document(id: str, content: str, vector: list[float], **fields) -> dict:
+    return {
+        "id": id,
+        "content": content,
+        "content_vector": vector,
+        "title": "benefits.pdf",
+        "source": "https://example.com/benefits.pdf_SAS_TOKEN_PLACEHOLDER_",
+        **fields,
+    }
+
+
+@pytest.fixture
+def index(tmp_path) -> LocalSearchIndex:
+    index = LocalSearchIndex(str(tmp_path))
+    index.upload_documents(
+        [
+            document("1", "the deductible of the plan", [1.0, 0.0, 0.0]),
+            document("2", "the plan covers dental care", [0.0, 1.0, 0.0]),
+            document(
+                "3",
+                "vision care is not covered",
+                [0.0, 0.0, 1.0],
+                title="vision.pdf",
+                source="https://example.com/vision.pdf_SAS_TOKEN_PLACEHOLDER_",
+            ),
+        ]
+    )
+    return index
+
+
+def vector_query(vector: list[float], k: int = 3) -> VectorizedQuery:
+    return VectorizedQuery(
+        vector=vector, k_nearest_neighbors=k, fields="content_vector"
+    )
+
+
+def ids(results) -> list[str]:
+    return [result["id"] for result in results]
+
+
+def test_upload_documents_returns_results(tmp_path):
+    # given
+    index = LocalSearchIndex(str(tmp_path))
+
+    # when
+    results = index.upload_documents([document("1", "content", [1.0, 0.0])])
+
+    # then
+    assert [(result.key, result.succeeded) for result in results] == [("1", True)]
+
+
+def test_search_text_ranks_with_bm25(index: LocalSearchIndex):
+    # when
+    results = index.search("deductible plan")
+
+    # then
+    assert ids(results) == ["1", "2"]
+    assert results[0]["@search.score"] > results[1]["@search.score"]
+
+
+def test_search_vector_returns_nearest_neighbors(index: LocalSearchIndex):
+    # when
+    results = index.search(vector_queries=[vector_query([0.1, 0.9, 0.2], k=2)])
+
+    # then
+    assert ids(results) == ["2", "3"]
+
+
+def test_search_hybrid_fuses_rankings(index: LocalSearchIndex):
+    # when
+    results = index.search(
+        "vision care", vector_queries=[vector_query([0.0, 0.6, 0.8])], top=2
+    )
+
+    # then
+    assert ids(results) == ["3", "2"]
+
+
+def test_search_selects_fields(index: LocalSearchIndex):
+    # when
+    results = index.search("*", select="id, title", top=1)
+
+    # then
+    assert list(results[0].keys()) == ["id", "title", "@search.score"]
+    assert index.search("*")[0]["content_vector"] == [1.0, 0.0, 0.0]
+
+
+def test_search_filters(index: LocalSearchIndex):
+    # when
+    results = index.search(
+        "*",
+        filter="source eq 'https://example.com/benefits.pdf_SAS_TOKEN_PLACEHOLDER_' and id ne '1'",
+        include_total_count=True,
+    )
+
+    # then
+    assert ids(results) == ["2"]
+    assert results.get_count() == 1
+
+
+def test_search_raises_for_unsupported_filter(index: LocalSearchIndex):
+    # when / then
+    with pytest.raises(ValueError):
+        index.search("*", filter="search.ismatch('plan')")
+
+
+def test_search_pages_results(index: LocalSearchIndex):
+    # when
+    results = index.search("*", top=2, skip=1, include_total_count=True)
+
+    # then
+    assert ids(results) == ["2", "3"]
+    assert results.get_count() == 3
+
+
+def test_search_returns_facets(index: LocalSearchIndex):
+    # when
+    results = index.search("*", facets=["title,count:1"])
+
+    # then
+    assert results.get_facets() == {"title": [{"value": "benefits.pdf", "count": 2}]}
+
+
+def test_upload_documents_replaces_documents_with_the_same_key(
+    index: LocalSearchIndex,
+):
+    # when
+    index.upload_documents([{"id": "1", "content": "dental plan"}])
+
+    # then
+    assert ids(index.search("deductible")) == []
+    assert ids(index.search("dental")) == ["1", "2"]
+    assert "1" not in ids(index.search(vector_queries=[vector_query([1.0, 0.0, 0.0])]))
+
+
+def test_delete_documents(index: LocalSearchIndex):
+    # when
+    results = index.delete_documents([{"id": "2"}])
+
+    # then
+    assert [result.key for result in results] == ["2"]
+    assert ids(index.search("*")) == ["1", "3"]
+    assert sorted(
+        ids(index.search(vector_queries=[vector_query([0.0, 1.0, 0.0])]))
+    ) == [
+        "1",
+        "3",
+    ]
+    assert ids(index.search("dental")) == []
+
+
+def test_index_is_reloaded_when_written_by_another_instance(
+    index: LocalSearchIndex, tmp_path
+):
+    # given
+    other_index = LocalSearchIndex(str(tmp_path))
+
+    # when
+    other_index.upload_documents([document("4", "hearing aids", [0.5, 0.5, 0.0])])
+
+    # then
+    assert ids(index.search("hearing")) == ["4"]
+    assert ids(LocalSearchIndex(str(tmp_path)).search("hearing")) == ["4"]
+
+
+def test_index_keeps_concurrent_writes_of_other_instances(tmp_path):
+    # given
+    indexes = [LocalSearchIndex(str(tmp_path)) for _ in range(4)]
+
+    # when
+    with ThreadPoolExecutor(len(indexes)) as executor:
+        list(
+            executor.map(
+                lambda i: [
+                    indexes[i].upload_documents(
+                        [document(f"{i}-{j}", "content", [1.0, 0.0])]
+                    )
+                    for j in range(5)
+                ],
+                range(len(indexes)),
+            )
+        )
+
+    # then
+    assert len(LocalSearchIndex(str(tmp_path)).search("*")) == 20
+
+
+def test_index_is_reloaded_before_writing_when_the_manifest_time_is_unchanged(
+    index: LocalSearchIndex, tmp_path
+):
+    # given
+    manifest_stat = os.stat(tmp_path / "manifest.json")
+    LocalSearchIndex(str(tmp_path)).upload_documents(
+        [document("4", "hearing aids", [0.5, 0.5, 0.0])]
+    )
+    os.utime(
+        tmp_path / "manifest.json",
+        ns=(manifest_stat.st_atime_ns, manifest_stat.st_mtime_ns),
+    )
+
+    # when
+    index.upload_documents([document("5", "glasses", [0.0, 0.5, 0.5])])
+
+    # then
+    assert sorted(ids(LocalSearchIndex(str(tmp_path)).search("*"))) == [
+        "1",
+        "2",
+        "3",
+        "4",
+        "5",
+    ]
+
+
+def test_index_removes_previous_generations(index: LocalSearchIndex, tmp_path):
+    # when
+    index.delete_documents([{"id": "1"}])
+
+    # then
+    assert sorted(os.listdir(tmp_path)) == [
+        "content_vector.2.npy",
+        "documents.2.json",
+        "index.lock",
+        "manifest.json",
+    ]
+
+
+def test_index_stores_float16_vectors(tmp_path):
+    # given
+    index = LocalSearchIndex(str(tmp_path), vector_dtype="float16")
+
+    # when
+    index.upload_documents(
+        [
+            document("1", "first", [1.0, 0.1]),
+            document("2", "second", [0.1, 1.0]),
+        ]
+    )
+
+    # then
+    assert np.load(tmp_path / "content_vector.1.npy").dtype == np.float16
+    assert ids(index.search(vector_queries=[vector_query([0.0, 1.0], k=1)])) == ["2"]
+
+
+def test_index_searches_closest_ivf_lists(tmp_path):
+    # given
+    random = np.random.default_rng(1)
+    clusters = np.eye(4)
+    vectors = np.repeat(clusters, 10, axis=0) + random.normal(0, 0.01, (40, 4))
+    index = LocalSearchIndex(str(tmp_path), ivf_lists=4, ivf_probes=1)
+
+    # when
+    index.upload_documents(
+        [
+            document(str(i), f"chunk {i}", vector.tolist())
+            for i, vector in enumerate(vectors)
+        ]
+    )
+    results = index.search(vector_queries=[vector_query([0.0, 0.0, 1.0, 0.0], k=50)])
+
+    # then
+    assert os.path.exists(tmp_path / "content_vector.centroids.1.npy")
+    assert sorted(int(id) for id in ids(results)) == list(range(20, 30))
+
+
+def test_get_index_shares_the_index_of_a_path(tmp_path):
+    # given
+    env_helper = Mock()
+    env_helper.LOCAL_SEARCH_INDEX_PATH = str(tmp_path)
+    env_helper.LOCAL_SEARCH_INDEX_VECTOR_DTYPE = "float16"
+    env_helper.LOCAL_SEARCH_INDEX_IVF_LISTS = 0
+    env_helper.LOCAL_SEARCH_INDEX_IVF_PROBES = 4
+
+    # when
+    index = LocalSearchIndex.get_index(env_helper)
+
+    # then
+    assert LocalSearchIndex.get_index(env_helper) is index
+    assert index.vector_dtype == np.float16
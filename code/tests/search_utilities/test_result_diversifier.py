@@ -0,0 +1,119 @@
+from backend.batch.utilities.common.source_document import SourceDocument
+from backend.batch.utilities.search.result_diversifier import ResultDiversifier
+
+SOURCE = "https://example.com/benefits.pdf_SAS_TOKEN_PLACEHOLDER_"
+
+
+def source_document(id: str, content: str, source: str = SOURCE, **kwargs):
+    return SourceDocument(id=id, content=content, source=source, **kwargs)
+
+
+def test_select_keeps_the_most_relevant_document_first():
+    # given
+    documents = [source_document("1", "a"), source_document("2", "b")]
+
+    # when
+    selected = ResultDiversifier(top_k=2).select(
+        documents, [0.5, 1.0], [[1.0, 0.0], [0.0, 1.0]]
+    )
+
+    # then
+    assert [document.id for document in selected] == ["2", "1"]
+
+
+def test_select_skips_near_duplicate_vectors():
+    # given
+    documents = [
+        source_document("1", "the deductible of the plan"),
+        source_document("2", "the deductible of the plan is"),
+        source_document("3", "dental care"),
+    ]
+
+    # when
+    selected = ResultDiversifier(top_k=2, lambda_mult=0.5).select(
+        documents, [1.0, 0.95, 0.7], [[1.0, 0.0], [0.99, 0.1], [0.0, 1.0]]
+    )
+
+    # then
+    assert [document.id for document in selected] == ["1", "3"]
+
+
+def test_select_uses_word_overlap_without_vectors():
+    # given
+    documents = [
+        source_document("1", "the deductible of the plan"),
+        source_document("2", "the deductible of the plan is"),
+        source_document("3", "dental care"),
+    ]
+
+    # when
+    selected = ResultDiversifier(top_k=2).select(
+        documents, [1.0, 0.95, 0.7], [None, None, None]
+    )
+
+    # then
+    assert [document.id for document in selected] == ["1", "3"]
+
+
+def test_select_keeps_ranking_with_lambda_of_one():
+    # given
+    documents = [source_document(str(i), "same content") for i in range(4)]
+
+    # when
+    selected = ResultDiversifier(top_k=3, lambda_mult=1).select(
+        documents, [0.4, 0.3, 0.2, 0.1]
+    )
+
+    # then
+    assert [document.id for document in selected] == ["0", "1", "2"]
+
+
+def test_merge_overlapping_strips_shared_text():
+    # given
+    first = "The plan covers dental care. The deductible is 500 dollars a year."
+    second = "The deductible is 500 dollars a year. Vision care is not covered."
+    documents = [
+        source_document("2", second, chunk=2, offset=40),
+        source_document("9", "Unrelated text from the same document."),
+        source_document("1", first, chunk=1, offset=0),
+    ]
+
+    # when
+    merged = ResultDiversifier(top_k=3).merge_overlapping(documents)
+
+    # then
+    assert [document.id for document in merged] == ["1", "9"]
+    assert merged[0].content == (
+        "The plan covers dental care. The deductible is 500 dollars a year."
+        " Vision care is not covered."
+    )
+    assert merged[0].offset == 0
+
+
+def test_merge_overlapping_drops_contained_documents():
+    # given
+    documents = [
+        source_document("1", "The plan covers dental care and vision care."),
+        source_document("2", "dental care and vision care"),
+    ]
+
+    # when
+    merged = ResultDiversifier(top_k=2).merge_overlapping(documents)
+
+    # then
+    assert merged == [documents[0]]
+
+
+def test_merge_overlapping_keeps_documents_of_other_sources():
+    # given
+    content = "The deductible is 500 dollars a year."
+    documents = [
+        source_document("1", content),
+        source_document("2", content, source="https://example.com/other.pdf"),
+    ]
+
+    # when
+    merged = ResultDiversifier(top_k=2).merge_overlapping(documents)
+
+    # then
+    assert merged == documents
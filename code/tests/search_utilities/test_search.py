@@ -4,6 +4,8 @@ from backend.batch.utilities.search.search import Search
 from backend.batch.utilities.search.integrated_vectorization_search_handler import (
     IntegratedVectorizationSearchHandler,
 )
+from backend.batch.utilities.search.local_search_handler import LocalSearchHandler
+from backend.batch.utilities.search.local_search_index import LocalSearchIndex
 from backend.batch.utilities.common.source_document import SourceDocument
 
 
@@ -15,6 +17,9 @@ def env_helper_mock():
     mock.AZURE_SEARCH_KEY = "example-key"
     mock.is_auth_type_keys = Mock(return_value=True)
     mock.AZURE_SEARCH_USE_INTEGRATED_VECTORIZATION = False
+    mock.USE_LOCAL_SEARCH_INDEX = False
+    mock.AZURE_SEARCH_USE_MMR = False
+    mock.AZURE_SEARCH_MERGE_OVERLAPPING_CHUNKS = False
     return mock
 
 
@@ -45,6 +50,21 @@ def test_get_search_handler_integrated_vectorization(env_helper_mock):
     assert isinstance(search_handler, IntegratedVectorizationSearchHandler)
 
 
+def test_get_search_handler_local_search_index(env_helper_mock):
+    # given
+    env_helper_mock.USE_LOCAL_SEARCH_INDEX = True
+    env_helper_mock.AZURE_SEARCH_USE_INTEGRATED_VECTORIZATION = True
+
+    # when
+    with patch.object(LocalSearchIndex, "get_index") as get_index_mock:
+        search_handler = Search.get_search_handler(env_helper_mock)
+
+    # then
+    assert isinstance(search_handler, LocalSearchHandler)
+    assert search_handler.search_client == get_index_mock.return_value
+    get_index_mock.assert_called_once_with(env_helper_mock)
+
+
 def test_get_source_documents_integrated_vectorization(env_helper_mock):
     # given
     env_helper_mock.AZURE_SEARCH_USE_INTEGRATED_VECTORIZATION = True
@@ -124,3 +144,18 @@ def test_get_source_documents_azure_search(search_handler_mock: MagicMock):
 
     # then
     assert len(actual_source_documents) == len(expected_source_documents)
+
+
+def test_get_source_documents_for_questions():
+    # given
+    search_handler = MagicMock()
+    questions = ["Standard plan", "Plus plan"]
+
+    # when
+    source_documents = Search.get_source_documents_for_questions(
+        search_handler, questions
+    )
+
+    # then
+    search_handler.query_search_many.assert_called_once_with(questions)
+    assert source_documents == search_handler.query_search_many.return_value
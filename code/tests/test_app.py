@@ -2,6 +2,7 @@
 This module tests the entry point for the application.
 """
 
+import json
 from unittest.mock import AsyncMock, MagicMock, Mock, patch, ANY
 
 from openai import RateLimitError, BadRequestError, InternalServerError
@@ -83,6 +84,7 @@ def env_helper_mock():
             AZURE_SEARCH_SEMANTIC_SEARCH_CONFIG
         )
         env_helper.SHOULD_STREAM = True
+        env_helper.SHOULD_STREAM_CUSTOM_CONVERSATION = False
         env_helper.is_auth_type_keys.return_value = True
         env_helper.should_use_data.return_value = True
         env_helper.CONVERSATION_FLOW = ConversationFlow.CUSTOM.value
@@ -275,6 +277,62 @@ class TestConversationCustom:
             "object": "response.object",
         }
 
+    @patch("create_app.get_message_orchestrator")
+    @patch(
+        "backend.batch.utilities.helpers.config.config_helper.ConfigHelper.get_active_config_or_default"
+    )
+    def test_conversation_custom_streams_response(
+        self,
+        get_active_config_or_default_mock,
+        get_message_orchestrator_mock,
+        env_helper_mock,
+        client,
+    ):
+        """Test that the custom conversation endpoint streams every frame from the message orchestrator."""
+        # given
+        get_active_config_or_default_mock.return_value.prompts.conversational_flow = (
+            "custom"
+        )
+        partial_messages = [
+            self.messages[0],
+            {"content": "An", "end_turn": False, "role": "assistant"},
+        ]
+
+        async def handle_message_stream(**kwargs):
+            yield partial_messages
+            yield self.messages
+
+        message_orchestrator_mock = MagicMock()
+        message_orchestrator_mock.handle_message_stream.side_effect = (
+            handle_message_stream
+        )
+        get_message_orchestrator_mock.return_value = message_orchestrator_mock
+
+        env_helper_mock.AZURE_OPENAI_MODEL = self.openai_model
+        env_helper_mock.SHOULD_STREAM_CUSTOM_CONVERSATION = True
+
+        # when
+        response = client.post(
+            "/api/conversation",
+            headers={"content-type": "application/json"},
+            json=self.body,
+        )
+
+        # then
+        assert response.status_code == 200
+        assert response.mimetype == "application/json-lines"
+        lines = response.text.splitlines()
+        assert len(lines) == 2
+        assert json.loads(lines[0])["choices"] == [{"messages": partial_messages}]
+        assert json.loads(lines[1]) == {
+            "choices": [{"messages": self.messages}],
+            "created": "response.created",
+            "id": "response.id",
+            "model": self.openai_model,
+            "object": "response.object",
+        }
+        message_orchestrator_mock.handle_message.assert_not_called()
+
     @patch("create_app.get_message_orchestrator")
     @patch("create_app.get_orchestrator_config")
     @patch(
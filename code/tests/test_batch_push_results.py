@@ -1,13 +1,32 @@
 import json
 import pytest
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 from azure.functions import QueueMessage
 from backend.batch.batch_push_results import (
+    ProcessingDeferred,
     batch_push_results,
+    _get_embedder,
     _get_file_name_from_message,
 )
 
 
+@pytest.fixture(autouse=True)
+def env_helper_mock():
+    with patch("backend.batch.batch_push_results.EnvHelper") as mock:
+        env_helper = mock.return_value
+        env_helper.DOCUMENT_PROCESSING_BATCH_SIZE = 1
+        env_helper.DOCUMENT_PROCESSING_DEDUPLICATION = False
+
+        yield env_helper
+
+
+@pytest.fixture(autouse=True)
+def clear_embedder_cache():
+    _get_embedder.cache_clear()
+    yield
+    _get_embedder.cache_clear()
+
+
 @pytest.fixture(autouse=True)
 def get_processor_handler_mock():
     with patch(
@@ -89,11 +108,9 @@ def test_batch_push_results_with_blob_deleted_event(
     mock_process_document_deleted_event.assert_called_once_with(expected_message_body)
 
 
-@patch("backend.batch.batch_push_results.EnvHelper")
 @patch("backend.batch.batch_push_results.AzureBlobStorageClient")
 def test_batch_push_results_with_blob_created_event_uses_embedder(
     mock_azure_blob_storage_client,
-    mock_env_helper,
     get_processor_handler_mock,
 ):
     mock_create_embedder, mock_get_search_handler = get_processor_handler_mock
@@ -106,14 +123,12 @@ def test_batch_push_results_with_blob_created_event_uses_embedder(
     mock_blob_client_instance.get_blob_sas.return_value = "test_blob_sas"
 
     batch_push_results.build().get_user_function()(mock_queue_message)
-    mock_create_embedder.embed_file.assert_called_once_with(
-        "test_blob_sas", "test/test/test_filename.md"
+    mock_create_embedder.embed_files.assert_called_once_with(
+        [("test_blob_sas", "test/test/test_filename.md")]
     )
 
 
-@patch("backend.batch.batch_push_results.EnvHelper")
 def test_batch_push_results_with_blob_deleted_event_uses_search_to_delete_with_sas_appended(
-    mock_env_helper,
     get_processor_handler_mock,
 ):
     mock_create_embedder, mock_get_search_handler = get_processor_handler_mock
@@ -126,3 +141,191 @@ def test_batch_push_results_with_blob_deleted_event_uses_search_to_delete_with_s
     mock_get_search_handler.delete_from_index.assert_called_once_with(
         "https://test.test/test/test_filename.pdf"
     )
+
+
+@patch("backend.batch.batch_push_results.AzureBlobStorageClient")
+def test_batch_push_results_embeds_every_packed_file(
+    mock_blob_storage_client, get_processor_handler_mock
+):
+    mock_queue_message = QueueMessage(
+        body='{"filenames": ["test_filename_1.md", "test_filename_2.md"]}'
+    )
+    mock_blob_storage_client.return_value.get_blob_sas.side_effect = (
+        lambda file_name: f"sas/{file_name}"
+    )
+    embedder, _ = get_processor_handler_mock
+
+    batch_push_results.build().get_user_function()(mock_queue_message)
+
+    embedder.embed_files.assert_called_once_with(
+        [
+            ("sas/test_filename_1.md", "test_filename_1.md"),
+            ("sas/test_filename_2.md", "test_filename_2.md"),
+        ]
+    )
+
+
+@patch("backend.batch.batch_push_results.BatchFanOut")
+def test_batch_push_results_with_batch_start_processing_event(mock_batch_fan_out):
+    mock_queue_message = QueueMessage(
+        body='{"eventType": "BatchStartProcessing", "job_id": "mock-job-id"}'
+    )
+
+    batch_push_results.build().get_user_function()(mock_queue_message)
+
+    mock_batch_fan_out.return_value.run.assert_called_once_with("mock-job-id")
+
+
+def create_drained_message(id: str, body: dict) -> MagicMock:
+    message = MagicMock(id=id)
+    message.content = json.dumps(body)
+    return message
+
+
+@patch("backend.batch.batch_push_results.create_queue_client")
+@patch("backend.batch.batch_push_results.AzureBlobStorageClient")
+def test_batch_push_results_drains_and_embeds_documents_together(
+    mock_blob_storage_client,
+    mock_create_queue_client,
+    env_helper_mock,
+    get_processor_handler_mock,
+):
+    env_helper_mock.DOCUMENT_PROCESSING_BATCH_SIZE = 3
+    mock_blob_storage_client.return_value.get_blob_sas.side_effect = (
+        lambda file_name: f"sas/{file_name}"
+    )
+    queue_client = mock_create_queue_client.return_value
+    drained_messages = [
+        create_drained_message("2", {"filename": "test_filename_2.md"}),
+        create_drained_message(
+            "3",
+            {
+                "eventType": "Microsoft.Storage.BlobDeleted",
+                "data": {"url": "https://test.test/test/test_filename_3.md"},
+            },
+        ),
+    ]
+    queue_client.receive_messages.return_value = drained_messages
+    embedder, search_handler = get_processor_handler_mock
+    mock_queue_message = QueueMessage(body='{"filename": "test_filename_1.md"}')
+
+    batch_push_results.build().get_user_function()(mock_queue_message)
+
+    queue_client.receive_messages.assert_called_once_with(
+        max_messages=2, messages_per_page=2, visibility_timeout=600
+    )
+    embedder.embed_files.assert_called_once_with(
+        [
+            ("sas/test_filename_1.md", "test_filename_1.md"),
+            ("sas/test_filename_2.md", "test_filename_2.md"),
+        ]
+    )
+    search_handler.delete_from_index.assert_called_once_with(
+        "https://test.test/test/test_filename_3.md"
+    )
+    assert queue_client.delete_message.call_count == 2
+
+
+@patch("backend.batch.batch_push_results.create_queue_client")
+@patch("backend.batch.batch_push_results.AzureBlobStorageClient")
+def test_batch_push_results_drains_large_batches_in_pages_of_32(
+    mock_blob_storage_client,
+    mock_create_queue_client,
+    env_helper_mock,
+    get_processor_handler_mock,
+):
+    env_helper_mock.DOCUMENT_PROCESSING_BATCH_SIZE = 50
+    queue_client = mock_create_queue_client.return_value
+    queue_client.receive_messages.return_value = []
+    mock_queue_message = QueueMessage(body='{"filename": "test_filename_1.md"}')
+
+    batch_push_results.build().get_user_function()(mock_queue_message)
+
+    queue_client.receive_messages.assert_called_once_with(
+        max_messages=49, messages_per_page=32, visibility_timeout=600
+    )
+
+
+@patch("backend.batch.batch_push_results.create_queue_client")
+@patch("backend.batch.batch_push_results.AzureBlobStorageClient")
+def test_batch_push_results_retries_documents_one_by_one_when_batch_fails(
+    mock_blob_storage_client,
+    mock_create_queue_client,
+    env_helper_mock,
+    get_processor_handler_mock,
+):
+    env_helper_mock.DOCUMENT_PROCESSING_BATCH_SIZE = 3
+    queue_client = mock_create_queue_client.return_value
+    good_message = create_drained_message("2", {"filename": "good.md"})
+    bad_message = create_drained_message("3", {"filename": "bad.md"})
+    queue_client.receive_messages.return_value = [good_message, bad_message]
+    embedder, _ = get_processor_handler_mock
+
+    def embed_files(files):
+        if len(files) > 1 or files[0][1] == "bad.md":
+            raise Exception("mock exception")
+
+    embedder.embed_files.side_effect = embed_files
+    mock_queue_message = QueueMessage(body='{"filename": "trigger.md"}')
+
+    batch_push_results.build().get_user_function()(mock_queue_message)
+
+    queue_client.delete_message.assert_called_once_with(good_message)
+
+
+@patch("backend.batch.batch_push_results.create_queue_client")
+@patch("backend.batch.batch_push_results.DocumentProcessingGuard")
+@patch("backend.batch.batch_push_results.AzureBlobStorageClient")
+def test_batch_push_results_processes_each_document_version_once(
+    mock_blob_storage_client,
+    mock_guard,
+    mock_create_queue_client,
+    env_helper_mock,
+    get_processor_handler_mock,
+):
+    env_helper_mock.DOCUMENT_PROCESSING_DEDUPLICATION = True
+    mock_blob_storage_client.return_value.get_blob_sas.side_effect = (
+        lambda file_name: f"sas/{file_name}"
+    )
+    new_lease = MagicMock(file_name="new.md")
+
+    def acquire(file_name):
+        if file_name == "recent.md":
+            raise ProcessingDeferred(file_name, 4.2)
+        return new_lease if file_name == "new.md" else None
+
+    mock_guard.return_value.acquire.side_effect = acquire
+    embedder, _ = get_processor_handler_mock
+    mock_queue_message = QueueMessage(
+        body='{"filenames": ["new.md", "duplicate.md", "recent.md"]}'
+    )
+
+    batch_push_results.build().get_user_function()(mock_queue_message)
+
+    embedder.embed_files.assert_called_once_with([("sas/new.md", "new.md")])
+    new_lease.complete.assert_called_once()
+    mock_create_queue_client.return_value.send_message.assert_called_once_with(
+        b'{"filename": "recent.md"}', visibility_timeout=5
+    )
+
+
+@patch("backend.batch.batch_push_results.DocumentProcessingGuard")
+@patch("backend.batch.batch_push_results.AzureBlobStorageClient")
+def test_batch_push_results_releases_leases_when_embedding_fails(
+    mock_blob_storage_client,
+    mock_guard,
+    env_helper_mock,
+    get_processor_handler_mock,
+):
+    env_helper_mock.DOCUMENT_PROCESSING_DEDUPLICATION = True
+    lease = MagicMock(file_name="new.md")
+    mock_guard.return_value.acquire.return_value = lease
+    embedder, _ = get_processor_handler_mock
+    embedder.embed_files.side_effect = Exception("mock exception")
+    mock_queue_message = QueueMessage(body='{"filename": "new.md"}')
+
+    with pytest.raises(Exception):
+        batch_push_results.build().get_user_function()(mock_queue_message)
+
+    lease.release.assert_called_once()
+    lease.complete.assert_not_called()
@@ -1,6 +1,10 @@
+import json
 import pytest
-from unittest.mock import call, patch, Mock
-from backend.batch.batch_start_processing import batch_start_processing
+from unittest.mock import patch, Mock
+from backend.batch.batch_start_processing import (
+    batch_start_processing,
+    batch_start_processing_status,
+)
 
 
 @pytest.fixture(autouse=True)
@@ -20,53 +24,36 @@ def mock_integrated_vectorization_embedder():
         yield mock
 
 
-@patch("backend.batch.batch_start_processing.create_queue_client")
-@patch("backend.batch.batch_start_processing.AzureBlobStorageClient")
-def test_batch_start_processing_processes_all(
-    mock_blob_storage_client, mock_create_queue_client, env_helper_mock
-):
+@pytest.fixture(autouse=True)
+def mock_batch_fan_out():
+    with patch("backend.batch.batch_start_processing.BatchFanOut") as mock:
+        yield mock
+
+
+def test_batch_start_processing_starts_fan_out_job(mock_batch_fan_out, env_helper_mock):
     # given
     mock_http_request = Mock()
     mock_http_request.params = dict()
-
-    mock_queue_client = Mock()
-    mock_create_queue_client.return_value = mock_queue_client
-    mock_blob_storage_client.return_value.get_all_files.return_value = [
-        {"filename": "file_name_one", "embeddings_added": False},
-        {"filename": "file_name_two", "embeddings_added": True},
-    ]
+    mock_batch_fan_out.return_value.start.return_value = "mock-job-id"
     env_helper_mock.AZURE_SEARCH_USE_INTEGRATED_VECTORIZATION = False
+
     # when
     response = batch_start_processing.build().get_user_function()(mock_http_request)
 
     # then
-    assert response.status_code == 200
-    assert response.get_body() == b"Conversion started successfully for 2 documents."
+    assert response.status_code == 202
+    assert json.loads(response.get_body()) == {"job_id": "mock-job-id"}
+    mock_batch_fan_out.return_value.start.assert_called_once()
 
-    send_message_calls = mock_queue_client.send_message.call_args_list
-    assert len(send_message_calls) == 2
-    assert send_message_calls[0] == call(b'{"filename": "file_name_one"}')
-    assert send_message_calls[1] == call(b'{"filename": "file_name_two"}')
 
-
-@patch("backend.batch.batch_start_processing.create_queue_client")
-@patch("backend.batch.batch_start_processing.AzureBlobStorageClient")
 def test_batch_start_processing_processes_all_integrated_vectorization(
-    mock_blob_storage_client,
-    mock_create_queue_client,
+    mock_batch_fan_out,
     mock_integrated_vectorization_embedder,
     env_helper_mock,
 ):
     # given
     mock_http_request = Mock()
     mock_http_request.params = dict()
-
-    mock_queue_client = Mock()
-    mock_create_queue_client.return_value = mock_queue_client
-    mock_blob_storage_client.return_value.get_all_files.return_value = [
-        {"filename": "file_name_one", "embeddings_added": False},
-        {"filename": "file_name_two", "embeddings_added": True},
-    ]
     mock_integrated_vectorization_embedder.return_value.reprocess_all.return_value = (
         None
     )
@@ -77,8 +64,44 @@ def test_batch_start_processing_processes_all_integrated_vectorization(
 
     # then
     assert response.status_code == 200
-    assert response.get_body() == b"Conversion started successfully for 2 documents."
+    assert (
+        response.get_body() == b"Reprocessing started successfully for all documents."
+    )
 
-    send_message_calls = mock_queue_client.send_message.call_args_list
-    assert len(send_message_calls) == 0
+    mock_batch_fan_out.assert_not_called()
     mock_integrated_vectorization_embedder.return_value.reprocess_all.assert_called_once()
+
+
+def test_batch_start_processing_status_returns_job(mock_batch_fan_out):
+    # given
+    mock_http_request = Mock()
+    mock_http_request.route_params = {"job_id": "mock-job-id"}
+    job = {"job_id": "mock-job-id", "status": "running", "files_queued": 1000}
+    mock_batch_fan_out.return_value.get_status.return_value = job
+
+    # when
+    response = batch_start_processing_status.build().get_user_function()(
+        mock_http_request
+    )
+
+    # then
+    assert response.status_code == 200
+    assert json.loads(response.get_body()) == job
+    mock_batch_fan_out.return_value.get_status.assert_called_once_with("mock-job-id")
+
+
+def test_batch_start_processing_status_returns_404_for_unknown_job(
+    mock_batch_fan_out,
+):
+    # given
+    mock_http_request = Mock()
+    mock_http_request.route_params = {"job_id": "mock-job-id"}
+    mock_batch_fan_out.return_value.get_status.return_value = None
+
+    # when
+    response = batch_start_processing_status.build().get_user_function()(
+        mock_http_request
+    )
+
+    # then
+    assert response.status_code == 404
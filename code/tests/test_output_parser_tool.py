@@ -136,6 +136,34 @@ def test_orders_citations_in_ascending_order():
     )
 
 
+def test_renumbers_repeated_doc_ids_by_order_of_appearance():
+    # Given
+    output_parser = OutputParserTool()
+    answer = "An answer [doc2] [doc1] [doc2]."
+    source_documents = [
+        SourceDocument(
+            id="1", content="Some content", title="A title", source="A source"
+        ),
+        SourceDocument(
+            id="2",
+            content="Some more content",
+            title="Another title",
+            source="Another source",
+        ),
+    ]
+
+    # When
+    messages = output_parser.parse(
+        question="A question?", answer=answer, source_documents=source_documents
+    )
+
+    # Then
+    assert messages[1]["content"] == "An answer [doc1] [doc2] [doc3]."
+    assert [
+        citation["id"] for citation in json.loads(messages[0]["content"])["citations"]
+    ] == ["2", "1", "2"]
+
+
 def test_removes_doc_ids_from_answer_if_no_citations():
     # Given
     output_parser = OutputParserTool()
@@ -205,6 +233,47 @@ def test_returns_chunk_number():
     assert expected["citations"][0]["chunk_id"] == "2"
 
 
+def test_partial_returns_every_source_document_as_citation():
+    # Given
+    output_parser = OutputParserTool()
+    question = "A question?"
+    answer = "An answer [doc2]"
+    source_documents = [
+        SourceDocument(
+            id="1",
+            content="Some content",
+            title="A title",
+            source="A source",
+            chunk="A chunk",
+            offset="An offset",
+            page_number="1",
+        ),
+        SourceDocument(
+            id="2",
+            content="Some more content",
+            title="Another title",
+            source="Another source",
+            chunk="Another chunk",
+            offset="Another offset",
+            page_number="",
+        ),
+    ]
+
+    # When
+    messages = output_parser.parse_partial(
+        question=question, answer=answer, source_documents=source_documents
+    )
+
+    # Then
+    expected_content = json.dumps(
+        _convert_source_documents_to_content(question, source_documents)
+    )
+    assert messages == [
+        {"content": expected_content, "end_turn": False, "role": "tool"},
+        {"content": "An answer [doc2]", "end_turn": False, "role": "assistant"},
+    ]
+
+
 def _convert_source_documents_to_content(
     question: str, source_documents: List[SourceDocument]
 ) -> dict:
@@ -0,0 +1,194 @@
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+from azure.core.exceptions import ResourceNotFoundError
+from backend.batch.utilities.helpers.batch_fan_out import BatchFanOut
+
+JOB_ID = "5f0c7b9e-6a0e-4d4b-9c53-3f0e2f7d8a61"
+
+
+@pytest.fixture(autouse=True)
+def env_helper_mock():
+    with patch("backend.batch.utilities.helpers.batch_fan_out.EnvHelper") as mock:
+        env_helper = mock.return_value
+        env_helper.BATCH_PROCESSING_FILES_PER_MESSAGE = 2
+        env_helper.BATCH_PROCESSING_MAX_IN_FLIGHT = 4
+
+        yield env_helper
+
+
+@pytest.fixture(autouse=True)
+def queue_client_mock():
+    with patch(
+        "backend.batch.utilities.helpers.batch_fan_out.create_queue_client"
+    ) as mock:
+        yield mock.return_value
+
+
+@pytest.fixture(autouse=True)
+def blob_client_mocks():
+    with patch(
+        "backend.batch.utilities.helpers.batch_fan_out.AzureBlobStorageClient"
+    ) as mock:
+        blob_client = MagicMock()
+        jobs_client = MagicMock()
+        mock.side_effect = lambda container_name=None: (
+            jobs_client if container_name else blob_client
+        )
+
+        yield blob_client, jobs_client
+
+
+def saved_jobs(jobs_client: MagicMock) -> list[dict]:
+    return [json.loads(call.args[0]) for call in jobs_client.upload_file.call_args_list]
+
+
+def sent_messages(queue_client_mock: MagicMock) -> list[dict]:
+    return [
+        json.loads(call.args[0])
+        for call in queue_client_mock.send_message.call_args_list
+    ]
+
+
+def test_start_saves_job_and_queues_first_run(blob_client_mocks, queue_client_mock):
+    # given
+    _, jobs_client = blob_client_mocks
+
+    # when
+    job_id = BatchFanOut().start()
+
+    # then
+    assert saved_jobs(jobs_client)[0]["status"] == "queued"
+    assert sent_messages(queue_client_mock) == [
+        {"eventType": "BatchStartProcessing", "job_id": job_id}
+    ]
+
+
+def test_run_packs_files_into_messages_and_completes(
+    blob_client_mocks, queue_client_mock
+):
+    # given
+    blob_client, jobs_client = blob_client_mocks
+    jobs_client.download_file.return_value = json.dumps(
+        {
+            "job_id": JOB_ID,
+            "status": "queued",
+            "files_queued": 0,
+            "continuation_token": None,
+        }
+    )
+    blob_client.iter_file_pages.return_value = iter(
+        [
+            ([{"filename": "a"}, {"filename": "b"}, {"filename": "c"}], "token-1"),
+            ([{"filename": "d"}], None),
+        ]
+    )
+
+    # when
+    BatchFanOut().run(JOB_ID)
+
+    # then
+    messages = sent_messages(queue_client_mock)
+    assert {"filenames": ["a", "b"]} in messages
+    assert {"filename": "c"} in messages
+    assert {"filename": "d"} in messages
+    assert len(messages) == 3
+
+    jobs = saved_jobs(jobs_client)
+    assert jobs[0]["files_queued"] == 3
+    assert jobs[0]["continuation_token"] == "token-1"
+    assert jobs[-1]["status"] == "completed"
+    assert jobs[-1]["files_queued"] == 4
+
+
+def test_run_resumes_from_checkpoint_and_requeues_itself(
+    blob_client_mocks, queue_client_mock
+):
+    # given
+    blob_client, jobs_client = blob_client_mocks
+    jobs_client.download_file.return_value = json.dumps(
+        {
+            "job_id": JOB_ID,
+            "status": "running",
+            "files_queued": 1000,
+            "continuation_token": "token-1",
+        }
+    )
+    blob_client.iter_file_pages.return_value = iter(
+        [([{"filename": "a"}], f"token-{i}") for i in range(2, 100)]
+    )
+
+    # when
+    with patch.object(BatchFanOut, "PAGES_PER_RUN", 2):
+        BatchFanOut().run(JOB_ID)
+
+    # then
+    blob_client.iter_file_pages.assert_called_once_with(
+        names_only=True, results_per_page=1000, continuation_token="token-1"
+    )
+    assert sent_messages(queue_client_mock)[-1] == {
+        "eventType": "BatchStartProcessing",
+        "job_id": JOB_ID,
+    }
+    jobs = saved_jobs(jobs_client)
+    assert jobs[-1]["status"] == "running"
+    assert jobs[-1]["files_queued"] == 1002
+    assert jobs[-1]["continuation_token"] == "token-3"
+
+
+def test_run_does_not_checkpoint_page_when_send_fails(
+    blob_client_mocks, queue_client_mock
+):
+    # given
+    blob_client, jobs_client = blob_client_mocks
+    jobs_client.download_file.return_value = json.dumps(
+        {
+            "job_id": JOB_ID,
+            "status": "queued",
+            "files_queued": 0,
+            "continuation_token": None,
+        }
+    )
+    blob_client.iter_file_pages.return_value = iter([([{"filename": "a"}], "token-1")])
+    queue_client_mock.send_message.side_effect = Exception("mock exception")
+
+    # when
+    with pytest.raises(Exception):
+        BatchFanOut().run(JOB_ID)
+
+    # then
+    jobs_client.upload_file.assert_not_called()
+
+
+def test_get_status_returns_job_without_continuation_token(blob_client_mocks):
+    # given
+    _, jobs_client = blob_client_mocks
+    jobs_client.download_file.return_value = json.dumps(
+        {
+            "job_id": JOB_ID,
+            "status": "running",
+            "files_queued": 10,
+            "continuation_token": "token",
+        }
+    )
+
+    # when
+    job = BatchFanOut().get_status(JOB_ID)
+
+    # then
+    assert job == {"job_id": JOB_ID, "status": "running", "files_queued": 10}
+    jobs_client.download_file.assert_called_once_with(f"batch-jobs/{JOB_ID}.json")
+
+
+@pytest.mark.parametrize("job_id", ["../config/active.json", JOB_ID])
+def test_get_status_returns_none_for_unknown_job(blob_client_mocks, job_id: str):
+    # given
+    _, jobs_client = blob_client_mocks
+    jobs_client.download_file.side_effect = ResourceNotFoundError()
+
+    # when
+    job = BatchFanOut().get_status(job_id)
+
+    # then
+    assert job is None
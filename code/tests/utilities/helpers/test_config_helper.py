@@ -1,6 +1,7 @@
 import json
 import pytest
 from unittest.mock import patch, MagicMock
+from azure.core.exceptions import ResourceNotFoundError
 from backend.batch.utilities.helpers.config.config_helper import ConfigHelper, Config
 from backend.batch.utilities.helpers.config.embedding_config import EmbeddingConfig
 from backend.batch.utilities.document_chunking.chunking_strategy import ChunkingSettings
@@ -120,7 +121,10 @@ def AzureBlobStorageClientMock():
 @pytest.fixture(autouse=True)
 def blob_client_mock(config_dict: dict, AzureBlobStorageClientMock: MagicMock):
     mock = AzureBlobStorageClientMock.return_value
-    mock.download_file.return_value = json.dumps(config_dict)
+    mock.download_file_if_modified.return_value = (
+        json.dumps(config_dict),
+        "mock-etag",
+    )
 
     return mock
 
@@ -133,6 +137,7 @@ def env_helper_mock():
         env_helper = mock.return_value
         env_helper.ORCHESTRATION_STRATEGY = "openai_function"
         env_helper.LOAD_CONFIG_FROM_BLOB_STORAGE = True
+        env_helper.CONFIG_CACHE_TTL_SECONDS = 10.0
         env_helper.USE_ADVANCED_IMAGE_PROCESSING = False
 
         yield mock
@@ -141,10 +146,10 @@ def env_helper_mock():
 @pytest.fixture(autouse=True)
 def reset_default_config():
     ConfigHelper._default_config = None
-    ConfigHelper.get_active_config_or_default.cache_clear()
+    ConfigHelper.invalidate_active_config()
     yield
     ConfigHelper._default_config = None
-    ConfigHelper.get_active_config_or_default.cache_clear()
+    ConfigHelper.invalidate_active_config()
 
 
 def test_active_config_or_default_is_cached(env_helper_mock: MagicMock):
@@ -239,7 +244,7 @@ def test_get_config_from_azure(
 
     # then
     AzureBlobStorageClientMock.assert_called_once_with(container_name="config")
-    blob_client_mock.download_file.assert_called_once_with("active.json")
+    blob_client_mock.download_file_if_modified.assert_called_once_with("active.json")
 
     assert config.prompts.condense_question_prompt == "mock_condense_question_prompt"
 
@@ -253,7 +258,7 @@ def test_get_default_config_when_not_in_azure(
     blob_client_mock: MagicMock,
 ):
     # given
-    blob_client_mock.file_exists.return_value = False
+    blob_client_mock.download_file_if_modified.side_effect = ResourceNotFoundError()
     config_dict["prompts"][
         "answering_system_prompt"
     ] = "mock_default_answering_system_prompt"
@@ -286,6 +291,98 @@ def test_save_config_as_active(
     )
 
 
+@patch("backend.batch.utilities.helpers.config.config_helper.threading.Thread")
+def test_stale_active_config_is_served_while_revalidating_in_background(
+    ThreadMock: MagicMock, blob_client_mock: MagicMock
+):
+    # given
+    config = ConfigHelper.get_active_config_or_default()
+    ConfigHelper._active_config_expires_at = 0
+
+    # when
+    stale_config = ConfigHelper.get_active_config_or_default()
+
+    # then
+    assert stale_config is config
+    blob_client_mock.download_file_if_modified.assert_called_once_with("active.json")
+    ThreadMock.assert_called_once_with(
+        target=ConfigHelper._revalidate_active_config, daemon=True
+    )
+    ThreadMock.return_value.start.assert_called_once()
+
+
+def test_revalidate_active_config_keeps_config_when_not_modified(
+    blob_client_mock: MagicMock,
+):
+    # given
+    config = ConfigHelper.get_active_config_or_default()
+    blob_client_mock.download_file_if_modified.return_value = (None, "mock-etag")
+
+    # when
+    ConfigHelper._revalidate_active_config()
+
+    # then
+    blob_client_mock.download_file_if_modified.assert_called_with(
+        "active.json", "mock-etag"
+    )
+    assert ConfigHelper.get_active_config_or_default() is config
+
+
+def test_revalidate_active_config_reloads_config_when_modified(
+    blob_client_mock: MagicMock, config_dict: dict
+):
+    # given
+    ConfigHelper.get_active_config_or_default()
+    config_dict["prompts"]["condense_question_prompt"] = "mock_new_prompt"
+    blob_client_mock.download_file_if_modified.return_value = (
+        json.dumps(config_dict),
+        "mock-new-etag",
+    )
+
+    # when
+    ConfigHelper._revalidate_active_config()
+
+    # then
+    config = ConfigHelper.get_active_config_or_default()
+    assert config.prompts.condense_question_prompt == "mock_new_prompt"
+    assert ConfigHelper._active_config_etag == "mock-new-etag"
+
+
+def test_revalidate_active_config_drops_config_when_invalidated_meanwhile(
+    blob_client_mock: MagicMock, config_dict: dict
+):
+    # given
+    ConfigHelper.get_active_config_or_default()
+    config_dict["prompts"]["condense_question_prompt"] = "mock_stale_prompt"
+
+    def download_and_invalidate(*args):
+        ConfigHelper.invalidate_active_config()
+        return json.dumps(config_dict), "mock-stale-etag"
+
+    blob_client_mock.download_file_if_modified.side_effect = download_and_invalidate
+
+    # when
+    ConfigHelper._revalidate_active_config()
+
+    # then
+    assert ConfigHelper._active_config is None
+    assert ConfigHelper._active_config_etag is None
+
+
+def test_save_config_as_active_invalidates_active_config(
+    blob_client_mock: MagicMock, config_dict: dict
+):
+    # given
+    config = ConfigHelper.get_active_config_or_default()
+
+    # when
+    ConfigHelper.save_config_as_active(config_dict)
+
+    # then
+    assert ConfigHelper.get_active_config_or_default() is not config
+    assert blob_client_mock.download_file_if_modified.call_count == 2
+
+
 def test_save_config_as_active_validates_advanced_image_file_types_are_valid(
     AzureBlobStorageClientMock: MagicMock,
     config_dict: dict,
@@ -430,7 +527,20 @@ def test_get_available_document_types_when_advanced_image_processing_enabled(
 
     # then
     assert sorted(document_types) == sorted(
-        ["txt", "pdf", "url", "html", "htm", "md", "jpeg", "jpg", "png", "docx", "tiff", "bmp"]
+        [
+            "txt",
+            "pdf",
+            "url",
+            "html",
+            "htm",
+            "md",
+            "jpeg",
+            "jpg",
+            "png",
+            "docx",
+            "tiff",
+            "bmp",
+        ]
     )
 
 
@@ -486,7 +596,10 @@ def test_loading_old_config(
 ):
     # given
     get_default_config_mock.return_value = config_dict
-    blob_client_mock.download_file.return_value = json.dumps(old_config_dict)
+    blob_client_mock.download_file_if_modified.return_value = (
+        json.dumps(old_config_dict),
+        "mock-etag",
+    )
 
     # when
     config = ConfigHelper.get_active_config_or_default()
@@ -512,7 +625,10 @@ def test_loading_old_config_with_modified_prompt(
     # given
     old_config_dict["prompts"]["answering_prompt"] = "new_mock_answering_prompt"
     get_default_config_mock.return_value = config_dict
-    blob_client_mock.download_file.return_value = json.dumps(old_config_dict)
+    blob_client_mock.download_file_if_modified.return_value = (
+        json.dumps(old_config_dict),
+        "mock-etag",
+    )
 
     # when
     config = ConfigHelper.get_active_config_or_default()
@@ -0,0 +1,183 @@
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+
+import pytest
+from azure.core.exceptions import HttpResponseError, ResourceNotFoundError
+from backend.batch.utilities.helpers.document_processing_guard import (
+    DocumentProcessingGuard,
+    ProcessingDeferred,
+)
+
+
+@pytest.fixture(autouse=True)
+def env_helper_mock():
+    with patch(
+        "backend.batch.utilities.helpers.document_processing_guard.EnvHelper"
+    ) as mock:
+        env_helper = mock.return_value
+        env_helper.DOCUMENT_PROCESSING_DEBOUNCE_SECONDS = 10
+
+        yield env_helper
+
+
+@pytest.fixture(autouse=True)
+def blob_client_mocks():
+    with patch(
+        "backend.batch.utilities.helpers.document_processing_guard.AzureBlobStorageClient"
+    ) as mock:
+        blob_client = MagicMock()
+        markers_client = MagicMock()
+        mock.side_effect = lambda container_name=None: (
+            markers_client if container_name else blob_client
+        )
+
+        yield blob_client, markers_client
+
+
+@pytest.fixture
+def document_mock(blob_client_mocks):
+    blob_client, _ = blob_client_mocks
+    document = blob_client.get_blob_client.return_value
+    document.get_blob_properties.return_value = MagicMock(
+        etag="mock-etag",
+        last_modified=datetime.now(timezone.utc) - timedelta(minutes=1),
+    )
+    return document
+
+
+@pytest.fixture
+def marker_mock(blob_client_mocks):
+    _, markers_client = blob_client_mocks
+    marker = markers_client.get_blob_client.return_value
+    marker.get_blob_properties.return_value = MagicMock(metadata={})
+    return marker
+
+
+def test_acquire_leases_and_completes_new_version(document_mock, marker_mock):
+    # given
+    guard = DocumentProcessingGuard()
+
+    # when
+    lease = guard.acquire("mock-file.pdf")
+    lease.complete()
+
+    # then
+    lease_client = marker_mock.acquire_lease.return_value
+    marker_mock.set_blob_metadata.assert_any_call(
+        {"processing_etag": "mock-etag"}, lease=lease_client
+    )
+    marker_mock.set_blob_metadata.assert_called_with(
+        {"processed_etag": "mock-etag"}, lease=lease_client
+    )
+    lease_client.release.assert_called_once()
+
+
+def test_complete_records_etag_changed_by_processing(document_mock, marker_mock):
+    # given
+    guard = DocumentProcessingGuard()
+    lease = guard.acquire("mock-file.pdf")
+    content_md5 = document_mock.get_blob_properties.return_value.content_settings
+    document_mock.get_blob_properties.return_value = MagicMock(
+        etag="mock-etag-after-metadata-update",
+        last_modified=datetime.now(timezone.utc),
+        content_settings=content_md5,
+    )
+
+    # when
+    lease.complete()
+
+    # then
+    marker_mock.set_blob_metadata.assert_called_with(
+        {"processed_etag": "mock-etag-after-metadata-update"},
+        lease=marker_mock.acquire_lease.return_value,
+    )
+    marker_mock.get_blob_properties.return_value = MagicMock(
+        metadata={"processed_etag": "mock-etag-after-metadata-update"}
+    )
+    assert guard.acquire("mock-file.pdf") is None
+
+
+def test_complete_keeps_etag_when_content_changed(document_mock, marker_mock):
+    # given
+    guard = DocumentProcessingGuard()
+    lease = guard.acquire("mock-file.pdf")
+    document_mock.get_blob_properties.return_value = MagicMock(
+        etag="mock-etag-of-new-version",
+        last_modified=datetime.now(timezone.utc),
+    )
+
+    # when
+    lease.complete()
+
+    # then
+    marker_mock.set_blob_metadata.assert_called_with(
+        {"processed_etag": "mock-etag"},
+        lease=marker_mock.acquire_lease.return_value,
+    )
+
+
+def test_acquire_returns_none_for_processed_version(document_mock, marker_mock):
+    # given
+    marker_mock.get_blob_properties.return_value = MagicMock(
+        metadata={"processed_etag": "mock-etag"}
+    )
+    guard = DocumentProcessingGuard()
+
+    # when
+    lease = guard.acquire("mock-file.pdf")
+
+    # then
+    assert lease is None
+    marker_mock.acquire_lease.assert_not_called()
+
+
+def test_acquire_returns_none_for_missing_document(document_mock, marker_mock):
+    # given
+    document_mock.get_blob_properties.side_effect = ResourceNotFoundError()
+    guard = DocumentProcessingGuard()
+
+    # when
+    lease = guard.acquire("mock-file.pdf")
+
+    # then
+    assert lease is None
+
+
+def test_acquire_defers_recently_modified_document(document_mock, marker_mock):
+    # given
+    document_mock.get_blob_properties.return_value.last_modified = datetime.now(
+        timezone.utc
+    ) - timedelta(seconds=4)
+    guard = DocumentProcessingGuard()
+
+    # when
+    with pytest.raises(ProcessingDeferred) as e:
+        guard.acquire("mock-file.pdf")
+
+    # then
+    assert 5 < e.value.delay_seconds <= 6
+    marker_mock.acquire_lease.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    "processing_etag,deferred", [("mock-etag", False), ("mock-other-etag", True)]
+)
+def test_acquire_when_document_is_leased(
+    document_mock, marker_mock, processing_etag: str, deferred: bool
+):
+    # given
+    marker_mock.get_blob_properties.return_value = MagicMock(
+        metadata={"processing_etag": processing_etag}
+    )
+    error = HttpResponseError()
+    error.status_code = 409
+    marker_mock.acquire_lease.side_effect = error
+    guard = DocumentProcessingGuard()
+
+    # when
+    if deferred:
+        with pytest.raises(ProcessingDeferred):
+            guard.acquire("mock-file.pdf")
+    else:
+        # then
+        assert guard.acquire("mock-file.pdf") is None
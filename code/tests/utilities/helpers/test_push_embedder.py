@@ -55,6 +55,7 @@ def env_helper_mock():
         env_helper.AZURE_SEARCH_KEY = AZURE_SEARCH_KEY
         env_helper.AZURE_SEARCH_SERVICE = AZURE_SEARCH_SERVICE
         env_helper.AZURE_SEARCH_INDEX = AZURE_SEARCH_INDEX
+        env_helper.USE_LOCAL_SEARCH_INDEX = False
         env_helper.AZURE_SEARCH_USE_SEMANTIC_SEARCH = AZURE_SEARCH_USE_SEMANTIC_SEARCH
         env_helper.AZURE_SEARCH_FIELDS_ID = AZURE_SEARCH_FIELDS_ID
         env_helper.AZURE_SEARCH_CONTENT_COLUMN = AZURE_SEARCH_CONTENT_COLUMN
@@ -155,6 +156,15 @@ def document_chunking_mock():
         yield mock
 
 
+@pytest.fixture(autouse=True)
+def tiktoken_mock():
+    with patch(
+        "backend.batch.utilities.helpers.embedders.push_embedder.tiktoken"
+    ) as mock:
+        mock.get_encoding.return_value.encode.side_effect = lambda text: text.split()
+        yield mock
+
+
 @pytest.fixture(autouse=True)
 def azure_computer_vision_mock():
     with patch(
@@ -167,7 +177,7 @@ def test_embed_file_advanced_image_processing_vectorizes_image(
     azure_computer_vision_mock,
 ):
     # given
-    push_embedder = PushEmbedder(MagicMock(), MagicMock())
+    push_embedder = PushEmbedder(MagicMock(), MagicMock(USE_LOCAL_SEARCH_INDEX=False))
     source_url = "http://localhost:8080/some-file-name.jpg"
 
     # when
@@ -185,6 +195,7 @@ def test_embed_file_advanced_image_processing_uses_vision_model_for_captioning(
     # given
     env_helper_mock = MagicMock()
     env_helper_mock.AZURE_OPENAI_VISION_MODEL = "gpt-4"
+    env_helper_mock.USE_LOCAL_SEARCH_INDEX = False
     push_embedder = PushEmbedder(MagicMock(), env_helper_mock)
     source_url = "http://localhost:8080/some-file-name.jpg"
 
@@ -223,7 +234,7 @@ def test_embed_file_advanced_image_processing_stores_embeddings_in_search_index(
     azure_search_helper_mock: MagicMock,
 ):
     # given
-    push_embedder = PushEmbedder(MagicMock(), MagicMock())
+    push_embedder = PushEmbedder(MagicMock(), MagicMock(USE_LOCAL_SEARCH_INDEX=False))
     storage_container = "some-container"
     file_name = "some-file-name.jpg"
     host_path = (
@@ -271,7 +282,7 @@ def test_embed_file_advanced_image_processing_raises_exception_on_failure(
     azure_search_helper_mock,
 ):
     # given
-    push_embedder = PushEmbedder(MagicMock(), MagicMock())
+    push_embedder = PushEmbedder(MagicMock(), MagicMock(USE_LOCAL_SEARCH_INDEX=False))
 
     successful_indexing_result = MagicMock()
     successful_indexing_result.succeeded = True
@@ -410,6 +421,7 @@ def test_embed_file_stores_documents_in_search_index(
                         AZURE_SEARCH_OFFSET_COLUMN: expected_chunked_documents[0].offset,
                         "page_number": expected_chunked_documents[0].page_number,
                         "chunk_id": expected_chunked_documents[0].chunk_id,
+                        "token_count": 2,
                     }
                 ),
                 AZURE_SEARCH_TITLE_COLUMN: expected_chunked_documents[0].title,
@@ -430,6 +442,7 @@ def test_embed_file_stores_documents_in_search_index(
                         AZURE_SEARCH_OFFSET_COLUMN: expected_chunked_documents[1].offset,
                         "page_number": expected_chunked_documents[1].page_number,
                         "chunk_id": expected_chunked_documents[1].chunk_id,
+                        "token_count": 3,
                     }
                 ),
                 AZURE_SEARCH_TITLE_COLUMN: expected_chunked_documents[1].title,
@@ -445,7 +458,7 @@ def test_embed_file_raises_exception_on_failure(
     azure_search_helper_mock,
 ):
     # given
-    push_embedder = PushEmbedder(MagicMock(), MagicMock())
+    push_embedder = PushEmbedder(MagicMock(), MagicMock(USE_LOCAL_SEARCH_INDEX=False))
 
     successful_indexing_result = MagicMock(succeeded=True)
     failed_indexing_result = MagicMock(succeeded=False)
@@ -460,3 +473,62 @@ def test_embed_file_raises_exception_on_failure(
             "some-url",
             "some-file-name.pdf",
         )
+
+
+def test_embed_files_shares_embedding_and_upload_requests(
+    llm_helper_mock, azure_search_helper_mock, env_helper_mock
+):
+    # given
+    blob_client = MagicMock()
+    push_embedder = PushEmbedder(blob_client, env_helper_mock)
+    llm_helper_mock.generate_embeddings_batch.side_effect = lambda inputs: [
+        [123] for _ in inputs
+    ]
+    azure_search_helper_mock.return_value.get_search_client.return_value.upload_documents.return_value = [
+        MagicMock(succeeded=True)
+    ]
+
+    # when
+    push_embedder.embed_files(
+        [("some-url", "some-file-name.pdf"), ("some-other-url", "other-file-name.pdf")]
+    )
+
+    # then
+    llm_helper_mock.generate_embeddings_batch.assert_called_once_with(
+        ["some content", "some other content", "some content", "some other content"]
+    )
+    llm_helper_mock.generate_embeddings.assert_not_called()
+    upload_documents = (
+        azure_search_helper_mock.return_value.get_search_client.return_value.upload_documents
+    )
+    upload_documents.assert_called_once()
+    assert len(upload_documents.call_args.args[0]) == 4
+    blob_client.upsert_blob_metadata.assert_has_calls(
+        [
+            call("some-file-name.pdf", {"embeddings_added": "true"}),
+            call("other-file-name.pdf", {"embeddings_added": "true"}),
+        ]
+    )
+
+
+def test_embed_file_uploads_to_local_search_index(
+    llm_helper_mock, azure_search_helper_mock, env_helper_mock
+):
+    # given
+    env_helper_mock.USE_LOCAL_SEARCH_INDEX = True
+    push_embedder = PushEmbedder(MagicMock(), env_helper_mock)
+
+    # when
+    with patch(
+        "backend.batch.utilities.helpers.embedders.push_embedder.LocalSearchIndex"
+    ) as local_search_index_mock:
+        upload_documents = (
+            local_search_index_mock.get_index.return_value.upload_documents
+        )
+        upload_documents.return_value = [MagicMock(succeeded=True)]
+        push_embedder.embed_file("some-url", "some-file-name.pdf")
+
+    # then
+    local_search_index_mock.get_index.assert_called_with(env_helper_mock)
+    assert len(upload_documents.call_args.args[0]) == 2
+    azure_search_helper_mock.assert_not_called()
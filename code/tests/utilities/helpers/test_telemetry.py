@@ -0,0 +1,105 @@
+from unittest.mock import patch
+
+import pytest
+from opentelemetry.sdk.metrics import MeterProvider
+from opentelemetry.sdk.metrics.export import InMemoryMetricReader
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+    InMemorySpanExporter,
+)
+from opentelemetry.trace import StatusCode, get_current_span
+
+from backend.batch.utilities.helpers import telemetry
+from backend.batch.utilities.helpers.telemetry import (
+    set_token_attributes,
+    trace_stage,
+)
+
+
+@pytest.fixture(autouse=True)
+def span_exporter():
+    exporter = InMemorySpanExporter()
+    tracer_provider = TracerProvider()
+    tracer_provider.add_span_processor(SimpleSpanProcessor(exporter))
+    with patch.object(telemetry, "_tracer", tracer_provider.get_tracer("test")):
+        yield exporter
+
+
+@pytest.fixture(autouse=True)
+def metric_reader():
+    reader = InMemoryMetricReader()
+    histogram = (
+        MeterProvider(metric_readers=[reader])
+        .get_meter("test")
+        .create_histogram("orchestration.stage.duration", unit="ms")
+    )
+    with patch.object(telemetry, "_stage_duration", histogram):
+        yield reader
+
+
+def get_histogram_points(metric_reader: InMemoryMetricReader):
+    metrics = metric_reader.get_metrics_data()
+    return [
+        point
+        for resource_metrics in metrics.resource_metrics
+        for scope_metrics in resource_metrics.scope_metrics
+        for metric in scope_metrics.metrics
+        for point in metric.data.data_points
+    ]
+
+
+def test_trace_stage_records_span_and_duration(
+    span_exporter: InMemorySpanExporter, metric_reader: InMemoryMetricReader
+):
+    # when
+    with trace_stage("search", top_k=5) as span:
+        set_token_attributes(span, 10, None)
+
+    # then
+    (finished_span,) = span_exporter.get_finished_spans()
+    assert finished_span.name == "orchestration.search"
+    assert dict(finished_span.attributes) == {
+        "stage": "search",
+        "top_k": 5,
+        "prompt_tokens": 10,
+        "completion_tokens": 0,
+    }
+
+    (point,) = get_histogram_points(metric_reader)
+    assert dict(point.attributes) == {"stage": "search", "top_k": 5}
+    assert point.count == 1
+
+
+def test_trace_stage_makes_span_current():
+    # when
+    with trace_stage("search") as span:
+        current_span = get_current_span()
+
+    # then
+    assert current_span is span
+
+
+def test_trace_stage_does_not_make_span_current_when_not_current():
+    # when
+    with trace_stage("answer_llm", current=False) as span:
+        current_span = get_current_span()
+
+    # then
+    assert current_span is not span
+    assert span.end_time is not None
+
+
+def test_trace_stage_records_exceptions(
+    span_exporter: InMemorySpanExporter, metric_reader: InMemoryMetricReader
+):
+    # when
+    with pytest.raises(ValueError):
+        with trace_stage("search"):
+            raise ValueError("mock exception")
+
+    # then
+    (finished_span,) = span_exporter.get_finished_spans()
+    assert finished_span.status.status_code == StatusCode.ERROR
+    (point,) = get_histogram_points(metric_reader)
+    assert point.count == 1
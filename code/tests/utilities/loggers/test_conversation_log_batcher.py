@@ -0,0 +1,153 @@
+import queue
+from collections import Counter
+from unittest.mock import MagicMock, patch
+
+import pytest
+from backend.batch.utilities.loggers.conversation_log_batcher import (
+    ConversationLogBatcher,
+)
+
+
+@pytest.fixture(autouse=True)
+def azure_search_helper_mock():
+    with patch(
+        "backend.batch.utilities.loggers.conversation_log_batcher.AzureSearchHelper"
+    ) as mock:
+        yield mock
+
+
+@pytest.fixture(autouse=True)
+def llm_helper_mock():
+    with patch(
+        "backend.batch.utilities.loggers.conversation_log_batcher.LLMHelper"
+    ) as mock:
+        llm_helper = mock.return_value
+        llm_helper.generate_embeddings_batch.side_effect = lambda texts: [
+            [float(i)] for i, _ in enumerate(texts)
+        ]
+        yield llm_helper
+
+
+@pytest.fixture()
+def vectorstore_mock(azure_search_helper_mock: MagicMock):
+    return azure_search_helper_mock.return_value.get_conversation_logger.return_value
+
+
+@pytest.fixture(autouse=True)
+def reset_batcher():
+    with patch.multiple(
+        ConversationLogBatcher,
+        _queue=queue.Queue(maxsize=ConversationLogBatcher.MAX_QUEUE_SIZE),
+        _counters=Counter(),
+        _worker=None,
+        _vectorstore=None,
+        _llm_helper=None,
+        FLUSH_INTERVAL_SECONDS=0.05,
+    ):
+        yield
+
+
+def create_entries(count: int) -> list[tuple[str, dict]]:
+    return [(f"message {i}", {"conversation_id": "123"}) for i in range(count)]
+
+
+def test_writes_entries_in_batches(
+    vectorstore_mock: MagicMock, llm_helper_mock: MagicMock
+):
+    # given
+    entries = create_entries(3)
+
+    # when
+    ConversationLogBatcher.enqueue(entries)
+    flushed = ConversationLogBatcher.flush(timeout=5)
+
+    # then
+    assert flushed
+    llm_helper_mock.generate_embeddings_batch.assert_called_once_with(
+        ["message 0", "message 1", "message 2"]
+    )
+    vectorstore_mock.add_embeddings.assert_called_once_with(
+        [("message 0", [0.0]), ("message 1", [1.0]), ("message 2", [2.0])],
+        metadatas=[{"conversation_id": "123"}] * 3,
+    )
+    vectorstore_mock.add_texts.assert_not_called()
+    assert ConversationLogBatcher.get_counters() == {
+        "enqueued": 3,
+        "written": 3,
+        "batches": 1,
+        "queue_depth": 0,
+    }
+
+
+def test_embeds_a_full_batch_with_one_embeddings_call(
+    vectorstore_mock: MagicMock, llm_helper_mock: MagicMock
+):
+    # given
+    entries = create_entries(ConversationLogBatcher.BATCH_SIZE)
+
+    # when
+    ConversationLogBatcher.enqueue(entries)
+    ConversationLogBatcher.flush(timeout=5)
+
+    # then
+    assert llm_helper_mock.generate_embeddings_batch.call_count == 1
+    assert vectorstore_mock.add_embeddings.call_count == 1
+    assert len(vectorstore_mock.add_embeddings.call_args.args[0]) == len(entries)
+
+
+def test_splits_batches_at_batch_size(vectorstore_mock: MagicMock):
+    # given
+    entries = create_entries(5)
+
+    # when
+    with patch.object(ConversationLogBatcher, "BATCH_SIZE", 2):
+        ConversationLogBatcher.enqueue(entries)
+        ConversationLogBatcher.flush(timeout=5)
+
+    # then
+    assert [
+        len(call.args[0]) for call in vectorstore_mock.add_embeddings.call_args_list
+    ] == [2, 2, 1]
+
+
+def test_drops_entries_when_queue_is_full(vectorstore_mock: MagicMock):
+    # given
+    ConversationLogBatcher._queue = queue.Queue(maxsize=2)
+    ConversationLogBatcher._worker = MagicMock()
+
+    # when
+    ConversationLogBatcher.enqueue(create_entries(3))
+
+    # then
+    counters = ConversationLogBatcher.get_counters()
+    assert counters["enqueued"] == 2
+    assert counters["dropped"] == 1
+    assert counters["queue_depth"] == 2
+    vectorstore_mock.add_embeddings.assert_not_called()
+
+
+def test_counts_failed_entries(vectorstore_mock: MagicMock):
+    # given
+    vectorstore_mock.add_embeddings.side_effect = Exception("mock exception")
+
+    # when
+    ConversationLogBatcher.enqueue(create_entries(2))
+    flushed = ConversationLogBatcher.flush(timeout=5)
+
+    # then
+    assert flushed
+    counters = ConversationLogBatcher.get_counters()
+    assert counters["failed"] == 2
+    assert "written" not in counters
+
+
+def test_flush_times_out_when_entries_are_not_written():
+    # given
+    ConversationLogBatcher._worker = MagicMock()
+    ConversationLogBatcher.enqueue(create_entries(1))
+
+    # when
+    flushed = ConversationLogBatcher.flush(timeout=0.01)
+
+    # then
+    assert not flushed
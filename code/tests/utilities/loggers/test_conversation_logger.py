@@ -0,0 +1,80 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+from backend.batch.utilities.loggers.conversation_logger import ConversationLogger
+
+MESSAGES = [
+    {"role": "user", "content": "user message", "conversation_id": "123"},
+    {
+        "role": "tool",
+        "content": '{"citations": [{"id": "doc1"}]}',
+    },
+    {"role": "assistant", "content": "assistant message"},
+]
+
+
+@pytest.fixture(autouse=True)
+def azure_search_helper_mock():
+    with patch(
+        "backend.batch.utilities.loggers.conversation_logger.AzureSearchHelper"
+    ) as mock:
+        yield mock
+
+
+@pytest.fixture()
+def env_helper_mock():
+    with patch("backend.batch.utilities.loggers.conversation_logger.EnvHelper") as mock:
+        env_helper = mock.return_value
+        env_helper.CONVERSATION_LOGGING_ASYNC = False
+
+        yield env_helper
+
+
+@pytest.fixture()
+def batcher_mock():
+    with patch(
+        "backend.batch.utilities.loggers.conversation_logger.ConversationLogBatcher"
+    ) as mock:
+        yield mock
+
+
+def test_log_writes_messages_synchronously(
+    env_helper_mock: MagicMock,
+    azure_search_helper_mock: MagicMock,
+    batcher_mock: MagicMock,
+):
+    # given
+    vectorstore = (
+        azure_search_helper_mock.return_value.get_conversation_logger.return_value
+    )
+
+    # when
+    ConversationLogger().log(MESSAGES)
+
+    # then
+    assert vectorstore.add_texts.call_count == 2
+    user_call, assistant_call = vectorstore.add_texts.call_args_list
+    assert user_call.kwargs["texts"] == ["user message"]
+    assert user_call.kwargs["metadatas"][0]["type"] == "user"
+    assert assistant_call.kwargs["texts"] == ["assistant message"]
+    assert assistant_call.kwargs["metadatas"][0]["conversation_id"] == "123"
+    assert assistant_call.kwargs["metadatas"][0]["sources"] == ["doc1"]
+    batcher_mock.enqueue.assert_not_called()
+
+
+def test_log_enqueues_messages_when_asynchronous(
+    env_helper_mock: MagicMock,
+    azure_search_helper_mock: MagicMock,
+    batcher_mock: MagicMock,
+):
+    # given
+    env_helper_mock.CONVERSATION_LOGGING_ASYNC = True
+
+    # when
+    ConversationLogger().log(MESSAGES)
+
+    # then
+    azure_search_helper_mock.assert_not_called()
+    entries = batcher_mock.enqueue.call_args.args[0]
+    assert [text for text, _ in entries] == ["user message", "assistant message"]
+    assert [metadata["type"] for _, metadata in entries] == ["user", "assistant"]
@@ -0,0 +1,146 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+from backend.batch.utilities.orchestrator.intent_router import IntentRouter
+
+
+@pytest.fixture(autouse=True)
+def env_helper_mock():
+    with patch("backend.batch.utilities.orchestrator.intent_router.EnvHelper") as mock:
+        env_helper = mock.return_value
+        env_helper.LOCAL_INTENT_ROUTING_MIN_MARGIN = 0.05
+
+        yield env_helper
+
+
+@pytest.fixture(autouse=True)
+def llm_helper_mock():
+    with patch("backend.batch.utilities.orchestrator.intent_router.LLMHelper") as mock:
+        llm_helper = mock.return_value
+        llm_helper.generate_embeddings_batch.side_effect = lambda inputs: [
+            [1.0, 0.0] if i < len(IntentRouter.search_examples) else [0.0, 1.0]
+            for i in range(len(inputs))
+        ]
+
+        yield llm_helper
+
+
+@pytest.fixture(autouse=True)
+def reset_centroids():
+    IntentRouter._centroids = None
+    yield
+    IntentRouter._centroids = None
+
+
+@pytest.mark.parametrize(
+    "user_message",
+    [
+        "What is the parental leave policy?",
+        "how do I request a new laptop",
+        "Vacation days for part-time employees?",
+    ],
+)
+def test_routes_first_turn_questions_to_search_documents(
+    user_message: str, llm_helper_mock: MagicMock
+):
+    # given
+    router = IntentRouter()
+
+    # when
+    route = router.route(user_message, [])
+
+    # then
+    assert route == "search_documents"
+    llm_helper_mock.generate_embeddings.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    "user_message",
+    [
+        "Translate the previous answer to Italian",
+        "Can you summarize this?",
+        "Hello",
+        "What documents do you have? List all documents",
+    ],
+)
+def test_leaves_text_processing_and_small_talk_to_the_llm(user_message: str):
+    # given
+    router = IntentRouter()
+
+    # when
+    route = router.route(user_message, [])
+
+    # then
+    assert route is None
+
+
+def test_leaves_follow_up_questions_to_the_llm(llm_helper_mock: MagicMock):
+    # given
+    router = IntentRouter()
+    chat_history = [
+        {"role": "user", "content": "What is the parental leave policy?"},
+        {"role": "assistant", "content": "It is 16 weeks."},
+    ]
+
+    # when
+    route = router.route("What about for contractors?", chat_history)
+
+    # then
+    assert route is None
+    llm_helper_mock.generate_embeddings.assert_not_called()
+
+
+def test_routes_by_nearest_centroid_when_lexically_uncertain(
+    llm_helper_mock: MagicMock,
+):
+    # given
+    llm_helper_mock.generate_embeddings.return_value = [0.9, 0.1]
+    router = IntentRouter()
+
+    # when
+    route = router.route("Expense policy for conferences", [])
+
+    # then
+    assert route == "search_documents"
+    llm_helper_mock.generate_embeddings.assert_called_once_with(
+        "Expense policy for conferences"
+    )
+
+
+def test_falls_back_to_the_llm_when_centroids_are_too_close(
+    llm_helper_mock: MagicMock,
+):
+    # given
+    llm_helper_mock.generate_embeddings.return_value = [0.5, 0.5]
+    router = IntentRouter()
+
+    # when
+    route = router.route("Expense policy for conferences", [])
+
+    # then
+    assert route is None
+
+
+def test_embeds_examples_only_once(llm_helper_mock: MagicMock):
+    # given
+    llm_helper_mock.generate_embeddings.return_value = [0.9, 0.1]
+    router = IntentRouter()
+
+    # when
+    router.route("Expense policy for conferences", [])
+    router.route("Security training requirements", [])
+
+    # then
+    llm_helper_mock.generate_embeddings_batch.assert_called_once()
+
+
+def test_falls_back_to_the_llm_when_embedding_fails(llm_helper_mock: MagicMock):
+    # given
+    llm_helper_mock.generate_embeddings.side_effect = Exception("mock exception")
+    router = IntentRouter()
+
+    # when
+    route = router.route("Expense policy for conferences", [])
+
+    # then
+    assert route is None
@@ -1,5 +1,6 @@
 from unittest.mock import MagicMock, patch
 import pytest
+from langchain_core.messages import AIMessage, HumanMessage
 
 from backend.batch.utilities.orchestrator.lang_chain_agent import LangChainAgent
 from backend.batch.utilities.common.answer import Answer
@@ -8,83 +9,76 @@ from backend.batch.utilities.common.answer import Answer
 class LangChainAgentNoInit(LangChainAgent):
     def __init__(self) -> None:
         self.content_safety_checker = MagicMock()
-        self.question_answer_tool = MagicMock()
-        self.text_processing_tool = MagicMock()
         self.config = MagicMock()
         self.output_parser = MagicMock()
-        self.tools = MagicMock()
         self.llm_helper = MagicMock()
         self.tokens = {"prompt": 0, "completion": 0, "total": 0}
 
 
-def test_run_tool_returns_answer_json():
+@pytest.fixture(autouse=True)
+def reset_agent_executor():
+    LangChainAgent._agent_executor = None
+    yield
+    LangChainAgent._agent_executor = None
+
+
+@pytest.fixture
+def agent_chain_mock():
+    with patch(
+        "backend.batch.utilities.orchestrator.lang_chain_agent.ZeroShotAgent"
+    ), patch("backend.batch.utilities.orchestrator.lang_chain_agent.LLMChain"), patch(
+        "langchain.agents.AgentExecutor.from_agent_and_tools"
+    ) as agent_executor_mock:
+        agent_chain_mock = MagicMock()
+        agent_executor_mock.return_value = agent_chain_mock
+        yield agent_chain_mock
+
+
+@patch("backend.batch.utilities.orchestrator.lang_chain_agent.QuestionAnswerTool")
+def test_run_tool_returns_answer(question_answer_tool_mock):
     # Given
     user_message = "Hello"
-    agent = LangChainAgentNoInit()
-    answer = Answer(
-        question=user_message,
-        answer="Hello, how can I help you?",
-        source_documents=[],
-        prompt_tokens=None,
-        completion_tokens=None,
-    )
-    agent.question_answer_tool.answer_question = MagicMock(return_value=answer)
+    answer = Answer(question=user_message, answer="Hello, how can I help you?")
+    question_answer_tool_mock.return_value.answer_question.return_value = answer
 
     # When
-    answer_json = agent.run_tool(user_message)
+    result = LangChainAgent.run_tool(user_message)
 
     # Then
-    assert (
-        answer_json
-        == '{"question": "Hello", "answer": "Hello, how can I help you?", "source_documents": [], "prompt_tokens": null, "completion_tokens": null}'
-    )
-    agent.question_answer_tool.answer_question.assert_called_once_with(
+    assert result is answer
+    question_answer_tool_mock.return_value.answer_question.assert_called_once_with(
         user_message, chat_history=[]
     )
 
 
-def test_run_text_processing_tool_returns_answer_json():
+@patch("backend.batch.utilities.orchestrator.lang_chain_agent.TextProcessingTool")
+def test_run_text_processing_tool_returns_answer(text_processing_tool_mock):
     # Given
     user_message = "Hello"
-    agent = LangChainAgentNoInit()
-    answer = Answer(
-        question=user_message,
-        answer="Hello, how can I help you?",
-        source_documents=[],
-        prompt_tokens=None,
-        completion_tokens=None,
-    )
-    agent.text_processing_tool.answer_question = MagicMock(return_value=answer)
+    answer = Answer(question=user_message, answer="Hello, how can I help you?")
+    text_processing_tool_mock.return_value.answer_question.return_value = answer
 
     # When
-    answer_json = agent.run_text_processing_tool(user_message)
+    result = LangChainAgent.run_text_processing_tool(user_message)
 
     # Then
-    assert (
-        answer_json
-        == '{"question": "Hello", "answer": "Hello, how can I help you?", "source_documents": [], "prompt_tokens": null, "completion_tokens": null}'
-    )
-    agent.text_processing_tool.answer_question.assert_called_once_with(
+    assert result is answer
+    text_processing_tool_mock.return_value.answer_question.assert_called_once_with(
         user_message, chat_history=[]
     )
 
 
-@patch("backend.batch.utilities.orchestrator.lang_chain_agent.ZeroShotAgent")
-@patch("backend.batch.utilities.orchestrator.lang_chain_agent.LLMChain")
-@patch("langchain.agents.AgentExecutor.from_agent_and_tools")
 @pytest.mark.asyncio
-async def test_orchestrate_langchain_to_orchestrate_chat(
-    agent_executor_mock, llm_chain_mock, zero_shot_agent_mock
-):
+async def test_orchestrate_langchain_to_orchestrate_chat(agent_chain_mock: MagicMock):
     # Given
     agent = LangChainAgentNoInit()
 
     agent.config.prompts.enable_post_answering_prompt = False
     agent.config.prompts.enable_content_safety = False
 
-    agent_chain_mock = MagicMock()
-    agent_executor_mock.return_value = agent_chain_mock
-    agent_chain_mock.run.return_value = '{"question": "Hello", "answer": "Hello, how can I help you?", "source_documents": [], "prompt_tokens": null, "completion_tokens": null}'
+    agent_chain_mock.invoke.return_value = {
+        "output": Answer(question="Hello", answer="Hello, how can I help you?")
+    }
 
     expected_messages = [{"some", "message"}, {"another", "message"}]
     agent.output_parser.parse.return_value = expected_messages
@@ -94,18 +88,58 @@ async def test_orchestrate_langchain_to_orchestrate_chat(
 
     # Then
     assert actual_messages == expected_messages
-    agent_chain_mock.run.assert_called_once_with("Hello")
+    agent_chain_mock.invoke.assert_called_once_with(
+        {"input": "Hello", "chat_history": []}
+    )
     agent.output_parser.parse.assert_called_once_with(
         question="Hello", answer="Hello, how can I help you?", source_documents=[]
     )
 
 
-@patch("backend.batch.utilities.orchestrator.lang_chain_agent.ZeroShotAgent")
-@patch("backend.batch.utilities.orchestrator.lang_chain_agent.LLMChain")
-@patch("langchain.agents.AgentExecutor.from_agent_and_tools")
+@pytest.mark.asyncio
+async def test_orchestrate_passes_chat_history_and_reuses_agent(
+    agent_chain_mock: MagicMock,
+):
+    # Given
+    agent = LangChainAgentNoInit()
+
+    agent.config.prompts.enable_post_answering_prompt = False
+    agent.config.prompts.enable_content_safety = False
+
+    agent_chain_mock.invoke.return_value = {"output": "Hi!"}
+    chat_history = [
+        {"role": "user", "content": "Hello"},
+        {"role": "assistant", "content": "Hi, how can I help?"},
+    ]
+
+    other_agent = LangChainAgentNoInit()
+    other_agent.config = agent.config
+
+    # When
+    await agent.orchestrate(user_message="Hi", chat_history=chat_history)
+    await other_agent.orchestrate(user_message="Hi", chat_history=[])
+
+    # Then
+    assert agent.llm_helper.get_llm.call_count == 1
+    assert agent_chain_mock.invoke.call_args_list[0].args[0] == {
+        "input": "Hi",
+        "chat_history": [
+            HumanMessage(content="Hello"),
+            AIMessage(content="Hi, how can I help?"),
+        ],
+    }
+    assert agent_chain_mock.invoke.call_args_list[1].args[0] == {
+        "input": "Hi",
+        "chat_history": [],
+    }
+    agent.output_parser.parse.assert_called_once_with(
+        question="Hi", answer="Hi!", source_documents=[]
+    )
+
+
 @pytest.mark.asyncio
 async def test_orchestrate_returns_error_message_on_Exception(
-    agent_executor_mock, llm_chain_mock, zero_shot_agent_mock
+    agent_chain_mock: MagicMock,
 ):
     # Given
     agent = LangChainAgentNoInit()
@@ -113,9 +147,7 @@ async def test_orchestrate_returns_error_message_on_Exception(
     agent.config.prompts.enable_post_answering_prompt = False
     agent.config.prompts.enable_content_safety = False
 
-    agent_chain_mock = MagicMock()
-    agent_executor_mock.return_value = agent_chain_mock
-    agent_chain_mock.run.side_effect = Exception("Some error")
+    agent_chain_mock.invoke.side_effect = Exception("Some error")
 
     agent.output_parser.parse.return_value = [{"some", "message"}]
 
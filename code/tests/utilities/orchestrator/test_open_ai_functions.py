@@ -1,10 +1,14 @@
-from unittest.mock import MagicMock, patch
+import json
+import threading
+from unittest.mock import ANY, MagicMock, patch
 
 import pytest
 from backend.batch.utilities.orchestrator.open_ai_functions import (
     OpenAIFunctionsOrchestrator,
 )
 from backend.batch.utilities.parser.output_parser_tool import OutputParserTool
+from backend.batch.utilities.common.answer import Answer
+from backend.batch.utilities.common.source_document import SourceDocument
 
 
 @pytest.fixture(autouse=True)
@@ -38,6 +42,21 @@ def orchestrator():
         yield orchestrator
 
 
+def mock_tool_calls(llm_helper_mock: MagicMock, *function_calls: tuple[str, str]):
+    result = llm_helper_mock.get_chat_completion_with_tools.return_value
+    result.choices[0].finish_reason = "tool_calls"
+    result.choices[0].message.tool_calls = [
+        MagicMock(function=MagicMock(arguments=arguments))
+        for _, arguments in function_calls
+    ]
+    for tool_call, (name, _) in zip(
+        result.choices[0].message.tool_calls, function_calls
+    ):
+        tool_call.function.name = name
+    result.usage.prompt_tokens = 10
+    result.usage.completion_tokens = 5
+
+
 @pytest.mark.asyncio
 async def test_content_safety_input(orchestrator: OpenAIFunctionsOrchestrator):
     # given
@@ -62,3 +81,222 @@ async def test_content_safety_input(orchestrator: OpenAIFunctionsOrchestrator):
 
     # then
     assert response == content_safety_response
+
+
+@pytest.mark.asyncio
+async def test_orchestrate_stream_sends_citations_before_answer(
+    orchestrator: OpenAIFunctionsOrchestrator, llm_helper_mock: MagicMock
+):
+    # given
+    orchestrator.config.prompts.enable_post_answering_prompt = False
+    mock_tool_calls(
+        llm_helper_mock, ("search_documents", '{"question": "A question?"}')
+    )
+
+    answer = Answer(question="A question?", answer="", source_documents=[])
+
+    def stream_answer_question(question, chat_history, search_queries=None):
+        yield answer
+        answer.answer = "An"
+        yield answer
+        answer.answer = "An answer"
+        answer.prompt_tokens = 100
+        answer.completion_tokens = 50
+        yield answer
+
+    with patch(
+        "backend.batch.utilities.orchestrator.open_ai_functions.QuestionAnswerTool"
+    ) as question_answer_tool_mock:
+        question_answer_tool_mock.return_value.stream_answer_question.side_effect = (
+            stream_answer_question
+        )
+
+        # when
+        frames = [
+            frame async for frame in orchestrator.orchestrate_stream("A question?", [])
+        ]
+
+    # then
+    tool_message = {
+        "role": "tool",
+        "content": '{"citations": [], "intent": "A question?"}',
+        "end_turn": False,
+    }
+    assert frames == [
+        [tool_message, {"role": "assistant", "content": "", "end_turn": False}],
+        [
+            tool_message,
+            {"role": "assistant", "content": "An", "end_turn": False},
+        ],
+        [
+            tool_message,
+            {"role": "assistant", "content": "An answer", "end_turn": False},
+        ],
+        [
+            tool_message,
+            {"role": "assistant", "content": "An answer", "end_turn": True},
+        ],
+    ]
+    assert orchestrator.tokens == {"prompt": 110, "completion": 55, "total": 165}
+
+
+@pytest.mark.asyncio
+async def test_orchestrate_skips_llm_routing_when_routed_locally(
+    orchestrator: OpenAIFunctionsOrchestrator, llm_helper_mock: MagicMock
+):
+    # given
+    orchestrator.config.prompts.enable_post_answering_prompt = False
+    orchestrator.intent_router = MagicMock()
+    orchestrator.intent_router.route.return_value = "search_documents"
+
+    with patch(
+        "backend.batch.utilities.orchestrator.open_ai_functions.QuestionAnswerTool"
+    ) as question_answer_tool_mock:
+        question_answer_tool_mock.return_value.answer_question.return_value = Answer(
+            question="A question?",
+            answer="An answer",
+            prompt_tokens=100,
+            completion_tokens=50,
+        )
+
+        # when
+        response = await orchestrator.orchestrate("A question?", [])
+
+    # then
+    llm_helper_mock.get_chat_completion_with_tools.assert_not_called()
+    orchestrator.call_content_safety_input.assert_called_once_with("A question?")
+    question_answer_tool_mock.return_value.answer_question.assert_called_once_with(
+        "A question?", [], search_queries=None
+    )
+    assert response[1] == {
+        "role": "assistant",
+        "content": "An answer",
+        "end_turn": True,
+    }
+    assert orchestrator.tokens == {"prompt": 100, "completion": 50, "total": 150}
+
+
+@pytest.mark.asyncio
+async def test_orchestrate_searches_with_search_queries(
+    orchestrator: OpenAIFunctionsOrchestrator, llm_helper_mock: MagicMock
+):
+    # given
+    orchestrator.config.prompts.enable_post_answering_prompt = False
+    mock_tool_calls(
+        llm_helper_mock,
+        (
+            "search_documents",
+            json.dumps(
+                {
+                    "question": "Compare the Standard and Plus plans",
+                    "search_queries": ["Standard plan", "Plus plan"],
+                }
+            ),
+        ),
+    )
+
+    with patch(
+        "backend.batch.utilities.orchestrator.open_ai_functions.QuestionAnswerTool"
+    ) as question_answer_tool_mock:
+        question_answer_tool_mock.return_value.answer_question.return_value = Answer(
+            question="Compare the Standard and Plus plans", answer="An answer"
+        )
+
+        # when
+        await orchestrator.orchestrate("Compare the Standard and Plus plans", [])
+
+    # then
+    question_answer_tool_mock.return_value.answer_question.assert_called_once_with(
+        "Compare the Standard and Plus plans",
+        [],
+        search_queries=["Standard plan", "Plus plan"],
+    )
+
+
+@pytest.mark.asyncio
+async def test_orchestrate_routes_with_tools(
+    orchestrator: OpenAIFunctionsOrchestrator, llm_helper_mock: MagicMock
+):
+    # given
+    result = llm_helper_mock.get_chat_completion_with_tools.return_value
+    result.choices[0].finish_reason = "stop"
+    result.choices[0].message.content = "Hello!"
+    result.usage.prompt_tokens = 10
+    result.usage.completion_tokens = 5
+
+    # when
+    response = await orchestrator.orchestrate("Hello", [])
+
+    # then
+    llm_helper_mock.get_chat_completion_with_tools.assert_called_once_with(
+        ANY,
+        [
+            {"type": "function", "function": function}
+            for function in orchestrator.functions
+        ],
+        tool_choice="auto",
+    )
+    assert response[1]["content"] == "Hello!"
+
+
+@pytest.mark.asyncio
+async def test_orchestrate_answers_parallel_tool_calls_concurrently(
+    orchestrator: OpenAIFunctionsOrchestrator, llm_helper_mock: MagicMock
+):
+    # given
+    orchestrator.config.prompts.enable_post_answering_prompt = False
+    mock_tool_calls(
+        llm_helper_mock,
+        ("search_documents", '{"question": "What is the deductible?"}'),
+        ("text_processing", '{"text": "Hello", "operation": "Translate to French"}'),
+    )
+    # Each tool waits for the other one to have started
+    tools_started = threading.Barrier(2, timeout=5)
+
+    def answer_question(question, chat_history, search_queries=None):
+        tools_started.wait()
+        return Answer(
+            question=question,
+            answer="The deductible is $500 [doc1].",
+            source_documents=[
+                SourceDocument(id="doc", content="content", source="benefits.pdf")
+            ],
+            prompt_tokens=100,
+            completion_tokens=50,
+        )
+
+    def process_text(question, chat_history, text, operation):
+        tools_started.wait()
+        return Answer(
+            question=question,
+            answer="Bonjour",
+            prompt_tokens=20,
+            completion_tokens=10,
+        )
+
+    with patch(
+        "backend.batch.utilities.orchestrator.open_ai_functions.QuestionAnswerTool"
+    ) as question_answer_tool_mock, patch(
+        "backend.batch.utilities.orchestrator.open_ai_functions.TextProcessingTool"
+    ) as text_processing_tool_mock:
+        question_answer_tool_mock.return_value.answer_question.side_effect = (
+            answer_question
+        )
+        text_processing_tool_mock.return_value.answer_question.side_effect = (
+            process_text
+        )
+
+        # when
+        response = await orchestrator.orchestrate(
+            "What is the deductible? And translate Hello to French", []
+        )
+
+    # then
+    assert response[1] == {
+        "role": "assistant",
+        "content": "The deductible is $500 [doc1].\n\nBonjour",
+        "end_turn": True,
+    }
+    citations = json.loads(response[0]["content"])["citations"]
+    assert [citation["filepath"] for citation in citations] == ["benefits.pdf"]
+    assert orchestrator.tokens == {"prompt": 130, "completion": 65, "total": 195}
@@ -1,6 +1,9 @@
+import asyncio
 from unittest.mock import MagicMock, patch
 
 import pytest
+from backend.batch.utilities.common.answer import Answer
+from backend.batch.utilities.common.source_document import SourceDocument
 from backend.batch.utilities.orchestrator.orchestrator_base import OrchestratorBase
 
 
@@ -38,6 +41,17 @@ def content_safety_checker_mock():
         yield content_safety_checker
 
 
+@pytest.fixture(autouse=True)
+def env_helper_mock():
+    with patch(
+        "backend.batch.utilities.orchestrator.orchestrator_base.EnvHelper"
+    ) as mock:
+        env_helper = mock.return_value
+        env_helper.SPECULATIVE_CONTENT_SAFETY = False
+        env_helper.CHAT_HISTORY_SUMMARIZATION = False
+        yield env_helper
+
+
 def test_call_content_safety_input_replace(content_safety_checker_mock: MagicMock):
     # given
     orchestrator = MockOrchestrator()
@@ -106,3 +120,186 @@ def test_call_content_safety_output_no_replace(content_safety_checker_mock: Magi
 
     # then
     assert result is None
+
+
+@pytest.mark.asyncio
+async def test_run_with_content_safety_input_skips_work_when_flagged(
+    content_safety_checker_mock: MagicMock,
+):
+    # given
+    orchestrator = MockOrchestrator()
+    content_safety_checker_mock.validate_input_and_replace_if_harmful.return_value = (
+        "filtered user message"
+    )
+    work = MagicMock()
+
+    # when
+    response, result = await orchestrator.run_with_content_safety_input(
+        "user message", asyncio.to_thread(work)
+    )
+
+    # then
+    assert response[1]["content"] == "filtered user message"
+    assert result is None
+    work.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_run_with_content_safety_input_speculative_returns_work_result(
+    env_helper_mock: MagicMock,
+    content_safety_checker_mock: MagicMock,
+):
+    # given
+    env_helper_mock.SPECULATIVE_CONTENT_SAFETY = True
+    orchestrator = MockOrchestrator()
+    content_safety_checker_mock.validate_input_and_replace_if_harmful.return_value = (
+        "user message"
+    )
+
+    async def work():
+        return "work result"
+
+    # when
+    response, result = await orchestrator.run_with_content_safety_input(
+        "user message", work(), speculative=True
+    )
+
+    # then
+    assert response is None
+    assert result == "work result"
+
+
+@pytest.mark.asyncio
+async def test_run_with_content_safety_input_speculative_closes_work_result_when_flagged(
+    env_helper_mock: MagicMock,
+    content_safety_checker_mock: MagicMock,
+):
+    # given
+    env_helper_mock.SPECULATIVE_CONTENT_SAFETY = True
+    orchestrator = MockOrchestrator()
+    content_safety_checker_mock.validate_input_and_replace_if_harmful.return_value = (
+        "filtered user message"
+    )
+    work_result = MagicMock()
+    release_work = asyncio.Event()
+
+    async def work():
+        await release_work.wait()
+        return work_result
+
+    # when
+    response, result = await orchestrator.run_with_content_safety_input(
+        "user message", work(), speculative=True
+    )
+    release_work.set()
+    await asyncio.sleep(0.01)
+
+    # then
+    assert response[1]["content"] == "filtered user message"
+    assert result is None
+    work_result.close.assert_called_once_with()
+
+
+@pytest.mark.asyncio
+async def test_run_with_content_safety_input_waits_for_check_unless_speculative(
+    env_helper_mock: MagicMock,
+    content_safety_checker_mock: MagicMock,
+):
+    # given
+    env_helper_mock.SPECULATIVE_CONTENT_SAFETY = True
+    orchestrator = MockOrchestrator()
+    content_safety_checker_mock.validate_input_and_replace_if_harmful.return_value = (
+        "filtered user message"
+    )
+    work = MagicMock()
+
+    # when
+    response, result = await orchestrator.run_with_content_safety_input(
+        "user message", asyncio.to_thread(work)
+    )
+
+    # then
+    assert response[1]["content"] == "filtered user message"
+    assert result is None
+    work.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_handle_message_compacts_chat_history(env_helper_mock: MagicMock):
+    # given
+    env_helper_mock.CHAT_HISTORY_SUMMARIZATION = True
+    env_helper_mock.CHAT_HISTORY_SUMMARIZATION_KEEP_TURNS = 2
+    chat_history = [{"role": "user", "content": "question"}]
+    compacted_history = [{"role": "assistant", "content": "summary"}]
+    orchestrator = MockOrchestrator()
+    orchestrator.orchestrate = MagicMock(wraps=orchestrator.orchestrate)
+
+    with patch(
+        "backend.batch.utilities.orchestrator.orchestrator_base.ChatHistoryCompactor"
+    ) as chat_history_compactor_mock:
+        chat_history_compactor_mock.return_value.compact.return_value = (
+            compacted_history
+        )
+
+        # when
+        await orchestrator.handle_message("message", chat_history, "conversation")
+
+    # then
+    chat_history_compactor_mock.assert_called_once_with(2)
+    chat_history_compactor_mock.return_value.compact.assert_called_once_with(
+        chat_history, "conversation"
+    )
+    orchestrator.orchestrate.assert_called_once_with("message", compacted_history)
+
+
+def source_document(id: str) -> SourceDocument:
+    return SourceDocument(id=id, content=f"content {id}", source=f"{id}.pdf")
+
+
+def test_merge_answers_returns_single_answer():
+    # given
+    orchestrator = MockOrchestrator()
+    answer = Answer(question="A question?", answer="An answer [doc1]")
+
+    # when
+    merged_answer = orchestrator.merge_answers("Questions?", [answer])
+
+    # then
+    assert merged_answer is answer
+
+
+def test_merge_answers_renumbers_doc_references():
+    # given
+    orchestrator = MockOrchestrator()
+    answers = [
+        Answer(
+            question="First question?",
+            answer="First answer [doc1][doc2].",
+            source_documents=[source_document("a"), source_document("b")],
+            prompt_tokens=10,
+            completion_tokens=5,
+        ),
+        Answer(
+            question="Second question?",
+            answer="Second answer [doc2][doc1][doc3].",
+            source_documents=[source_document("c"), source_document("a")],
+            prompt_tokens=20,
+            completion_tokens=10,
+        ),
+    ]
+
+    # when
+    merged_answer = orchestrator.merge_answers("Questions?", answers)
+
+    # then
+    assert merged_answer == Answer(
+        question="Questions?",
+        answer="First answer [doc1][doc2].\n\nSecond answer [doc1][doc3].",
+        source_documents=[
+            source_document("a"),
+            source_document("b"),
+            source_document("c"),
+        ],
+        prompt_tokens=30,
+        completion_tokens=15,
+    )
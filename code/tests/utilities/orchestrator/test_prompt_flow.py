@@ -1,6 +1,9 @@
-from unittest.mock import ANY, AsyncMock, MagicMock, patch
+import json
+import time
+from unittest.mock import MagicMock, patch
 
 import pytest
+from azure.ai.ml.entities import EndpointAuthKeys, EndpointAuthToken
 from backend.batch.utilities.orchestrator.prompt_flow import (
     PromptFlowOrchestrator,
 )
@@ -13,6 +16,12 @@ def llm_helper_mock():
         llm_helper = mock.return_value
 
         mock_ml_client = MagicMock()
+        mock_ml_client.online_endpoints.get.return_value.scoring_uri = (
+            "https://endpoint_name.region.inference.ml.azure.com/score"
+        )
+        mock_ml_client.online_endpoints.get_keys.return_value = EndpointAuthKeys(
+            primary_key="primary_key"
+        )
         llm_helper.get_ml_client.return_value = mock_ml_client
 
         yield llm_helper, mock_ml_client
@@ -30,6 +39,32 @@ def env_helper_mock():
         yield env_helper
 
 
+@pytest.fixture(autouse=True)
+def session_mock():
+    PromptFlowOrchestrator._scoring_endpoints.clear()
+    with patch.object(PromptFlowOrchestrator, "get_session") as mock:
+        yield mock.return_value
+    PromptFlowOrchestrator._scoring_endpoints.clear()
+
+
+def scoring_response(
+    body: dict | None = None, status_code: int = 200, events: list[dict] | None = None
+) -> MagicMock:
+    response = MagicMock()
+    response.__enter__.return_value = response
+    response.status_code = status_code
+    response.ok = status_code < 400
+    response.json.return_value = body
+    if events is None:
+        response.headers = {"Content-Type": "application/json"}
+    else:
+        response.headers = {"Content-Type": "text/event-stream"}
+        response.iter_lines.return_value = [
+            line for event in events for line in (f"data: {json.dumps(event)}", "")
+        ]
+    return response
+
+
 @pytest.fixture()
 def orchestrator():
     with patch(
@@ -87,7 +122,7 @@ async def test_orchestrate_returns_content_safety_response_for_unsafe_input(
 
 @pytest.mark.asyncio
 async def test_orchestrate_returns_expected_chat_response(
-    orchestrator: PromptFlowOrchestrator,
+    orchestrator: PromptFlowOrchestrator, session_mock: MagicMock
 ):
     # given
     user_message = "question"
@@ -121,29 +156,36 @@ async def test_orchestrate_returns_expected_chat_response(
     }
 
     orchestrator.transform_chat_history = MagicMock(return_value=[])
-    orchestrator.ml_client.online_endpoints.invoke = AsyncMock(return_value=chat_output)
+    session_mock.post.return_value = scoring_response(chat_output)
 
     # when
-    with patch("json.loads", return_value=chat_output):
-        response = await orchestrator.orchestrate(user_message, chat_history)
+    response = await orchestrator.orchestrate(user_message, chat_history)
 
     # then
     orchestrator.transform_chat_history.assert_called_once_with(chat_history)
-    orchestrator.ml_client.online_endpoints.invoke.assert_called_once_with(
-        endpoint_name="endpoint_name",
-        request_file=ANY,
-        deployment_name="deployment_name",
+    session_mock.post.assert_called_once_with(
+        "https://endpoint_name.region.inference.ml.azure.com/score",
+        json={"chat_input": "question", "chat_history": []},
+        headers={
+            "Authorization": "Bearer primary_key",
+            "azureml-model-deployment": "deployment_name",
+            "Accept": "application/json",
+        },
+        stream=False,
+        timeout=PromptFlowOrchestrator._TIMEOUT,
     )
     assert response == expected_result
 
 
 @pytest.mark.asyncio
-async def test_orchestrate_returns_error_response(orchestrator: PromptFlowOrchestrator):
+async def test_orchestrate_returns_error_response(
+    orchestrator: PromptFlowOrchestrator, session_mock: MagicMock
+):
     # given
     user_message = "question"
     chat_history = []
     error = Exception()
-    orchestrator.ml_client.online_endpoints.invoke = AsyncMock(side_effect=error)
+    session_mock.post.side_effect = error
 
     # when & then
     with pytest.raises(RuntimeError):
@@ -152,7 +194,7 @@ async def test_orchestrate_returns_error_response(orchestrator: PromptFlowOrches
 
 @pytest.mark.asyncio
 async def test_orchestrate_returns_content_safety_response_for_unsafe_output(
-    orchestrator: PromptFlowOrchestrator,
+    orchestrator: PromptFlowOrchestrator, session_mock: MagicMock
 ):
     # given
     user_message = "question"
@@ -165,15 +207,10 @@ async def test_orchestrate_returns_content_safety_response_for_unsafe_output(
         },
     ]
     orchestrator.call_content_safety_output.return_value = content_safety_response
+    session_mock.post.return_value = scoring_response(chat_output)
 
-    with patch.object(
-        orchestrator.ml_client,
-        "invoke",
-        new_callable=AsyncMock,
-        return_value=chat_output,
-    ), patch("json.loads", return_value=chat_output):
-        # when
-        response = await orchestrator.orchestrate(user_message, [])
+    # when
+    response = await orchestrator.orchestrate(user_message, [])
 
     # then
     orchestrator.call_content_safety_output.assert_called_once_with(
@@ -182,6 +219,133 @@ async def test_orchestrate_returns_content_safety_response_for_unsafe_output(
     assert response == content_safety_response
 
 
+@pytest.mark.asyncio
+async def test_orchestrate_resolves_the_scoring_endpoint_once(
+    orchestrator: PromptFlowOrchestrator, session_mock: MagicMock
+):
+    # given
+    session_mock.post.return_value = scoring_response(
+        {"chat_output": "answer", "citations": {}}
+    )
+
+    # when
+    await orchestrator.orchestrate("question", [])
+    PromptFlowOrchestrator().score({"chat_input": "question", "chat_history": []})
+
+    # then
+    assert session_mock.post.call_count == 2
+    orchestrator.ml_client.online_endpoints.get.assert_called_once_with("endpoint_name")
+    orchestrator.ml_client.online_endpoints.get_keys.assert_called_once_with(
+        "endpoint_name"
+    )
+
+
+def test_get_scoring_endpoint_renews_expiring_token(
+    orchestrator: PromptFlowOrchestrator,
+):
+    # given
+    orchestrator.ml_client.online_endpoints.get_keys.side_effect = [
+        EndpointAuthToken(access_token="expiring_token", expiry_time_utc=time.time()),
+        EndpointAuthToken(access_token="token", expiry_time_utc=time.time() + 3600),
+    ]
+
+    # when
+    orchestrator.get_scoring_endpoint()
+    scoring_endpoint = orchestrator.get_scoring_endpoint()
+
+    # then
+    assert scoring_endpoint.token == "token"
+    assert orchestrator.get_scoring_endpoint() is scoring_endpoint
+
+
+@pytest.mark.asyncio
+async def test_orchestrate_resolves_the_scoring_endpoint_again_when_unauthorized(
+    orchestrator: PromptFlowOrchestrator, session_mock: MagicMock
+):
+    # given
+    orchestrator.ml_client.online_endpoints.get_keys.side_effect = [
+        EndpointAuthKeys(primary_key="rotated_key"),
+        EndpointAuthKeys(primary_key="primary_key"),
+    ]
+    session_mock.post.side_effect = [
+        scoring_response(status_code=401),
+        scoring_response({"chat_output": "answer", "citations": {}}),
+    ]
+
+    # when
+    response = await orchestrator.orchestrate("question", [])
+
+    # then
+    assert response[-1]["content"] == "answer"
+    assert [
+        call.kwargs["headers"]["Authorization"]
+        for call in session_mock.post.call_args_list
+    ] == ["Bearer rotated_key", "Bearer primary_key"]
+
+
+@pytest.mark.asyncio
+async def test_orchestrate_stream_yields_the_streamed_answer(
+    orchestrator: PromptFlowOrchestrator, session_mock: MagicMock
+):
+    # given
+    session_mock.post.return_value = scoring_response(
+        events=[
+            {
+                "citations": {
+                    "[doc1]": {
+                        "content": "some-content",
+                        "filepath": "some-filepath",
+                        "chunk_id": 1,
+                    }
+                }
+            },
+            {"chat_output": "answer"},
+            {"chat_output": "[doc1]"},
+        ]
+    )
+
+    # when
+    responses = [
+        response async for response in orchestrator.orchestrate_stream("question", [])
+    ]
+
+    # then
+    assert session_mock.post.call_args.kwargs["stream"] is True
+    assert [response[-1]["content"] for response in responses] == [
+        "",
+        "answer",
+        "answer[doc1]",
+        "answer[doc1]",
+    ]
+    assert [response[-1]["end_turn"] for response in responses] == [
+        False,
+        False,
+        False,
+        True,
+    ]
+    assert '"filepath": "some-filepath"' in responses[0][0]["content"]
+    assert responses[-1][0]["content"] == responses[0][0]["content"]
+
+
+@pytest.mark.asyncio
+async def test_orchestrate_stream_yields_an_answer_that_is_not_streamed(
+    orchestrator: PromptFlowOrchestrator, session_mock: MagicMock
+):
+    # given
+    session_mock.post.return_value = scoring_response(
+        {"chat_output": "answer", "citations": {}}
+    )
+
+    # when
+    responses = [
+        response async for response in orchestrator.orchestrate_stream("question", [])
+    ]
+
+    # then
+    assert [response[-1]["content"] for response in responses] == ["answer", "answer"]
+    assert responses[-1][-1]["end_turn"] is True
+
+
 def test_transform_chat_history_returns_expected_format(
     orchestrator: PromptFlowOrchestrator,
 ):
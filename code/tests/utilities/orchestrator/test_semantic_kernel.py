@@ -1,3 +1,5 @@
+import asyncio
+import json
 from unittest.mock import ANY, AsyncMock, MagicMock, call, patch
 
 import pytest
@@ -13,6 +15,7 @@ from semantic_kernel.contents.utils.finish_reason import FinishReason
 from semantic_kernel.contents.function_call_content import FunctionCallContent
 
 from backend.batch.utilities.common.answer import Answer
+from backend.batch.utilities.common.source_document import SourceDocument
 from backend.batch.utilities.orchestrator.semantic_kernel import (
     SemanticKernelOrchestrator,
 )
@@ -119,9 +122,8 @@ async def test_semantic_kernel_no_function_call(
     orchestrator: SemanticKernelOrchestrator,
 ):
     # given
-    with patch.object(orchestrator, "kernel", wraps=orchestrator.kernel) as kernel_mock:
-        kernel_mock.invoke = AsyncMock()
-        kernel_mock.invoke.return_value.value = [chat_message_default_content]
+    with patch.object(Kernel, "invoke", new_callable=AsyncMock) as invoke_mock:
+        invoke_mock.return_value.value = [chat_message_default_content]
 
         # when
         response = await orchestrator.orchestrate("question", [])
@@ -140,7 +142,7 @@ async def test_semantic_kernel_no_function_call(
         },
     ]
 
-    kernel_mock.invoke.assert_awaited_once_with(
+    invoke_mock.assert_awaited_once_with(
         function=ANY,
         chat_history=ANY,
         user_message="question",
@@ -149,43 +151,33 @@ async def test_semantic_kernel_no_function_call(
     assert orchestrator.tokens == {"prompt": 10, "completion": 20, "total": 30}
 
 
-@pytest.mark.asyncio
-async def test_chat_plugin_added(
+def test_create_request_kernel_adds_chat_plugin(
     orchestrator: SemanticKernelOrchestrator,
 ):
-    # given
-    with patch.object(orchestrator, "kernel", wraps=orchestrator.kernel) as kernel_mock:
-        kernel_mock.invoke = AsyncMock()
-        kernel_mock.invoke.return_value.value = [chat_message_default_content]
-
-        # when
-        await orchestrator.orchestrate("question", [])
+    # when
+    kernel = orchestrator.create_request_kernel("question", [])
 
     # then
-    assert kernel_mock.plugins["Chat"] is not None
-    assert kernel_mock.plugins["Chat"].functions["search_documents"] is not None
-    assert kernel_mock.plugins["Chat"].functions["text_processing"] is not None
+    assert kernel.plugins["Chat"].functions["search_documents"] is not None
+    assert kernel.plugins["Chat"].functions["text_processing"] is not None
+    assert (
+        kernel.plugins["PostAnswering"] is orchestrator.kernel.plugins["PostAnswering"]
+    )
+    assert kernel.services["mock-service-id"] is orchestrator.chat_service
+    assert "Chat" not in orchestrator.kernel.plugins
 
 
-@pytest.mark.asyncio
-async def test_kernel_function_call_behavior(
+def test_kernel_function_call_behavior(
     orchestrator: SemanticKernelOrchestrator,
 ):
-    # given
-    with patch.object(orchestrator, "kernel", wraps=orchestrator.kernel) as kernel_mock:
-        kernel_mock.invoke = AsyncMock()
-        kernel_mock.invoke.return_value.value = [chat_message_default_content]
-
-        # when
-        await orchestrator.orchestrate("question", [])
-
-    # then
+    # when
     function_call_behavior: EnabledFunctions = (
-        kernel_mock.add_function.call_args.kwargs[
-            "prompt_execution_settings"
+        orchestrator.orchestrate_function.prompt_execution_settings[
+            "mock-service-id"
         ].function_call_behavior
     )
 
+    # then
     assert function_call_behavior.auto_invoke_kernel_functions is False
     assert function_call_behavior.enable_kernel_functions is True
     assert function_call_behavior.filters == {"included_plugins": ["Chat"]}
@@ -223,9 +215,8 @@ async def test_semantic_kernel_text_processing(
         completion_tokens=20,
     )
 
-    with patch.object(orchestrator, "kernel", wraps=orchestrator.kernel) as kernel_mock:
-        kernel_mock.invoke = AsyncMock()
-        kernel_mock.invoke.side_effect = [
+    with patch.object(Kernel, "invoke", new_callable=AsyncMock) as invoke_mock:
+        invoke_mock.side_effect = [
             MagicMock(value=[first_response]),
             MagicMock(value=tool_response),
         ]
@@ -247,9 +238,9 @@ async def test_semantic_kernel_text_processing(
         },
     ]
 
-    assert kernel_mock.invoke.await_count == 2
+    assert invoke_mock.await_count == 2
 
-    kernel_mock.invoke.assert_awaited_with(
+    invoke_mock.assert_awaited_with(
         function=ANY,
         text="mock-text",
         operation="mock-operation",
@@ -295,9 +286,8 @@ async def test_semantic_kernel_search_documents_post_answering_prompt(
         completion_tokens=60,
     )
 
-    with patch.object(orchestrator, "kernel", wraps=orchestrator.kernel) as kernel_mock:
-        kernel_mock.invoke = AsyncMock()
-        kernel_mock.invoke.side_effect = [
+    with patch.object(Kernel, "invoke", new_callable=AsyncMock) as invoke_mock:
+        invoke_mock.side_effect = [
             MagicMock(value=[first_response]),
             MagicMock(value=tool_response),
             MagicMock(value=post_answering_response),
@@ -320,9 +310,9 @@ async def test_semantic_kernel_search_documents_post_answering_prompt(
         },
     ]
 
-    assert kernel_mock.invoke.await_count == 3
+    assert invoke_mock.await_count == 3
 
-    kernel_mock.invoke.assert_has_awaits(
+    invoke_mock.assert_has_awaits(
         [
             call(
                 function=ANY,
@@ -371,9 +361,8 @@ async def test_semantic_kernel_search_documents_without_post_answering_prompt(
         completion_tokens=20,
     )
 
-    with patch.object(orchestrator, "kernel", wraps=orchestrator.kernel) as kernel_mock:
-        kernel_mock.invoke = AsyncMock()
-        kernel_mock.invoke.side_effect = [
+    with patch.object(Kernel, "invoke", new_callable=AsyncMock) as invoke_mock:
+        invoke_mock.side_effect = [
             MagicMock(value=[first_response]),
             MagicMock(value=tool_response),
         ]
@@ -395,9 +384,9 @@ async def test_semantic_kernel_search_documents_without_post_answering_prompt(
         },
     ]
 
-    assert kernel_mock.invoke.await_count == 2
+    assert invoke_mock.await_count == 2
 
-    kernel_mock.invoke.assert_awaited_with(
+    invoke_mock.assert_awaited_with(
         function=ANY,
         question="mock-tool-question",
     )
@@ -405,6 +394,84 @@ async def test_semantic_kernel_search_documents_without_post_answering_prompt(
     assert orchestrator.tokens == {"prompt": 110, "completion": 220, "total": 330}
 
 
+@pytest.mark.asyncio
+async def test_semantic_kernel_answers_parallel_function_calls(
+    orchestrator: SemanticKernelOrchestrator,
+):
+    # given
+    orchestrator.config.prompts.enable_post_answering_prompt = False
+
+    first_response = ChatMessageContent(
+        role=AuthorRole.ASSISTANT,
+        finish_reason=FinishReason.TOOL_CALLS,
+        items=[
+            FunctionCallContent(
+                id="id1",
+                name="Chat-search_documents",
+                arguments='{"question": "first question"}',
+            ),
+            FunctionCallContent(
+                id="id2",
+                name="Chat-search_documents",
+                arguments='{"question": "second question"}',
+            ),
+        ],
+        metadata={
+            "usage": MagicMock(
+                prompt_tokens=100,
+                completion_tokens=200,
+            )
+        },
+    )
+    answers_started = asyncio.Event()
+    started_questions = []
+
+    async def invoke(**kwargs):
+        if "question" not in kwargs:
+            return MagicMock(value=[first_response])
+
+        # Both functions must have been called before either answers
+        started_questions.append(kwargs["question"])
+        if len(started_questions) == 2:
+            answers_started.set()
+        await answers_started.wait()
+        return MagicMock(
+            value=Answer(
+                question=kwargs["question"],
+                answer=f"{kwargs['question']} answer[doc1]",
+                source_documents=[
+                    SourceDocument(
+                        id=kwargs["question"],
+                        content="mock-content",
+                        source=f"{kwargs['question']}.pdf",
+                    )
+                ],
+                prompt_tokens=10,
+                completion_tokens=20,
+            )
+        )
+
+    with patch.object(Kernel, "invoke", side_effect=invoke):
+        # when
+        response = await asyncio.wait_for(orchestrator.orchestrate("question", []), 5)
+
+    # then
+    assert started_questions == ["first question", "second question"]
+    assert response[1] == {
+        "role": "assistant",
+        "content": "first question answer[doc1]\n\nsecond question answer[doc2]",
+        "end_turn": True,
+    }
+    assert [
+        citation["filepath"]
+        for citation in json.loads(response[0]["content"])["citations"]
+    ] == [
+        "first question.pdf",
+        "second question.pdf",
+    ]
+    assert orchestrator.tokens == {"prompt": 120, "completion": 240, "total": 360}
+
+
 @pytest.mark.asyncio
 async def test_chat_history_included(
     orchestrator: SemanticKernelOrchestrator,
@@ -415,15 +482,14 @@ async def test_chat_history_included(
         {"role": "assistant", "content": "Hi, how can I help you today?"},
     ]
 
-    with patch.object(orchestrator, "kernel", wraps=orchestrator.kernel) as kernel_mock:
-        kernel_mock.invoke = AsyncMock()
-        kernel_mock.invoke.return_value.value = [chat_message_default_content]
+    with patch.object(Kernel, "invoke", new_callable=AsyncMock) as invoke_mock:
+        invoke_mock.return_value.value = [chat_message_default_content]
 
         # when
         await orchestrator.orchestrate("question", chat_history)
 
     # then
-    chat_history = kernel_mock.invoke.call_args.kwargs["chat_history"]
+    chat_history = invoke_mock.call_args.kwargs["chat_history"]
     messages = chat_history.messages
 
     assert len(messages) == 3
@@ -459,9 +525,8 @@ async def test_content_safety_output(orchestrator: SemanticKernelOrchestrator):
     ]
     orchestrator.call_content_safety_output.return_value = content_safety_response
 
-    with patch.object(orchestrator, "kernel", wraps=orchestrator.kernel) as kernel_mock:
-        kernel_mock.invoke = AsyncMock()
-        kernel_mock.invoke.return_value.value = [chat_message_content]
+    with patch.object(Kernel, "invoke", new_callable=AsyncMock) as invoke_mock:
+        invoke_mock.return_value.value = [chat_message_content]
 
         # when
         response = await orchestrator.orchestrate("question", [])
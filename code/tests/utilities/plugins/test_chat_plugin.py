@@ -37,6 +37,33 @@ async def test_search_documents(QuestionAnswerToolMock: MagicMock):
     QuestionAnswerToolMock.return_value.answer_question.assert_called_once_with(
         question=question,
         chat_history=chat_history,
+        search_queries=None,
+    )
+
+
+@patch("backend.batch.utilities.plugins.chat_plugin.QuestionAnswerTool")
+@pytest.mark.asyncio
+async def test_search_documents_with_search_queries(QuestionAnswerToolMock: MagicMock):
+    # given
+    kernel = Kernel()
+    question = "Compare the Standard and Plus plans"
+    search_queries = ["Standard plan", "Plus plan"]
+
+    plugin = kernel.add_plugin(
+        plugin=ChatPlugin(question=question, chat_history=[]),
+        plugin_name="Chat",
+    )
+
+    # when
+    await kernel.invoke(
+        plugin["search_documents"], question=question, search_queries=search_queries
+    )
+
+    # then
+    QuestionAnswerToolMock.return_value.answer_question.assert_called_once_with(
+        question=question,
+        chat_history=[],
+        search_queries=search_queries,
     )
 
 
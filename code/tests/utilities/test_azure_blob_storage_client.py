@@ -1,5 +1,7 @@
 import pytest
-from unittest.mock import ANY, MagicMock, patch
+from unittest.mock import ANY, AsyncMock, MagicMock, patch
+from azure.core import MatchConditions
+from azure.core.exceptions import ResourceNotFoundError, ResourceNotModifiedError
 from backend.batch.utilities.helpers.azure_blob_storage_client import (
     AzureBlobStorageClient,
 )
@@ -22,6 +24,13 @@ def env_helper_mock():
         yield env_helper
 
 
+@pytest.fixture(autouse=True)
+def clear_sas_cache():
+    AzureBlobStorageClient.clear_sas_cache()
+    yield
+    AzureBlobStorageClient.clear_sas_cache()
+
+
 @pytest.fixture()
 def BlobServiceClientMock():
     with patch(
@@ -97,6 +106,43 @@ def test_upload_file(
     assert result == "mock_url?mock-sas"
 
 
+def test_download_file_if_modified_returns_content_and_etag(
+    BlobServiceClientMock: MagicMock,
+):
+    # given
+    client = AzureBlobStorageClient()
+    blob_service_client_mock = BlobServiceClientMock.return_value
+    blob_client_mock = blob_service_client_mock.get_blob_client.return_value
+    downloader_mock = blob_client_mock.download_blob.return_value
+    downloader_mock.readall.return_value = b"mock-data"
+    downloader_mock.properties.etag = "mock-new-etag"
+
+    # when
+    result = client.download_file_if_modified("mock-file", "mock-etag")
+
+    # then
+    assert result == (b"mock-data", "mock-new-etag")
+    blob_client_mock.download_blob.assert_called_once_with(
+        etag="mock-etag", match_condition=MatchConditions.IfModified
+    )
+
+
+def test_download_file_if_modified_returns_none_when_not_modified(
+    BlobServiceClientMock: MagicMock,
+):
+    # given
+    client = AzureBlobStorageClient()
+    blob_service_client_mock = BlobServiceClientMock.return_value
+    blob_client_mock = blob_service_client_mock.get_blob_client.return_value
+    blob_client_mock.download_blob.side_effect = ResourceNotModifiedError()
+
+    # when
+    result = client.download_file_if_modified("mock-file", "mock-etag")
+
+    # then
+    assert result == (None, "mock-etag")
+
+
 def test_delete_file(BlobServiceClientMock: MagicMock):
     # given
     client = AzureBlobStorageClient()
@@ -113,6 +159,266 @@ def test_delete_file(BlobServiceClientMock: MagicMock):
     blob_client_mock.delete_blob.assert_called_once()
 
 
+def test_delete_file_ignores_missing_file(BlobServiceClientMock: MagicMock):
+    # given
+    client = AzureBlobStorageClient()
+    blob_client_mock = BlobServiceClientMock.return_value.get_blob_client.return_value
+    blob_client_mock.delete_blob.side_effect = ResourceNotFoundError()
+
+    # when
+    client.delete_file("mock-file")
+
+    # then
+    blob_client_mock.exists.assert_not_called()
+
+
+def test_delete_files_deletes_in_batches(BlobServiceClientMock: MagicMock):
+    # given
+    client = AzureBlobStorageClient()
+    container_client_mock = (
+        BlobServiceClientMock.return_value.get_container_client.return_value
+    )
+    container_client_mock.delete_blobs.side_effect = lambda *blobs, **kwargs: [
+        MagicMock(status_code=202) for _ in blobs
+    ]
+    files = {f"https://mock-source/mock-file-{i}.pdf": [i] for i in range(300)}
+
+    # when
+    failed = client.delete_files(files, False)
+
+    # then
+    assert failed == []
+    assert container_client_mock.delete_blobs.call_count == 2
+    batch_sizes = sorted(
+        len(call.args) for call in container_client_mock.delete_blobs.call_args_list
+    )
+    assert batch_sizes == [44, 256]
+    assert (
+        "mock-file-0.pdf"
+        in container_client_mock.delete_blobs.call_args_list[0].args
+        + container_client_mock.delete_blobs.call_args_list[1].args
+    )
+
+
+def test_delete_files_treats_missing_files_as_deleted(
+    BlobServiceClientMock: MagicMock,
+):
+    # given
+    client = AzureBlobStorageClient()
+    container_client_mock = (
+        BlobServiceClientMock.return_value.get_container_client.return_value
+    )
+    container_client_mock.delete_blobs.return_value = [
+        MagicMock(status_code=202),
+        MagicMock(status_code=404),
+        MagicMock(status_code=403),
+    ]
+
+    # when
+    failed = client.delete_files(
+        {"mock-file-1": [], "mock-file-2": [], "mock-file-3": []}, True
+    )
+
+    # then
+    assert failed == ["mock-file-3"]
+    container_client_mock.delete_blobs.assert_called_once_with(
+        "mock-file-1", "mock-file-2", "mock-file-3", raise_on_any_failure=False
+    )
+
+
+def test_delete_files_falls_back_to_single_deletes_when_batch_fails(
+    BlobServiceClientMock: MagicMock,
+):
+    # given
+    client = AzureBlobStorageClient()
+    blob_service_client_mock = BlobServiceClientMock.return_value
+    container_client_mock = blob_service_client_mock.get_container_client.return_value
+    container_client_mock.delete_blobs.side_effect = Exception("mock exception")
+
+    # when
+    failed = client.delete_files({"mock-file-1": [], "mock-file-2": []}, True)
+
+    # then
+    assert failed == []
+    assert blob_service_client_mock.get_blob_client.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_delete_files_async_deletes_in_batches():
+    # given
+    client = AzureBlobStorageClient()
+
+    async def responses(blobs):
+        for _ in blobs:
+            yield MagicMock(status_code=404)
+
+    with patch(
+        "backend.batch.utilities.helpers.azure_blob_storage_client.AsyncBlobServiceClient"
+    ) as AsyncBlobServiceClientMock:
+        blob_service_client_mock = MagicMock()
+        AsyncBlobServiceClientMock.return_value.__aenter__.return_value = (
+            blob_service_client_mock
+        )
+        container_client_mock = (
+            blob_service_client_mock.get_container_client.return_value
+        )
+        container_client_mock.delete_blobs = AsyncMock(
+            side_effect=lambda *blobs, **kwargs: responses(blobs)
+        )
+
+        # when
+        failed = await client.delete_files_async(
+            {f"mock-file-{i}": [] for i in range(257)}, True
+        )
+
+    # then
+    assert failed == []
+    assert container_client_mock.delete_blobs.await_count == 2
+
+
+class BlobPagesMock(list):
+    continuation_token = "mock-continuation-token"
+
+
+def create_blob(name: str, metadata: dict[str, str]) -> MagicMock:
+    blob = MagicMock(metadata=metadata)
+    blob.name = name
+    return blob
+
+
+@patch(
+    "backend.batch.utilities.helpers.azure_blob_storage_client.generate_container_sas"
+)
+def test_iter_files_names_only_does_not_fetch_metadata_or_sas(
+    generate_container_sas_mock: MagicMock, BlobServiceClientMock: MagicMock
+):
+    # given
+    client = AzureBlobStorageClient()
+    container_client_mock = (
+        BlobServiceClientMock.return_value.get_container_client.return_value
+    )
+    container_client_mock.list_blob_names.return_value.by_page.return_value = (
+        BlobPagesMock([["mock-file-1", "converted/mock-file-1.txt"], ["mock-file-2"]])
+    )
+
+    # when
+    files = list(client.iter_files(prefix="mock", names_only=True))
+
+    # then
+    assert files == [{"filename": "mock-file-1"}, {"filename": "mock-file-2"}]
+    container_client_mock.list_blob_names.assert_called_once_with(
+        name_starts_with="mock", results_per_page=None
+    )
+    container_client_mock.list_blobs.assert_not_called()
+    generate_container_sas_mock.assert_not_called()
+
+
+@patch(
+    "backend.batch.utilities.helpers.azure_blob_storage_client.generate_container_sas"
+)
+def test_iter_file_pages_filters_by_metadata_and_resumes_from_token(
+    generate_container_sas_mock: MagicMock, BlobServiceClientMock: MagicMock
+):
+    # given
+    client = AzureBlobStorageClient()
+    generate_container_sas_mock.return_value = "mock-sas"
+    container_client_mock = (
+        BlobServiceClientMock.return_value.get_container_client.return_value
+    )
+    container_client_mock.list_blob_names.return_value = iter(
+        ["converted/mock-file-1.pdf.zip"]
+    )
+    list_blobs_mock = container_client_mock.list_blobs.return_value
+    list_blobs_mock.by_page.return_value = BlobPagesMock(
+        [
+            [
+                create_blob(
+                    "mock-file-1.pdf",
+                    {
+                        "embeddings_added": "false",
+                        "converted_filename": "converted/mock-file-1.pdf.zip",
+                    },
+                ),
+                create_blob("mock-file-2.pdf", {"embeddings_added": "true"}),
+                create_blob("mock-file-3.pdf", None),
+            ]
+        ]
+    )
+
+    # when
+    pages = list(
+        client.iter_file_pages(
+            metadata_filter={"embeddings_added": "false"},
+            results_per_page=10,
+            continuation_token="mock-token",
+        )
+    )
+
+    # then
+    assert pages == [
+        (
+            [
+                {
+                    "filename": "mock-file-1.pdf",
+                    "converted": True,
+                    "embeddings_added": False,
+                    "fullpath": "https://mock-account.blob.core.windows.net/mock-container/mock-file-1.pdf?mock-sas",
+                    "converted_path": "https://mock-account.blob.core.windows.net/mock-container/converted/mock-file-1.pdf.zip?mock-sas",
+                }
+            ],
+            "mock-continuation-token",
+        )
+    ]
+    container_client_mock.list_blobs.assert_called_once_with(
+        name_starts_with=None, include="metadata", results_per_page=10
+    )
+    list_blobs_mock.by_page.assert_called_once_with(continuation_token="mock-token")
+    container_client_mock.list_blob_names.assert_called_once_with(
+        name_starts_with="converted/"
+    )
+    generate_container_sas_mock.assert_called_once()
+
+
+@patch(
+    "backend.batch.utilities.helpers.azure_blob_storage_client.generate_container_sas"
+)
+def test_iter_files_does_not_mark_files_converted_when_converted_file_is_missing(
+    generate_container_sas_mock: MagicMock, BlobServiceClientMock: MagicMock
+):
+    # given
+    client = AzureBlobStorageClient()
+    container_client_mock = (
+        BlobServiceClientMock.return_value.get_container_client.return_value
+    )
+    container_client_mock.list_blob_names.return_value = iter([])
+    container_client_mock.list_blobs.return_value.by_page.return_value = BlobPagesMock(
+        [
+            [
+                create_blob(
+                    "mock-file-1.pdf",
+                    {"converted_filename": "converted/mock-file-1.pdf.zip"},
+                ),
+                create_blob(
+                    "mock-file-2.pdf",
+                    {"converted_filename": "converted/mock-file-2.pdf.zip"},
+                ),
+            ]
+        ]
+    )
+
+    # when
+    files = list(client.iter_files())
+
+    # then
+    assert [(file["converted"], file["converted_path"]) for file in files] == [
+        (False, ""),
+        (False, ""),
+    ]
+    container_client_mock.list_blob_names.assert_called_once_with(
+        name_starts_with="converted/"
+    )
+
+
 def test_upsert_blob_metadata(BlobServiceClientMock: MagicMock):
     # given
     client = AzureBlobStorageClient()
@@ -191,3 +497,84 @@ def test_get_container_sas(generate_container_sas_mock: MagicMock):
         permission="r",
         expiry=ANY,
     )
+
+
+@patch(
+    "backend.batch.utilities.helpers.azure_blob_storage_client.generate_container_sas"
+)
+def test_get_container_sas_reuses_sas_across_clients(
+    generate_container_sas_mock: MagicMock,
+):
+    # given
+    generate_container_sas_mock.return_value = "mock-sas"
+
+    # when
+    first_result = AzureBlobStorageClient().get_container_sas()
+    second_result = AzureBlobStorageClient().get_container_sas()
+
+    # then
+    assert first_result == second_result == "?mock-sas"
+    generate_container_sas_mock.assert_called_once()
+    assert AzureBlobStorageClient.get_sas_counters() == {
+        "container_sas_generated": 1,
+        "container_sas_hits": 1,
+    }
+
+
+@patch(
+    "backend.batch.utilities.helpers.azure_blob_storage_client.generate_container_sas"
+)
+def test_get_container_sas_renews_sas_close_to_expiry(
+    generate_container_sas_mock: MagicMock,
+):
+    # given
+    generate_container_sas_mock.side_effect = ["mock-sas", "new-mock-sas"]
+    client = AzureBlobStorageClient()
+
+    # when
+    with patch.object(
+        AzureBlobStorageClient,
+        "_CONTAINER_SAS_REFRESH_AHEAD",
+        AzureBlobStorageClient._CONTAINER_SAS_LIFETIME,
+    ):
+        client.get_container_sas()
+        result = client.get_container_sas()
+
+    # then
+    assert result == "?new-mock-sas"
+    assert generate_container_sas_mock.call_count == 2
+
+
+@patch(
+    "backend.batch.utilities.helpers.azure_blob_storage_client.generate_container_sas"
+)
+def test_get_container_sas_requests_user_delegation_key_once_with_rbac(
+    generate_container_sas_mock: MagicMock,
+    BlobServiceClientMock: MagicMock,
+    env_helper_mock: MagicMock,
+):
+    # given
+    env_helper_mock.AZURE_AUTH_TYPE = "rbac"
+    get_user_delegation_key_mock = (
+        BlobServiceClientMock.return_value.get_user_delegation_key
+    )
+
+    # when
+    client = AzureBlobStorageClient()
+    requested_on_construction = get_user_delegation_key_mock.called
+    client.get_container_sas()
+    AzureBlobStorageClient(container_name="other-container").get_container_sas()
+
+    # then
+    assert not requested_on_construction
+    get_user_delegation_key_mock.assert_called_once()
+    assert generate_container_sas_mock.call_count == 2
+    assert (
+        generate_container_sas_mock.call_args.kwargs["user_delegation_key"]
+        == get_user_delegation_key_mock.return_value
+    )
+    assert AzureBlobStorageClient.get_sas_counters() == {
+        "user_delegation_key_requests": 1,
+        "user_delegation_key_hits": 1,
+        "container_sas_generated": 2,
+    }
@@ -0,0 +1,148 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+from backend.batch.utilities.tools.chat_history_compactor import (
+    ChatHistoryCompactor,
+)
+
+
+@pytest.fixture(autouse=True)
+def llm_helper_mock():
+    with patch(
+        "backend.batch.utilities.tools.chat_history_compactor.LLMHelper"
+    ) as mock:
+        llm_helper = mock.return_value
+        llm_helper.get_chat_completion.return_value.choices[0].message.content = (
+            "mock summary"
+        )
+
+        yield llm_helper
+
+
+@pytest.fixture(autouse=True)
+def thread_mock():
+    """Runs the background summarization synchronously."""
+    with patch(
+        "backend.batch.utilities.tools.chat_history_compactor.threading.Thread"
+    ) as mock:
+        mock.side_effect = lambda target, args, daemon: MagicMock(
+            start=lambda: target(*args)
+        )
+
+        yield mock
+
+
+@pytest.fixture(autouse=True)
+def reset_summaries():
+    ChatHistoryCompactor._summaries.clear()
+    ChatHistoryCompactor._summarizing.clear()
+    yield
+    ChatHistoryCompactor._summaries.clear()
+
+
+def create_history(turns: int) -> list[dict]:
+    history = []
+    for i in range(turns):
+        history.append({"role": "user", "content": f"question {i}"})
+        history.append({"role": "assistant", "content": f"answer {i}"})
+    return history
+
+
+def test_keeps_short_history_verbatim(llm_helper_mock: MagicMock):
+    # given
+    chat_history = create_history(2)
+
+    # when
+    result = ChatHistoryCompactor(2).compact(chat_history, "conversation")
+
+    # then
+    assert result == chat_history
+    llm_helper_mock.get_chat_completion.assert_not_called()
+
+
+def test_summarizes_every_turn_when_keeping_none(llm_helper_mock: MagicMock):
+    # given
+    chat_history = create_history(2)
+    compactor = ChatHistoryCompactor(0)
+
+    # when
+    compactor.compact(chat_history, "conversation")
+    result = compactor.compact(chat_history, "conversation")
+
+    # then
+    assert result == [
+        {"role": "user", "content": ChatHistoryCompactor.SUMMARY_REQUEST},
+        {"role": "assistant", "content": "mock summary"},
+    ]
+
+
+def test_does_not_summarize_without_conversation_id(llm_helper_mock: MagicMock):
+    # given
+    chat_history = create_history(5)
+
+    # when
+    result = ChatHistoryCompactor(2).compact(chat_history, None)
+
+    # then
+    assert result == chat_history
+    llm_helper_mock.get_chat_completion.assert_not_called()
+
+
+def test_replaces_older_turns_once_summarized(llm_helper_mock: MagicMock):
+    # given
+    chat_history = create_history(4)
+    compactor = ChatHistoryCompactor(2)
+
+    # when
+    first_result = compactor.compact(chat_history, "conversation")
+    second_result = compactor.compact(chat_history, "conversation")
+
+    # then
+    assert first_result == chat_history
+    assert second_result == [
+        {"role": "user", "content": ChatHistoryCompactor.SUMMARY_REQUEST},
+        {"role": "assistant", "content": "mock summary"},
+        *chat_history[4:],
+    ]
+    llm_helper_mock.get_chat_completion.assert_called_once()
+    assert "question 1" in (
+        llm_helper_mock.get_chat_completion.call_args.args[0][1]["content"]
+    )
+
+
+def test_only_summarizes_turns_that_fall_out_of_the_window(
+    llm_helper_mock: MagicMock,
+):
+    # given
+    compactor = ChatHistoryCompactor(2)
+    compactor.compact(create_history(4), "conversation")
+    chat_history = create_history(5)
+
+    # when
+    result = compactor.compact(chat_history, "conversation")
+
+    # then
+    assert result[:3] == [
+        {"role": "user", "content": ChatHistoryCompactor.SUMMARY_REQUEST},
+        {"role": "assistant", "content": "mock summary"},
+        {"role": "user", "content": "question 2"},
+    ]
+    assert llm_helper_mock.get_chat_completion.call_count == 2
+    content = llm_helper_mock.get_chat_completion.call_args.args[0][1]["content"]
+    assert "mock summary" in content
+    assert "question 2" in content
+    assert "question 1" not in content
+
+
+def test_ignores_summary_when_history_changed(llm_helper_mock: MagicMock):
+    # given
+    compactor = ChatHistoryCompactor(2)
+    compactor.compact(create_history(4), "conversation")
+    chat_history = create_history(4)
+    chat_history[0]["content"] = "edited question"
+
+    # when
+    result = compactor.compact(chat_history, "conversation")
+
+    # then
+    assert result == chat_history
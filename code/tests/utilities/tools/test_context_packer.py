@@ -0,0 +1,98 @@
+from unittest.mock import patch
+
+import pytest
+from backend.batch.utilities.common.source_document import SourceDocument
+from backend.batch.utilities.tools.context_packer import ContextPacker
+
+
+@pytest.fixture(autouse=True)
+def tiktoken_mock():
+    with patch("backend.batch.utilities.tools.context_packer.tiktoken") as mock:
+        mock.get_encoding.return_value.encode.side_effect = lambda text: text.split()
+        yield mock
+
+
+@pytest.fixture
+def fixed_messages():
+    # 3 tokens + 4 for the message
+    return [{"role": "system", "content": "answer the question"}]
+
+
+def create_source(content: str, token_count: int | None = None) -> SourceDocument:
+    return SourceDocument(content=content, source="source", token_count=token_count)
+
+
+def test_keeps_everything_within_budget(fixed_messages):
+    # given
+    chat_history = [
+        {"role": "user", "content": "a question"},
+        {"role": "assistant", "content": "an answer"},
+    ]
+    sources = [create_source("some content"), create_source("more content")]
+
+    # when
+    packed_history, packed_sources = ContextPacker(100).pack(
+        fixed_messages, chat_history, sources
+    )
+
+    # then
+    assert packed_history == chat_history
+    assert packed_sources == sources
+
+
+def test_uses_token_count_from_index(tiktoken_mock, fixed_messages):
+    # given
+    sources = [create_source("some content", token_count=50)]
+
+    # when
+    ContextPacker(100).pack(fixed_messages, [], sources)
+
+    # then
+    encoded = [
+        call.args[0]
+        for call in tiktoken_mock.get_encoding.return_value.encode.call_args_list
+    ]
+    assert "some content" not in encoded
+
+
+def test_drops_lowest_ranked_sources_over_budget(fixed_messages):
+    # given
+    sources = [
+        create_source("first", token_count=10),
+        create_source("second", token_count=30),
+        create_source("third", token_count=5),
+    ]
+
+    # when
+    _, packed_sources = ContextPacker(60).pack(fixed_messages, [], sources)
+
+    # then
+    assert packed_sources == [sources[0], sources[2]]
+
+
+def test_always_keeps_highest_ranked_source(fixed_messages):
+    # given
+    sources = [create_source("first", token_count=1000)]
+
+    # when
+    _, packed_sources = ContextPacker(60).pack(fixed_messages, [], sources)
+
+    # then
+    assert packed_sources == sources
+
+
+def test_drops_oldest_history_over_budget(fixed_messages):
+    # given
+    chat_history = [
+        {"role": "user", "content": "an old question"},
+        {"role": "assistant", "content": "an old answer"},
+        {"role": "user", "content": "a question"},
+        {"role": "assistant", "content": "an answer"},
+    ]
+    sources = [create_source("first", token_count=10)]
+
+    # when
+    packed_history, _ = ContextPacker(45).pack(fixed_messages, chat_history, sources)
+
+    # then
+    assert packed_history == chat_history[2:]
@@ -0,0 +1,83 @@
+from backend.batch.utilities.common.answer import Answer
+from backend.batch.utilities.common.source_document import SourceDocument
+from backend.batch.utilities.tools.grounding_checker import GroundingChecker
+
+
+def create_answer(answer: str) -> Answer:
+    return Answer(
+        question="How many vacation days do employees get?",
+        answer=answer,
+        source_documents=[
+            SourceDocument(
+                id="1",
+                content="Full-time employees get 25 vacation days per year.",
+                source="source 1",
+            ),
+            SourceDocument(
+                id="2",
+                content="Unused vacation days can be carried over to the next year.",
+                source="source 2",
+            ),
+        ],
+    )
+
+
+def test_fully_grounded_answer_scores_one():
+    # given
+    answer = create_answer(
+        "Full-time employees get 25 vacation days per year [doc1]. "
+        "Unused vacation days can be carried over [doc2]."
+    )
+
+    # when
+    score = GroundingChecker().score(answer)
+
+    # then
+    assert score == 1
+
+
+def test_sentences_are_compared_with_the_sources_they_cite():
+    # given
+    answer = create_answer("Full-time employees get 25 vacation days per year [doc2].")
+
+    # when
+    score = GroundingChecker().score(answer)
+
+    # then
+    assert score < 0.5
+
+
+def test_unsupported_sentences_lower_the_score():
+    # given
+    answer = create_answer(
+        "Full-time employees get 25 vacation days per year [doc1]. "
+        "Managers may grant extra leave for long service."
+    )
+
+    # when
+    score = GroundingChecker().score(answer)
+
+    # then
+    assert 0 < score < 0.7
+
+
+def test_answer_without_references_is_not_scored():
+    # given
+    answer = create_answer("Full-time employees get 25 vacation days per year.")
+
+    # when
+    score = GroundingChecker().score(answer)
+
+    # then
+    assert score is None
+
+
+def test_answer_referencing_missing_source_is_not_scored():
+    # given
+    answer = create_answer("Full-time employees get 25 vacation days per year [doc3].")
+
+    # when
+    score = GroundingChecker().score(answer)
+
+    # then
+    assert score is None
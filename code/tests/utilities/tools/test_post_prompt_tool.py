@@ -31,6 +31,15 @@ def llm_helper_mock():
         yield llm_helper
 
 
+@pytest.fixture(autouse=True)
+def env_helper_mock():
+    with patch("backend.batch.utilities.tools.post_prompt_tool.EnvHelper") as mock:
+        env_helper = mock.return_value
+        env_helper.POST_ANSWERING_GROUNDING_THRESHOLD = 0
+
+        yield env_helper
+
+
 @pytest.fixture
 def answer():
     return Answer(
@@ -113,3 +122,41 @@ def test_validate_answer_with_filtering(llm_helper_mock: MagicMock, answer: Answ
             }
         ]
     )
+
+
+def test_validate_answer_accepts_grounded_answer_locally(
+    llm_helper_mock: MagicMock, env_helper_mock: MagicMock, answer: Answer
+):
+    # given
+    env_helper_mock.POST_ANSWERING_GROUNDING_THRESHOLD = 0.8
+    answer.answer = "The answer is content [doc1]"
+    answer.source_documents[0].content = "The answer is content"
+
+    # when
+    result = PostPromptTool().validate_answer(answer)
+
+    # then
+    llm_helper_mock.get_chat_completion.assert_not_called()
+    assert result == Answer(
+        question="user question",
+        answer="The answer is content [doc1]",
+        source_documents=answer.source_documents,
+        prompt_tokens=0,
+        completion_tokens=0,
+    )
+
+
+def test_validate_answer_escalates_ungrounded_answer_to_llm(
+    llm_helper_mock: MagicMock, env_helper_mock: MagicMock, answer: Answer
+):
+    # given
+    env_helper_mock.POST_ANSWERING_GROUNDING_THRESHOLD = 0.8
+    answer.answer = "Something the sources do not say [doc1]"
+
+    # when
+    result = PostPromptTool().validate_answer(answer)
+
+    # then
+    llm_helper_mock.get_chat_completion.assert_called_once()
+    assert result.prompt_tokens == 10
+    assert result.completion_tokens == 20
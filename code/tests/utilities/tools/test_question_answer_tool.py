@@ -43,6 +43,7 @@ def env_helper_mock():
         env_helper.USE_ADVANCED_IMAGE_PROCESSING = False
         env_helper.AZURE_OPENAI_VISION_MODEL = "mock vision model"
         env_helper.ADVANCED_IMAGE_PROCESSING_MAX_IMAGES = 1
+        env_helper.AZURE_OPENAI_CONTEXT_TOKEN_BUDGET = 0
 
         yield env_helper
 
@@ -125,6 +126,31 @@ def test_answer_question_returns_source_documents(
     assert answer.source_documents == get_source_documents_mock.return_value
 
 
+def test_answer_question_searches_with_search_queries(
+    get_source_documents_mock: MagicMock, search_handler_mock: MagicMock
+):
+    # given
+    tool = QuestionAnswerTool()
+    search_queries = ["Standard plan", "Plus plan"]
+
+    # when
+    with patch(
+        "backend.batch.utilities.tools.question_answer_tool.Search.get_source_documents_for_questions"
+    ) as get_source_documents_for_questions_mock:
+        answer = tool.answer_question(
+            "Compare the Standard and Plus plans", [], search_queries=search_queries
+        )
+
+    # then
+    get_source_documents_mock.assert_not_called()
+    get_source_documents_for_questions_mock.assert_called_once_with(
+        search_handler_mock, search_queries
+    )
+    assert (
+        answer.source_documents == get_source_documents_for_questions_mock.return_value
+    )
+
+
 def test_answer_question_returns_answer():
     # given
     tool = QuestionAnswerTool()
@@ -425,3 +451,76 @@ def test_limit_number_of_images_passed_to_llm(
         model="mock vision model",
         temperature=0,
     )
+
+
+def test_stream_answer_question_yields_source_documents_before_answer(
+    llm_helper_mock: MagicMock, get_source_documents_mock: MagicMock
+):
+    # given
+    chunks = []
+    for content in ["mock", " content", None]:
+        chunk = MagicMock()
+        chunk.usage = None
+        chunk.choices[0].delta.content = content
+        chunks.append(chunk)
+    usage_chunk = MagicMock()
+    usage_chunk.choices = []
+    usage_chunk.usage.prompt_tokens = 100
+    usage_chunk.usage.completion_tokens = 50
+    chunks.append(usage_chunk)
+    llm_helper_mock.get_chat_completion.return_value = iter(chunks)
+    tool = QuestionAnswerTool()
+
+    # when
+    stream = tool.stream_answer_question("mock question", [])
+    first = next(stream)
+
+    # then
+    assert first.answer == ""
+    assert first.source_documents == get_source_documents_mock.return_value
+    llm_helper_mock.get_chat_completion.assert_not_called()
+
+    # when
+    answers = [answer.answer for answer in stream]
+
+    # then
+    assert answers == ["mock", "mock content"]
+    assert first.answer == "mock content"
+    assert first.prompt_tokens == 100
+    assert first.completion_tokens == 50
+    assert llm_helper_mock.get_chat_completion.call_args.kwargs["stream"] is True
+
+
+@patch("backend.batch.utilities.tools.question_answer_tool.ContextPacker")
+def test_packs_context_into_token_budget(
+    context_packer_mock: MagicMock,
+    env_helper_mock: MagicMock,
+    llm_helper_mock: MagicMock,
+    get_source_documents_mock: MagicMock,
+):
+    # given
+    env_helper_mock.AZURE_OPENAI_CONTEXT_TOKEN_BUDGET = 1000
+    chat_history = [
+        {"role": "user", "content": "old question"},
+        {"role": "assistant", "content": "old answer"},
+    ]
+    packed_sources = get_source_documents_mock.return_value[:1]
+    context_packer_mock.return_value.pack.return_value = ([], packed_sources)
+    tool = QuestionAnswerTool()
+
+    # when
+    answer = tool.answer_question("mock question", chat_history)
+
+    # then
+    context_packer_mock.assert_called_once_with(1000)
+    fixed_messages, history, sources = (
+        context_packer_mock.return_value.pack.call_args.args
+    )
+    assert history == chat_history
+    assert sources == get_source_documents_mock.return_value
+    assert fixed_messages[-1]["content"][0]["text"] == (
+        'Sources: {"retrieved_documents":[]}, Question: mock question'
+    )
+    assert answer.source_documents == packed_sources
+    messages = llm_helper_mock.get_chat_completion.call_args.args[0]
+    assert all(message["content"] != "old question" for message in messages)